@@ -0,0 +1,103 @@
+"""Python client for the QuGate payment routing contract."""
+
+from .aio import AsyncQuGateClient
+from .allocator import GateIdPredictor
+from .balances import BalanceService, Snapshot
+from .bulk import GateDirectory
+from .cache import QueryCache
+from .client import CircuitOpenError, QuGateClient, RpcError
+from .clock import TickClock
+from .crawl import GateTable, SlotCrawler
+from .events import EventIndex, decode_events, read_entries
+from .exporter import MetricsExporter
+from .gateid import encode_gate_id, gate_generation, gate_slot
+from .inclusion import InclusionTracker
+from .payloads import (
+    build_cancel_time_lock,
+    build_close_gate,
+    build_configure_heartbeat,
+    build_configure_multisig,
+    build_configure_time_lock,
+    build_create_gate,
+    build_fund_gate,
+    build_heartbeat,
+    build_send_to_gate,
+    build_send_to_gate_verified,
+    build_set_admin_gate,
+    build_set_chain,
+    build_update_gate,
+    build_withdraw_reserve,
+)
+from .keys import identity_from_seed, is_valid_identity, public_key_from_identity
+from .maintenance import MaintenanceForecaster
+from .node import LocalNode
+from .resilience import Backoff, CircuitBreaker, RpcMetrics
+from .replica import StateReplica
+from .routing import RoutingGraph
+from .scheduler import TxScheduler
+from .simulator import ContractSimulator
+from .top import FleetView
+from .tracing import Tracer
+from .tx import (
+    Broadcaster,
+    TxHandle,
+    build_contract_transaction,
+    contract_public_key,
+    transaction_hash,
+)
+
+__all__ = [
+    'AsyncQuGateClient',
+    'Backoff',
+    'BalanceService',
+    'Broadcaster',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'ContractSimulator',
+    'EventIndex',
+    'FleetView',
+    'GateDirectory',
+    'GateIdPredictor',
+    'GateTable',
+    'InclusionTracker',
+    'LocalNode',
+    'MaintenanceForecaster',
+    'MetricsExporter',
+    'QuGateClient',
+    'QueryCache',
+    'RoutingGraph',
+    'RpcError',
+    'RpcMetrics',
+    'SlotCrawler',
+    'Snapshot',
+    'StateReplica',
+    'TickClock',
+    'Tracer',
+    'TxHandle',
+    'TxScheduler',
+    'build_cancel_time_lock',
+    'build_close_gate',
+    'build_configure_heartbeat',
+    'build_configure_multisig',
+    'build_configure_time_lock',
+    'build_contract_transaction',
+    'build_create_gate',
+    'build_fund_gate',
+    'build_heartbeat',
+    'build_send_to_gate',
+    'build_send_to_gate_verified',
+    'build_set_admin_gate',
+    'build_set_chain',
+    'build_update_gate',
+    'build_withdraw_reserve',
+    'contract_public_key',
+    'decode_events',
+    'encode_gate_id',
+    'gate_generation',
+    'gate_slot',
+    'identity_from_seed',
+    'is_valid_identity',
+    'public_key_from_identity',
+    'read_entries',
+    'transaction_hash',
+]
@@ -0,0 +1,30 @@
+"""Command-line entry point: ``python -m qugate top|export|node``."""
+from __future__ import annotations
+
+import sys
+
+COMMANDS = {
+    'top': 'Live per-gate throughput and balances.',
+    'export': 'Serve contract and client metrics in Prometheus text format.',
+    'node': 'Serve a local stand-in node backed by the contract simulator.',
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print('usage: python -m qugate <command> [options]\n\ncommands:')
+        for name, summary in COMMANDS.items():
+            print(f"  {name:<8}{summary}")
+        return 2
+    if argv[0] == 'export':
+        from .exporter import main as command
+    elif argv[0] == 'node':
+        from .node import main as command
+    else:
+        from .top import main as command
+    return command(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
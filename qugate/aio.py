@@ -0,0 +1,355 @@
+"""
+asyncio RPC client for the QuGate contract.
+
+Speaks HTTP/1.1 directly over ``asyncio`` streams (no third-party HTTP
+library) and keeps a small pool of keep-alive connections. A semaphore caps
+the number of requests in flight, so callers can ``asyncio.gather`` hundreds
+of reads and have them overlap without flooding the node:
+
+    async with AsyncQuGateClient(concurrency=16) as client:
+        gates = await asyncio.gather(*(client.get_gate(g) for g in gate_ids))
+
+Every call takes an optional ``deadline`` (seconds, covering retries);
+cancelling the awaiting task closes the connection it was using.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from . import bulk, structs
+from .client import CircuitOpenError, RpcError
+from .constants import (
+    DEFAULT_RPC,
+    FUNC_GET_ADMIN_GATE,
+    FUNC_GET_FEES,
+    FUNC_GET_GATE,
+    FUNC_GET_GATE_BATCH,
+    FUNC_GET_GATE_BY_SLOT,
+    FUNC_GET_GATE_COUNT,
+    FUNC_GET_GATES_BY_MODE,
+    FUNC_GET_GATES_BY_OWNER,
+    FUNC_GET_HEARTBEAT,
+    FUNC_GET_LATEST_EXECUTION,
+    FUNC_GET_MULTISIG_STATE,
+    FUNC_GET_TIME_LOCK_STATE,
+    MAX_BATCH_GATES,
+    QUGATE_INDEX,
+)
+from .resilience import Backoff, CircuitBreaker, RpcMetrics
+from .tracing import function_name, span
+
+
+class _HttpError(Exception):
+    """Non-2xx status or malformed HTTP response (retried like a network error)."""
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    def close(self):
+        self.reusable = False
+        self.writer.close()
+
+    async def request(self, method, host, path, body=None):
+        head = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive",
+                "Accept: application/json"]
+        if body is not None:
+            head += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise _HttpError(f"bad status line {status_line!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            payload = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                payload += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+        elif 'content-length' in headers:
+            payload = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            payload = await self.reader.read()
+            self.reusable = False
+        if headers.get('connection', '').lower() == 'close':
+            self.reusable = False
+        if not 200 <= status < 300:
+            raise _HttpError(f"HTTP {status}")
+        return bytes(payload)
+
+
+class AsyncQuGateClient:
+    """asyncio counterpart of :class:`~qugate.client.QuGateClient`.
+
+    ``concurrency`` bounds requests in flight (and pooled connections),
+    ``timeout`` bounds each attempt and ``deadline`` (per call) bounds the
+    whole call including retries. Failures raise ``RpcError``.
+    """
+
+    def __init__(self, rpc=DEFAULT_RPC, contract_index=QUGATE_INDEX, timeout=5.0,
+                 retries=4, retry_delay=0.5, concurrency=16, breaker=None, metrics=None,
+                 tracer=None):
+        url = urlsplit(rpc.rstrip('/'))
+        self.rpc = rpc.rstrip('/')
+        self.contract_index = contract_index
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.backoff = Backoff(base=retry_delay)
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self.metrics = RpcMetrics() if metrics is None else metrics
+        self.tracer = tracer
+        self.concurrency = concurrency
+        self._host = url.hostname or '127.0.0.1'
+        self._port = url.port or (443 if url.scheme == 'https' else 80)
+        self._host_header = url.netloc
+        self._prefix = url.path
+        self._ssl = ssl.create_default_context() if url.scheme == 'https' else None
+        self._limit = None
+        self._idle = []
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # =============================================
+    # Transport
+    # =============================================
+
+    async def _acquire(self):
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.reusable and not conn.reader.at_eof():
+                return conn
+            conn.close()
+        reader, writer = await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+        return _Connection(reader, writer)
+
+    async def _attempt(self, method, path, body):
+        conn = await self._acquire()
+        try:
+            payload = await conn.request(method, self._host_header, self._prefix + path, body)
+        except BaseException:
+            conn.close()      # unknown protocol state (error, timeout or cancellation)
+            raise
+        if conn.reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        return json.loads(payload)
+
+    async def health(self):
+        """Probe ``/live/v1/tick-info`` once, bypassing retries and the breaker."""
+        start = time.monotonic()
+        try:
+            payload = await asyncio.wait_for(self._attempt('GET', '/live/v1/tick-info', None),
+                                             self.timeout)
+            healthy = 'tick' in payload
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                _HttpError, ValueError, TypeError):
+            healthy = False
+        self.metrics.observe('/live/v1/tick-info', time.monotonic() - start, healthy)
+        return healthy
+
+    async def _admit(self, method, path):
+        """Fail fast while the breaker is open; probe the node once it has cooled down."""
+        if not self.breaker.is_open:
+            return
+        if self.breaker.due_for_probe():
+            self.breaker.probed(await self.health())
+        if self.breaker.is_open:
+            self.metrics.reject(path)
+            raise CircuitOpenError(f"{method} {path}: node unavailable (circuit open)")
+
+    async def _request(self, method, path, json_body=None, deadline=None):
+        """One RPC call with retries, bounded by ``timeout`` per attempt and *deadline* overall."""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        body = None if json_body is None else json.dumps(json_body).encode()
+        loop = asyncio.get_running_loop()
+        end = None if deadline is None else loop.time() + deadline
+        for attempt in range(self.retries + 1):
+            await self._admit(method, path)
+            budget = self.timeout if end is None else min(self.timeout, end - loop.time())
+            start = time.monotonic()
+            try:
+                if budget <= 0:
+                    raise asyncio.TimeoutError()
+                async with self._limit:
+                    payload = await asyncio.wait_for(self._attempt(method, path, body), budget)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    _HttpError, ValueError) as exc:
+                self.metrics.observe(path, time.monotonic() - start, ok=False)
+                self.breaker.record_failure()
+                delay = self.backoff.delay(attempt)
+                remaining = None if end is None else end - loop.time()
+                if (attempt == self.retries or self.breaker.is_open
+                        or (remaining is not None and remaining <= delay)):
+                    reason = exc.__class__.__name__ if isinstance(exc, asyncio.TimeoutError) else exc
+                    raise RpcError(f"{method} {path} failed after {attempt + 1} attempts: {reason}") from exc
+                self.metrics.retry(path)
+                await asyncio.sleep(delay)
+            else:
+                self.metrics.observe(path, time.monotonic() - start)
+                self.breaker.record_success()
+                return payload
+
+    async def tick_info(self, deadline=None):
+        """Raw ``/live/v1/tick-info`` payload (tick, epoch, ...)."""
+        return await self._request('GET', '/live/v1/tick-info', deadline=deadline)
+
+    async def get_tick(self, deadline=None):
+        return (await self.tick_info(deadline))['tick']
+
+    async def tick_data(self, tick, deadline=None):
+        """``tickData`` of a processed *tick* from ``/query/v1/getTickData`` (None if empty)."""
+        payload = await self._request('POST', '/query/v1/getTickData', {'tickNumber': tick},
+                                      deadline=deadline)
+        return payload.get('tickData')
+
+    async def balance(self, identity, deadline=None):
+        """Raw ``/live/v1/balances/{identity}`` payload."""
+        with span(self.tracer, 'balance', 'balances'):
+            return await self._request('GET', f'/live/v1/balances/{identity}', deadline=deadline)
+
+    async def get_balance(self, identity, deadline=None):
+        """Spendable balance of *identity* in QU."""
+        payload = await self.balance(identity, deadline)
+        try:
+            return int(payload['balance']['balance'])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RpcError(f"bad balance response for {identity}") from exc
+
+    async def query(self, input_type, data=b'', deadline=None):
+        """Run contract function *input_type* with raw input *data*; returns raw output bytes."""
+        with span(self.tracer, 'query', function_name(input_type)):
+            payload = await self._request('POST', '/live/v1/querySmartContract', {
+                'contractIndex': self.contract_index,
+                'inputType': input_type,
+                'inputSize': len(data),
+                'requestData': base64.b64encode(data).decode(),
+            }, deadline)
+        try:
+            return base64.b64decode(payload.get('responseData') or '')
+        except (AttributeError, ValueError) as exc:
+            raise RpcError(f"bad querySmartContract response for inputType {input_type}") from exc
+
+    # =============================================
+    # Typed functions (one per registered function id)
+    # =============================================
+
+    async def get_gate(self, gate_id, deadline=None):
+        """getGate (5). Invalid IDs decode as an all-zero gate with ``active == 0``."""
+        out = await self.query(FUNC_GET_GATE, structs.GATE_ID_INPUT.encode(gateId=gate_id), deadline)
+        return structs.GET_GATE_OUTPUT.decode(out)
+
+    async def get_gate_count(self, deadline=None):
+        """getGateCount (6)."""
+        return structs.GET_GATE_COUNT_OUTPUT.decode(await self.query(FUNC_GET_GATE_COUNT,
+                                                                     deadline=deadline))
+
+    async def get_gates_by_owner(self, owner_pk, deadline=None):
+        """getGatesByOwner (7); returns the list of gate IDs."""
+        out = await self.query(FUNC_GET_GATES_BY_OWNER,
+                               structs.GET_GATES_BY_OWNER_INPUT.encode(owner=owner_pk), deadline)
+        result = structs.GET_GATES_BY_OWNER_OUTPUT.decode(out)
+        return result['gateIds'][:result['count']]
+
+    async def get_gate_batch(self, gate_ids, deadline=None):
+        """getGateBatch (8) for up to 32 IDs; returns one decoded gate per requested ID."""
+        gate_ids = list(gate_ids)
+        if len(gate_ids) > MAX_BATCH_GATES:
+            raise ValueError(f"getGateBatch takes at most {MAX_BATCH_GATES} gate IDs")
+        out = await self.query(FUNC_GET_GATE_BATCH,
+                               structs.GET_GATE_BATCH_INPUT.encode(gateIds=gate_ids), deadline)
+        return structs.GET_GATE_OUTPUT.decode_many(out, len(gate_ids))
+
+    async def get_gates(self, gate_ids, deadline=None):
+        """Any number of gates via concurrent 32-ID getGateBatch calls.
+
+        Returns ``{gate_id: gate}`` in first-seen order, with ``None`` for IDs
+        the contract reports missing (see :mod:`qugate.bulk`).
+        """
+        chunks = bulk.batches(gate_ids)
+        replies = await asyncio.gather(*(self.get_gate_batch(c, deadline) for c in chunks))
+        return bulk.collect(chunks, replies)
+
+    async def get_fees(self, deadline=None):
+        """getFees (9)."""
+        return structs.GET_FEES_OUTPUT.decode(await self.query(FUNC_GET_FEES, deadline=deadline))
+
+    async def get_heartbeat(self, gate_id, deadline=None):
+        """getHeartbeat (15)."""
+        out = await self.query(FUNC_GET_HEARTBEAT, structs.GATE_ID_INPUT.encode(gateId=gate_id),
+                               deadline)
+        return structs.GET_HEARTBEAT_OUTPUT.decode(out)
+
+    async def get_multisig_state(self, gate_id, deadline=None):
+        """getMultisigState (17)."""
+        out = await self.query(FUNC_GET_MULTISIG_STATE,
+                               structs.GATE_ID_INPUT.encode(gateId=gate_id), deadline)
+        return structs.GET_MULTISIG_STATE_OUTPUT.decode(out)
+
+    async def get_time_lock_state(self, gate_id, deadline=None):
+        """getTimeLockState (20)."""
+        out = await self.query(FUNC_GET_TIME_LOCK_STATE,
+                               structs.GATE_ID_INPUT.encode(gateId=gate_id), deadline)
+        return structs.GET_TIME_LOCK_STATE_OUTPUT.decode(out)
+
+    async def get_admin_gate(self, gate_id, deadline=None):
+        """getAdminGate (22)."""
+        out = await self.query(FUNC_GET_ADMIN_GATE, structs.GATE_ID_INPUT.encode(gateId=gate_id),
+                               deadline)
+        return structs.GET_ADMIN_GATE_OUTPUT.decode(out)
+
+    async def get_gates_by_mode(self, mode, deadline=None):
+        """getGatesByMode (24); returns the list of gate IDs."""
+        out = await self.query(FUNC_GET_GATES_BY_MODE,
+                               structs.GET_GATES_BY_MODE_INPUT.encode(mode=mode), deadline)
+        result = structs.GET_GATES_BY_MODE_OUTPUT.decode(out)
+        return result['gateIds'][:result['count']]
+
+    async def get_gate_by_slot(self, slot_index, deadline=None):
+        """getGateBySlot (25)."""
+        out = await self.query(FUNC_GET_GATE_BY_SLOT,
+                               structs.GET_GATE_BY_SLOT_INPUT.encode(slotIndex=slot_index), deadline)
+        return structs.GET_GATE_BY_SLOT_OUTPUT.decode(out)
+
+    async def get_latest_execution(self, gate_id, deadline=None):
+        """getLatestExecution (26)."""
+        out = await self.query(FUNC_GET_LATEST_EXECUTION,
+                               structs.GATE_ID_INPUT.encode(gateId=gate_id), deadline)
+        return structs.GET_LATEST_EXECUTION_OUTPUT.decode(out)
@@ -0,0 +1,136 @@
+"""
+Client-side mirror of the contract's slot allocator, for predicting gate IDs.
+
+createGate takes the slot on top of ``_freeSlots`` (LIFO) or, when the
+free-list is empty, slot ``_gateCount``, and the new gate's ID is
+``((_gateGenerations[slot] + 1) << 20) | slot``. Closing or expiring a gate
+pushes its slot back and bumps the slot's generation. :class:`GateIdPredictor`
+replays those rules locally, so the ID a pending createGate will receive is
+known before it lands and follow-up sendToGate/setChain calls can go into the
+same pipeline:
+
+    predictor = GateIdPredictor.from_client(client)
+    gate_id = predictor.allocate()                 # ID of the next createGate
+    create = scheduler.add(seed, PROC_CREATE_GATE, 1000, build_create_gate(...))
+    scheduler.add(seed, PROC_SEND_TO_GATE, 5000, build_send_to_gate(gate_id), after=create)
+
+A ``getGateBySlot`` crawl recovers the generations and *which* slots are
+free, but not the order they were pushed in; neither is the order of several
+closes landing in the same tick. Such slots form an unordered group:
+:attr:`GateIdPredictor.certain` is False while the next allocation would come
+from a group with more than one slot, and :meth:`GateIdPredictor.candidates`
+lists the IDs it may receive.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .gateid import encode_gate_id, gate_generation, gate_slot
+
+GENERATION_MASK = 0xFFFF   # _gateGenerations is Array<uint16>
+
+
+class GateIdPredictor:
+    """Mirrors ``_gateCount``, ``_freeSlots`` and ``_gateGenerations``.
+
+    *free_slots* is given in push order (the last one is allocated first); if
+    it holds more than one slot, their order is treated as unknown.
+    """
+
+    def __init__(self, gate_count=0, generations=None, free_slots=()):
+        self.gate_count = gate_count
+        self.generations = dict(generations or {})
+        self._free = []
+        self._groups = []
+        self._next_group = 0
+        self._push(free_slots)
+
+    @classmethod
+    def from_slots(cls, slots):
+        """Build from ``getGateBySlot`` outputs for slots 0, 1, ... (stops at ``valid == 0``)."""
+        generations = {}
+        free = []
+        count = 0
+        for slot, out in enumerate(slots):
+            if not out['valid']:
+                break
+            count = slot + 1
+            generations[slot] = out['generation']
+            if not out['active']:
+                free.append(slot)
+        return cls(count, generations, free)
+
+    @classmethod
+    def from_client(cls, client, workers=None):
+        """Crawl every slot below ``totalGates`` with concurrent getGateBySlot calls."""
+        total = client.get_gate_count()['totalGates']
+        if total == 0:
+            return cls()
+        with ThreadPoolExecutor(max_workers=min(total, workers or client.pool_size)) as pool:
+            return cls.from_slots(pool.map(client.get_gate_by_slot, range(total)))
+
+    def _push(self, slots):
+        group = self._next_group
+        self._next_group += 1
+        for slot in slots:
+            self._free.append(slot)
+            self._groups.append(group)
+
+    def _id(self, slot):
+        return encode_gate_id(slot, self.generations.get(slot, 0))
+
+    @property
+    def free_count(self):
+        return len(self._free)
+
+    @property
+    def certain(self):
+        """True if :meth:`next_id` is exact rather than one of several :meth:`candidates`."""
+        return not self._groups or self._groups.count(self._groups[-1]) == 1
+
+    def next_id(self):
+        """ID the next createGate will receive (the best guess if not :attr:`certain`)."""
+        return self._id(self._free[-1] if self._free else self.gate_count)
+
+    def candidates(self):
+        """Every ID the next createGate may receive."""
+        if not self._free:
+            return [self._id(self.gate_count)]
+        top = self._groups[-1]
+        return [self._id(slot) for slot, group in zip(self._free, self._groups) if group == top]
+
+    def allocate(self):
+        """Record a createGate that will succeed; returns its (predicted) gate ID."""
+        if self._free:
+            self._groups.pop()
+            return self._id(self._free.pop())
+        self.gate_count += 1
+        return self._id(self.gate_count - 1)
+
+    def confirm(self, predicted, actual):
+        """Correct a guess from an unordered group once the gate is read back as *actual*."""
+        if predicted == actual:
+            return
+        index = self._free.index(gate_slot(actual))
+        self._free[index] = gate_slot(predicted)
+
+    def cancel(self, gate_id):
+        """Undo the most recent :meth:`allocate`, as the contract does when a create fails late."""
+        slot = gate_slot(gate_id)
+        if slot < self.gate_count - 1:
+            self._push([slot])
+        else:
+            self.gate_count -= 1
+
+    def release(self, *gate_ids):
+        """Record closes/expiries of live gates; several IDs are taken to land in one tick."""
+        for gate_id in gate_ids:
+            slot = gate_slot(gate_id)
+            if slot >= self.gate_count or gate_generation(gate_id) != self.generations.get(slot, 0):
+                raise ValueError(f"gate {gate_id} is not a live gate")
+            if slot in self._free:
+                raise ValueError(f"gate {gate_id} is already released")
+        for gate_id in gate_ids:
+            slot = gate_slot(gate_id)
+            self.generations[slot] = (self.generations.get(slot, 0) + 1) & GENERATION_MASK
+        self._push(gate_slot(g) for g in gate_ids)
@@ -0,0 +1,95 @@
+"""
+Tick-scoped, batched balance reads over ``/live/v1/balances/{identity}``.
+
+A balance cannot change within a tick, so :class:`BalanceService` caches
+each identity's balance against the tick it was read at and only refetches
+once the network has moved on. Uncached identities are fetched concurrently
+over the client's pooled session:
+
+    balances = BalanceService(client)
+    before = balances.snapshot([ADDR_B, ADDR_C])
+    ...send, wait...
+    after = balances.snapshot([ADDR_B, ADDR_C])
+    balances.diff(before, after)      # {ADDR_B: +600, ADDR_C: +400}
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Snapshot(dict):
+    """``{identity: balance}`` read at one tick (``.tick``)."""
+
+    def __init__(self, balances, tick):
+        super().__init__(balances)
+        self.tick = tick
+
+    def __repr__(self):
+        return f'Snapshot(tick={self.tick}, {dict.__repr__(self)})'
+
+
+class BalanceService:
+    """Per-tick balance cache in front of a :class:`~qugate.client.QuGateClient`."""
+
+    def __init__(self, client, workers=None):
+        self.client = client
+        self.workers = workers or getattr(client, 'pool_size', 8)
+        self._tick = None
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._tick = None
+            self._cache.clear()
+
+    def _scope(self, tick):
+        """Drop the cache if *tick* (default: the current tick) is a new tick."""
+        if tick is None:
+            tick = self.client.get_tick()
+        with self._lock:
+            if tick != self._tick:
+                self._tick = tick
+                self._cache.clear()
+        return tick
+
+    def get_many(self, identities, tick=None):
+        """``{identity: balance}`` for *identities*, fetching only what this tick has not seen.
+
+        *tick* skips the tick-info lookup when the caller already knows it.
+        """
+        identities = list(dict.fromkeys(identities))
+        tick = self._scope(tick)
+        with self._lock:
+            wanted = [i for i in identities if i not in self._cache]
+        self.hits += len(identities) - len(wanted)
+        self.misses += len(wanted)
+        if len(wanted) == 1:
+            fetched = [self.client.get_balance(wanted[0])]
+        elif wanted:
+            with ThreadPoolExecutor(max_workers=min(len(wanted), self.workers)) as pool:
+                fetched = list(pool.map(self.client.get_balance, wanted))
+        else:
+            fetched = []
+        with self._lock:
+            if self._tick == tick:
+                self._cache.update(zip(wanted, fetched))
+            known = dict(zip(wanted, fetched))
+            known.update((i, self._cache[i]) for i in identities if i in self._cache)
+        return {i: known[i] for i in identities}
+
+    def get(self, identity, tick=None):
+        return self.get_many([identity], tick)[identity]
+
+    def snapshot(self, identities, tick=None):
+        """Balances of *identities* as a :class:`Snapshot` stamped with the tick read."""
+        tick = self._scope(tick)
+        return Snapshot(self.get_many(identities, tick), tick)
+
+    @staticmethod
+    def diff(before, after):
+        """``{identity: after - before}`` over both snapshots (absent counts as 0)."""
+        return {i: after.get(i, 0) - before.get(i, 0) for i in {**before, **after}}
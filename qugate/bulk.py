@@ -0,0 +1,121 @@
+"""
+Bulk gate reads over getGateBatch (function 8).
+
+getGateBatch returns up to ``MAX_BATCH_GATES`` gates per call and zeroes the
+entry of any ID that is 0, out of range or of a stale generation. Every real
+gate has a non-zero owner (closed gates keep theirs), so a zero owner marks
+an entry as missing. Both clients expose ``get_gates(gate_ids)``: the IDs are
+de-duplicated, split into 32-ID chunks, the chunks are fetched concurrently
+and the result maps each requested ID to its gate dict, or to ``None`` when
+the contract reported it missing.
+
+:class:`GateDirectory` turns that into a read of every live gate. It keeps
+the slot -> gate ID map without crawling getGateBySlot: a new slot's first
+gate has generation 0 and a closed slot's next gate has the next
+generation, so the guessed IDs are confirmed by the same batched read.
+Closed slots are skipped until getGateCount changes:
+
+    directory = GateDirectory(client)
+    live = directory.read(client.get_gate_count())   # {gate_id: gate}
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import MAX_BATCH_GATES
+from .gateid import encode_gate_id, gate_generation, gate_slot
+from .structs import ZERO_ID
+
+
+def batches(gate_ids, size=MAX_BATCH_GATES):
+    """Unique *gate_ids* (first-seen order) split into lists of at most *size*."""
+    unique = list(dict.fromkeys(gate_ids))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def is_missing(gate):
+    """True for the zeroed entry getGateBatch returns for an invalid gate ID."""
+    return gate['owner'] == ZERO_ID
+
+
+def collect(chunks, replies):
+    """``{gate_id: gate or None}`` from each chunk and its decoded getGateBatch reply."""
+    out = {}
+    for chunk, gates in zip(chunks, replies):
+        for gate_id, gate in zip(chunk, gates):
+            out[gate_id] = None if is_missing(gate) else gate
+    return out
+
+
+def missing(result):
+    """Gate IDs of a ``get_gates`` result that the contract reported missing."""
+    return [gate_id for gate_id, gate in result.items() if gate is None]
+
+
+def _next_id(gate_id):
+    """ID the slot of *gate_id* hands out once that gate has closed."""
+    return encode_gate_id(gate_slot(gate_id), gate_generation(gate_id) + 1)
+
+
+class GateDirectory:
+    """Slot -> gate ID map kept current by getGateBatch reads.
+
+    ``gate_ids`` holds the live or last gate ID of every slot and ``closed``
+    the slots without a live gate. A slot falls back to getGateBySlot
+    (counted in ``slot_reads``) only when the live gates found fall short
+    of ``activeGates`` after the guesses, i.e. it was closed and reused more
+    than once between two reads.
+    """
+
+    def __init__(self, client, workers=None):
+        self.client = client
+        self.workers = workers
+        self.gate_ids = []
+        self.closed = set()
+        self.slot_reads = 0
+        self._counts = None
+
+    def _confirm(self, guesses, live):
+        """Batch-read ``{slot: gate_id}``; live ones go into *live*, the rest are closed."""
+        gates = self.client.get_gates(list(guesses.values()), self.workers)
+        for slot, gate_id in guesses.items():
+            gate = gates[gate_id]
+            if gate is not None and gate['active']:
+                self.gate_ids[slot] = gate_id
+                self.closed.discard(slot)
+                live[gate_id] = gate
+            else:
+                self.closed.add(slot)
+
+    def _read_slots(self, slots, live):
+        workers = min(len(slots), self.workers or self.client.pool_size)
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            outs = list(pool.map(self.client.get_gate_by_slot, slots))
+        self.slot_reads += len(slots)
+        for slot, out in zip(slots, outs):
+            self.gate_ids[slot] = out['gateId']
+            if out['active']:
+                self.closed.discard(slot)
+                live[out['gateId']] = out
+
+    def read(self, count):
+        """``{gate_id: gate}`` for every live gate, given a getGateCount output."""
+        total, active = count['totalGates'], count['activeGates']
+        self.gate_ids.extend(encode_gate_id(slot) for slot in range(len(self.gate_ids), total))
+        guesses = {slot: gate_id for slot, gate_id in enumerate(self.gate_ids)
+                   if slot not in self.closed}
+        if (total, active) != self._counts:
+            # a gate was created or closed somewhere: closed slots may be live again
+            self._counts = (total, active)
+            guesses.update((slot, _next_id(self.gate_ids[slot])) for slot in self.closed)
+        live = {}
+        self._confirm(guesses, live)
+        if len(live) < active:
+            # slots found closed in this read may already hold their next gate
+            retry = {slot: _next_id(self.gate_ids[slot]) for slot in sorted(self.closed)
+                     if guesses.get(slot) != _next_id(self.gate_ids[slot])}
+            if retry:
+                self._confirm(retry, live)
+        if len(live) < active:
+            self._read_slots(sorted(self.closed), live)
+        return live
@@ -0,0 +1,79 @@
+"""
+Tick-scoped read-through cache for contract queries.
+
+Contract state only changes when a tick is processed, so two identical
+``querySmartContract`` calls made during the same tick must return the same
+bytes. :class:`QueryCache` keys raw replies by ``(inputType, requestData)``
+and drops them all as soon as the :class:`~qugate.clock.TickClock` reports a
+new tick. Attach it to a client and every typed getter goes through it:
+
+    client = QuGateClient(RPC)
+    clock = TickClock(client)
+    client.cache = QueryCache(clock)
+    client.get_gate(gid); client.get_gate(gid)      # one RPC call
+
+A gate's ``mode``, ``owner`` and ``createdEpoch`` are fixed at creation and a
+reused slot gets a new versioned ID, so those fields are kept per gate ID for
+the life of the cache (:meth:`QueryCache.gate_constants`).
+"""
+from __future__ import annotations
+
+import threading
+
+from .bulk import is_missing
+
+GATE_CONSTANTS = ('mode', 'owner', 'createdEpoch')
+
+
+class QueryCache:
+    """``(inputType, requestData) -> reply`` for the current tick, plus per-gate constants.
+
+    The tick is read through ``clock.current(max_age)``, so a reply may be
+    served for up to *max_age* seconds (default: the clock's ``min_poll``)
+    after the network has moved on.
+    """
+
+    def __init__(self, clock, max_age=None):
+        self.clock = clock
+        self.max_age = max_age
+        self._tick = None
+        self._replies = {}
+        self._constants = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Forget the cached replies (gate constants stay valid)."""
+        with self._lock:
+            self._tick = None
+            self._replies.clear()
+
+    def get(self, input_type, data, fetch):
+        """Cached reply for this tick, or ``fetch()`` stored under the tick it was read at."""
+        tick = self.clock.current(self.max_age)
+        key = (input_type, bytes(data))
+        with self._lock:
+            if tick != self._tick:
+                self._tick = tick
+                self._replies.clear()
+            if key in self._replies:
+                self.hits += 1
+                return self._replies[key]
+            self.misses += 1
+        reply = fetch()
+        with self._lock:
+            if self._tick == tick:
+                self._replies[key] = reply
+        return reply
+
+    def remember(self, gate_id, gate):
+        """Record the constant fields of a decoded gate (ignored for missing gates)."""
+        if gate is not None and not is_missing(gate):
+            with self._lock:
+                self._constants.setdefault(gate_id, {f: gate[f] for f in GATE_CONSTANTS})
+
+    def gate_constants(self, gate_id):
+        """``{mode, owner, createdEpoch}`` seen for *gate_id*, or None."""
+        with self._lock:
+            return self._constants.get(gate_id)
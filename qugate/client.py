@@ -0,0 +1,273 @@
+"""
+Blocking RPC client for the QuGate contract.
+
+One ``requests.Session`` is shared by every call so queries reuse pooled
+keep-alive connections to the node's HTTP RPC instead of opening a new TCP
+connection per request. Failed attempts are retried with jittered
+exponential backoff behind a circuit breaker, and every attempt is recorded in
+``client.metrics`` (see :mod:`qugate.resilience`). An optional :class:`~qugate.cache.QueryCache`
+(``client.cache``) answers repeated queries within a tick without a request, and
+an optional :class:`~qugate.tracing.Tracer` (``client.tracer``) times every
+query and balance read.
+"""
+from __future__ import annotations
+
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import bulk, structs
+from .cache import GATE_CONSTANTS
+from .resilience import Backoff, CircuitBreaker, RpcMetrics
+from .tracing import function_name, span
+from .constants import (
+    DEFAULT_RPC,
+    FUNC_GET_ADMIN_GATE,
+    FUNC_GET_FEES,
+    FUNC_GET_GATE,
+    FUNC_GET_GATE_BATCH,
+    FUNC_GET_GATE_BY_SLOT,
+    FUNC_GET_GATE_COUNT,
+    FUNC_GET_GATES_BY_MODE,
+    FUNC_GET_GATES_BY_OWNER,
+    FUNC_GET_HEARTBEAT,
+    FUNC_GET_LATEST_EXECUTION,
+    FUNC_GET_MULTISIG_STATE,
+    FUNC_GET_TIME_LOCK_STATE,
+    MAX_BATCH_GATES,
+    QUGATE_INDEX,
+)
+
+
+class RpcError(Exception):
+    """Raised when the node cannot be reached or returns an unusable response."""
+
+
+class CircuitOpenError(RpcError):
+    """Raised without contacting the node while the circuit breaker is open."""
+
+
+class QuGateClient:
+    """Typed access to every registered QuGate function over one pooled session."""
+
+    def __init__(self, rpc=DEFAULT_RPC, contract_index=QUGATE_INDEX, timeout=5.0,
+                 retries=4, retry_delay=0.5, pool_size=16, session=None, cache=None,
+                 breaker=None, metrics=None, tracer=None):
+        self.rpc = rpc.rstrip('/')
+        self.contract_index = contract_index
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.backoff = Backoff(base=retry_delay)
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self.metrics = RpcMetrics() if metrics is None else metrics
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.pool_size = pool_size
+        self.cache = cache
+        self.tracer = tracer
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # =============================================
+    # Transport
+    # =============================================
+
+    def health(self):
+        """Probe ``/live/v1/tick-info`` once, bypassing retries and the breaker."""
+        start = time.monotonic()
+        try:
+            resp = self.session.request('GET', f"{self.rpc}/live/v1/tick-info",
+                                        timeout=self.timeout)
+            resp.raise_for_status()
+            healthy = 'tick' in resp.json()
+        except (requests.RequestException, ValueError, TypeError):
+            healthy = False
+        self.metrics.observe('/live/v1/tick-info', time.monotonic() - start, healthy)
+        return healthy
+
+    def _admit(self, method, path):
+        """Fail fast while the breaker is open; probe the node once it has cooled down."""
+        if not self.breaker.is_open:
+            return
+        if self.breaker.due_for_probe():
+            self.breaker.probed(self.health())
+        if self.breaker.is_open:
+            self.metrics.reject(path)
+            raise CircuitOpenError(f"{method} {path}: node unavailable (circuit open)")
+
+    def _request(self, method, path, **kwargs):
+        """Send one RPC request, retrying up to ``retries`` times; returns decoded JSON."""
+        url = f"{self.rpc}{path}"
+        for attempt in range(self.retries + 1):
+            self._admit(method, path)
+            start = time.monotonic()
+            try:
+                resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                resp.raise_for_status()
+                payload = resp.json()
+            except (requests.RequestException, ValueError) as exc:
+                self.metrics.observe(path, time.monotonic() - start, ok=False)
+                self.breaker.record_failure()
+                if attempt == self.retries or self.breaker.is_open:
+                    raise RpcError(f"{method} {path} failed after {attempt + 1} attempts: {exc}") from exc
+                self.metrics.retry(path)
+                time.sleep(self.backoff.delay(attempt))
+            else:
+                self.metrics.observe(path, time.monotonic() - start)
+                self.breaker.record_success()
+                return payload
+
+    def tick_info(self):
+        """Raw ``/live/v1/tick-info`` payload (tick, epoch, ...)."""
+        return self._request('GET', '/live/v1/tick-info')
+
+    def get_tick(self):
+        return self.tick_info()['tick']
+
+    def tick_data(self, tick):
+        """``tickData`` of a processed *tick* from ``/query/v1/getTickData`` (None if empty)."""
+        payload = self._request('POST', '/query/v1/getTickData', json={'tickNumber': tick})
+        return payload.get('tickData')
+
+    def balance(self, identity):
+        """Raw ``/live/v1/balances/{identity}`` payload."""
+        with span(self.tracer, 'balance', 'balances'):
+            return self._request('GET', f'/live/v1/balances/{identity}')
+
+    def get_balance(self, identity):
+        """Spendable balance of *identity* in QU."""
+        payload = self.balance(identity)
+        try:
+            return int(payload['balance']['balance'])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RpcError(f"bad balance response for {identity}") from exc
+
+    def query(self, input_type, data=b''):
+        """Run contract function *input_type* with raw input *data*; returns raw output bytes."""
+        if self.cache is not None:
+            return self.cache.get(input_type, data, lambda: self._query(input_type, data))
+        return self._query(input_type, data)
+
+    def _query(self, input_type, data):
+        with span(self.tracer, 'query', function_name(input_type)):
+            payload = self._request('POST', '/live/v1/querySmartContract', json={
+                'contractIndex': self.contract_index,
+                'inputType': input_type,
+                'inputSize': len(data),
+                'requestData': base64.b64encode(data).decode(),
+            })
+        try:
+            return base64.b64decode(payload.get('responseData') or '')
+        except (AttributeError, ValueError) as exc:
+            raise RpcError(f"bad querySmartContract response for inputType {input_type}") from exc
+
+    # =============================================
+    # Typed functions (one per registered function id)
+    # =============================================
+
+    def get_gate(self, gate_id):
+        """getGate (5). Invalid IDs decode as an all-zero gate with ``active == 0``."""
+        out = self.query(FUNC_GET_GATE, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        gate = structs.GET_GATE_OUTPUT.decode(out)
+        if self.cache is not None:
+            self.cache.remember(gate_id, gate)
+        return gate
+
+    def get_gate_constants(self, gate_id):
+        """``{mode, owner, createdEpoch}`` of a gate; only queries the node the first time."""
+        constants = self.cache.gate_constants(gate_id) if self.cache is not None else None
+        if constants is None:
+            gate = self.get_gate(gate_id)
+            constants = {f: gate[f] for f in GATE_CONSTANTS}
+        return constants
+
+    def get_gate_count(self):
+        """getGateCount (6)."""
+        return structs.GET_GATE_COUNT_OUTPUT.decode(self.query(FUNC_GET_GATE_COUNT))
+
+    def get_gates_by_owner(self, owner_pk):
+        """getGatesByOwner (7); returns the list of gate IDs."""
+        out = self.query(FUNC_GET_GATES_BY_OWNER,
+                         structs.GET_GATES_BY_OWNER_INPUT.encode(owner=owner_pk))
+        result = structs.GET_GATES_BY_OWNER_OUTPUT.decode(out)
+        return result['gateIds'][:result['count']]
+
+    def get_gate_batch(self, gate_ids):
+        """getGateBatch (8) for up to 32 IDs; returns one decoded gate per requested ID."""
+        gate_ids = list(gate_ids)
+        if len(gate_ids) > MAX_BATCH_GATES:
+            raise ValueError(f"getGateBatch takes at most {MAX_BATCH_GATES} gate IDs")
+        out = self.query(FUNC_GET_GATE_BATCH, structs.GET_GATE_BATCH_INPUT.encode(gateIds=gate_ids))
+        gates = structs.GET_GATE_OUTPUT.decode_many(out, len(gate_ids))
+        if self.cache is not None:
+            for gate_id, gate in zip(gate_ids, gates):
+                self.cache.remember(gate_id, gate)
+        return gates
+
+    def get_gates(self, gate_ids, workers=None):
+        """Any number of gates via concurrent 32-ID getGateBatch calls.
+
+        Returns ``{gate_id: gate}`` in first-seen order, with ``None`` for IDs
+        the contract reports missing (see :mod:`qugate.bulk`).
+        """
+        chunks = bulk.batches(gate_ids)
+        if len(chunks) <= 1:
+            return bulk.collect(chunks, [self.get_gate_batch(c) for c in chunks])
+        with ThreadPoolExecutor(max_workers=min(len(chunks), workers or self.pool_size)) as pool:
+            return bulk.collect(chunks, list(pool.map(self.get_gate_batch, chunks)))
+
+    def get_fees(self):
+        """getFees (9)."""
+        return structs.GET_FEES_OUTPUT.decode(self.query(FUNC_GET_FEES))
+
+    def get_heartbeat(self, gate_id):
+        """getHeartbeat (15)."""
+        out = self.query(FUNC_GET_HEARTBEAT, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        return structs.GET_HEARTBEAT_OUTPUT.decode(out)
+
+    def get_multisig_state(self, gate_id):
+        """getMultisigState (17)."""
+        out = self.query(FUNC_GET_MULTISIG_STATE, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        return structs.GET_MULTISIG_STATE_OUTPUT.decode(out)
+
+    def get_time_lock_state(self, gate_id):
+        """getTimeLockState (20)."""
+        out = self.query(FUNC_GET_TIME_LOCK_STATE, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        return structs.GET_TIME_LOCK_STATE_OUTPUT.decode(out)
+
+    def get_admin_gate(self, gate_id):
+        """getAdminGate (22)."""
+        out = self.query(FUNC_GET_ADMIN_GATE, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        return structs.GET_ADMIN_GATE_OUTPUT.decode(out)
+
+    def get_gates_by_mode(self, mode):
+        """getGatesByMode (24); returns the list of active gate IDs in *mode*."""
+        out = self.query(FUNC_GET_GATES_BY_MODE, structs.GET_GATES_BY_MODE_INPUT.encode(mode=mode))
+        result = structs.GET_GATES_BY_MODE_OUTPUT.decode(out)
+        return result['gateIds'][:result['count']]
+
+    def get_gate_by_slot(self, slot_index):
+        """getGateBySlot (25)."""
+        out = self.query(FUNC_GET_GATE_BY_SLOT,
+                         structs.GET_GATE_BY_SLOT_INPUT.encode(slotIndex=slot_index))
+        return structs.GET_GATE_BY_SLOT_OUTPUT.decode(out)
+
+    def get_latest_execution(self, gate_id):
+        """getLatestExecution (26)."""
+        out = self.query(FUNC_GET_LATEST_EXECUTION, structs.GATE_ID_INPUT.encode(gateId=gate_id))
+        return structs.GET_LATEST_EXECUTION_OUTPUT.decode(out)
@@ -0,0 +1,170 @@
+"""
+Shared, adaptive tick clock.
+
+Instead of every wait loop sleeping a fixed interval between ``get_tick()``
+calls, one background poller per :class:`TickClock` learns how long a tick
+takes (an exponentially weighted average of observed tick changes) and polls
+again when the earliest pending target tick is predicted to arrive. All
+waiters share that poller and are woken as soon as it observes a new tick,
+so a wait neither oversleeps by a poll interval nor multiplies RPC load
+when many waits run in parallel:
+
+    clock = TickClock(client)
+    clock.wait_ticks(15)                                  # 15 ticks from now
+    clock.wait_for(lambda: client.get_gate(g)['active'] == 0, timeout=120)
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+from .tracing import span
+
+
+class TickClock:
+    """Predicts tick arrival from the observed tick rate and wakes waiters on each new tick.
+
+    ``seconds_per_tick`` is only the starting estimate. Polls happen no more
+    often than ``min_poll`` and no less often than ``max_poll`` seconds while
+    anyone is waiting; the poller thread exits when nobody is. A failed poll,
+    whatever it raised, is counted in ``errors`` (the exception is kept in
+    ``last_error``) and retried after ``max_poll``. Waits are traced
+    as ``wait`` spans by *tracer* (default: the client's).
+    """
+
+    def __init__(self, client, seconds_per_tick=2.0, min_poll=0.25, max_poll=5.0, smoothing=0.3,
+                 tracer=None):
+        self.client = client
+        self.seconds_per_tick = seconds_per_tick
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.smoothing = smoothing
+        self.tracer = getattr(client, 'tracer', None) if tracer is None else tracer
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._tick = None
+        self._seen_at = None
+        self._targets = []
+        self._poller = None
+
+    @property
+    def tick(self):
+        """Last observed tick (None before the first poll)."""
+        return self._tick
+
+    # =============================================
+    # Observation
+    # =============================================
+
+    def _observe(self, tick, now):
+        with self._cond:
+            if tick == self._tick:
+                return
+            if self._tick is not None and tick > self._tick:
+                sample = (now - self._seen_at) / (tick - self._tick)
+                self.seconds_per_tick += self.smoothing * (sample - self.seconds_per_tick)
+            # a lower tick means the node restarted: start over from it
+            self._tick = tick
+            self._seen_at = now
+            self._cond.notify_all()
+
+    def refresh(self):
+        """Poll the node now; returns the current tick (raises ``RpcError``)."""
+        tick = self.client.get_tick()
+        self.polls += 1
+        self._observe(tick, time.monotonic())
+        return tick
+
+    def current(self, max_age=None):
+        """Current tick, reusing the last observation if it is at most *max_age* seconds old."""
+        max_age = self.min_poll if max_age is None else max_age
+        with self._cond:
+            if self._tick is not None and time.monotonic() - self._seen_at <= max_age:
+                return self._tick
+        return self.refresh()
+
+    def predict(self, tick):
+        """``time.monotonic()`` at which *tick* is expected (None before the first poll)."""
+        with self._cond:
+            if self._tick is None:
+                return None
+            return self._seen_at + (tick - self._tick) * self.seconds_per_tick
+
+    # =============================================
+    # Shared poller
+    # =============================================
+
+    def _next_delay(self):
+        if self._tick is None:
+            return 0.0
+        target = min(self._targets)
+        delay = self._seen_at + (target - self._tick) * self.seconds_per_tick - time.monotonic()
+        return min(max(delay, self.min_poll), self.max_poll)
+
+    def _run(self):
+        last_poll = 0.0
+        while True:
+            with self._cond:
+                while True:
+                    if not self._targets:
+                        self._poller = None
+                        return
+                    wake = max(last_poll + self._next_delay(), last_poll + self.min_poll)
+                    remaining = wake - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            last_poll = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as exc:    # a malformed reply must not strand the waiters
+                self.errors += 1
+                self.last_error = exc
+                last_poll += self.max_poll - self.min_poll    # back off while the node is down
+
+    # =============================================
+    # Waiting
+    # =============================================
+
+    def wait_until(self, target, timeout=None):
+        """Block until tick *target* is observed; False if *timeout* seconds pass first."""
+        with span(self.tracer, 'wait', 'tick'):
+            return self._wait_until(target, timeout)
+
+    def _wait_until(self, target, timeout):
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._tick is not None and self._tick >= target:
+                return True
+            self._targets.append(target)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._run, name='qugate-tick-clock',
+                                                daemon=True)
+                self._poller.start()
+            self._cond.notify_all()      # the poller may need to wake earlier for this target
+            try:
+                while self._tick is None or self._tick < target:
+                    remaining = None if end is None else end - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._targets.remove(target)
+
+    def wait_ticks(self, n, timeout=None):
+        """Block until *n* ticks after the current one; False on timeout."""
+        return self.wait_until(self.current() + n, timeout)
+
+    def wait_for(self, predicate, timeout=None, every=1):
+        """Re-check *predicate* every *every* ticks until it is true; False on timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if predicate():
+                return True
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self.wait_until(self.current() + every, remaining)
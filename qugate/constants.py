@@ -0,0 +1,216 @@
+"""Contract constants mirrored from QuGate.h."""
+
+QUGATE_INDEX = 25  # Pulse took index 24
+
+DEFAULT_RPC = "http://127.0.0.1:41841"
+DEFAULT_NODE_IP = "127.0.0.1"
+DEFAULT_NODE_PORT = 31841
+
+MAX_RECIPIENTS = 8
+MAX_RATIO = 10000
+MAX_OWNER_GATES = 32
+MAX_BATCH_GATES = 32
+MAX_CHAIN_DEPTH = 3
+CHAIN_HOP_FEE = 1000
+MAX_GATES = 2048                 # QUGATE_INITIAL_MAX_GATES * X_MULTIPLIER (1)
+FEE_ESCALATION_STEP = 1024       # creation fee steps up per this many active gates
+HEARTBEAT_PING_FEE = 1000
+NUMBER_OF_COMPUTORS = 676        # Qubic core constant; END_TICK pays dividends per computor
+
+# INITIALIZE defaults, changeable later by shareholder vote
+DEFAULT_CREATION_FEE = 100000
+DEFAULT_MIN_SEND = 1000
+DEFAULT_MAINTENANCE_FEE = 25000
+DEFAULT_MAINTENANCE_INTERVAL_EPOCHS = 4
+DEFAULT_MAINTENANCE_GRACE_EPOCHS = 4
+DEFAULT_FEE_BURN_BPS = 5000
+DEFAULT_EXPIRY_EPOCHS = 50
+
+# Versioned gate ID encoding
+GATE_ID_SLOT_BITS = 20
+GATE_ID_SLOT_MASK = (1 << GATE_ID_SLOT_BITS) - 1
+
+# Gate modes
+MODE_SPLIT = 0
+MODE_ROUND_ROBIN = 1
+MODE_THRESHOLD = 2
+MODE_RANDOM = 3
+MODE_CONDITIONAL = 4
+MODE_ORACLE = 5
+MODE_HEARTBEAT = 6
+MODE_MULTISIG = 7
+MODE_TIME_LOCK = 8
+
+MODE_NAMES = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL',
+              'ORACLE', 'HEARTBEAT', 'MULTISIG', 'TIME_LOCK']
+
+# Registered procedures (input types)
+PROC_CREATE_GATE = 1
+PROC_SEND_TO_GATE = 2
+PROC_CLOSE_GATE = 3
+PROC_UPDATE_GATE = 4
+PROC_FUND_GATE = 10
+PROC_SET_CHAIN = 11
+PROC_SEND_TO_GATE_VERIFIED = 12
+PROC_CONFIGURE_HEARTBEAT = 13
+PROC_HEARTBEAT = 14
+PROC_CONFIGURE_MULTISIG = 16
+PROC_CONFIGURE_TIME_LOCK = 18
+PROC_CANCEL_TIME_LOCK = 19
+PROC_SET_ADMIN_GATE = 21
+PROC_WITHDRAW_RESERVE = 23
+
+# Registered functions (input types)
+FUNC_GET_GATE = 5
+FUNC_GET_GATE_COUNT = 6
+FUNC_GET_GATES_BY_OWNER = 7
+FUNC_GET_GATE_BATCH = 8
+FUNC_GET_FEES = 9
+FUNC_GET_HEARTBEAT = 15
+FUNC_GET_MULTISIG_STATE = 17
+FUNC_GET_TIME_LOCK_STATE = 20
+FUNC_GET_ADMIN_GATE = 22
+FUNC_GET_GATES_BY_MODE = 24
+FUNC_GET_GATE_BY_SLOT = 25
+FUNC_GET_LATEST_EXECUTION = 26
+
+# Idle maintenance multipliers (basis points of _idleFee)
+IDLE_BASE_MULTIPLIER_BPS = 10000
+IDLE_MULTI_RECIPIENT_THRESHOLD = 3
+IDLE_MULTI_RECIPIENT_MULTIPLIER_BPS = 15000
+IDLE_MAX_RECIPIENT_MULTIPLIER_BPS = 20000
+IDLE_HEARTBEAT_MULTIPLIER_BPS = 15000
+IDLE_MULTISIG_MULTIPLIER_BPS = 15000
+IDLE_CHAIN_EXTRA_BPS = 5000
+IDLE_SHIELD_PER_TARGET_BPS = 5000
+
+# Time-lock modes
+TIME_LOCK_ABSOLUTE_EPOCH = 0
+TIME_LOCK_RELATIVE_EPOCHS = 1
+
+# Governance policies
+GOVERNANCE_STRICT_ADMIN = 0
+GOVERNANCE_OWNER_OR_ADMIN = 1
+
+# Latest execution outcomes
+EXEC_NONE = 0
+EXEC_FORWARDED = 1
+EXEC_HELD = 2
+EXEC_REFUNDED = 3
+EXEC_BURNED = 4
+EXEC_REJECTED = 5
+
+# Log record types (QuGateLogger._type)
+LOG_GATE_CREATED = 1
+LOG_GATE_CLOSED = 2
+LOG_GATE_UPDATED = 3
+LOG_PAYMENT_FORWARDED = 4
+LOG_PAYMENT_BOUNCED = 5
+LOG_DUST_BURNED = 6
+LOG_FEE_CHANGED = 7
+LOG_GATE_EXPIRED = 8
+LOG_ORACLE_TRIGGERED = 9
+LOG_ORACLE_EXHAUSTED = 10
+LOG_ORACLE_SUBSCRIBED = 11
+LOG_CHAIN_HOP = 12
+LOG_CHAIN_CYCLE = 13
+LOG_CHAIN_HOP_INSUFFICIENT = 14
+LOG_HEARTBEAT_CONFIGURED = 15
+LOG_HEARTBEAT_PULSE = 16
+LOG_HEARTBEAT_TRIGGERED = 17
+LOG_HEARTBEAT_PAYOUT = 18
+LOG_MULTISIG_VOTE = 19
+LOG_MULTISIG_EXECUTED = 20
+LOG_MULTISIG_EXPIRED = 21
+LOG_MULTISIG_CONFIGURED = 22
+LOG_TIME_LOCK_FIRED = 23
+LOG_TIME_LOCK_CANCELLED = 24
+LOG_TIME_LOCK_CONFIGURED = 25
+LOG_ADMIN_GATE_SET = 26
+LOG_ADMIN_GATE_CLEARED = 27
+LOG_ADMIN_APPROVAL_USED = 28
+LOG_MAINTENANCE_CHARGED = 29
+LOG_MAINTENANCE_DELINQUENT = 30
+LOG_MAINTENANCE_CURED = 31
+LOG_FAIL_INVALID_GATE = 100
+LOG_FAIL_NOT_ACTIVE = 101
+LOG_FAIL_UNAUTHORIZED = 102
+LOG_FAIL_INVALID_PARAMS = 103
+LOG_FAIL_INSUFFICIENT_FEE = 104
+LOG_FAIL_NO_SLOTS = 105
+LOG_FAIL_OWNER_MISMATCH = 106
+
+LOG_TYPE_NAMES = {
+    LOG_GATE_CREATED: 'GATE_CREATED',
+    LOG_GATE_CLOSED: 'GATE_CLOSED',
+    LOG_GATE_UPDATED: 'GATE_UPDATED',
+    LOG_PAYMENT_FORWARDED: 'PAYMENT_FORWARDED',
+    LOG_PAYMENT_BOUNCED: 'PAYMENT_BOUNCED',
+    LOG_DUST_BURNED: 'DUST_BURNED',
+    LOG_FEE_CHANGED: 'FEE_CHANGED',
+    LOG_GATE_EXPIRED: 'GATE_EXPIRED',
+    LOG_ORACLE_TRIGGERED: 'ORACLE_TRIGGERED',
+    LOG_ORACLE_EXHAUSTED: 'ORACLE_EXHAUSTED',
+    LOG_ORACLE_SUBSCRIBED: 'ORACLE_SUBSCRIBED',
+    LOG_CHAIN_HOP: 'CHAIN_HOP',
+    LOG_CHAIN_CYCLE: 'CHAIN_CYCLE',
+    LOG_CHAIN_HOP_INSUFFICIENT: 'CHAIN_HOP_INSUFFICIENT',
+    LOG_HEARTBEAT_CONFIGURED: 'HEARTBEAT_CONFIGURED',
+    LOG_HEARTBEAT_PULSE: 'HEARTBEAT_PULSE',
+    LOG_HEARTBEAT_TRIGGERED: 'HEARTBEAT_TRIGGERED',
+    LOG_HEARTBEAT_PAYOUT: 'HEARTBEAT_PAYOUT',
+    LOG_MULTISIG_VOTE: 'MULTISIG_VOTE',
+    LOG_MULTISIG_EXECUTED: 'MULTISIG_EXECUTED',
+    LOG_MULTISIG_EXPIRED: 'MULTISIG_EXPIRED',
+    LOG_MULTISIG_CONFIGURED: 'MULTISIG_CONFIGURED',
+    LOG_TIME_LOCK_FIRED: 'TIME_LOCK_FIRED',
+    LOG_TIME_LOCK_CANCELLED: 'TIME_LOCK_CANCELLED',
+    LOG_TIME_LOCK_CONFIGURED: 'TIME_LOCK_CONFIGURED',
+    LOG_ADMIN_GATE_SET: 'ADMIN_GATE_SET',
+    LOG_ADMIN_GATE_CLEARED: 'ADMIN_GATE_CLEARED',
+    LOG_ADMIN_APPROVAL_USED: 'ADMIN_APPROVAL_USED',
+    LOG_MAINTENANCE_CHARGED: 'MAINTENANCE_CHARGED',
+    LOG_MAINTENANCE_DELINQUENT: 'MAINTENANCE_DELINQUENT',
+    LOG_MAINTENANCE_CURED: 'MAINTENANCE_CURED',
+    LOG_FAIL_INVALID_GATE: 'FAIL_INVALID_GATE',
+    LOG_FAIL_NOT_ACTIVE: 'FAIL_NOT_ACTIVE',
+    LOG_FAIL_UNAUTHORIZED: 'FAIL_UNAUTHORIZED',
+    LOG_FAIL_INVALID_PARAMS: 'FAIL_INVALID_PARAMS',
+    LOG_FAIL_INSUFFICIENT_FEE: 'FAIL_INSUFFICIENT_FEE',
+    LOG_FAIL_NO_SLOTS: 'FAIL_NO_SLOTS',
+    LOG_FAIL_OWNER_MISMATCH: 'FAIL_OWNER_MISMATCH',
+}
+
+# Status codes
+QUGATE_SUCCESS = 0
+QUGATE_INVALID_GATE_ID = -1
+QUGATE_GATE_NOT_ACTIVE = -2
+QUGATE_UNAUTHORIZED = -3
+QUGATE_INVALID_MODE = -4
+QUGATE_INVALID_RECIPIENT_COUNT = -5
+QUGATE_INVALID_RATIO = -6
+QUGATE_INSUFFICIENT_FEE = -7
+QUGATE_NO_FREE_SLOTS = -8
+QUGATE_DUST_AMOUNT = -9
+QUGATE_INVALID_THRESHOLD = -10
+QUGATE_INVALID_SENDER_COUNT = -11
+QUGATE_CONDITIONAL_REJECTED = -12
+QUGATE_INVALID_ORACLE_CONFIG = -13
+QUGATE_INVALID_CHAIN = -14
+QUGATE_OWNER_MISMATCH = -15
+QUGATE_HEARTBEAT_TRIGGERED = -16
+QUGATE_HEARTBEAT_NOT_ACTIVE = -17
+QUGATE_HEARTBEAT_INVALID = -18
+QUGATE_MULTISIG_NOT_GUARDIAN = -19
+QUGATE_MULTISIG_ALREADY_VOTED = -20
+QUGATE_MULTISIG_INVALID_CONFIG = -21
+QUGATE_MULTISIG_NO_ACTIVE_PROP = -22
+QUGATE_TIME_LOCK_ALREADY_FIRED = -23
+QUGATE_TIME_LOCK_NOT_CANCELLABLE = -24
+QUGATE_TIME_LOCK_EPOCH_PAST = -25
+QUGATE_ADMIN_GATE_REQUIRED = -26
+QUGATE_INVALID_ADMIN_GATE = -27
+QUGATE_INVALID_GATE_RECIPIENT = -28
+QUGATE_INVALID_ADMIN_CYCLE = -29
+QUGATE_MULTISIG_PROPOSAL_ACTIVE = -30
+QUGATE_INVALID_PARAMS = -31
@@ -0,0 +1,208 @@
+"""
+Whole-contract snapshots over getGateBySlot (function 25).
+
+getGateBySlot returns every slot below ``_gateCount``, closed ones included,
+so walking it yields the full gate table. :class:`SlotCrawler` does the walk
+with concurrent requests and stores the result in a :class:`GateTable`: one
+packed column per getGateBySlot field (``array`` for integers, ``bytearray``
+for identities), indexed by slot. Tables can be saved and loaded, so a later
+run can start from the previous snapshot:
+
+    crawler = SlotCrawler(client)
+    table = crawler.crawl()                      # every slot
+    table.save('gates.snapshot')
+    ...
+    table = GateTable.load('gates.snapshot')
+    changes = crawler.refresh(table)             # {slot: {field: (old, new)}}
+
+A refresh does not re-read the whole table. It probes each live gate with
+getLatestExecution (32 bytes) and re-reads only slots that are new, whose
+``observedTick`` moved or whose gate ID went stale (closed or expired). The
+probe reports ``valid == 0`` both for a gate that has never executed and for
+a stale ID, so live gates with no execution yet are told apart with chunked
+getGateBatch reads, which return zeros for stale IDs. If
+``activeGates`` shows that freed slots were reused, the free slots are
+re-read too. END_EPOCH charges idle fees and expires gates across the whole
+table, so a snapshot from an earlier epoch is re-read in full.
+Configuration-only calls (updateGate, setChain, configure*) do not move
+``observedTick``; they show up on the next epoch or with ``full=True``.
+"""
+from __future__ import annotations
+
+import json
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from .structs import GET_GATE_BY_SLOT_OUTPUT, SCALAR_TYPES
+
+# (field, array typecode or None for ids, values per slot)
+LAYOUT = [(name, None if ftype == 'id' else SCALAR_TYPES[ftype][0], count)
+          for name, ftype, count in GET_GATE_BY_SLOT_OUTPUT.fields]
+
+
+class GateTable:
+    """Columnar getGateBySlot snapshot plus each slot's latest ``observedTick``."""
+
+    def __init__(self, epoch=None, tick=None):
+        self.epoch = epoch
+        self.tick = tick
+        self.slots = 0
+        self.columns = {name: bytearray() if code is None else array(code)
+                        for name, code, count in LAYOUT}
+        self.observed = array('Q')
+
+    def __len__(self):
+        return self.slots
+
+    def put(self, slot, gate, observed_tick=0):
+        """Store a decoded getGateBySlot reply at *slot* (at most one past the end)."""
+        if slot > self.slots:
+            raise IndexError(f"slot {slot} would leave a gap after {self.slots}")
+        for name, code, count in LAYOUT:
+            values = gate[name] if count > 1 else [gate[name]]
+            column = self.columns[name]
+            if code is None:
+                column[slot * 32 * count:(slot + 1) * 32 * count] = b''.join(values)
+            else:
+                column[slot * count:(slot + 1) * count] = array(code, values)
+        self.observed[slot:slot + 1] = array('Q', [observed_tick])
+        self.slots = max(self.slots, slot + 1)
+
+    def row(self, slot):
+        """The stored gate at *slot* as a getGateBySlot-style dict."""
+        if not 0 <= slot < self.slots:
+            raise IndexError(slot)
+        out = {}
+        for name, code, count in LAYOUT:
+            column = self.columns[name]
+            if code is None:
+                values = [bytes(column[i * 32:(i + 1) * 32])
+                          for i in range(slot * count, (slot + 1) * count)]
+            else:
+                values = column[slot * count:(slot + 1) * count].tolist()
+            out[name] = values if count > 1 else values[0]
+        return out
+
+    def active_slots(self):
+        active = self.columns['active']
+        return [slot for slot in range(self.slots) if active[slot]]
+
+    def free_slots(self):
+        active = self.columns['active']
+        return [slot for slot in range(self.slots) if not active[slot]]
+
+    def save(self, path):
+        """Write a JSON header line followed by every column's raw bytes."""
+        header = {'epoch': self.epoch, 'tick': self.tick, 'slots': self.slots,
+                  'columns': [name for name, code, count in LAYOUT]}
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header).encode() + b'\n')
+            for name, code, count in LAYOUT:
+                column = self.columns[name]
+                f.write(column if code is None else column.tobytes())
+            f.write(self.observed.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header['columns'] != [name for name, code, count in LAYOUT]:
+                raise ValueError(f"{path}: snapshot layout does not match getGateBySlot_output")
+            table = cls(header['epoch'], header['tick'])
+            table.slots = slots = header['slots']
+            for name, code, count in LAYOUT:
+                if code is None:
+                    table.columns[name] = bytearray(f.read(slots * 32 * count))
+                else:
+                    table.columns[name].frombytes(
+                        f.read(slots * count * table.columns[name].itemsize))
+            table.observed.frombytes(f.read(slots * table.observed.itemsize))
+        return table
+
+
+def diff_rows(old, new):
+    """``{field: (old, new)}`` for the fields that differ; *old* may be None."""
+    if old is None:
+        return {name: (None, value) for name, value in new.items()}
+    return {name: (old[name], value) for name, value in new.items() if old[name] != value}
+
+
+class SlotCrawler:
+    """Builds and incrementally refreshes a :class:`GateTable` from a client.
+
+    ``executions`` keeps the getLatestExecution output of every probe and read.
+    ``reads`` counts getGateBySlot re-reads, ``probes`` getLatestExecution
+    probes and ``checks`` the gate IDs confirmed through getGateBatch.
+    """
+
+    def __init__(self, client, workers=None):
+        self.client = client
+        self.workers = workers or client.pool_size
+        self.reads = 0
+        self.probes = 0
+        self.checks = 0
+        self.executions = {}        # gate ID -> its last getLatestExecution output
+
+    def _map(self, fn, items):
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(len(items), self.workers)) as pool:
+            return list(pool.map(fn, items))
+
+    def _read(self, slot):
+        gate = self.client.get_gate_by_slot(slot)
+        return gate, self._probe(gate['gateId']) if gate['active'] else 0
+
+    def _probe(self, gate_id):
+        """``observedTick`` of *gate_id*'s latest execution; 0 if none (or the ID is stale)."""
+        out = self.client.get_latest_execution(gate_id)
+        self.executions[gate_id] = out
+        return out['observedTick'] if out['valid'] else 0
+
+    def _reread(self, table, slots):
+        slots = sorted(set(slots))
+        changes = {}
+        for slot, (gate, observed) in zip(slots, self._map(self._read, slots)):
+            old = table.row(slot) if slot < len(table) else None
+            table.put(slot, gate, observed)
+            delta = diff_rows(old, gate)
+            if delta:
+                changes[slot] = delta
+        self.reads += len(slots)
+        return changes
+
+    def crawl(self):
+        """Read every slot below ``totalGates`` into a new table."""
+        table = GateTable()
+        self.refresh(table, full=True)
+        return table
+
+    def refresh(self, table, full=False):
+        """Bring *table* up to date; returns ``{slot: {field: (old, new)}}`` for what changed."""
+        info = self.client.tick_info()
+        count = self.client.get_gate_count()
+        total = count['totalGates']
+        stale = full or info.get('epoch') != table.epoch
+        table.epoch, table.tick = info.get('epoch'), info.get('tick')
+        if stale:
+            return self._reread(table, range(total))
+
+        live = table.active_slots()
+        gate_ids = table.columns['gateId']
+        ticks = self._map(self._probe, [gate_ids[slot] for slot in live])
+        self.probes += len(live)
+        moved = [slot for slot, tick in zip(live, ticks) if tick != table.observed[slot]]
+        idle = [slot for slot, tick in zip(live, ticks) if tick == 0 == table.observed[slot]]
+        if idle:
+            gates = self.client.get_gates([gate_ids[slot] for slot in idle])
+            self.checks += len(idle)
+            moved += [slot for slot in idle
+                      if not (gates[gate_ids[slot]] or {}).get('active')]
+        free = table.free_slots()
+        changes = self._reread(table, moved + list(range(len(table), total)))
+
+        if count['activeGates'] > len(table.active_slots()):
+            # some freed slots were handed to new gates
+            changes.update(self._reread(table, free))
+        return changes
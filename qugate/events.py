@@ -0,0 +1,149 @@
+"""
+Index of QuGateLogger events in SQLite.
+
+Every forward, bounce, dust burn, chain hop, heartbeat, multisig and
+maintenance step is logged by the contract as a ``QuGateLogger`` record
+(``_contractIndex``, ``_type``, ``gateId``, ``sender``, ``amount``). The core
+node serves its event log as a byte stream of entries. Each entry is a
+26-byte header (epoch, tick, 24-bit size and 8-bit message type, log ID,
+digest) followed by *size* bytes of content. Contract messages carry the
+logger struct up to ``_terminator``.
+
+:func:`read_entries` walks such a stream: a socket's ``makefile('rb')``, or
+a file the stream was recorded to for offline use. :func:`decode_events`
+keeps the QuGate records. :class:`EventIndex` bulk-inserts them with
+indexes on ``(gate_id, tick)`` and ``(sender, tick)``:
+
+    index = EventIndex('events.db')
+    with open('node.log', 'rb') as f:
+        index.ingest(decode_events(read_entries(f)))
+    index.gate_history(gate_id)        # [{'tick', '_type', 'sender', 'amount', ...}, ...]
+"""
+from __future__ import annotations
+
+import sqlite3
+import struct
+from itertools import islice
+
+from .constants import LOG_TYPE_NAMES, QUGATE_INDEX
+from .structs import QUGATE_LOGGER
+
+# epoch (uint16), tick (uint32), size | messageType << 24 (uint32), logId, logDigest
+ENTRY_HEADER = struct.Struct('<HIIQQ')
+
+# Core message types written by LOG_ERROR/LOG_WARNING/LOG_INFO/LOG_DEBUG
+CONTRACT_MESSAGE_LEVELS = {4: 'error', 5: 'warning', 6: 'info', 7: 'debug'}
+
+LOGGER_SIZE = QUGATE_LOGGER.offsets['_terminator']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    log_id  INTEGER PRIMARY KEY,
+    epoch   INTEGER NOT NULL,
+    tick    INTEGER NOT NULL,
+    level   TEXT NOT NULL,
+    type    INTEGER NOT NULL,
+    gate_id INTEGER NOT NULL,
+    sender  BLOB NOT NULL,
+    amount  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_gate ON events (gate_id, tick);
+CREATE INDEX IF NOT EXISTS events_sender ON events (sender, tick);
+"""
+
+_COLUMNS = 'log_id, epoch, tick, level, type, gate_id, sender, amount'
+
+
+def read_entries(stream):
+    """Yield ``(epoch, tick, message_type, log_id, content)`` until *stream* runs out."""
+    while True:
+        header = stream.read(ENTRY_HEADER.size)
+        if len(header) < ENTRY_HEADER.size:
+            return
+        epoch, tick, word, log_id, _digest = ENTRY_HEADER.unpack(header)
+        size = word & 0xFFFFFF
+        content = stream.read(size)
+        if len(content) < size:
+            return
+        yield epoch, tick, word >> 24, log_id, content
+
+
+def decode_events(entries, contract_index=QUGATE_INDEX):
+    """QuGateLogger records among *entries*, as dicts keyed by the struct's field names."""
+    for epoch, tick, message_type, log_id, content in entries:
+        level = CONTRACT_MESSAGE_LEVELS.get(message_type)
+        if level is None or len(content) < LOGGER_SIZE:
+            continue
+        record = QUGATE_LOGGER.decode(content[:LOGGER_SIZE])
+        if record['_contractIndex'] != contract_index:
+            continue
+        del record['_terminator']
+        record.update(logId=log_id, epoch=epoch, tick=tick, level=level)
+        yield record
+
+
+def type_name(log_type):
+    return LOG_TYPE_NAMES.get(log_type, f'UNKNOWN({log_type})')
+
+
+class EventIndex:
+    """SQLite store of decoded events; re-ingesting the same log IDs is a no-op."""
+
+    def __init__(self, path=':memory:'):
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, events, batch=10000):
+        """Insert *events* in transactions of *batch* rows; returns how many were new."""
+        rows = ((e['logId'], e['epoch'], e['tick'], e['level'], e['_type'], e['gateId'],
+                 e['sender'], e['amount']) for e in events)
+        added = 0
+        while True:
+            chunk = list(islice(rows, batch))
+            if not chunk:
+                return added
+            with self.db:
+                before = self.db.total_changes
+                self.db.executemany(f'INSERT OR IGNORE INTO events ({_COLUMNS}) '
+                                    f'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', chunk)
+                added += self.db.total_changes - before
+
+    def _select(self, column, value, since, until):
+        sql = f'SELECT {_COLUMNS} FROM events WHERE {column} = ?'
+        args = [value]
+        if since is not None:
+            sql += ' AND tick >= ?'
+            args.append(since)
+        if until is not None:
+            sql += ' AND tick <= ?'
+            args.append(until)
+        rows = self.db.execute(sql + ' ORDER BY tick, log_id', args)
+        return [{'logId': log_id, 'epoch': epoch, 'tick': tick, 'level': level,
+                 '_type': log_type, 'gateId': gate_id, 'sender': sender, 'amount': amount}
+                for log_id, epoch, tick, level, log_type, gate_id, sender, amount in rows]
+
+    def gate_history(self, gate_id, since=None, until=None):
+        """Events of *gate_id* (a versioned ID) in tick order, optionally within a tick range."""
+        return self._select('gate_id', gate_id, since, until)
+
+    def sender_history(self, sender, since=None, until=None):
+        """Events whose ``sender`` is the 32-byte public key *sender*, in tick order."""
+        return self._select('sender', bytes(sender), since, until)
+
+    def last_tick(self):
+        """Highest indexed tick (where to resume a stream), or None when empty."""
+        return self.db.execute('SELECT MAX(tick) FROM events').fetchone()[0]
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
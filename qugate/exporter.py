@@ -0,0 +1,279 @@
+"""
+Prometheus text-format exporter for contract state and client metrics.
+
+:class:`MetricsExporter` scrapes the contract once per ``interval``: tick
+info, getGateCount (gate counts, ``totalBurned`` and the maintenance
+totals), getFees, and every live gate through a
+:class:`~qugate.bulk.GateDirectory`: concurrent 32-ID getGateBatch calls, so
+a cycle costs ``3 + ceil(live gates / 32)`` queries however many gates
+exist. Closed slots are skipped until the gate counts change, and the IDs of
+new and reused slots are guessed from their generations instead of read from
+getGateBySlot. Alongside that it publishes the client's own
+:class:`~qugate.resilience.RpcMetrics` (requests, failures, retries,
+fast-fails and a latency histogram per endpoint) and, when given an
+:class:`~qugate.inclusion.InclusionTracker`, transaction outcomes and
+inclusion latency:
+
+    exporter = MetricsExporter(client, interval=15, tracker=tracker)
+    exporter.serve(port=9425)        # GET http://127.0.0.1:9425/metrics
+
+or ``python -m qugate export --rpc http://127.0.0.1:41841``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .bulk import GateDirectory
+from .client import QuGateClient, RpcError
+from .constants import DEFAULT_RPC, MODE_NAMES
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_PORT = 9425
+
+# getGateCount field -> (metric, type, help)
+COUNT_METRICS = {
+    'totalGates': ('qugate_gate_slots', 'gauge', 'Gate slots ever allocated (totalGates).'),
+    'activeGates': ('qugate_active_gates', 'gauge', 'Live gates.'),
+    'totalBurned': ('qugate_burned_total', 'counter', 'QU burned by the contract.'),
+    'totalMaintenanceCharged': ('qugate_maintenance_charged_total', 'counter',
+                                'Idle maintenance charged from reserves.'),
+    'totalMaintenanceBurned': ('qugate_maintenance_burned_total', 'counter',
+                               'Idle maintenance burned.'),
+    'totalMaintenanceDividends': ('qugate_maintenance_dividends_total', 'counter',
+                                  'Idle maintenance set aside as dividends.'),
+    'distributedMaintenanceDividends': ('qugate_maintenance_dividends_distributed_total',
+                                        'counter', 'Maintenance dividends paid out.'),
+}
+
+# getGate field -> (metric, type, help), one sample per live gate
+GATE_METRICS = {
+    'totalReceived': ('qugate_gate_received_total', 'counter', 'QU received by the gate.'),
+    'totalForwarded': ('qugate_gate_forwarded_total', 'counter', 'QU forwarded by the gate.'),
+    'currentBalance': ('qugate_gate_balance', 'gauge', 'QU held by the gate.'),
+    'reserve': ('qugate_gate_reserve', 'gauge', 'Idle-maintenance reserve.'),
+    'idleDelinquent': ('qugate_gate_idle_delinquent', 'gauge',
+                       '1 while the reserve cannot pay idle maintenance.'),
+    'idleGraceRemainingEpochs': ('qugate_gate_idle_grace_remaining_epochs', 'gauge',
+                                 'Epochs of grace left before a delinquent gate expires.'),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """Collects samples grouped by metric family, in first-declared order."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, **labels):
+        self.lines.append(f'{name}{_labels(**labels)} {_number(value)}')
+
+    def histogram(self, name, histogram, **labels):
+        for bound, count in histogram.cumulative():
+            self.sample(f'{name}_bucket', count, **labels, le=_number(bound))
+        self.sample(f'{name}_sum', histogram.sum, **labels)
+        self.sample(f'{name}_count', histogram.count, **labels)
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+class MetricsExporter:
+    """Scrapes *client* every *interval* seconds and renders Prometheus text."""
+
+    def __init__(self, client, interval=15.0, tracker=None, workers=None):
+        self.client = client
+        self.interval = interval
+        self.tracker = tracker
+        self.workers = workers
+        self.directory = GateDirectory(client, workers)
+        self.scrapes = 0
+        self.errors = 0
+        self.last = None            # {'info', 'count', 'fees', 'gates', 'seconds', 'at'}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    # =============================================
+    # Scraping
+    # =============================================
+
+    def scrape(self):
+        """One query cycle; returns the scraped state (also kept as ``last``)."""
+        start = time.monotonic()
+        info = self.client.tick_info()
+        count = self.client.get_gate_count()
+        fees = self.client.get_fees()
+        live = self.directory.read(count)
+        state = {'info': info, 'count': count, 'fees': fees, 'gates': live,
+                 'seconds': time.monotonic() - start, 'at': time.time()}
+        with self._lock:
+            self.last = state
+            self.scrapes += 1
+        return state
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.scrape()
+            except RpcError:
+                with self._lock:
+                    self.errors += 1
+            self._stop.wait(self.interval)
+
+    # =============================================
+    # Rendering
+    # =============================================
+
+    def _render_contract(self, out, state):
+        out.family('qugate_tick', 'gauge', 'Current network tick.')
+        out.sample('qugate_tick', state['info']['tick'])
+        out.family('qugate_epoch', 'gauge', 'Current epoch.')
+        out.sample('qugate_epoch', state['info'].get('epoch', 0))
+        for field, (name, kind, help_text) in COUNT_METRICS.items():
+            out.family(name, kind, help_text)
+            out.sample(name, state['count'][field])
+        out.family('qugate_fee', 'gauge', 'getFees values by field.')
+        for field, value in state['fees'].items():
+            out.sample('qugate_fee', value, field=field)
+        gates = sorted(state['gates'].items())
+        for field, (name, kind, help_text) in GATE_METRICS.items():
+            out.family(name, kind, help_text)
+            for gate_id, gate in gates:
+                out.sample(name, gate[field], gate_id=gate_id, mode=MODE_NAMES[gate['mode']])
+
+    def _render_client(self, out):
+        metrics = self.client.metrics
+        snapshot = metrics.snapshot()
+        for field, name, help_text in (
+                ('requests', 'qugate_rpc_requests_total', 'RPC attempts.'),
+                ('failures', 'qugate_rpc_failures_total', 'Failed RPC attempts.'),
+                ('retries', 'qugate_rpc_retries_total', 'RPC retries.'),
+                ('rejected', 'qugate_rpc_rejected_total', 'Calls failed fast by the breaker.')):
+            out.family(name, 'counter', help_text)
+            for label, row in snapshot.items():
+                out.sample(name, row[field], endpoint=label)
+        out.family('qugate_rpc_latency_seconds', 'histogram', 'RPC attempt latency.')
+        for label, histogram in metrics.latency_histograms().items():
+            out.histogram('qugate_rpc_latency_seconds', histogram, endpoint=label)
+
+    def _render_tracker(self, out):
+        resolved, latency = self.tracker.outcomes()
+        out.family('qugate_tx_resolved_total', 'counter', 'Tracked transactions by outcome.')
+        for status, count in sorted(resolved.items()):
+            out.sample('qugate_tx_resolved_total', count, status=status)
+        out.family('qugate_tx_pending', 'gauge', 'Tracked transactions not resolved yet.')
+        out.sample('qugate_tx_pending', len(self.tracker.pending))
+        out.family('qugate_tx_inclusion_seconds', 'histogram',
+                   'Seconds from tracking a transaction to its confirmed inclusion.')
+        out.histogram('qugate_tx_inclusion_seconds', latency)
+
+    def render(self):
+        """The latest scrape plus the live client (and tracker) metrics."""
+        out = _Writer()
+        with self._lock:
+            state, scrapes, errors = self.last, self.scrapes, self.errors
+        out.family('qugate_scrapes_total', 'counter', 'Completed contract scrapes.')
+        out.sample('qugate_scrapes_total', scrapes)
+        out.family('qugate_scrape_errors_total', 'counter', 'Scrapes that failed with RpcError.')
+        out.sample('qugate_scrape_errors_total', errors)
+        if state is not None:
+            out.family('qugate_scrape_duration_seconds', 'gauge', 'Duration of the last scrape.')
+            out.sample('qugate_scrape_duration_seconds', state['seconds'])
+            self._render_contract(out, state)
+        self._render_client(out)
+        if self.tracker is not None:
+            self._render_tracker(out)
+        return out.text()
+
+    # =============================================
+    # Serving
+    # =============================================
+
+    def start(self):
+        """Scrape every ``interval`` seconds on a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='qugate-exporter',
+                                            daemon=True)
+            self._thread.start()
+
+    def serve(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Start scraping and answer ``GET /metrics`` on a background thread; returns the port."""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.start()
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='qugate-exporter-http',
+                         daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m qugate export',
+                                     description='Serve contract and client metrics.')
+    parser.add_argument('--rpc', default=DEFAULT_RPC)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--interval', type=float, default=15.0, help='seconds between scrapes')
+    args = parser.parse_args(argv)
+
+    with QuGateClient(args.rpc) as client:
+        exporter = MetricsExporter(client, args.interval)
+        port = exporter.serve(args.host, args.port)
+        print(f"export: http://{args.host}:{port}/metrics", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            exporter.stop()
+            return 0
@@ -0,0 +1,247 @@
+"""
+FourQ curve arithmetic and the SchnorrQ signature scheme as used by Qubic.
+
+FourQ is the twisted Edwards curve -x^2 + y^2 = 1 + d*x^2*y^2 over GF(p^2),
+p = 2^127 - 1. Field elements are ``(re, im)`` tuples of Python ints; points
+are kept in extended coordinates ``(X, Y, Z, T)`` with x = X/Z, y = Y/Z and
+T = XY/Z, so additions never need a field inversion.
+
+Signing follows Qubic's ``sign(subseed, publicKey, messageDigest)``: the
+nonce and challenge are derived with KangarooTwelve instead of SHA-512.
+"""
+from __future__ import annotations
+
+from .k12 import k12
+
+P = (1 << 127) - 1
+N = 0x0029CBC14E5E0A72F05397829CBC14E5DFBD004DFE0F79992FB2540EC7768CE7
+
+
+def _limbs(a, b, c, d):
+    return a | (b << 64), c | (d << 64)
+
+
+D = _limbs(0x0000000000000142, 0x00000000000000E4, 0xB3821488F1FC0C8D, 0x5E472F846657E0FC)
+GX = _limbs(0x286592AD7B3833AA, 0x1A3472237C2FB305, 0x96869FB360AC77F6, 0x1E1F553F2878AA9C)
+GY = _limbs(0xB924A2462BCBB287, 0x0E3FEE9BA120785A, 0x49A7C344844C8B5C, 0x6E1C4AF8630E0242)
+
+_ONE = (1, 0)
+_ZERO = (0, 0)
+
+
+# =============================================
+# GF(p^2) arithmetic
+# =============================================
+
+def _add(x, y):
+    return (x[0] + y[0]) % P, (x[1] + y[1]) % P
+
+
+def _sub(x, y):
+    return (x[0] - y[0]) % P, (x[1] - y[1]) % P
+
+
+def _mul(x, y):
+    a, b = x
+    c, d = y
+    return (a * c - b * d) % P, (a * d + b * c) % P
+
+
+def _inv(x):
+    a, b = x
+    t = pow(a * a + b * b, P - 2, P)
+    return a * t % P, -b * t % P
+
+
+def _sqrt_p(a):
+    """Square root in GF(p) (p = 3 mod 4), or None if *a* is not a square."""
+    r = pow(a, (P + 1) // 4, P)
+    return r if r * r % P == a % P else None
+
+
+def _sqrt(x):
+    """Square root in GF(p^2), or None if *x* is not a square."""
+    a, b = x
+    if b == 0:
+        r = _sqrt_p(a)
+        if r is not None:
+            return r, 0
+        r = _sqrt_p(-a % P)
+        return None if r is None else (0, r)
+    t = _sqrt_p((a * a + b * b) % P)
+    if t is None:
+        return None
+    half = (P + 1) // 2
+    re = _sqrt_p((a + t) * half % P)
+    if re is None:
+        re = _sqrt_p((a - t) * half % P)
+        if re is None:
+            return None
+    im = b * pow(2 * re, P - 2, P) % P
+    return re, im
+
+
+# =============================================
+# Point arithmetic (extended twisted Edwards, a = -1)
+# =============================================
+
+_D2 = _add(D, D)
+IDENTITY = (_ZERO, _ONE, _ONE, _ZERO)
+
+
+def point_add(p, q):
+    x1, y1, z1, t1 = p
+    x2, y2, z2, t2 = q
+    a = _mul(_sub(y1, x1), _sub(y2, x2))
+    b = _mul(_add(y1, x1), _add(y2, x2))
+    c = _mul(_mul(t1, _D2), t2)
+    d = _mul(_add(z1, z1), z2)
+    e, f, g, h = _sub(b, a), _sub(d, c), _add(d, c), _add(b, a)
+    return _mul(e, f), _mul(g, h), _mul(f, g), _mul(e, h)
+
+
+def point_double(p):
+    x1, y1, z1, _ = p
+    a = _mul(x1, x1)
+    b = _mul(y1, y1)
+    c = _mul(z1, z1)
+    c = _add(c, c)
+    d = _sub(_ZERO, a)
+    s = _add(x1, y1)
+    e = _sub(_sub(_mul(s, s), a), b)
+    g = _add(d, b)
+    f = _sub(g, c)
+    h = _sub(d, b)
+    return _mul(e, f), _mul(g, h), _mul(f, g), _mul(e, h)
+
+
+def point_mul(k, p):
+    """k*p by double-and-add (variable base)."""
+    r = IDENTITY
+    for bit in bin(k % N)[2:]:
+        r = point_double(r)
+        if bit == '1':
+            r = point_add(r, p)
+    return r
+
+
+def from_affine(x, y):
+    return x, y, _ONE, _mul(x, y)
+
+
+def to_affine(p):
+    x, y, z, _ = p
+    zi = _inv(z)
+    return _mul(x, zi), _mul(y, zi)
+
+
+def on_curve(x, y):
+    x2 = _mul(x, x)
+    y2 = _mul(y, y)
+    return _sub(y2, x2) == _add(_ONE, _mul(D, _mul(x2, y2)))
+
+
+G = from_affine(GX, GY)
+
+# Fixed-base comb for G: _BASE_TABLE[i][j] = j * 16^i * G, built on first use
+_WINDOWS = 64
+_BASE_TABLE = None
+
+
+def _base_table():
+    global _BASE_TABLE
+    if _BASE_TABLE is None:
+        table = []
+        base = G
+        for _ in range(_WINDOWS):
+            row = [IDENTITY, base]
+            for _ in range(14):
+                row.append(point_add(row[-1], base))
+            table.append(row)
+            base = point_add(row[-1], base)
+        _BASE_TABLE = table
+    return _BASE_TABLE
+
+
+def base_mul(k):
+    """k*G using the precomputed comb (64 additions, no doublings)."""
+    table = _base_table()
+    k %= N
+    r = IDENTITY
+    for i in range(_WINDOWS):
+        nibble = (k >> (4 * i)) & 0xF
+        if nibble:
+            r = point_add(r, table[i][nibble])
+    return r
+
+
+# =============================================
+# Encoding
+# =============================================
+
+def encode(p):
+    """32-byte FourQ point encoding: y, with the sign of x in the top bit."""
+    x, y = to_affine(p)
+    out = bytearray(y[0].to_bytes(16, 'little') + y[1].to_bytes(16, 'little'))
+    sign_source = x[0] if x[0] else x[1]
+    if (sign_source >> 126) & 1:
+        out[31] |= 0x80
+    return bytes(out)
+
+
+def decode(data):
+    """Inverse of :func:`encode`; raises ValueError for an invalid encoding."""
+    if len(data) != 32:
+        raise ValueError("FourQ point encoding must be 32 bytes")
+    sign = data[31] >> 7
+    y0 = int.from_bytes(data[:16], 'little')
+    y1 = int.from_bytes(data[16:], 'little') & ((1 << 127) - 1)
+    if y0 >= P or y1 >= P:
+        raise ValueError("FourQ y coordinate out of range")
+    y = (y0, y1)
+    y2 = _mul(y, y)
+    x = _sqrt(_mul(_sub(y2, _ONE), _inv(_add(_mul(D, y2), _ONE))))
+    if x is None:
+        raise ValueError("not a FourQ point")
+    sign_source = x[0] if x[0] else x[1]
+    if (sign_source >> 126) & 1 != sign:
+        x = _sub(_ZERO, x)
+    return from_affine(x, y)
+
+
+# =============================================
+# SchnorrQ (Qubic variant)
+# =============================================
+
+def _scalar(data):
+    return int.from_bytes(data[:32], 'little') % N
+
+
+def public_key(private_key):
+    """32-byte public key for a 32-byte private key."""
+    return encode(base_mul(_scalar(private_key)))
+
+
+def sign(subseed, public_key_bytes, message_digest):
+    """64-byte signature over the 32-byte *message_digest*."""
+    k = k12(subseed, 64)
+    r = _scalar(k12(k[32:] + message_digest, 64))
+    signature_r = encode(base_mul(r))
+    h = _scalar(k12(signature_r + public_key_bytes + message_digest, 64))
+    s = (r - _scalar(k) * h) % N
+    return signature_r + s.to_bytes(32, 'little')
+
+
+def verify(public_key_bytes, message_digest, signature):
+    """True if *signature* is valid for *message_digest* under *public_key_bytes*."""
+    if len(signature) != 64:
+        return False
+    s = int.from_bytes(signature[32:], 'little')
+    if s >= N:
+        return False
+    try:
+        a = decode(public_key_bytes)
+    except ValueError:
+        return False
+    h = _scalar(k12(signature[:32] + public_key_bytes + message_digest, 64))
+    return encode(point_add(base_mul(s), point_mul(h, a))) == signature[:32]
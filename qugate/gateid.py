@@ -0,0 +1,17 @@
+"""Versioned gate ID helpers: ``gateId = ((generation + 1) << 20) | slot``."""
+from __future__ import annotations
+
+from .constants import GATE_ID_SLOT_BITS, GATE_ID_SLOT_MASK
+
+
+def encode_gate_id(slot_idx: int, generation: int = 0) -> int:
+    return ((generation + 1) << GATE_ID_SLOT_BITS) | slot_idx
+
+
+def gate_slot(gate_id: int) -> int:
+    return gate_id & GATE_ID_SLOT_MASK
+
+
+def gate_generation(gate_id: int) -> int:
+    """Generation encoded in *gate_id*; -1 for the invalid ID 0."""
+    return (gate_id >> GATE_ID_SLOT_BITS) - 1
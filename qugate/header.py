@@ -0,0 +1,214 @@
+"""
+Read struct layouts and constants straight out of QuGate.h.
+
+``parse_header`` understands the subset of C++ the contract uses for its
+data: ``constexpr`` integer constants, ``struct`` blocks (nested or not)
+whose members are scalars, ``id``, other structs, or ``Array<T, N>`` with a
+literal or constant N. Structs containing anything else (methods, QPI
+containers, ...) are skipped. ``codecs`` turns the parsed definitions into
+:class:`~qugate.structs.Codec` objects and ``generate`` renders them as the
+Python source kept in ``qugate/structs.py`` (see ``scripts/gen_structs.py``).
+"""
+from __future__ import annotations
+
+import re
+
+from .structs import SCALAR_TYPES, Codec
+
+# Defined by the core build, not by QuGate.h; 1 on testnet and mainnet today.
+DEFAULT_DEFINES = {'X_MULTIPLIER': 1}
+
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+_CONSTEXPR = re.compile(r'constexpr\s+\w+\s+(\w+)\s*=\s*([^;]+);')
+_STRUCT = re.compile(r'\bstruct\s+(\w+)\s*(?::[^{;]*)?\{')
+_ARRAY = re.compile(r'^Array\s*<\s*(\w+)\s*,\s*(\w+)\s*>\s+(\w+)$')
+_FIELD = re.compile(r'^(\w+)\s+(\w+)$')
+_INT_SUFFIX = re.compile(r'\b(0[xX][0-9a-fA-F]+|\d+)(?:ULL|LL|UL|U|L)\b')
+_SAFE_EXPR = re.compile(r'^[\w\s()+\-*/%<>|&~^]*$')
+_REGISTER = re.compile(r'REGISTER_USER_(FUNCTION|PROCEDURE)\(\s*(\w+)\s*,\s*(\d+)\s*\)')
+
+# Records kept per gate slot in StateData (plus the log record); generated
+# alongside the registered inputs/outputs so StateData views can nest them.
+STATE_RECORDS = (
+    'QUGATE_HeartbeatConfig',
+    'QUGATE_MultisigConfig',
+    'QUGATE_AdminApprovalState',
+    'QUGATE_TimeLockConfig',
+    'QUGATE_AllowedSendersConfig',
+    'QuGateLogger',
+    'GateConfig',
+    'QUGATE_LatestExecution',
+)
+
+
+def strip_comments(text):
+    return _COMMENT.sub('', text)
+
+
+def parse_constants(text, defines=None):
+    """``{name: int}`` for every constexpr that evaluates to an integer."""
+    names = dict(DEFAULT_DEFINES if defines is None else defines)
+    out = {}
+    for name, expr in _CONSTEXPR.findall(strip_comments(text)):
+        expr = _INT_SUFFIX.sub(r'\1', expr.strip()).replace('/', '//')
+        if not _SAFE_EXPR.match(expr):
+            continue
+        try:
+            value = eval(expr, {'__builtins__': {}}, names)   # noqa: S307 - vetted by _SAFE_EXPR
+        except (NameError, SyntaxError, TypeError, ZeroDivisionError):
+            continue
+        if isinstance(value, int):
+            names[name] = out[name] = value
+    return out
+
+
+def _block_end(text, start):
+    depth = 1
+    i = start
+    while depth:
+        ch = text[i]
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+        i += 1
+    return i - 1
+
+
+def _members(body):
+    """Top-level ``;``-terminated declarations of a struct body, or None."""
+    decls = []
+    depth = 0
+    current = []
+    for ch in body:
+        if ch == '{':
+            if depth == 0 and not _STRUCT.match(''.join(current).strip() + '{'):
+                return None       # a function body: not plain data
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                current = []      # nested struct definition; parsed on its own
+            continue
+        if depth:
+            continue
+        if ch == ';':
+            decl = ''.join(current).strip()
+            current = []
+            if decl:
+                decls.append(decl)
+        else:
+            current.append(ch)
+    return decls
+
+
+def parse_structs(text, constants=None):
+    """``{name: [(field, type, count), ...]}`` in definition order.
+
+    Struct names are unqualified (``getGate_output``, ``GateConfig``).
+    """
+    text = strip_comments(text)
+    if constants is None:
+        constants = parse_constants(text)
+    structs = {}
+    for match in _STRUCT.finditer(text):
+        name = match.group(1)
+        body = text[match.end():_block_end(text, match.end())]
+        body = re.sub(r'\b(public|private|protected)\s*:', '', body)
+        decls = _members(body)
+        if decls is None:
+            continue
+        fields = []
+        for decl in decls:
+            decl = ' '.join(decl.split())
+            if decl.startswith('struct '):
+                decl = decl[len('struct '):]
+            array = _ARRAY.match(decl)
+            if array:
+                ftype, size, fname = array.groups()
+                count = int(size) if size.isdigit() else constants.get(size)
+            else:
+                plain = _FIELD.match(decl)
+                if not plain:
+                    fields = None
+                    break
+                ftype, fname = plain.groups()
+                count = 1
+            if count is None or (ftype not in SCALAR_TYPES and ftype not in structs):
+                fields = None
+                break
+            fields.append((fname, ftype, count))
+        if fields is not None and name not in structs:
+            structs[name] = fields
+    return structs
+
+
+def parse_registrations(text):
+    """``[(kind, name, input_type), ...]`` from REGISTER_USER_FUNCTIONS_AND_PROCEDURES."""
+    return [(kind.lower(), name, int(index))
+            for kind, name, index in _REGISTER.findall(strip_comments(text))]
+
+
+def parse_header(text, defines=None):
+    """``(constants, structs)`` parsed from QuGate.h source *text*."""
+    constants = parse_constants(text, defines)
+    return constants, parse_structs(text, constants)
+
+
+def codecs(structs, names=None):
+    """Build Codec objects for *names* (default: all) and the structs they nest."""
+    built = {}
+
+    def build(name):
+        if name not in built:
+            fields = []
+            for fname, ftype, count in structs[name]:
+                if ftype not in SCALAR_TYPES:
+                    ftype = build(ftype)
+                fields.append((fname, ftype, count) if count != 1 else (fname, ftype))
+            built[name] = Codec(name, fields)
+        return built[name]
+
+    for name in structs if names is None else names:
+        build(name)
+    return built
+
+
+def constant_name(struct_name):
+    """Python constant for a struct: ``getGateBySlot_output`` -> ``GET_GATE_BY_SLOT_OUTPUT``."""
+    name = re.sub(r'^QUGATE_', '', struct_name).replace('QuGate', 'Qugate')
+    name = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', name)
+    return name.upper()
+
+
+def public_structs(text, structs):
+    """State records plus every registered entry point's _input/_output, in header order."""
+    wanted = set(STATE_RECORDS)
+    for _, name, _ in parse_registrations(text):
+        wanted.update((f'{name}_input', f'{name}_output'))
+    return [name for name in structs if name in wanted]
+
+
+def generate(structs, names):
+    """Python source defining one ``Codec`` constant per struct in *names*.
+
+    Nested structs must appear in *names* before the structs that use them.
+    """
+    lines = []
+    for name in names:
+        fields = structs[name]
+        rows = []
+        for fname, ftype, count in fields:
+            ref = constant_name(ftype) if ftype not in SCALAR_TYPES else repr(ftype)
+            rows.append(f"({fname!r}, {ref}, {count})" if count != 1 else f"({fname!r}, {ref})")
+        head = f"{constant_name(name)} = Codec({name!r}, ["
+        if not rows:
+            lines.append(f"{head}])")
+        elif len(rows) == 1 and len(head) + len(rows[0]) + 2 <= 100:
+            lines.append(f"{head}{rows[0]}])")
+        else:
+            lines.append(head)
+            lines.extend(f"    {row}," for row in rows)
+            lines.append("])")
+        lines.append("")
+    return '\n'.join(lines)
@@ -0,0 +1,183 @@
+"""
+Vectorized projection of HEARTBEAT gates through END_EPOCH.
+
+The heartbeat pass of END_EPOCH does, for each active HEARTBEAT gate with a
+configured heartbeat, at the end of epoch *E*:
+
+* not yet triggered: if ``E - lastHeartbeatEpoch > thresholdEpochs`` (uint32)
+  the gate is triggered with ``triggerEpoch = E``; nothing is paid that epoch;
+* triggered: if ``currentBalance > minimumBalance`` it pays
+  ``div(currentBalance * payoutPercentPerEpoch, 100)`` (the whole balance if
+  that rounds to 0). Beneficiary *j* gets ``div(payout * share_j, 100)`` and
+  the last one ``payout`` minus the others; with no beneficiaries the payout
+  goes down the chain. Then, still inside that branch, if the balance is now
+  ``<= minimumBalance`` the rest is split the same way (refunded to the owner
+  when there are no beneficiaries) and the gate closes. A triggered gate that
+  starts the epoch at or below ``minimumBalance`` is neither paid nor closed.
+
+:func:`project_heartbeats` replays that for any number of gates at once, in
+uint64 like the contract, and stops when every gate has closed:
+
+    state = heartbeat_state_from(configs, gates)   # getHeartbeat + getGate outputs
+    project_heartbeats(state, epoch)
+    state['paid']              # (n, 8) cumulative amount per beneficiary
+    state['closeEpoch']        # END_EPOCH that auto-closes the gate
+
+It assumes nothing else happens to the gates: no further heartbeat() or
+deposits, transfers and chain hops succeed, and no inactivity expiry.
+Idle maintenance is charged from the reserve, not the balance, so it does
+not change the schedule. Like :mod:`qugate.payouts`, this module needs NumPy.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from .constants import MAX_RECIPIENTS
+from .payouts import U64, _div, _u64
+
+EPOCH_MASK = 0xFFFFFFFF     # the epoch arithmetic is uint32
+
+
+def heartbeat_state(balance, threshold_epochs, last_heartbeat_epoch, payout_percent,
+                    minimum_balance, shares, beneficiary_count, triggered=0, trigger_epoch=0,
+                    chained=False):
+    """Columns for :func:`end_epoch`, one row per gate; *shares* is ``(n, 8)``.
+
+    *chained* marks gates with a ``chainNextGateId``. The result is keyed by
+    QUGATE_HeartbeatConfig/QUGATE_Gate field names, plus the running totals
+    ``paid`` (per beneficiary), ``chainedOut`` and ``refunded``.
+    """
+    balance = _u64(balance).reshape(-1)
+    n = len(balance)
+
+    def column(values, dtype=np.int64):
+        return np.array(np.broadcast_to(np.asarray(values, dtype=dtype), (n,)))
+
+    return {
+        'currentBalance': balance.copy(),
+        'thresholdEpochs': column(threshold_epochs),
+        'lastHeartbeatEpoch': column(last_heartbeat_epoch),
+        'payoutPercentPerEpoch': column(payout_percent, U64),
+        'minimumBalance': column(minimum_balance),
+        'beneficiaryShares': np.array(np.broadcast_to(_u64(shares), (n, MAX_RECIPIENTS))),
+        'beneficiaryCount': column(beneficiary_count),
+        'triggered': column(triggered),
+        'triggerEpoch': column(trigger_epoch),
+        'chained': column(chained, bool),
+        'closeEpoch': np.zeros(n, dtype=np.int64),
+        'paid': np.zeros((n, MAX_RECIPIENTS), dtype=U64),
+        'chainedOut': np.zeros(n, dtype=U64),
+        'refunded': np.zeros(n, dtype=U64),
+    }
+
+
+def heartbeat_state_from(configs, gates):
+    """:func:`heartbeat_state` from getHeartbeat outputs and the matching getGate outputs."""
+    configs, gates = list(configs), list(gates)
+    return heartbeat_state(
+        balance=[g['currentBalance'] for g in gates],
+        threshold_epochs=[c['thresholdEpochs'] for c in configs],
+        last_heartbeat_epoch=[c['lastHeartbeatEpoch'] for c in configs],
+        payout_percent=[c['payoutPercentPerEpoch'] for c in configs],
+        minimum_balance=[c['minimumBalance'] for c in configs],
+        shares=np.array([c['beneficiaryShares'] for c in configs], dtype=U64).reshape(-1, 8),
+        beneficiary_count=[c['beneficiaryCount'] for c in configs],
+        triggered=[c['triggered'] for c in configs],
+        trigger_epoch=[c['triggerEpoch'] for c in configs],
+        chained=[g['chainNextGateId'] != -1 for g in gates],
+    )
+
+
+def beneficiary_portions(amount, shares, count):
+    """``div(amount * share_j, 100)`` per beneficiary, the last one taking the remainder."""
+    amount = _u64(amount)
+    count = np.asarray(count, dtype=np.int64)
+    used = np.arange(MAX_RECIPIENTS) < count[:, None]
+    portions = np.where(used, amount[:, None] * shares // U64(100), U64(0))
+    rows = np.flatnonzero(count > 0)
+    last = count[rows] - 1
+    portions[rows, last] = 0
+    portions[rows, last] = amount[rows] - portions[rows].sum(axis=1, dtype=U64)
+    return portions
+
+
+def end_epoch(state, epoch):
+    """Apply the heartbeat pass of END_EPOCH for *epoch* in place.
+
+    Returns the ``(n, 8)`` amounts paid to beneficiaries in this epoch.
+    """
+    n = len(state['currentBalance'])
+    out = np.zeros((n, MAX_RECIPIENTS), dtype=U64)
+    open_ = state['closeEpoch'] == 0
+    waiting = open_ & (state['triggered'] == 0)
+    rows = np.flatnonzero(open_ & ~waiting)
+
+    fire = waiting & (((epoch - state['lastHeartbeatEpoch']) & EPOCH_MASK)
+                      > state['thresholdEpochs'])
+    state['triggered'][fire] = 1
+    state['triggerEpoch'][fire] = epoch
+    if not len(rows):
+        return out
+
+    balance = state['currentBalance'][rows]
+    minimum = state['minimumBalance'][rows]
+    shares = state['beneficiaryShares'][rows]
+    count = state['beneficiaryCount'][rows]
+    chained = state['chained'][rows]
+
+    over = balance.astype(np.int64) > minimum
+    payout = np.where(over, _div(balance * state['payoutPercentPerEpoch'][rows], U64(100)),
+                      U64(0))
+    payout = np.where(over & (payout == 0), balance, payout)
+    paid = beneficiary_portions(payout, shares, count)
+    distributed = paid.sum(axis=1, dtype=U64)
+    onward = np.where(chained, payout - distributed, U64(0))
+    balance = balance - distributed - onward
+
+    closing = over & (balance.astype(np.int64) <= minimum)
+    dust = np.where(closing, balance, U64(0))
+    paid += beneficiary_portions(dust, shares, count)
+    refund = np.where(count == 0, dust, U64(0))
+
+    state['currentBalance'][rows] = np.where(closing, U64(0), balance)
+    state['closeEpoch'][rows[closing]] = epoch
+    state['paid'][rows] += paid
+    state['chainedOut'][rows] += onward
+    state['refunded'][rows] += refund
+    out[rows] = paid
+    return out
+
+
+def heartbeat_schedule(state, epoch, until=None):
+    """Yield ``(epoch, paid)`` for each END_EPOCH from *epoch* on, updating *state*.
+
+    Epochs in which no gate can pay are skipped. Stops when every gate has
+    closed or can no longer change (its balance is at or below
+    ``minimumBalance``, or nothing is left to pay), or after *until*.
+    """
+    stuck = np.zeros(len(state['currentBalance']), dtype=bool)
+    while until is None or epoch <= until:
+        open_ = (state['closeEpoch'] == 0) & ~stuck
+        if not open_.any():
+            return
+        if not (open_ & (state['triggered'] == 1)).any():
+            waiting = np.flatnonzero(open_)
+            due = (state['lastHeartbeatEpoch'][waiting] + state['thresholdEpochs'][waiting]
+                   + 1).min()
+            epoch = max(epoch, int(due))
+            if until is not None and epoch > until:
+                return
+        before = state['currentBalance'].copy()
+        was_triggered = state['triggered'] == 1
+        paid = end_epoch(state, epoch)
+        stuck |= (was_triggered & (state['closeEpoch'] == 0)
+                  & (state['currentBalance'] == before))
+        yield epoch, paid
+        epoch += 1
+
+
+def project_heartbeats(state, epoch, until=None):
+    """Run :func:`heartbeat_schedule` to the end and return the final *state*."""
+    for _ in heartbeat_schedule(state, epoch, until):
+        pass
+    return state
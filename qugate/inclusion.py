@@ -0,0 +1,170 @@
+"""
+Transaction inclusion tracking.
+
+A broadcast only tells us the node accepted the packet. Whether the
+transaction made it into its target tick is known once that tick has been
+processed: its ``tickData`` lists every included transaction id. The
+:class:`InclusionTracker` waits on a :class:`~qugate.clock.TickClock` for
+the target tick to pass, reads the tick data once per tick (resolving every
+handle aimed at it) and reports each handle as ``included`` or ``dropped``:
+
+    tracker = InclusionTracker(client, clock)
+    tracker.track(broadcaster.send_contract_call(seed, PROC_CREATE_GATE, 1000, data))
+    tracker.settle(timeout=120)        # [] once everything is included
+
+Nodes without the ``/query/v1`` API (they answer 404 or 501) cannot confirm
+inclusion; handles on those resolve as ``unverified`` as soon as their tick
+has passed. Any other failure (a timeout, a 5xx, an open circuit breaker)
+leaves the tick pending and is retried with backoff.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+
+from .client import RpcError
+from .resilience import Backoff, Histogram
+
+PENDING = 'pending'
+INCLUDED = 'included'
+DROPPED = 'dropped'
+UNVERIFIED = 'unverified'
+
+# upper bounds (seconds) of the track-to-included latency buckets
+INCLUSION_BUCKETS = (2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# HTTP statuses that mean the node has no tick-data API at all
+UNSUPPORTED_STATUSES = (404, 501)
+
+
+def _unsupported(exc):
+    response = getattr(exc.__cause__, 'response', None)
+    return getattr(response, 'status_code', None) in UNSUPPORTED_STATUSES
+
+
+class InclusionTracker:
+    """Resolves :class:`~qugate.tx.TxHandle` objects against processed tick data.
+
+    A processed tick with no tick data yet is retried until ``grace`` ticks
+    later, after which its handles count as dropped (the tick was empty).
+    Transient tick-data errors are counted in ``errors`` and retried after
+    *backoff* delays. ``resolved`` counts handles per final status and ``latency`` holds the
+    seconds from :meth:`track` to a confirmed inclusion.
+    """
+
+    def __init__(self, client, clock, grace=5, backoff=None):
+        self.client = client
+        self.clock = clock
+        self.grace = grace
+        self.backoff = Backoff(base=1.0, cap=30.0) if backoff is None else backoff
+        self.verify = True
+        self.errors = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self.resolved = defaultdict(int)
+        self.latency = Histogram(INCLUSION_BUCKETS)
+        self._status = {}
+        self._by_tick = {}
+        self._tracked_at = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Handles whose target tick has not been resolved yet, oldest tick first."""
+        with self._lock:
+            return [h for tick in sorted(self._by_tick) for h in self._by_tick[tick]]
+
+    def track(self, handle):
+        """Start tracking *handle*; returns it so calls can be chained."""
+        with self._lock:
+            if handle not in self._status:
+                self._status[handle] = PENDING
+                self._by_tick.setdefault(handle.tick, []).append(handle)
+                self._tracked_at[handle] = time.monotonic()
+        return handle
+
+    def status(self, handle):
+        return self._status.get(handle, PENDING)
+
+    def outcomes(self):
+        """``({status: count}, latency histogram)``, copied for reporting."""
+        with self._lock:
+            return dict(self.resolved), self.latency.copy()
+
+    def _settle_tick(self, tick, statuses):
+        now = time.monotonic()
+        with self._lock:
+            for handle in self._by_tick.pop(tick, []):
+                status = self._status[handle] = statuses(handle)
+                self.resolved[status] += 1
+                tracked_at = self._tracked_at.pop(handle)
+                if status == INCLUDED:
+                    self.latency.observe(now - tracked_at)
+
+    def _resolve(self, tick):
+        """Resolve the handles of processed *tick*; False if its tick data is not out yet."""
+        if not self.verify:
+            self._settle_tick(tick, lambda handle: UNVERIFIED)
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            data = self.client.tick_data(tick)
+        except RpcError as exc:
+            if not _unsupported(exc):
+                self.errors += 1
+                self._retry_at = time.monotonic() + self.backoff.delay(self._failures)
+                self._failures += 1
+                return False
+            self.verify = False       # no query API on this node
+            self._settle_tick(tick, lambda handle: UNVERIFIED)
+            return True
+        self._failures = 0
+        if not data:
+            if self.clock.current() <= tick + self.grace:
+                return False
+            self._settle_tick(tick, lambda handle: DROPPED)
+            return True
+        included = {h.lower() for h in data.get('transactionHashes') or ()}
+        self._settle_tick(tick, lambda handle: INCLUDED if handle.lower() in included else DROPPED)
+        return True
+
+    def poll(self):
+        """Resolve every tracked tick that has already been processed, without blocking."""
+        current = self.clock.current()
+        with self._lock:
+            ticks = sorted(t for t in self._by_tick if t < current)
+        for tick in ticks:
+            self._resolve(tick)
+
+    def wait(self, handle, timeout=None):
+        """Block until *handle* is resolved; returns its status (``pending`` on timeout)."""
+        self.track(handle)
+        end = None if timeout is None else time.monotonic() + timeout
+        while self.status(handle) == PENDING:
+            # the target tick is processed once the network is working on a later one
+            current = self.clock.current()
+            if current > handle.tick:
+                if self._resolve(handle.tick):
+                    continue
+                target = current + 1          # tick data not published yet
+            else:
+                target = handle.tick + 1
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self.clock.wait_until(target, remaining)
+        return self.status(handle)
+
+    def settle(self, timeout=None):
+        """Wait for every pending handle; returns the ones not included (dropped or timed out).
+
+        Handles resolved ``unverified`` count as settled.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        pending = self.pending
+        for handle in pending:
+            remaining = None if end is None else max(end - time.monotonic(), 0)
+            self.wait(handle, remaining)
+        return [h for h in pending if self.status(h) in (PENDING, DROPPED)]
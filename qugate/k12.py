@@ -0,0 +1,84 @@
+"""
+KangarooTwelve (K12) hash, as used by Qubic for key derivation, transaction
+digests, signatures and identity checksums.
+
+Pure Python implementation of the reduced-round (12-round) Keccak-p[1600]
+sponge with the K12 tree-hashing mode for inputs longer than 8 KiB.
+"""
+from __future__ import annotations
+
+import struct
+
+_ROUND_CONSTANTS = (
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+_ROTATIONS = (
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+)
+_MASK = (1 << 64) - 1
+_RATE = 168
+_CHUNK = 8192
+_LANES = struct.Struct('<21Q')
+
+# pi step: destination lane for source lane x + 5y is y + 5((2x + 3y) % 5)
+_PI = tuple(y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5))
+
+
+def _permute(a):
+    """Keccak-p[1600, 12] on a list of 25 lanes."""
+    for rc in _ROUND_CONSTANTS:
+        c = [a[x] ^ a[x + 5] ^ a[x + 10] ^ a[x + 15] ^ a[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK)
+             for x in range(5)]
+        b = [0] * 25
+        for i in range(25):
+            v = a[i] ^ d[i % 5]
+            n = _ROTATIONS[i]
+            b[_PI[i]] = ((v << n) | (v >> (64 - n))) & _MASK if n else v
+        a = [b[i] ^ (~b[i - i % 5 + (i + 1) % 5] & b[i - i % 5 + (i + 2) % 5]) for i in range(25)]
+        a[0] ^= rc
+    return a
+
+
+def _turboshake(message, suffix, output_length):
+    state = [0] * 25
+    data = bytearray(message)
+    data.append(suffix)
+    data.extend(bytes(-len(data) % _RATE))
+    data[-1] |= 0x80
+    for offset in range(0, len(data), _RATE):
+        for i, lane in enumerate(_LANES.unpack_from(data, offset)):
+            state[i] ^= lane
+        state = _permute(state)
+    out = bytearray()
+    while True:
+        out += _LANES.pack(*state[:21])
+        if len(out) >= output_length:
+            return bytes(out[:output_length])
+        state = _permute(state)
+
+
+def _length_encode(x):
+    encoded = x.to_bytes((x.bit_length() + 7) // 8, 'big') if x else b''
+    return encoded + bytes([len(encoded)])
+
+
+def k12(message, output_length=32, customization=b''):
+    """KangarooTwelve(*message*, *customization*) truncated to *output_length* bytes."""
+    s = bytes(message) + customization + _length_encode(len(customization))
+    if len(s) <= _CHUNK:
+        return _turboshake(s, 0x07, output_length)
+    node = bytearray(s[:_CHUNK])
+    node += b'\x03' + bytes(7)
+    chunks = 0
+    for offset in range(_CHUNK, len(s), _CHUNK):
+        node += _turboshake(s[offset:offset + _CHUNK], 0x0B, 32)
+        chunks += 1
+    node += _length_encode(chunks) + b'\xff\xff'
+    return _turboshake(node, 0x06, output_length)
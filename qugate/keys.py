@@ -0,0 +1,103 @@
+"""
+Qubic key derivation: seed -> subseed -> private key -> public key -> identity.
+
+A seed is 55 lowercase letters. Every step is a KangarooTwelve hash except
+the public key, which is private_key * G on FourQ. Seed derivation and
+identity decoding are memoized, so resolving the same wallets over and over
+(every script does) costs a dict lookup after the first call.
+"""
+from __future__ import annotations
+
+import functools
+import struct
+
+from . import fourq
+from .k12 import k12
+
+SEED_LENGTH = 55
+IDENTITY_LENGTH = 60
+
+
+def subseed_from_seed(seed):
+    if len(seed) != SEED_LENGTH or not all('a' <= c <= 'z' for c in seed):
+        raise ValueError(f"seed must be {SEED_LENGTH} lowercase letters a-z")
+    return k12(bytes(ord(c) - ord('a') for c in seed), 32)
+
+
+def private_key_from_subseed(subseed):
+    return k12(subseed, 32)
+
+
+def public_key_from_private_key(private_key):
+    return fourq.public_key(private_key)
+
+
+@functools.lru_cache(maxsize=4096)
+def derive_keys(seed):
+    """(subseed, private_key, public_key) for *seed*."""
+    subseed = subseed_from_seed(seed)
+    private_key = private_key_from_subseed(subseed)
+    return subseed, private_key, public_key_from_private_key(private_key)
+
+
+def _checksum(public_key):
+    return int.from_bytes(k12(public_key, 3), 'little') & 0x3FFFF
+
+
+def identity_from_public_key(public_key, lowercase=False):
+    """60-char identity: 56 base-26 chars of the key + 4 checksum chars."""
+    base = ord('a') if lowercase else ord('A')
+    chars = []
+    for (fragment,) in struct.iter_unpack('<Q', public_key):
+        for _ in range(14):
+            chars.append(chr(base + fragment % 26))
+            fragment //= 26
+    checksum = _checksum(public_key)
+    for _ in range(4):
+        chars.append(chr(base + checksum % 26))
+        checksum //= 26
+    return ''.join(chars)
+
+
+@functools.lru_cache(maxsize=4096)
+def public_key_from_identity(identity, verify_checksum=True):
+    """32-byte public key for a 60-char identity (either case).
+
+    Raises ValueError for a malformed identity or, unless *verify_checksum*
+    is False, one whose last four characters do not match the key.
+    """
+    if len(identity) != IDENTITY_LENGTH:
+        raise ValueError(f"identity must be {IDENTITY_LENGTH} characters")
+    upper = identity.upper()
+    if not all('A' <= c <= 'Z' for c in upper):
+        raise ValueError("identity must contain only letters A-Z")
+    fragments = []
+    for i in range(4):
+        value = 0
+        for c in reversed(upper[i * 14:(i + 1) * 14]):
+            value = value * 26 + ord(c) - ord('A')
+        if value >> 64:
+            raise ValueError("identity fragment out of range")
+        fragments.append(value)
+    public_key = struct.pack('<4Q', *fragments)
+    if verify_checksum:
+        checksum = 0
+        for c in reversed(upper[56:]):
+            checksum = checksum * 26 + ord(c) - ord('A')
+        if checksum != _checksum(public_key):
+            raise ValueError(f"identity checksum mismatch: {identity}")
+    return public_key
+
+
+def is_valid_identity(identity):
+    try:
+        public_key_from_identity(identity)
+    except ValueError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def identity_from_seed(seed):
+    """Uppercase identity of *seed* (what ``qubic-cli -showkeys`` prints)."""
+    return identity_from_public_key(derive_keys(seed)[2])
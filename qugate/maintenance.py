@@ -0,0 +1,280 @@
+"""
+Forecast of END_EPOCH idle-maintenance charges, delinquency and expiry.
+
+END_EPOCH charges every eligible gate from its ``reserve``, in slot order:
+
+* admin drain: a gate with a live admin gate pays
+  ``div(_idleFee * IDLE_MULTISIG_MULTIPLIER_BPS, 10000)`` for it whenever
+  its own cycle is due, refreshing the admin gate's schedule;
+* a gate that was active within ``_idleWindowEpochs`` or is in a hold state
+  (untriggered heartbeat, armed time lock, THRESHOLD/ORACLE/MULTISIG with a
+  balance) is never charged itself. Once per cycle a hold-state gate pays its
+  live downstream gates' fees (chain target and gate-as-recipients), plus
+  ``IDLE_SHIELD_PER_TARGET_BPS`` per target;
+* any other gate pays its own fee when ``nextIdleChargeEpoch`` comes round.
+  :func:`idle_multiplier_bps` gives the multiplier: 1.5x for 3+ recipients,
+  2x for 8, at least 1.5x for HEARTBEAT and MULTISIG, +0.5x if chained. A gate
+  that cannot pay turns delinquent. If it is still delinquent
+  ``_idleGraceEpochs`` later, the expiry pass closes it.
+
+:class:`MaintenanceForecaster` replays those passes epoch by epoch over a
+snapshot of the whole table, with the knock-on effects between gates, so
+reserves can be topped up in bulk before anything goes delinquent:
+
+    forecaster = MaintenanceForecaster.from_client(client)
+    for gate_id, row in forecaster.forecast(epochs=12).items():
+        if row['topUp']:
+            ...                        # fundGate(gate_id) with row['topUp']
+
+It assumes nothing else happens to the gates over the horizon: no payments,
+heartbeats or fundings, and hold states as in the snapshot.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import (
+    IDLE_BASE_MULTIPLIER_BPS,
+    IDLE_CHAIN_EXTRA_BPS,
+    IDLE_HEARTBEAT_MULTIPLIER_BPS,
+    IDLE_MAX_RECIPIENT_MULTIPLIER_BPS,
+    IDLE_MULTI_RECIPIENT_MULTIPLIER_BPS,
+    IDLE_MULTI_RECIPIENT_THRESHOLD,
+    IDLE_MULTISIG_MULTIPLIER_BPS,
+    IDLE_SHIELD_PER_TARGET_BPS,
+    MAX_RECIPIENTS,
+    MODE_HEARTBEAT,
+    MODE_MULTISIG,
+    MODE_ORACLE,
+    MODE_THRESHOLD,
+    MODE_TIME_LOCK,
+)
+from .crawl import SlotCrawler
+from .gateid import gate_slot
+
+EPOCH_MASK = 0xFFFF          # nextIdleChargeEpoch, lastActivityEpoch: uint16
+UNLIMITED_RESERVE = 1 << 62
+
+
+def idle_multiplier_bps(gate):
+    """Multiplier of ``_idleFee`` for *gate*'s own idle charge, in basis points."""
+    bps = IDLE_BASE_MULTIPLIER_BPS
+    if gate['recipientCount'] >= MAX_RECIPIENTS:
+        bps = IDLE_MAX_RECIPIENT_MULTIPLIER_BPS
+    elif gate['recipientCount'] >= IDLE_MULTI_RECIPIENT_THRESHOLD:
+        bps = IDLE_MULTI_RECIPIENT_MULTIPLIER_BPS
+    if gate['mode'] == MODE_HEARTBEAT:
+        bps = max(bps, IDLE_HEARTBEAT_MULTIPLIER_BPS)
+    if gate['mode'] == MODE_MULTISIG:
+        bps = max(bps, IDLE_MULTISIG_MULTIPLIER_BPS)
+    if gate['chainNextGateId'] >= 0:
+        bps += IDLE_CHAIN_EXTRA_BPS
+    return bps
+
+
+def idle_charge(idle_fee, gate):
+    """``div(_idleFee * multiplier, 10000)``: what END_EPOCH charges *gate* per cycle."""
+    return idle_fee * idle_multiplier_bps(gate) // 10000
+
+
+def delinquent_epoch(gate, epoch, grace_epochs):
+    """The ``_idleDelinquentEpochs`` entry implied by a getGate output (0 if not delinquent)."""
+    if not gate['idleDelinquent']:
+        return 0
+    if gate['idleExpiryOverdue']:
+        return max(epoch - grace_epochs, 1)
+    return epoch - (grace_epochs - gate['idleGraceRemainingEpochs']) if grace_epochs else epoch
+
+
+class MaintenanceForecaster:
+    """END_EPOCH's maintenance and expiry passes over ``{gate_id: getGate output}``.
+
+    *heartbeats*, *multisigs* and *time_locks* map gate IDs to getHeartbeat,
+    getMultisigState and getTimeLockState outputs; they decide eligibility
+    and hold states (a gate of those modes without one is taken as
+    unconfigured). *fees* is a getFees output and *epoch* the current epoch,
+    whose END_EPOCH is the first one replayed.
+    """
+
+    def __init__(self, fees, epoch, gates, heartbeats=None, multisigs=None, time_locks=None):
+        self.fees = fees
+        self.epoch = epoch
+        self.gates = dict(gates)
+        self.heartbeats = dict(heartbeats or {})
+        self.multisigs = dict(multisigs or {})
+        self.time_locks = dict(time_locks or {})
+
+    @classmethod
+    def from_client(cls, client, workers=None):
+        """Snapshot every live gate with one slot crawl plus the mode configs."""
+        table = SlotCrawler(client, workers).crawl()
+        gates = {}
+        for slot in table.active_slots():
+            row = table.row(slot)
+            gates[row['gateId']] = row
+        queries = {MODE_HEARTBEAT: 'get_heartbeat', MODE_MULTISIG: 'get_multisig_state',
+                   MODE_TIME_LOCK: 'get_time_lock_state'}
+        configs = {mode: {} for mode in queries}
+        jobs = [(g['mode'], gid) for gid, g in gates.items() if g['mode'] in queries]
+        if jobs:
+            workers = min(len(jobs), workers or client.pool_size)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(lambda job: getattr(client, queries[job[0]])(job[1]), jobs)
+                for (mode, gid), config in zip(jobs, results):
+                    configs[mode][gid] = config
+        return cls(client.get_fees(), table.epoch, gates, configs[MODE_HEARTBEAT],
+                   configs[MODE_MULTISIG], configs[MODE_TIME_LOCK])
+
+    def _state(self, gate_id, gate, unlimited):
+        hb = self.heartbeats.get(gate_id, {})
+        ms = self.multisigs.get(gate_id, {})
+        tl = self.time_locks.get(gate_id, {})
+        mode, balance = gate['mode'], gate['currentBalance']
+        armed = bool(tl.get('active') and not tl.get('fired') and not tl.get('cancelled'))
+        waiting = bool(hb.get('active') and not hb.get('triggered'))
+        if mode == MODE_HEARTBEAT:
+            eligible, hold = bool(hb.get('active')), waiting
+        elif mode == MODE_MULTISIG:
+            eligible = bool(ms.get('guardianCount') and ms.get('required'))
+            hold = balance > 0 or bool(ms.get('proposalActive'))
+        elif mode == MODE_TIME_LOCK:
+            eligible, hold = bool(tl.get('active')), armed and balance > 0
+        else:
+            eligible, hold = True, mode in (MODE_THRESHOLD, MODE_ORACLE) and balance > 0
+        targets = [gate['chainNextGateId']]
+        targets += gate['recipientGateIds'][:gate['recipientCount']]
+        return {
+            'gateId': gate_id, 'mode': mode, 'recipientCount': gate['recipientCount'],
+            'chainNextGateId': gate['chainNextGateId'], 'adminGateId': gate['adminGateId'],
+            'targets': [t for t in targets if t >= 0], 'currentBalance': balance,
+            'reserve': UNLIMITED_RESERVE if unlimited else gate['reserve'],
+            'nextIdleChargeEpoch': gate['nextIdleChargeEpoch'],
+            'lastActivityEpoch': gate['lastActivityEpoch'],
+            'delinquent': delinquent_epoch(gate, self.epoch, self.fees['idleGraceEpochs']),
+            'active': True, 'eligible': eligible, 'hold': hold,
+            'expiryExempt': ((mode == MODE_TIME_LOCK and armed)
+                             or (mode == MODE_HEARTBEAT and waiting)
+                             or (mode == MODE_MULTISIG and balance > 0)),
+            'charges': [], 'shortEpoch': 0, 'delinquentEpoch': 0, 'expiryEpoch': 0,
+        }
+
+    def _debit(self, gate, cost, epoch):
+        if gate['reserve'] >= cost:
+            gate['reserve'] -= cost
+            gate['charges'].append((epoch, cost))
+            return True
+        gate['shortEpoch'] = gate['shortEpoch'] or epoch
+        return False
+
+    @staticmethod
+    def _refresh(gate, epoch, window):
+        gate['lastActivityEpoch'] = epoch
+        if window:
+            gate['nextIdleChargeEpoch'] = (epoch + window) & EPOCH_MASK
+        gate['delinquent'] = 0
+
+    def _maintenance(self, table, order, epoch):
+        fee, window = self.fees['idleFee'], self.fees['idleWindowEpochs']
+        for gate in order:
+            if not gate['active'] or not gate['eligible'] or fee == 0:
+                continue
+            due = gate['nextIdleChargeEpoch'] == 0 or epoch >= gate['nextIdleChargeEpoch']
+            admin = table.get(gate['adminGateId'])
+            if due and admin is not None and admin['active']:
+                cost = fee * IDLE_MULTISIG_MULTIPLIER_BPS // 10000
+                if gate['reserve'] > 0 and self._debit(gate, cost, epoch):
+                    self._refresh(admin, epoch, window)
+                else:
+                    gate['shortEpoch'] = gate['shortEpoch'] or epoch
+            recently = window > 0 and epoch - gate['lastActivityEpoch'] < window
+            if recently or gate['hold']:
+                if due and window:
+                    gate['nextIdleChargeEpoch'] = (epoch + window) & EPOCH_MASK
+                gate['delinquent'] = 0
+                if due and gate['hold']:
+                    self._shield(table, gate, epoch, fee, window)
+                continue
+            if gate['nextIdleChargeEpoch'] == 0 and window:
+                gate['nextIdleChargeEpoch'] = (epoch + window) & EPOCH_MASK
+                continue
+            if window and epoch > 0 and gate['nextIdleChargeEpoch'] and due:
+                if self._debit(gate, idle_charge(fee, gate), epoch):
+                    gate['nextIdleChargeEpoch'] = (epoch + window) & EPOCH_MASK
+                    gate['delinquent'] = 0
+                elif gate['delinquent'] == 0:
+                    gate['delinquent'] = epoch
+                    gate['delinquentEpoch'] = gate['delinquentEpoch'] or epoch
+
+    def _shield(self, table, gate, epoch, fee, window):
+        """A hold-state gate pays its live downstream gates' idle fees plus the surcharge."""
+        targets = [table[t] for t in gate['targets'] if t in table and table[t]['active']]
+        if not targets:
+            return
+        if gate['reserve'] <= 0:
+            gate['shortEpoch'] = gate['shortEpoch'] or epoch
+            return
+        for target in targets:
+            if self._debit(gate, idle_charge(fee, target), epoch):
+                self._refresh(target, epoch, window)
+        self._debit(gate, fee * len(targets) * IDLE_SHIELD_PER_TARGET_BPS // 10000, epoch)
+
+    def _expiry(self, table, order, epoch):
+        grace, expiry = self.fees['idleGraceEpochs'], self.fees['expiryEpochs']
+        if not expiry:
+            return
+        for gate in order:
+            if not gate['active'] or (gate['expiryExempt'] and not gate['delinquent']):
+                continue
+            if gate['mode'] == MODE_MULTISIG and gate['recipientCount'] == 0:
+                if any(g['active'] and g['adminGateId'] == gate['gateId'] for g in order):
+                    continue
+                if gate['currentBalance'] == 0 and gate['reserve'] <= 0:
+                    gate['active'] = False
+                    gate['expiryEpoch'] = epoch
+                    continue
+            overdue = gate['delinquent'] and grace and epoch - gate['delinquent'] >= grace
+            if overdue or epoch - gate['lastActivityEpoch'] >= expiry:
+                gate['active'] = False
+                gate['expiryEpoch'] = epoch
+
+    def simulate(self, epochs, unlimited=False):
+        """Replay *epochs* END_EPOCHs; returns the per-gate working state by gate ID.
+
+        With *unlimited*, every reserve is treated as bottomless, so the
+        charges are what keeping every gate paid up would cost.
+        """
+        table = {gid: self._state(gid, gate, unlimited) for gid, gate in self.gates.items()
+                 if gate['active']}
+        order = sorted(table.values(), key=lambda g: gate_slot(g['gateId']))
+        for epoch in range(self.epoch, self.epoch + epochs):
+            self._maintenance(table, order, epoch)
+            self._expiry(table, order, epoch)
+        return table
+
+    def forecast(self, epochs):
+        """Per gate, over the next *epochs* END_EPOCHs:
+
+        ``nextChargeEpoch``/``nextChargeAmount`` (the first debit of its
+        reserve, 0 if none), ``charged`` in total, the ``reserve`` left,
+        ``runwayEpochs`` until a charge first cannot be covered (None if
+        never), the epochs it would turn ``delinquentEpoch`` and
+        ``expiryEpoch`` (0 if not), and ``topUp``: how much more reserve
+        keeps it paid up throughout.
+        """
+        actual = self.simulate(epochs)
+        needed = self.simulate(epochs, unlimited=True)
+        out = {}
+        for gate_id, gate in actual.items():
+            first = gate['charges'][0] if gate['charges'] else (0, 0)
+            required = sum(cost for _, cost in needed[gate_id]['charges'])
+            out[gate_id] = {
+                'nextChargeEpoch': first[0],
+                'nextChargeAmount': first[1],
+                'charged': sum(cost for _, cost in gate['charges']),
+                'reserve': gate['reserve'],
+                'runwayEpochs': gate['shortEpoch'] - self.epoch if gate['shortEpoch'] else None,
+                'delinquentEpoch': gate['delinquentEpoch'],
+                'expiryEpoch': gate['expiryEpoch'],
+                'topUp': max(0, required - self.gates[gate_id]['reserve']),
+            }
+        return out
@@ -0,0 +1,188 @@
+"""
+Local stand-in for a Qubic node, backed by :class:`~qugate.simulator.ContractSimulator`.
+
+:class:`LocalNode` serves the node's HTTP RPC on 127.0.0.1:41841:
+``/live/v1/tick-info``, ``/live/v1/querySmartContract`` (the simulated
+contract's index, 25 by default), ``/live/v1/balances/{identity}``,
+``/live/v1/broadcast-transaction`` and ``/query/v1/getTickData``. It also
+accepts the ``BROADCAST_TRANSACTION`` packets that
+:class:`~qugate.tx.Broadcaster` writes to the node port 31841. A clock thread
+advances the simulator ``tick_rate`` ticks per second, far faster than a real
+network. Scripts written against a real node can therefore run against it
+unchanged::
+
+    python -m qugate node --tick-rate 20 --ticks-per-epoch 600 \\
+        --fund SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN
+
+Only broadcasts are understood on the node port; other packets (such as the
+tick-info requests ``qubic-cli`` makes) are read and ignored.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from .constants import DEFAULT_NODE_PORT, DEFAULT_RPC
+from .simulator import ContractSimulator
+from .tx import BROADCAST_TRANSACTION
+
+DEFAULT_PORT = urlsplit(DEFAULT_RPC).port
+DEFAULT_TICK_RATE = 10.0
+DEFAULT_FUNDING = 10 ** 12
+PACKET_HEADER_SIZE = 8
+
+
+class _PacketServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class LocalNode:
+    """HTTP RPC and broadcast intake for a :class:`ContractSimulator`, on its own clock.
+
+    A *tick_rate* of 0 leaves the clock to the caller (``node.simulator.advance()``).
+    """
+
+    def __init__(self, simulator=None, tick_rate=DEFAULT_TICK_RATE):
+        self.simulator = ContractSimulator() if simulator is None else simulator
+        self.tick_rate = tick_rate
+        self.rpc_port = None
+        self.node_port = None
+        self._servers = []
+        self._clock = None
+        self._stop = threading.Event()
+
+    def serve(self, host='127.0.0.1', port=DEFAULT_PORT, node_port=DEFAULT_NODE_PORT):
+        """Start the RPC server, the broadcast listener and the clock on background threads.
+
+        Port 0 picks a free port; a *node_port* of None skips the broadcast
+        listener. Returns ``(rpc port, node port)``.
+        """
+        self._stop.clear()
+        rpc = ThreadingHTTPServer((host, port), self._http_handler())
+        self._start(rpc, 'qugate-node-rpc')
+        self.rpc_port = rpc.server_address[1]
+        if node_port is not None:
+            packets = _PacketServer((host, node_port), self._packet_handler())
+            self._start(packets, 'qugate-node-packets')
+            self.node_port = packets.server_address[1]
+        if self.tick_rate > 0:
+            self._clock = threading.Thread(target=self._run_clock, name='qugate-node-clock',
+                                           daemon=True)
+            self._clock.start()
+        return self.rpc_port, self.node_port
+
+    def _start(self, server, name):
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+        if self._clock is not None:
+            self._clock.join()
+            self._clock = None
+
+    def _run_clock(self):
+        interval = 1.0 / self.tick_rate
+        due = time.monotonic()
+        while True:
+            due += interval
+            if self._stop.wait(max(due - time.monotonic(), 0.0)):
+                return
+            self.simulator.advance()
+
+    def _http_handler(self):
+        simulator = self.simulator
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply(*simulator.handle('GET', self.path))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._reply(400, {'code': 3, 'message': 'request body is not valid JSON'})
+                    return
+                self._reply(*simulator.handle('POST', self.path, body))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _packet_handler(self):
+        simulator = self.simulator
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    header = self.rfile.read(PACKET_HEADER_SIZE)
+                    if len(header) < PACKET_HEADER_SIZE:
+                        return
+                    size = int.from_bytes(header[:3], 'little')
+                    payload = self.rfile.read(max(size - PACKET_HEADER_SIZE, 0))
+                    if len(payload) < size - PACKET_HEADER_SIZE:
+                        return
+                    if header[3] == BROADCAST_TRANSACTION:
+                        try:
+                            simulator.submit(payload)
+                        except ValueError:
+                            pass        # a node drops bad transactions without a reply
+
+        return Handler
+
+
+def _funding(text):
+    identity, _, amount = text.partition('=')
+    return identity, int(amount) if amount else DEFAULT_FUNDING
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m qugate node',
+                                     description='Serve a simulated QuGate node.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='HTTP RPC port')
+    parser.add_argument('--node-port', type=int, default=DEFAULT_NODE_PORT,
+                        help='port accepting broadcast packets')
+    parser.add_argument('--tick-rate', type=float, default=DEFAULT_TICK_RATE,
+                        help='ticks per second')
+    parser.add_argument('--ticks-per-epoch', type=int, default=1000)
+    parser.add_argument('--epoch', type=int, default=1)
+    parser.add_argument('--fund', type=_funding, action='append', default=[],
+                        metavar='IDENTITY[=QU]',
+                        help=f'credit an identity (default {DEFAULT_FUNDING} QU); repeatable')
+    args = parser.parse_args(argv)
+
+    simulator = ContractSimulator(epoch=args.epoch, ticks_per_epoch=args.ticks_per_epoch)
+    for identity, amount in args.fund:
+        simulator.fund(identity, amount)
+    node = LocalNode(simulator, args.tick_rate)
+    port, node_port = node.serve(args.host, args.port, args.node_port)
+    print(f"node: rpc http://{args.host}:{port}, broadcasts on {args.host}:{node_port}, "
+          f"{args.tick_rate:g} ticks/s", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        node.stop()
+        return 0
@@ -0,0 +1,129 @@
+"""Input payload builders for the QuGate procedures."""
+from __future__ import annotations
+
+from . import structs
+
+
+def _gate_recipient_ids(recipient_gate_ids):
+    # Unset entries default to -1 (wallet recipient), matching createGate/updateGate
+    ids = list(recipient_gate_ids or [])
+    return ids + [-1] * (8 - len(ids))
+
+
+def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None,
+                      chain_next_gate_id=-1, recipient_gate_ids=None):
+    """createGate_input (procedure 1)."""
+    allowed_senders = allowed_senders or []
+    return structs.CREATE_GATE_INPUT.encode(
+        mode=mode,
+        recipientCount=len(recipients_pk),
+        recipients=recipients_pk,
+        ratios=ratios,
+        threshold=threshold,
+        allowedSenders=allowed_senders,
+        allowedSenderCount=len(allowed_senders),
+        chainNextGateId=chain_next_gate_id,
+        recipientGateIds=_gate_recipient_ids(recipient_gate_ids),
+    )
+
+
+def build_send_to_gate(gate_id):
+    """sendToGate_input (procedure 2)."""
+    return structs.SEND_TO_GATE_INPUT.encode(gateId=gate_id)
+
+
+def build_close_gate(gate_id):
+    """closeGate_input (procedure 3)."""
+    return structs.CLOSE_GATE_INPUT.encode(gateId=gate_id)
+
+
+def build_update_gate(gate_id, recipients_pk, ratios, threshold=0, allowed_senders=None,
+                      recipient_gate_ids=None):
+    """updateGate_input (procedure 4)."""
+    allowed_senders = allowed_senders or []
+    return structs.UPDATE_GATE_INPUT.encode(
+        gateId=gate_id,
+        recipientCount=len(recipients_pk),
+        recipients=recipients_pk,
+        ratios=ratios,
+        threshold=threshold,
+        allowedSenders=allowed_senders,
+        allowedSenderCount=len(allowed_senders),
+        recipientGateIds=_gate_recipient_ids(recipient_gate_ids),
+    )
+
+
+def build_fund_gate(gate_id):
+    """fundGate_input (procedure 10)."""
+    return structs.FUND_GATE_INPUT.encode(gateId=gate_id)
+
+
+def build_set_chain(gate_id, next_gate_id):
+    """setChain_input (procedure 11); next_gate_id=-1 clears the chain."""
+    return structs.SET_CHAIN_INPUT.encode(gateId=gate_id, nextGateId=next_gate_id)
+
+
+def build_send_to_gate_verified(gate_id, expected_owner_pk):
+    """sendToGateVerified_input (procedure 12)."""
+    return structs.SEND_TO_GATE_VERIFIED_INPUT.encode(gateId=gate_id,
+                                                      expectedOwner=expected_owner_pk)
+
+
+def build_configure_heartbeat(gate_id, threshold_epochs, payout_pct, min_balance,
+                              beneficiaries_pk, shares):
+    """configureHeartbeat_input (procedure 13)."""
+    return structs.CONFIGURE_HEARTBEAT_INPUT.encode(
+        gateId=gate_id,
+        thresholdEpochs=threshold_epochs,
+        payoutPercentPerEpoch=payout_pct,
+        minimumBalance=min_balance,
+        beneficiaryAddresses=beneficiaries_pk,
+        beneficiaryShares=shares,
+        beneficiaryCount=len(beneficiaries_pk),
+    )
+
+
+def build_heartbeat(gate_id):
+    """heartbeat_input (procedure 14)."""
+    return structs.HEARTBEAT_INPUT.encode(gateId=gate_id)
+
+
+def build_configure_multisig(gate_id, guardian_pks, required, expiry_epochs,
+                             admin_approval_window_epochs=1):
+    """configureMultisig_input (procedure 16)."""
+    return structs.CONFIGURE_MULTISIG_INPUT.encode(
+        gateId=gate_id,
+        guardians=guardian_pks,
+        guardianCount=len(guardian_pks),
+        required=required,
+        proposalExpiryEpochs=expiry_epochs,
+        adminApprovalWindowEpochs=admin_approval_window_epochs,
+    )
+
+
+def build_configure_time_lock(gate_id, unlock_epoch=0, delay_epochs=0, lock_mode=0,
+                              cancellable=0):
+    """configureTimeLock_input (procedure 18)."""
+    return structs.CONFIGURE_TIME_LOCK_INPUT.encode(
+        gateId=gate_id,
+        unlockEpoch=unlock_epoch,
+        delayEpochs=delay_epochs,
+        lockMode=lock_mode,
+        cancellable=cancellable,
+    )
+
+
+def build_cancel_time_lock(gate_id):
+    """cancelTimeLock_input (procedure 19)."""
+    return structs.CANCEL_TIME_LOCK_INPUT.encode(gateId=gate_id)
+
+
+def build_set_admin_gate(gate_id, admin_gate_id, governance_policy=0):
+    """setAdminGate_input (procedure 21); admin_gate_id=-1 clears the admin gate."""
+    return structs.SET_ADMIN_GATE_INPUT.encode(gateId=gate_id, adminGateId=admin_gate_id,
+                                               governancePolicy=governance_policy)
+
+
+def build_withdraw_reserve(gate_id, amount=0):
+    """withdrawReserve_input (procedure 23); amount=0 withdraws everything."""
+    return structs.WITHDRAW_RESERVE_INPUT.encode(gateId=gate_id, amount=amount)
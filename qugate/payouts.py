@@ -0,0 +1,153 @@
+"""
+Vectorized expected payouts for SPLIT, ROUND_ROBIN and RANDOM gates.
+
+Each function takes one row per payment (NumPy arrays or anything
+``np.asarray`` accepts) and returns ``(n, MAX_RECIPIENTS)`` uint64 arrays of
+what each recipient slot receives. The arithmetic is the contract's own, in
+uint64, including ``QPI::div``/``QPI::mod`` returning 0 for a zero divisor:
+
+* SPLIT (processSplit): recipient *i* gets
+  ``div(amount, totalRatio) * ratio_i + div(mod(amount, totalRatio) * ratio_i, totalRatio)``
+  and the last recipient gets ``amount`` minus everything before it;
+* ROUND_ROBIN (processRoundRobin): everything to ``recipients[roundRobinIndex]``;
+* RANDOM (processRandom): everything to
+  ``recipients[mod(totalReceived + tick, recipientCount)]``, where
+  ``totalReceived`` already includes this payment.
+
+The amounts are what reaches the mode handler: after the dust check, and
+after the hop fee for chained deliveries. Payments to one gate within a batch
+depend on each other (the round-robin cursor, the running ``totalReceived``).
+:func:`sequence_positions` and :func:`running_totals` derive those per row, so
+a whole fleet is checked in a handful of array operations:
+
+    shares = split_payouts(ratios, counts, amounts)
+    bad = mismatches(shares, observed)               # rows that differ
+
+This module needs NumPy, which the rest of the package does not; import it
+as ``qugate.payouts``.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from .constants import MAX_RECIPIENTS, MODE_RANDOM, MODE_ROUND_ROBIN, MODE_SPLIT
+
+U64 = np.uint64
+
+
+def _u64(values):
+    return np.asarray(values, dtype=U64)
+
+
+def _div(a, b):
+    """QPI::div: ``a // b``, or 0 where *b* is 0."""
+    return np.where(b == 0, U64(0), a // np.where(b == 0, U64(1), b))
+
+
+def _mod(a, b):
+    """QPI::mod: ``a % b``, or 0 where *b* is 0."""
+    return np.where(b == 0, U64(0), a % np.where(b == 0, U64(1), b))
+
+
+def split_payouts(ratios, recipient_count, amount):
+    """Per-recipient SPLIT shares; *ratios* is ``(n, 8)``, the others ``(n,)``."""
+    ratios = _u64(ratios).reshape(-1, MAX_RECIPIENTS)
+    count = np.asarray(recipient_count, dtype=np.int64)
+    amount = _u64(amount)
+    used = np.arange(MAX_RECIPIENTS) < count[:, None]
+    ratios = np.where(used, ratios, U64(0))
+    total = ratios.sum(axis=1, dtype=U64)[:, None]
+    wide = amount[:, None]
+    shares = _div(wide, total) * ratios + _div(_mod(wide, total) * ratios, total)
+    shares = np.where(used, shares, U64(0))
+    rows = np.flatnonzero(count > 0)
+    last = count[rows] - 1
+    shares[rows, last] = 0
+    shares[rows, last] = amount[rows] - shares[rows].sum(axis=1, dtype=U64)
+    return shares
+
+
+def single_payouts(recipient_index, amount, recipient_count=None):
+    """The whole *amount* to ``recipient_index`` (nothing where *recipient_count* is 0)."""
+    index = np.asarray(recipient_index, dtype=np.int64)
+    amount = _u64(amount)
+    shares = np.zeros((len(index), MAX_RECIPIENTS), dtype=U64)
+    rows = np.arange(len(index))
+    if recipient_count is not None:
+        rows = rows[np.asarray(recipient_count) > 0]
+    shares[rows, index[rows]] = amount[rows]
+    return shares
+
+
+def round_robin_recipients(round_robin_index, recipient_count, position=0):
+    """Recipient of each payment: the cursor *position* payments after ``roundRobinIndex``."""
+    start = _u64(round_robin_index)
+    return _mod(start + _u64(position), _u64(recipient_count)).astype(np.int64)
+
+
+def random_recipients(total_received, tick, recipient_count):
+    """``mod(totalReceived + tick, recipientCount)`` with *total_received* including the payment."""
+    return _mod(_u64(total_received) + _u64(tick), _u64(recipient_count)).astype(np.int64)
+
+
+def sequence_positions(gate_ids):
+    """For each row, how many earlier rows paid the same gate (0, 1, 2, ... per gate)."""
+    gate_ids = np.asarray(gate_ids)
+    order = np.argsort(gate_ids, kind='stable')
+    ranked = gate_ids[order]
+    starts = np.r_[0, np.flatnonzero(ranked[1:] != ranked[:-1]) + 1]
+    group = np.repeat(starts, np.diff(np.r_[starts, len(ranked)]))
+    positions = np.empty(len(gate_ids), dtype=np.int64)
+    positions[order] = np.arange(len(ranked)) - group
+    return positions
+
+
+def running_totals(gate_ids, amount, total_before):
+    """``totalReceived`` after each row's payment, given each gate's total before the batch.
+
+    *total_before* is per row (the same value repeated for one gate's rows).
+    """
+    gate_ids = np.asarray(gate_ids)
+    amount = _u64(amount)
+    order = np.argsort(gate_ids, kind='stable')
+    ranked = gate_ids[order]
+    summed = np.cumsum(amount[order], dtype=U64)
+    starts = np.r_[0, np.flatnonzero(ranked[1:] != ranked[:-1]) + 1]
+    offset = np.repeat(np.r_[U64(0), summed[starts[1:] - 1]],
+                       np.diff(np.r_[starts, len(ranked)]))
+    totals = np.empty(len(gate_ids), dtype=U64)
+    totals[order] = summed - offset
+    return _u64(total_before) + totals
+
+
+def expected_payouts(mode, recipient_count, ratios, amount, tick=0, total_received=0,
+                     round_robin_index=0):
+    """Payouts for a mixed batch; rows of other modes come back all zero.
+
+    *total_received* (RANDOM) includes the payment; *round_robin_index*
+    (ROUND_ROBIN) is the cursor when the payment is processed.
+    """
+    mode = np.asarray(mode)
+    count = np.asarray(recipient_count, dtype=np.int64)
+    amount = _u64(amount)
+    n = len(amount)
+    total_received = np.broadcast_to(_u64(total_received), (n,))
+    tick = np.broadcast_to(_u64(tick), (n,))
+    cursor = np.broadcast_to(_u64(round_robin_index), (n,))
+    ratios = np.broadcast_to(_u64(ratios), (n, MAX_RECIPIENTS))
+    out = np.zeros((n, MAX_RECIPIENTS), dtype=U64)
+
+    rows = np.flatnonzero(mode == MODE_SPLIT)
+    out[rows] = split_payouts(ratios[rows], count[rows], amount[rows])
+    rows = np.flatnonzero(mode == MODE_ROUND_ROBIN)
+    out[rows] = single_payouts(round_robin_recipients(cursor[rows], count[rows]),
+                               amount[rows], count[rows])
+    rows = np.flatnonzero(mode == MODE_RANDOM)
+    out[rows] = single_payouts(random_recipients(total_received[rows], tick[rows], count[rows]),
+                               amount[rows], count[rows])
+    return out
+
+
+def mismatches(expected, observed):
+    """Row indices where *observed* payouts differ from *expected*."""
+    return np.flatnonzero((_u64(expected) != _u64(observed)).any(axis=1))
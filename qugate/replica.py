@@ -0,0 +1,160 @@
+"""
+In-memory replica of the contract's gate table, kept current from its event log.
+
+:class:`StateReplica` starts from one :class:`~qugate.crawl.SlotCrawler`
+crawl. After that it follows the decoded QuGateLogger events (see
+:mod:`qugate.events`), so it never needs to re-crawl:
+
+* any event that names a live gate (payment forwarded, bounced, dust burned,
+  chain hop, heartbeat, multisig, time lock, admin and maintenance events,
+  updates, creates) marks that gate dirty;
+* GATE_CLOSED drops the gate: its ID is stale from then on, just as
+  ``getGate`` treats it;
+* GATE_EXPIRED only marks the gate dirty. The contract also logs it when a
+  lazy-expiry refund transfer fails, and then the gate stays active;
+* FAIL_* records change no state and are only counted.
+
+Dirty gates are re-read when the event stream moves past their tick, with
+one concurrent getGateBatch pass (:meth:`QuGateClient.get_gates`) plus one
+getGateCount call for the totals.
+
+Some state changes are never logged, so the event stream cannot see them:
+
+* a successful fundGate (``reserve`` grows);
+* setChain on a gate with no admin gate (``chainNextGateId``, ``chainDepth``);
+* a THRESHOLD payment that stays below the threshold (``currentBalance``
+  grows).
+
+To pick those up, every *sweep_ticks* ticks of the stream the flush also
+re-reads every live gate in the same getGateBatch pass (``ceil(n / 32)``
+calls). :meth:`StateReplica.sweep` does the same on demand. Readers get
+gates from memory with no per-request node load: logged changes are at most
+one tick behind, unlogged ones at most *sweep_ticks*:
+
+    replica = StateReplica(client)
+    replica.bootstrap()
+    threading.Thread(target=replica.follow, args=(events,), daemon=True).start()
+    replica.gate(gate_id)          # getGate_output dict, or None once closed
+"""
+from __future__ import annotations
+
+import threading
+
+from .constants import LOG_GATE_CLOSED
+from .crawl import SlotCrawler
+from .structs import GET_GATE_OUTPUT
+
+CLOSING_TYPES = frozenset((LOG_GATE_CLOSED,))
+DEFAULT_SWEEP_TICKS = 20
+FIRST_FAILURE_TYPE = 100          # QUGATE_LOG_FAIL_* records
+GATE_FIELDS = [name for name, ftype, count in GET_GATE_OUTPUT.fields]
+
+
+class StateReplica:
+    """Live gates (``{gate_id: getGate_output}``) and getGateCount totals, event-driven."""
+
+    def __init__(self, client, workers=None, sweep_ticks=DEFAULT_SWEEP_TICKS):
+        self.client = client
+        self.workers = workers
+        self.sweep_ticks = sweep_ticks
+        self.gates = {}
+        self.counts = None
+        self.tick = None
+        self._pending_tick = None
+        self._dirty = set()
+        self._closed = set()
+        self._changed = False
+        self._swept_tick = None
+        self._lock = threading.Lock()
+        self.events = 0
+        self.failures = 0
+        self.rereads = 0
+        self.sweeps = 0
+
+    def bootstrap(self):
+        """Load every live gate from one getGateBySlot crawl."""
+        table = SlotCrawler(self.client, self.workers).crawl()
+        gates = {}
+        for slot in table.active_slots():
+            row = table.row(slot)
+            gates[row['gateId']] = {name: row[name] for name in GATE_FIELDS}
+        counts = self.client.get_gate_count()
+        with self._lock:
+            self.gates = gates
+            self.counts = counts
+            self.tick = table.tick
+        self._swept_tick = table.tick
+
+    def apply(self, event):
+        """Fold one decoded event in; re-reads happen once the stream reaches a later tick."""
+        if self._pending_tick is not None and event['tick'] > self._pending_tick:
+            self.flush()
+        self._pending_tick = event['tick']
+        self.events += 1
+        log_type, gate_id = event['_type'], event['gateId']
+        if log_type >= FIRST_FAILURE_TYPE:
+            self.failures += 1
+            return
+        self._changed = True
+        if log_type in CLOSING_TYPES:
+            self._dirty.discard(gate_id)
+            self._closed.add(gate_id)
+        elif gate_id:
+            self._dirty.add(gate_id)
+
+    def flush(self):
+        """Re-read the gates touched since the last flush and publish them."""
+        tick = self._pending_tick
+        if (tick is not None and self.sweep_ticks
+                and (self._swept_tick is None or tick - self._swept_tick >= self.sweep_ticks)):
+            self._mark_all(tick)
+        dirty, closed, changed = self._dirty, self._closed, self._changed
+        self._dirty, self._closed, self._changed = set(), set(), False
+        fresh = self.client.get_gates(dirty, self.workers) if dirty else {}
+        counts = self.client.get_gate_count() if changed else None
+        self.rereads += len(dirty)
+        with self._lock:
+            for gate_id in closed:
+                self.gates.pop(gate_id, None)
+            for gate_id, gate in fresh.items():
+                if gate is None or not gate['active']:
+                    self.gates.pop(gate_id, None)
+                else:
+                    self.gates[gate_id] = gate
+            if counts is not None:
+                self.counts = counts
+            if tick is not None:
+                self.tick = tick
+
+    def sweep(self):
+        """Re-read every live gate now, catching the changes no event reports."""
+        self._mark_all(self.tick if self._pending_tick is None else self._pending_tick)
+        self.flush()
+
+    def _mark_all(self, tick):
+        with self._lock:
+            live = set(self.gates)
+        self._dirty |= live - self._closed
+        self._changed = True
+        self._swept_tick = tick
+        self.sweeps += 1
+
+    def follow(self, events):
+        """Apply an event iterable (e.g. a live log stream) until it ends."""
+        for event in events:
+            self.apply(event)
+        self.flush()
+
+    def gate(self, gate_id):
+        """The replicated gate, or None if it is not live."""
+        with self._lock:
+            return self.gates.get(gate_id)
+
+    def live_gate_ids(self):
+        with self._lock:
+            return sorted(self.gates)
+
+    def gates_by_owner(self, owner):
+        """IDs of the live gates owned by the 32-byte public key *owner*."""
+        with self._lock:
+            return sorted(gid for gid, gate in self.gates.items() if gate['owner'] == owner)
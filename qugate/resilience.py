@@ -0,0 +1,196 @@
+"""
+Retry pacing, circuit breaking and request metrics shared by both clients.
+
+* :class:`Backoff` spaces retries with capped exponential delays and full
+  jitter, so clients that failed together do not retry in lockstep.
+* :class:`CircuitBreaker` opens after ``threshold`` consecutive failed
+  attempts. While open, calls fail fast with ``CircuitOpenError`` instead
+  of queueing behind a dead node. After ``cooldown`` seconds the client
+  probes ``/live/v1/tick-info`` once and closes the breaker if the node
+  answers.
+* :class:`RpcMetrics` counts requests, retries, failures and fast-fails per
+  endpoint and keeps recent latencies plus a cumulative :class:`Histogram`,
+  so an overloaded node shows up as numbers instead of as time lost to sleeps.
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+_IDENTITY_SEGMENT = re.compile(r'/[A-Za-z]{60}(?=/|$)')
+
+# upper bounds (seconds) of the RPC latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Backoff:
+    """Retry delay for *attempt* (0-based): uniform in ``[0, min(cap, base * factor**attempt)]``."""
+
+    def __init__(self, base=0.5, factor=2.0, cap=10.0, jitter=True):
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        ceiling = min(self.cap, self.base * self.factor ** attempt)
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+class CircuitBreaker:
+    """Closed -> open after *threshold* consecutive failures -> probed after *cooldown* seconds."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+
+    def __init__(self, threshold=5, cooldown=10.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+    def due_for_probe(self):
+        """True (for one caller) once an open breaker has cooled down and should be probed."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.cooldown:
+                self.opened_at = now
+                return True
+            return False
+
+    def probed(self, healthy):
+        """Close after a successful probe; otherwise stay open for another cooldown."""
+        if healthy:
+            self.record_success()
+        else:
+            with self._lock:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.state == self.OPEN
+
+
+def endpoint(path):
+    """Metrics label for *path*: identities in balance paths are folded into ``{id}``."""
+    return _IDENTITY_SEGMENT.sub('/{id}', path.split('?', 1)[0])
+
+
+class Histogram:
+    """Fixed-bucket histogram: counts per ``value <= bound`` bucket, plus count and sum.
+
+    Not locked; the owner serializes :meth:`observe`.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)      # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def copy(self):
+        other = Histogram(self.bounds)
+        other.counts, other.count, other.sum = list(self.counts), self.count, self.sum
+        return other
+
+    def cumulative(self):
+        """``[(bound, observations <= bound), ..., (inf, count)]``."""
+        out, total = [], 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+
+class RpcMetrics:
+    """Per-endpoint request counters, a window of recent latencies (seconds) and
+    a cumulative latency :class:`Histogram` per endpoint."""
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.requests = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.rejected = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self.histograms = defaultdict(Histogram)
+        self._lock = threading.Lock()
+
+    def observe(self, path, seconds, ok=True):
+        """Record one attempt against *path* that took *seconds*."""
+        label = endpoint(path)
+        with self._lock:
+            self.requests[label] += 1
+            if not ok:
+                self.failures[label] += 1
+            self.latencies[label].append(seconds)
+            self.histograms[label].observe(seconds)
+
+    def retry(self, path):
+        with self._lock:
+            self.retries[endpoint(path)] += 1
+
+    def reject(self, path):
+        with self._lock:
+            self.rejected[endpoint(path)] += 1
+
+    def snapshot(self):
+        """``{endpoint: {requests, failures, retries, rejected, p50, p95, max}}``."""
+        with self._lock:
+            labels = set(self.requests) | set(self.rejected)
+            out = {}
+            for label in sorted(labels):
+                recent = sorted(self.latencies.get(label, ()))
+                out[label] = {
+                    'requests': self.requests.get(label, 0),
+                    'failures': self.failures.get(label, 0),
+                    'retries': self.retries.get(label, 0),
+                    'rejected': self.rejected.get(label, 0),
+                    'p50': _quantile(recent, 0.50),
+                    'p95': _quantile(recent, 0.95),
+                    'max': recent[-1] if recent else None,
+                }
+            return out
+
+    def latency_histograms(self):
+        """``{endpoint: Histogram}`` copies of the cumulative latency histograms."""
+        with self._lock:
+            return {label: hist.copy() for label, hist in sorted(self.histograms.items())}
+
+
+def _quantile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
@@ -0,0 +1,428 @@
+"""
+Whole-table routing analysis: where a payment into a gate ends up.
+
+Gates route onward through ``chainNextGateId`` and through gate-as-recipient
+slots (``recipientGateIds``). :class:`RoutingGraph` loads every live gate
+once and replays sendToGate's routing for any entry gate and amount, without
+touching the node:
+
+* the entry gate's mode handler runs on the full amount. Its gate recipients
+  get one routeToGate hop each, and each of those passes its own gate
+  recipients one more hop; anything deferred beyond that is not dispatched;
+* what the entry forwards follows its chain for up to ``MAX_CHAIN_DEPTH``
+  hops, each hop dispatching its own gate recipients once;
+* each routeToGate hop burns ``CHAIN_HOP_FEE`` from the amount. When the
+  amount does not exceed the fee, the hop gate's reserve pays it, or else the
+  amount strands in that gate's balance (CHAIN_HOP_INSUFFICIENT). A chain
+  that cannot deliver puts the rest back on the entry gate, also as a strand.
+
+Amounts follow the contract's bookkeeping: a hop's ``forwarded`` amount
+continues down the chain even when the hop also paid its own recipients.
+ROUND_ROBIN and RANDOM pick one recipient from the gate's cursor (when the
+snapshot has ``roundRobinIndex``) and ``mod(totalReceived + tick, count)``.
+:meth:`RoutingGraph.sinks` instead takes every branch.
+
+Results are cached per (entry, amount, tick), and a reverse index maps each
+gate to the results that consulted it. :meth:`RoutingGraph.update` swaps one
+gate and drops only the results that depended on it. The strongly connected
+components behind :meth:`RoutingGraph.cycles` are kept as well: an update
+that leaves the gate's successors unchanged keeps them all, and any other
+update recomputes only the gates reachable from the changed one (plus its old
+component). Many what-if topologies can therefore be tried cheaply:
+
+    graph = RoutingGraph.from_client(client)
+    graph.route(gate_id, 50_000)['wallets']       # {recipient: amount}
+    graph.update(gate_id, dict(gate, chainNextGateId=-1))
+    graph.cycles()                                # [[gate_id, ...], ...]
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import (
+    CHAIN_HOP_FEE,
+    MAX_CHAIN_DEPTH,
+    MODE_CONDITIONAL,
+    MODE_HEARTBEAT,
+    MODE_MULTISIG,
+    MODE_ORACLE,
+    MODE_ROUND_ROBIN,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    MODE_TIME_LOCK,
+)
+from .crawl import SlotCrawler
+
+HOLDING_MODES = frozenset((MODE_ORACLE, MODE_HEARTBEAT, MODE_MULTISIG, MODE_TIME_LOCK))
+EXPLORE_AMOUNT = 10 ** 15      # large enough that no hop fee strands it
+
+
+class _Route:
+    """Scratch state of one simulated payment."""
+
+    def __init__(self, graph, tick, explore):
+        self.graph = graph
+        self.tick = tick
+        self.explore = explore
+        self.wallets = {}
+        self.held = {}
+        self.stranded = {}
+        self.lost = []
+        self.fees = 0
+        self.reserve_fees = 0
+        self.hops = []
+        self.touched = set()
+        self._reserve = {}
+        self._balance = {}
+        self._cursor = {}
+        self._received = {}
+
+    def gate(self, gate_id):
+        self.touched.add(gate_id)
+        return self.graph.gates.get(gate_id)
+
+    def _add(self, book, key, amount):
+        book[key] = book.get(key, 0) + amount
+
+    def _target(self, gate, index):
+        """Recipient *index* as ``(wallet, None)``, ``(None, gate_id)``, or ``(None, None)``
+        for a gate recipient that is not routed to (dead, or a disarmed time lock)."""
+        target = gate['recipientGateIds'][index]
+        if target < 0:
+            return gate['recipients'][index], None
+        recipient = self.gate(target)
+        if recipient is None or not recipient['active'] or not self.graph.armed(target, recipient):
+            return None, None
+        return None, target
+
+    def _pay(self, gate_id, gate, index, amount, deferred):
+        wallet, target = self._target(gate, index)
+        if wallet is not None:
+            self._add(self.wallets, wallet, amount)
+        elif target is not None:
+            deferred.append((target, amount))
+        else:
+            self.lost.append((gate_id, amount, 'dead recipient gate'))
+            return 0
+        return amount
+
+    def _choices(self, gate_id, gate):
+        count = gate['recipientCount']
+        if self.explore:
+            return range(count)
+        if gate['mode'] == MODE_ROUND_ROBIN:
+            return [self._cursor.get(gate_id, gate.get('roundRobinIndex', 0))]
+        return [(self._received[gate_id] + self.tick) % count]
+
+    def process(self, gate_id, gate, amount):
+        """The mode handler; returns ``(forwarded, deferred)``."""
+        mode, count = gate['mode'], gate['recipientCount']
+        deferred = []
+        if mode in HOLDING_MODES:
+            self._add(self.held, gate_id, amount)
+            return amount, deferred
+        if mode == MODE_THRESHOLD:
+            balance = self._balance.get(gate_id, gate['currentBalance']) + amount
+            self._balance[gate_id] = balance
+            if balance < gate['threshold'] and not self.explore:
+                self._add(self.held, gate_id, amount)
+                return 0, deferred
+            if count > 0 and gate['chainNextGateId'] == -1:
+                wallet, target = self._target(gate, 0)
+                if wallet is None and target is None:
+                    self._add(self.held, gate_id, amount)      # stays in the balance
+                    return 0, deferred
+                self._pay(gate_id, gate, 0, balance, deferred)
+            self._balance[gate_id] = 0
+            return balance, deferred
+        if count == 0:
+            return amount, deferred
+        if mode == MODE_SPLIT:
+            ratios = gate['ratios'][:count]
+            total, distributed = sum(ratios), 0
+            for index, ratio in enumerate(ratios):
+                if index == count - 1:
+                    share = amount - distributed    # picks up shares that were not paid
+                elif total:
+                    share = (amount // total) * ratio + (amount % total) * ratio // total
+                else:
+                    share = 0
+                if share > 0:
+                    distributed += self._pay(gate_id, gate, index, share, deferred)
+            return distributed, deferred
+        indices = [0] if mode == MODE_CONDITIONAL else self._choices(gate_id, gate)
+        forwarded = 0
+        for index in indices:
+            forwarded = self._pay(gate_id, gate, index, amount, deferred) or forwarded
+        if mode == MODE_ROUND_ROBIN and forwarded and not self.explore:
+            self._cursor[gate_id] = (indices[0] + 1) % count     # advances only on delivery
+        return forwarded, deferred
+
+    def _unrouted(self, gate_id, gate, forwarded):
+        """A pass-through amount with no chain to carry it stays in the contract."""
+        if gate['recipientCount'] == 0 and forwarded > 0 and gate['chainNextGateId'] == -1 \
+                and gate['mode'] not in HOLDING_MODES:
+            self.lost.append((gate_id, forwarded, 'no onward route'))
+
+    def hop(self, gate_id, amount, hop):
+        """routeToGate; returns ``(forwarded, deferred)``."""
+        if hop >= MAX_CHAIN_DEPTH:
+            self.lost.append((gate_id, amount, 'max depth'))
+            return 0, []
+        gate = self.gate(gate_id)
+        if gate is None or not gate['active']:
+            self.lost.append((gate_id, amount, 'inactive'))
+            return 0, []
+        after = amount
+        if amount <= CHAIN_HOP_FEE:
+            reserve = self._reserve.get(gate_id, gate['reserve'])
+            if reserve < CHAIN_HOP_FEE:
+                self._add(self.stranded, gate_id, amount)
+                return 0, []
+            self._reserve[gate_id] = reserve - CHAIN_HOP_FEE
+            self.reserve_fees += CHAIN_HOP_FEE
+        else:
+            self.fees += CHAIN_HOP_FEE
+            after = amount - CHAIN_HOP_FEE
+        self._received[gate_id] = self._received.get(gate_id, gate['totalReceived']) + after
+        self.hops.append((gate_id, hop, after))
+        if gate['mode'] == MODE_CONDITIONAL or not self.graph.armed(gate_id, gate):
+            self.lost.append((gate_id, after, 'not accepted'))
+            return 0, []
+        return self.process(gate_id, gate, after)
+
+    def dispatch(self, deferred, hop, depth):
+        """Route deferred gate recipients; their own are passed on *depth* more times."""
+        for target, amount in deferred:
+            forwarded, more = self.hop(target, amount, hop)
+            self._unrouted(target, self.gate(target), forwarded)
+            if depth:
+                self.dispatch(more, hop + 1, depth - 1)
+            else:
+                for gate_id, dropped in more:
+                    self.lost.append((gate_id, dropped, 'not dispatched'))
+
+    def send(self, entry, amount):
+        """sendToGate of *amount* into *entry*."""
+        gate = self.gate(entry)
+        if gate is None or not gate['active']:
+            raise ValueError(f"gate {entry} is not live")
+        if not self.graph.armed(entry, gate):
+            self.lost.append((entry, amount, 'refunded'))
+            return
+        self._received[entry] = gate['totalReceived'] + amount
+        if gate['mode'] in HOLDING_MODES:
+            self._add(self.held, entry, amount)
+            return
+        forwarded, deferred = self.process(entry, gate, amount)
+        self.dispatch(deferred, 0, 0 if gate['mode'] == MODE_CONDITIONAL else 1)
+        chain = gate['chainNextGateId']
+        if chain == -1 or forwarded == 0:
+            self._unrouted(entry, gate, forwarded)
+            return
+        hop = 0
+        while hop < MAX_CHAIN_DEPTH and chain != -1 and forwarded > 0:
+            link = self.gate(chain)
+            if link is None:
+                break                               # dead link
+            forwarded, deferred = self.hop(chain, forwarded, hop)
+            self.dispatch(deferred, hop + 1, 0)
+            chain = link['chainNextGateId']
+            hop += 1
+        if forwarded > 0 and chain != -1:
+            self._add(self.stranded, entry, forwarded)
+
+    def result(self):
+        return {
+            'wallets': self.wallets,
+            'held': self.held,
+            'stranded': self.stranded,
+            'lost': self.lost,
+            'delivered': sum(self.wallets.values()),
+            'hopFees': self.fees,
+            'reserveFees': self.reserve_fees,
+            'hops': self.hops,
+        }
+
+
+class RoutingGraph:
+    """Every live gate (``{gate_id: getGate output}``) as one routing graph.
+
+    *time_locks* maps TIME_LOCK gate IDs to getTimeLockState outputs; a time
+    lock without one is taken as armed.
+    """
+
+    def __init__(self, gates, time_locks=None):
+        self.gates = {gid: gate for gid, gate in gates.items() if gate['active']}
+        self.time_locks = dict(time_locks or {})
+        self._routes = {}
+        self._dependents = {}         # gate_id -> cache keys whose routes consulted it
+        self._components = None       # gate_id -> its strongly connected group (sorted tuple)
+        self._cyclic = set()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_client(cls, client, workers=None):
+        """One slot crawl, plus getTimeLockState for the TIME_LOCK gates."""
+        table = SlotCrawler(client, workers).crawl()
+        gates = {}
+        for slot in table.active_slots():
+            row = table.row(slot)
+            gates[row['gateId']] = row
+        locks = [gid for gid, gate in gates.items() if gate['mode'] == MODE_TIME_LOCK]
+        time_locks = {}
+        if locks:
+            workers = min(len(locks), workers or client.pool_size)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                time_locks = dict(zip(locks, pool.map(client.get_time_lock_state, locks)))
+        return cls(gates, time_locks)
+
+    def armed(self, gate_id, gate):
+        if gate['mode'] != MODE_TIME_LOCK or gate_id not in self.time_locks:
+            return True
+        lock = self.time_locks[gate_id]
+        return bool(lock['active'] and not lock['cancelled'] and not lock['fired'])
+
+    def successors(self, gate_id):
+        """Live gates *gate_id* can route to directly (chain target and gate recipients)."""
+        gate = self.gates[gate_id]
+        targets = [gate['chainNextGateId']]
+        targets += gate['recipientGateIds'][:gate['recipientCount']]
+        return sorted({t for t in targets if t >= 0 and t in self.gates})
+
+    def _run(self, entry, amount, tick, explore):
+        key = (entry, amount, tick, explore)
+        cached = self._routes.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        route = _Route(self, tick, explore)
+        route.send(entry, amount)
+        result = route.result()
+        self._routes[key] = (result, frozenset(route.touched))
+        for gate_id in route.touched:
+            self._dependents.setdefault(gate_id, set()).add(key)
+        return result
+
+    def route(self, entry, amount, tick=0):
+        """Replay sendToGate of *amount* into *entry*; see the module docstring.
+
+        Returns ``wallets`` ({recipient: amount}) and ``delivered`` (their
+        sum), ``held`` ({gate_id: amount} kept in gate balances), ``stranded``
+        ({gate_id: amount} left by CHAIN_HOP_INSUFFICIENT), ``lost``
+        (``(gate_id, amount, reason)`` the contract keeps but routes nowhere),
+        ``hopFees`` taken from the payment, ``reserveFees`` paid by hop gates'
+        reserves, and the ``hops`` taken as ``(gate_id, hop, amount)``.
+        """
+        return self._run(entry, amount, tick, False)
+
+    def sinks(self, entry):
+        """Every wallet and holding gate a payment into *entry* can end up in.
+
+        Takes all ROUND_ROBIN/RANDOM branches and treats thresholds as met.
+        """
+        result = self._run(entry, EXPLORE_AMOUNT, 0, True)
+        return {'wallets': sorted(result['wallets']), 'gates': sorted(result['held'])}
+
+    def cycles(self):
+        """Strongly connected groups of gates (including self-loops), each sorted."""
+        if self._components is None:
+            self._components, self._cyclic = {}, set()
+            self._add_components(self.gates)
+        return sorted(list(group) for group in self._cyclic)
+
+    def _add_components(self, nodes):
+        for group in self._strongly_connected(nodes):
+            for member in group:
+                self._components[member] = group
+            if len(group) > 1 or group[0] in self.successors(group[0]):
+                self._cyclic.add(group)
+
+    def _strongly_connected(self, nodes):
+        """Tarjan's algorithm on the subgraph induced by *nodes*; all groups, as sorted tuples."""
+        def successors(node):
+            return iter([child for child in self.successors(node) if child in nodes])
+
+        index, low, on_stack, stack, out = {}, {}, set(), [], []
+        for root in sorted(nodes):
+            if root in index:
+                continue
+            work = [(root, successors(root))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, successors(child)))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                    if low[node] == index[node]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            group.append(member)
+                            if member == node:
+                                break
+                        out.append(tuple(sorted(group)))
+        return out
+
+    def _reachable(self, gate_id):
+        seen, todo = {gate_id}, [gate_id]
+        while todo:
+            for child in self.successors(todo.pop()):
+                if child not in seen:
+                    seen.add(child)
+                    todo.append(child)
+        return seen
+
+    def _recompute_components(self, gate_id):
+        """Redo the components *gate_id*'s new edges can reach.
+
+        Any group that changed contains *gate_id*, before or after the update,
+        so only its old group and what it now reaches need another pass.
+        """
+        region = set(self._components.get(gate_id, ()))
+        if gate_id in self.gates:
+            region |= self._reachable(gate_id)
+        for node in region:
+            self._cyclic.discard(self._components.pop(node, None))
+        if gate_id not in self.gates:
+            region.discard(gate_id)
+        self._add_components(region)
+
+    def update(self, gate_id, gate=None, time_lock=None):
+        """Replace (or, with None or an inactive *gate*, remove) one gate.
+
+        Only cached results that consulted *gate_id* are dropped, and the
+        components are only recomputed when its successors changed.
+        """
+        before = self.successors(gate_id) if gate_id in self.gates else None
+        if gate is None or not gate['active']:
+            self.gates.pop(gate_id, None)
+        else:
+            self.gates[gate_id] = gate
+        if time_lock is not None:
+            self.time_locks[gate_id] = time_lock
+        for key in self._dependents.pop(gate_id, ()):
+            _, touched = self._routes.pop(key)
+            for other in touched - {gate_id}:
+                keys = self._dependents[other]
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[other]
+        after = self.successors(gate_id) if gate_id in self.gates else None
+        if self._components is not None and after != before:
+            self._recompute_components(gate_id)
@@ -0,0 +1,121 @@
+"""
+Pipelined submission of many contract calls.
+
+Sending a batch one transaction at a time and waiting in between costs a
+full confirmation delay per step. :class:`TxScheduler` instead takes the
+whole batch, assigns every call a target tick up front and broadcasts the
+lot in one pass:
+
+* calls share a tick up to ``per_source`` per identity (1 by default) and
+  ``per_tick`` in total;
+* the order of transactions inside one tick is not guaranteed, so a call
+  lands strictly after the earlier calls from the same identity (when
+  ``per_source`` is 1) and after the calls it was given as ``after=``.
+  ``per_source=None`` packs any number of one identity's calls into a tick,
+  in which case they may run in any order; chain the ones that depend on
+  each other with ``after=``;
+* calls more than ``lookahead`` ticks ahead are held back until the network
+  catches up, and if signing/sending falls behind the plan, every unsent
+  call is shifted later by the same amount so the constraints still hold.
+
+    scheduler = TxScheduler(broadcaster, clock, tracker)
+    create = scheduler.add(seed_a, PROC_CREATE_GATE, 1000, build_create_gate(...))
+    scheduler.add(seed_a, PROC_SEND_TO_GATE, 5000, build_send_to_gate(gid), after=create)
+    scheduler.run()            # [TxHandle, ...] in submission order
+"""
+from __future__ import annotations
+
+from collections import Counter
+
+MAX_TRANSACTIONS_PER_TICK = 1024   # core's NUMBER_OF_TRANSACTIONS_PER_TICK
+
+
+class Operation:
+    """One scheduled contract call; ``tick`` and ``handle`` are filled in by the scheduler."""
+
+    __slots__ = ('seed', 'input_type', 'amount', 'data', 'after', 'tick', 'handle')
+
+    def __init__(self, seed, input_type, amount=0, data=b'', after=()):
+        self.seed = seed
+        self.input_type = input_type
+        self.amount = amount
+        self.data = data
+        self.after = tuple(after)
+        self.tick = None
+        self.handle = None
+
+    def __repr__(self):
+        return f'Operation(input_type={self.input_type}, tick={self.tick})'
+
+
+class TxScheduler:
+    """Packs a batch of contract calls into target ticks and broadcasts them as a pipeline."""
+
+    def __init__(self, broadcaster, clock, tracker=None, per_source=1,
+                 per_tick=MAX_TRANSACTIONS_PER_TICK, lookahead=None, margin=2):
+        self.broadcaster = broadcaster
+        self.clock = clock
+        self.tracker = tracker
+        self.per_source = per_source
+        self.per_tick = per_tick
+        self.lookahead = 2 * broadcaster.tick_offset if lookahead is None else lookahead
+        self.margin = margin
+        self.ops = []
+        self.shifted = 0
+
+    def add(self, seed, input_type, amount=0, data=b'', after=None):
+        """Queue a call; *after* is an Operation (or several) that must land in an earlier tick."""
+        if isinstance(after, Operation):
+            after = (after,)
+        after = tuple(after or ())
+        for dep in after:
+            if dep not in self.ops:
+                raise ValueError("dependencies must be added to the scheduler first")
+        op = Operation(seed, input_type, amount, data, after)
+        self.ops.append(op)
+        return op
+
+    def plan(self, base_tick):
+        """Assign a target tick (>= *base_tick*) to every unsent call; returns the last tick."""
+        per_tick = Counter()
+        per_source = Counter()
+        last_of_source = {}
+        for op in self.ops:
+            if op.handle is not None:
+                # already sent: its tick stays taken for later runs
+                per_tick[op.tick] += 1
+                per_source[op.seed, op.tick] += 1
+                last_of_source[op.seed] = max(op.tick, last_of_source.get(op.seed, op.tick))
+                continue
+            tick = max([base_tick, last_of_source.get(op.seed, base_tick)]
+                       + [dep.tick + 1 for dep in op.after])
+            while (per_tick[tick] >= self.per_tick
+                   or (self.per_source is not None
+                       and per_source[op.seed, tick] >= self.per_source)):
+                tick += 1
+            op.tick = tick
+            per_tick[tick] += 1
+            per_source[op.seed, tick] += 1
+            last_of_source[op.seed] = tick
+        return max((op.tick for op in self.ops), default=base_tick)
+
+    def run(self):
+        """Plan from the current tick and broadcast everything; returns the handles in order."""
+        pending = [op for op in self.ops if op.handle is None]
+        if not pending:
+            return [op.handle for op in self.ops]
+        self.plan(self.clock.current() + self.broadcaster.tick_offset)
+        for op in sorted(pending, key=lambda op: op.tick):
+            self.clock.wait_until(op.tick - self.lookahead)
+            lag = self.clock.current() + self.margin - op.tick
+            if lag > 0:
+                # fell behind the plan: push every unsent call back by the same amount
+                for later in pending:
+                    if later.handle is None:
+                        later.tick += lag
+                self.shifted += lag
+            op.handle = self.broadcaster.send_contract_call(op.seed, op.input_type, op.amount,
+                                                            op.data, tick=op.tick)
+            if self.tracker is not None:
+                self.tracker.track(op.handle)
+        return [op.handle for op in self.ops]
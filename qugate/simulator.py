@@ -0,0 +1,1672 @@
+"""
+Pure-Python reference simulator of the QuGate contract.
+
+:class:`ContractSimulator` holds the contract's whole state: the gate table,
+generations and free-slot stack, the per-slot heartbeat, multisig, time-lock,
+allowed-senders, admin-approval and latest-execution arrays, and the fee and
+dividend counters. It runs every registered procedure and function, END_EPOCH
+and END_TICK on that state with QuGate.h's integer semantics. That covers the
+validation order and status codes, uint16 epoch fields, floor divisions,
+burns and refunds, and the contract's quirks. For example, a time lock
+released into a gate recipient counts the payout in ``totalForwarded`` twice,
+and getGateBatch repeats the previous entry's allowed senders for an invalid
+ID. Balances live in an in-process ledger that stands in for the spectrum, so
+transfers, burns and dividend payouts move real amounts::
+
+    sim = ContractSimulator(epoch=120)
+    sim.fund(owner_pk, 10**9)
+    out = sim.invoke(owner_pk, PROC_CREATE_GATE, 100000,
+                     build_create_gate(MODE_SPLIT, [a, b], [60, 40]))
+    sim.invoke(payer_pk, PROC_SEND_TO_GATE, 5000, build_send_to_gate(out['gateId']))
+    sim.end_epoch()                    # END_EPOCH, then the next epoch begins
+
+It also answers the node's HTTP RPC, so the client API can use it as a
+backend. ``QuGateClient(session=sim.session())`` gets tick-info,
+querySmartContract, balances and getTickData from the simulator. Signed
+transactions from :func:`~qugate.tx.build_contract_transaction` are accepted
+by ``broadcast-transaction`` (or :meth:`ContractSimulator.submit`). They run
+when :meth:`ContractSimulator.advance` reaches their tick.
+
+Not modelled: log events (nothing is emitted) and the empty BEGIN_* hooks.
+Shareholder fee votes are not modelled either; set the fee parameters
+through the constructor. Dividends paid by END_TICK leave the contract's
+balance, but nobody receives them.
+"""
+from __future__ import annotations
+
+import base64
+import copy
+import threading
+from urllib.parse import urlsplit
+
+import requests
+
+from . import structs
+from .constants import (
+    CHAIN_HOP_FEE,
+    DEFAULT_CREATION_FEE,
+    DEFAULT_EXPIRY_EPOCHS,
+    DEFAULT_FEE_BURN_BPS,
+    DEFAULT_MAINTENANCE_FEE,
+    DEFAULT_MAINTENANCE_GRACE_EPOCHS,
+    DEFAULT_MAINTENANCE_INTERVAL_EPOCHS,
+    DEFAULT_MIN_SEND,
+    EXEC_FORWARDED,
+    EXEC_NONE,
+    FEE_ESCALATION_STEP,
+    GATE_ID_SLOT_BITS,
+    GATE_ID_SLOT_MASK,
+    GOVERNANCE_OWNER_OR_ADMIN,
+    GOVERNANCE_STRICT_ADMIN,
+    HEARTBEAT_PING_FEE,
+    IDLE_MULTISIG_MULTIPLIER_BPS,
+    IDLE_SHIELD_PER_TARGET_BPS,
+    MAX_BATCH_GATES,
+    MAX_CHAIN_DEPTH,
+    MAX_GATES,
+    MAX_OWNER_GATES,
+    MAX_RATIO,
+    MAX_RECIPIENTS,
+    MODE_CONDITIONAL,
+    MODE_HEARTBEAT,
+    MODE_MULTISIG,
+    MODE_ORACLE,
+    MODE_RANDOM,
+    MODE_ROUND_ROBIN,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    MODE_TIME_LOCK,
+    NUMBER_OF_COMPUTORS,
+    QUGATE_ADMIN_GATE_REQUIRED,
+    QUGATE_CONDITIONAL_REJECTED,
+    QUGATE_DUST_AMOUNT,
+    QUGATE_GATE_NOT_ACTIVE,
+    QUGATE_HEARTBEAT_INVALID,
+    QUGATE_HEARTBEAT_NOT_ACTIVE,
+    QUGATE_HEARTBEAT_TRIGGERED,
+    QUGATE_INDEX,
+    QUGATE_INSUFFICIENT_FEE,
+    QUGATE_INVALID_ADMIN_CYCLE,
+    QUGATE_INVALID_ADMIN_GATE,
+    QUGATE_INVALID_CHAIN,
+    QUGATE_INVALID_GATE_ID,
+    QUGATE_INVALID_GATE_RECIPIENT,
+    QUGATE_INVALID_MODE,
+    QUGATE_INVALID_PARAMS,
+    QUGATE_INVALID_RATIO,
+    QUGATE_INVALID_RECIPIENT_COUNT,
+    QUGATE_INVALID_SENDER_COUNT,
+    QUGATE_INVALID_THRESHOLD,
+    QUGATE_MULTISIG_ALREADY_VOTED,
+    QUGATE_MULTISIG_INVALID_CONFIG,
+    QUGATE_MULTISIG_PROPOSAL_ACTIVE,
+    QUGATE_NO_FREE_SLOTS,
+    QUGATE_OWNER_MISMATCH,
+    QUGATE_SUCCESS,
+    QUGATE_TIME_LOCK_ALREADY_FIRED,
+    QUGATE_TIME_LOCK_EPOCH_PAST,
+    QUGATE_TIME_LOCK_NOT_CANCELLABLE,
+    QUGATE_UNAUTHORIZED,
+    TIME_LOCK_ABSOLUTE_EPOCH,
+    TIME_LOCK_RELATIVE_EPOCHS,
+)
+from .gateid import encode_gate_id
+from .keys import public_key_from_identity
+from .maintenance import EPOCH_MASK, idle_charge
+from .structs import ZERO_ID
+from .tx import (
+    SIGNATURE_SIZE,
+    TRANSACTION_HEADER,
+    TxHandle,
+    contract_public_key,
+    transaction_hash,
+    verify_transaction,
+)
+
+UINT64_MASK = (1 << 64) - 1
+GENERATION_MASK = 0xFFFF     # _gateGenerations: uint16
+
+
+class _Rejected(Exception):
+    """A procedure bailed out: the reward is refunded and *status* returned."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+def _zero(codec):
+    return codec.decode(b'')
+
+
+def _fresh_execution():
+    return {'valid': 0, 'mode': 0, 'outcomeType': EXEC_NONE, 'selectedRecipientIndex': 255,
+            'selectedDownstreamGateId': -1, 'forwardedAmount': 0, 'observedTick': 0}
+
+
+class ContractSimulator:
+    """QuGate's state machine, its qpi ledger and a tick/epoch clock; thread-safe.
+
+    The fee parameters default to the values INITIALIZE sets. With
+    *ticks_per_epoch*, :meth:`advance` runs END_EPOCH whenever that many
+    ticks have passed since *tick*.
+    """
+
+    def __init__(self, epoch=1, tick=1, ticks_per_epoch=None, creation_fee=DEFAULT_CREATION_FEE,
+                 fee_burn_bps=DEFAULT_FEE_BURN_BPS, idle_fee=DEFAULT_MAINTENANCE_FEE,
+                 idle_window_epochs=DEFAULT_MAINTENANCE_INTERVAL_EPOCHS,
+                 idle_grace_epochs=DEFAULT_MAINTENANCE_GRACE_EPOCHS,
+                 min_send=DEFAULT_MIN_SEND, expiry_epochs=DEFAULT_EXPIRY_EPOCHS,
+                 contract_index=QUGATE_INDEX):
+        self.epoch = epoch
+        self.tick = tick
+        self.initial_tick = tick
+        self.ticks_per_epoch = ticks_per_epoch
+        self.contract_index = contract_index
+        self.contract_key = contract_public_key(contract_index)
+        self.creation_fee = creation_fee
+        self.fee_burn_bps = fee_burn_bps
+        self.idle_fee = idle_fee
+        self.idle_window_epochs = idle_window_epochs
+        self.idle_grace_epochs = idle_grace_epochs
+        self.min_send = min_send
+        self.expiry_epochs = expiry_epochs
+
+        self.gates = []                      # slot -> GATE_CONFIG dict
+        self.gate_count = 0
+        self.generations = [0] * MAX_GATES
+        self.delinquent = [0] * MAX_GATES    # _idleDelinquentEpochs
+        self.free_slots = []
+        self.heartbeats = {}                 # slot -> HEARTBEAT_CONFIG dict, and so on
+        self.multisigs = {}
+        self.approvals = {}
+        self.time_locks = {}
+        self.allowed_senders = {}
+        self.executions = {}
+        self.active_gates = 0
+        self.total_burned = 0
+        self.maintenance_charged = 0
+        self.maintenance_burned = 0
+        self.maintenance_dividends = 0
+        self.earned_dividends = 0
+        self.distributed_dividends = 0
+
+        self.balances = {}                   # public key -> QU
+        self.pending = {}                    # tick -> [signed tx]
+        self.tick_hashes = {}                # tick -> (epoch, [tx hash]) for non-empty ticks
+        self._invocator = ZERO_ID
+        self._reward = 0
+        self._lock = threading.RLock()
+
+    # =============================================
+    # Ledger
+    # =============================================
+
+    @staticmethod
+    def _key(who):
+        return public_key_from_identity(who) if isinstance(who, str) else bytes(who)
+
+    def fund(self, who, amount):
+        """Credit *amount* QU to *who* (identity or public key), like a faucet."""
+        with self._lock:
+            key = self._key(who)
+            self.balances[key] = self.balances.get(key, 0) + amount
+
+    def balance(self, who):
+        """Balance of *who*: an identity or public key (``contract_key`` for the contract)."""
+        with self._lock:
+            return self.balances.get(self._key(who), 0)
+
+    def _move(self, source, destination, amount):
+        self.balances[source] = self.balances.get(source, 0) - amount
+        self.balances[destination] = self.balances.get(destination, 0) + amount
+
+    def _transfer(self, destination, amount):
+        """qpi.transfer from the contract: True on success."""
+        if amount < 0 or self.balances.get(self.contract_key, 0) < amount:
+            return False
+        self._move(self.contract_key, destination, amount)
+        return True
+
+    def _burn(self, amount):
+        if 0 <= amount <= self.balances.get(self.contract_key, 0):
+            self.balances[self.contract_key] -= amount
+
+    # =============================================
+    # Entry points
+    # =============================================
+
+    def invoke(self, source, input_type, amount=0, data=b''):
+        """Run procedure *input_type* as *source* with *amount* QU attached.
+
+        Returns the decoded output, or None when *source* cannot pay *amount*
+        (the node would not execute the transaction).
+        """
+        try:
+            method, input_codec, output_codec = PROCEDURES[input_type]
+        except KeyError:
+            raise ValueError(f"no procedure with input type {input_type}") from None
+        if amount < 0:
+            raise ValueError("amount must be non-negative")
+        with self._lock:
+            source = self._key(source)
+            if self.balances.get(source, 0) < amount:
+                return None
+            self._move(source, self.contract_key, amount)
+            self._invocator, self._reward = source, amount
+            try:
+                result = method(self, input_codec.decode(data))
+            except _Rejected as exc:
+                if self._reward > 0:
+                    self._transfer(self._invocator, self._reward)
+                result = exc.status
+            if not isinstance(result, dict):
+                result = {output_codec.fields[0][0]: result}
+            return output_codec.decode(output_codec.encode(**result))
+
+    def query(self, input_type, data=b''):
+        """Run function *input_type* on raw input *data*; returns the raw output bytes."""
+        try:
+            method, input_codec, output_codec = FUNCTIONS[input_type]
+        except KeyError:
+            raise ValueError(f"no function with input type {input_type}") from None
+        with self._lock:
+            return output_codec.encode(**method(self, input_codec.decode(data)))
+
+    def submit(self, tx):
+        """Queue signed transaction bytes *tx* for its tick; returns its :class:`TxHandle`.
+
+        Raises ValueError for a malformed or badly signed transaction, or one
+        whose tick has already been processed.
+        """
+        tx = bytes(tx)
+        if len(tx) < TRANSACTION_HEADER.size + SIGNATURE_SIZE:
+            raise ValueError("transaction is too short")
+        _, _, amount, tick, _, input_size = TRANSACTION_HEADER.unpack_from(tx)
+        if len(tx) != TRANSACTION_HEADER.size + input_size + SIGNATURE_SIZE:
+            raise ValueError("transaction size does not match its inputSize")
+        if amount < 0:
+            raise ValueError("transaction amount is negative")
+        if not verify_transaction(tx):
+            raise ValueError("bad transaction signature")
+        with self._lock:
+            if tick <= self.tick:
+                raise ValueError(f"tick {tick} has already been processed (current {self.tick})")
+            self.pending.setdefault(tick, []).append(tx)
+        return TxHandle.of(tx)
+
+    def _execute(self, tx):
+        source, destination, amount, _, input_type, input_size = TRANSACTION_HEADER.unpack_from(tx)
+        if self.balances.get(source, 0) < amount:
+            return
+        if destination == self.contract_key and input_type in PROCEDURES:
+            start = TRANSACTION_HEADER.size
+            self.invoke(source, input_type, amount, tx[start:start + input_size])
+        else:
+            self._move(source, destination, amount)
+
+    def advance(self, ticks=1):
+        """Process *ticks* ticks: queued transactions, END_TICK and due END_EPOCHs."""
+        with self._lock:
+            for _ in range(ticks):
+                self.tick += 1
+                included = []
+                for tx in self.pending.pop(self.tick, ()):
+                    self._execute(tx)
+                    included.append(transaction_hash(tx))
+                if included:
+                    self.tick_hashes[self.tick] = (self.epoch, included)
+                self.end_tick()
+                elapsed = self.tick - self.initial_tick
+                if self.ticks_per_epoch and elapsed % self.ticks_per_epoch == 0:
+                    self.end_epoch()
+
+    def end_tick(self):
+        """END_TICK: distribute whole per-computor shares of the undistributed dividends."""
+        with self._lock:
+            per_share = max(self.earned_dividends - self.distributed_dividends, 0) \
+                // NUMBER_OF_COMPUTORS
+            total = per_share * NUMBER_OF_COMPUTORS
+            if per_share > 0 and self.balances.get(self.contract_key, 0) >= total:
+                self.balances[self.contract_key] -= total
+                self.distributed_dividends += total
+
+    def end_epoch(self):
+        """END_EPOCH at the current epoch, then start the next one."""
+        with self._lock:
+            self._charge_maintenance()
+            self._expire_gates()
+            self._pay_out_heartbeats()
+            self._expire_proposals()
+            self._release_time_locks()
+            self.epoch += 1
+
+    # =============================================
+    # Node RPC
+    # =============================================
+
+    def tick_info(self):
+        return {'tick': self.tick, 'duration': 0, 'epoch': self.epoch,
+                'initialTick': self.initial_tick}
+
+    def handle(self, method, path, body=None):
+        """Answer one node RPC request; returns ``(HTTP status, JSON payload)``."""
+        route = urlsplit(path).path.rstrip('/')
+        body = body or {}
+        try:
+            with self._lock:
+                if method == 'GET' and route == '/live/v1/tick-info':
+                    return 200, self.tick_info()
+                if method == 'GET' and route.startswith('/live/v1/balances/'):
+                    identity = route.rsplit('/', 1)[1]
+                    return 200, {'balance': {'id': identity,
+                                             'balance': str(self.balance(identity)),
+                                             'validForTick': self.tick}}
+                if method == 'POST' and route == '/live/v1/querySmartContract':
+                    return self._handle_query(body)
+                if method == 'POST' and route == '/live/v1/broadcast-transaction':
+                    encoded = body['encodedTransaction']
+                    handle = self.submit(base64.b64decode(encoded))
+                    return 200, {'peersBroadcasted': 1, 'encodedTransaction': encoded,
+                                 'transactionId': str(handle)}
+                if method == 'POST' and route == '/query/v1/getTickData':
+                    return 200, {'tickData': self._tick_data(int(body['tickNumber']))}
+        except (KeyError, TypeError, ValueError) as exc:
+            return 400, {'code': 3, 'message': str(exc)}
+        return 404, {'code': 5, 'message': f"no route for {method} {route}"}
+
+    def _handle_query(self, body):
+        index = body.get('contractIndex')
+        if index != self.contract_index:
+            return 400, {'code': 3, 'message': f"unknown contract index {index}"}
+        data = base64.b64decode(body.get('requestData') or '')
+        out = self.query(int(body['inputType']), data)
+        return 200, {'responseData': base64.b64encode(out).decode()}
+
+    def _tick_data(self, tick):
+        entry = self.tick_hashes.get(tick)
+        if tick > self.tick or entry is None:
+            return None
+        epoch, hashes = entry
+        return {'tickNumber': tick, 'epoch': epoch, 'transactionHashes': list(hashes)}
+
+    def session(self):
+        """A ``requests.Session`` stand-in for ``QuGateClient(session=...)``."""
+        return SimulatorSession(self)
+
+    # =============================================
+    # Per-slot side arrays
+    # =============================================
+
+    @staticmethod
+    def _record(table, codec, slot):
+        record = table.get(slot)
+        if record is None:
+            record = table[slot] = _zero(codec)
+        return record
+
+    def _heartbeat(self, slot):
+        return self._record(self.heartbeats, structs.HEARTBEAT_CONFIG, slot)
+
+    def _multisig(self, slot):
+        return self._record(self.multisigs, structs.MULTISIG_CONFIG, slot)
+
+    def _approval(self, slot):
+        return self._record(self.approvals, structs.ADMIN_APPROVAL_STATE, slot)
+
+    def _time_lock(self, slot):
+        return self._record(self.time_locks, structs.TIME_LOCK_CONFIG, slot)
+
+    def _senders(self, slot):
+        return self._record(self.allowed_senders, structs.ALLOWED_SENDERS_CONFIG, slot)
+
+    def _execution(self, slot):
+        return self._record(self.executions, structs.LATEST_EXECUTION, slot)
+
+    # =============================================
+    # Shared checks and bookkeeping
+    # =============================================
+
+    def _slot(self, gate_id):
+        """Slot of *gate_id* if its generation is current, else None."""
+        gate_id &= UINT64_MASK
+        slot, encoded = gate_id & GATE_ID_SLOT_MASK, gate_id >> GATE_ID_SLOT_BITS
+        if (gate_id == 0 or slot >= self.gate_count or encoded == 0
+                or self.generations[slot] != (encoded - 1) & GENERATION_MASK):
+            return None
+        return slot
+
+    def _live_slot(self, gate_id):
+        """Slot of a valid, active gate, else None."""
+        slot = self._slot(gate_id)
+        return slot if slot is not None and self.gates[slot]['active'] else None
+
+    def _lock_open(self, slot):
+        cfg = self._time_lock(slot)
+        return cfg['active'] == 1 and not cfg['fired'] and not cfg['cancelled']
+
+    def _open_target(self, gate_id):
+        """Slot of a live gate recipient that accepts payments (an armed lock if TIME_LOCK)."""
+        slot = self._live_slot(gate_id)
+        if slot is None or (self.gates[slot]['mode'] == MODE_TIME_LOCK
+                            and not self._lock_open(slot)):
+            return None
+        return slot
+
+    def _gate_id(self, slot):
+        return encode_gate_id(slot, self.generations[slot])
+
+    def _require(self, gate_id):
+        slot = self._slot(gate_id)
+        if slot is None:
+            raise _Rejected(QUGATE_INVALID_GATE_ID)
+        return slot
+
+    def _touch(self, gate):
+        gate['lastActivityEpoch'] = self.epoch & EPOCH_MASK
+        if self.idle_window_epochs > 0:
+            gate['nextIdleChargeEpoch'] = (self.epoch + self.idle_window_epochs) & EPOCH_MASK
+
+    def _cycle_due(self, gate):
+        next_idle = gate['nextIdleChargeEpoch']
+        return next_idle == 0 or self.epoch >= next_idle
+
+    def _admin_approval(self, gate):
+        """Slot of the admin gate whose live approval authorises a change to *gate*, else None.
+
+        An approval whose window has passed is cleared on the way.
+        """
+        admin_id = gate['adminGateId']
+        slot = self._slot(admin_id) if admin_id > 0 else None
+        if slot is None:
+            return None
+        admin = self.gates[slot]
+        if not admin['active'] or admin['mode'] != MODE_MULTISIG:
+            return None
+        approval = self._approval(slot)
+        if approval['active'] == 1:
+            if self.epoch <= approval['validUntilEpoch']:
+                return slot
+            self.approvals[slot] = _zero(structs.ADMIN_APPROVAL_STATE)
+        return None
+
+    def _authorize(self, gate, strict=True):
+        """Owner or admin-gate approval; returns the approval slot to consume, if any."""
+        governed = strict and gate['adminGateId'] >= 0 \
+            and gate['governancePolicy'] == GOVERNANCE_STRICT_ADMIN
+        if gate['owner'] == self._invocator and not governed:
+            return None
+        approval = self._admin_approval(gate) if gate['adminGateId'] >= 0 else None
+        if approval is None:
+            raise _Rejected(QUGATE_UNAUTHORIZED)
+        return approval
+
+    def _consume(self, approval):
+        if approval is not None:
+            self.approvals[approval] = _zero(structs.ADMIN_APPROVAL_STATE)
+
+    def _close_slot(self, slot):
+        self.gates[slot]['active'] = 0
+        self.active_gates -= 1
+        self.free_slots.append(slot)
+        self.generations[slot] = (self.generations[slot] + 1) & GENERATION_MASK
+
+    def _refund_holdings(self, gate):
+        """Return balance and reserve to the owner; True if nothing is left behind."""
+        if gate['currentBalance'] > 0 and self._transfer(gate['owner'], gate['currentBalance']):
+            gate['currentBalance'] = 0
+        if gate['reserve'] > 0 and self._transfer(gate['owner'], gate['reserve']):
+            gate['reserve'] = 0
+        return gate['currentBalance'] <= 0 and gate['reserve'] <= 0
+
+    def _expire_on_touch(self, slot, gate):
+        """Lazy expiry: a gate idle for ``_expiryEpochs`` is refunded and closed when touched."""
+        if self.expiry_epochs > 0 \
+                and self.epoch - gate['lastActivityEpoch'] >= self.expiry_epochs:
+            if self._refund_holdings(gate):
+                self._close_slot(slot)
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+
+    def _active_gate(self, gate_id, expire=True):
+        slot = self._require(gate_id)
+        gate = self.gates[slot]
+        if not gate['active']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        if expire:
+            self._expire_on_touch(slot, gate)
+        return slot, gate
+
+    def _governed_gate(self, gate_id, expire=True):
+        """(slot, gate, approval slot) for an owner-or-admin change to *gate_id*."""
+        slot = self._require(gate_id)
+        gate = self.gates[slot]
+        approval = self._authorize(gate)
+        if not gate['active']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        if expire:
+            self._expire_on_touch(slot, gate)
+        return slot, gate, approval
+
+    def _split_fee(self, fee, maintenance=False):
+        """Burn ``_feeBurnBps`` of *fee*; the rest accrues to shareholder dividends."""
+        burn = fee * self.fee_burn_bps // 10000
+        self._burn(burn)
+        self.total_burned += burn
+        self.earned_dividends += fee - burn
+        self.maintenance_dividends += fee - burn
+        if maintenance:
+            self.maintenance_charged += fee
+            self.maintenance_burned += burn
+
+    def _refund_excess(self, fee):
+        if self._reward > fee:
+            self._transfer(self._invocator, self._reward - fee)
+
+    def _take_hop_fee(self):
+        """Burn the flat CHAIN_HOP_FEE an update costs and refund the rest of the reward."""
+        if self._reward < CHAIN_HOP_FEE:
+            raise _Rejected(QUGATE_INSUFFICIENT_FEE)
+        self._burn(CHAIN_HOP_FEE)
+        self.total_burned += CHAIN_HOP_FEE
+        self._refund_excess(CHAIN_HOP_FEE)
+
+    def _charge_config_fee(self, duration):
+        """``creationFee * (1 + duration / idleWindow)`` for a heartbeat or time lock."""
+        fee = 0
+        if duration > 0 and self.idle_window_epochs > 0:
+            fee = self.creation_fee * (1 + duration // self.idle_window_epochs)
+        if self._reward < fee:
+            raise _Rejected(QUGATE_INSUFFICIENT_FEE)
+        if fee > 0:
+            self._split_fee(fee)
+        self._refund_excess(fee)
+
+    def _chain_depth(self, slot, chain_id):
+        """Depth of a gate at *slot* chained to *chain_id*, or None if the link is invalid."""
+        target = self._slot(chain_id) if chain_id > 0 else None
+        if target is None or not self.gates[target]['active']:
+            return None
+        depth = self.gates[target]['chainDepth'] + 1
+        if depth >= MAX_CHAIN_DEPTH:
+            return None
+        walk = target
+        for _ in range(MAX_CHAIN_DEPTH):
+            if walk == slot:
+                return None
+            next_id = self.gates[walk]['chainNextGateId']
+            next_slot = self._slot(next_id) if next_id > 0 else None
+            if next_slot is None:
+                break
+            walk = next_slot
+        return None if walk == slot else depth
+
+    def _check_recipient_gates(self, count, gate_ids):
+        for gate_id in gate_ids[:count]:
+            if gate_id >= 0 and self._live_slot(gate_id) is None:
+                raise _Rejected(QUGATE_INVALID_GATE_RECIPIENT)
+
+    def _anchor(self, slot):
+        """A relative time lock starts counting at its first deposit."""
+        cfg = self._time_lock(slot)
+        if cfg['lockMode'] == TIME_LOCK_RELATIVE_EPOCHS and cfg['unlockEpoch'] == 0:
+            cfg['unlockEpoch'] = self.epoch + cfg['delayEpochs']
+
+    def _clear_mode_config(self, slot, mode):
+        if mode == MODE_HEARTBEAT:
+            self.heartbeats[slot] = _zero(structs.HEARTBEAT_CONFIG)
+        elif mode == MODE_MULTISIG:
+            self.multisigs[slot] = _zero(structs.MULTISIG_CONFIG)
+            self.approvals[slot] = _zero(structs.ADMIN_APPROVAL_STATE)
+        elif mode == MODE_TIME_LOCK:
+            self.time_locks[slot] = _zero(structs.TIME_LOCK_CONFIG)
+
+    def _downstream(self, gate):
+        """Live slots *gate* shields from maintenance: its chain target, then gate recipients."""
+        recipients = gate['recipientGateIds'][:gate['recipientCount']]
+        for gate_id in [gate['chainNextGateId']] + recipients:
+            if gate_id >= 0:
+                slot = self._live_slot(gate_id)
+                if slot is not None:
+                    yield slot
+
+    # =============================================
+    # Payment routing
+    # =============================================
+
+    def _process_split(self, slot, amount):
+        gate = self.gates[slot]
+        count = gate['recipientCount']
+        if count == 0:
+            gate['totalForwarded'] += amount
+            return amount, []
+        ratios = gate['ratios'][:count]
+        total = sum(ratios)
+        distributed, deferred = 0, []
+        for i, ratio in enumerate(ratios):
+            if i == count - 1:
+                share = amount - distributed
+            else:
+                share = amount // total * ratio + amount % total * ratio // total
+            if share <= 0:
+                continue
+            if gate['recipientGateIds'][i] >= 0:
+                target = self._open_target(gate['recipientGateIds'][i])
+                if target is not None:
+                    deferred.append((target, share))
+                    distributed += share
+            elif self._transfer(gate['recipients'][i], share):
+                distributed += share
+        gate['totalForwarded'] += distributed
+        return distributed, deferred
+
+    def _process_pick(self, slot, amount):
+        """ROUND_ROBIN / RANDOM: forward everything to one recipient."""
+        gate = self.gates[slot]
+        count, mode = gate['recipientCount'], gate['mode']
+        execution = dict(_fresh_execution(), valid=1, mode=mode, observedTick=self.tick)
+        forwarded, deferred = 0, []
+        if count == 0:
+            gate['totalForwarded'] += amount
+            execution.update(outcomeType=EXEC_FORWARDED, forwardedAmount=amount)
+            self.executions[slot] = execution
+            return amount, deferred
+        if mode == MODE_ROUND_ROBIN:
+            index = gate['roundRobinIndex']
+        else:
+            index = (gate['totalReceived'] + self.tick) % count
+        gate_id = gate['recipientGateIds'][index]
+        if gate_id >= 0:
+            target = self._open_target(gate_id)
+            if target is not None:
+                deferred.append((target, amount))
+                forwarded = amount
+        elif self._transfer(gate['recipients'][index], amount):
+            forwarded, gate_id = amount, -1
+        if forwarded:
+            gate['totalForwarded'] += amount
+            execution.update(outcomeType=EXEC_FORWARDED, selectedRecipientIndex=index,
+                             selectedDownstreamGateId=gate_id, forwardedAmount=amount)
+            if mode == MODE_ROUND_ROBIN:
+                gate['roundRobinIndex'] = (index + 1) % count
+        self.executions[slot] = execution
+        return forwarded, deferred
+
+    def _process_threshold(self, slot, amount):
+        gate = self.gates[slot]
+        gate['currentBalance'] += amount
+        balance = gate['currentBalance']
+        if balance < gate['threshold']:
+            return 0, []
+        deferred = []
+        if gate['recipientCount'] > 0 and gate['chainNextGateId'] == -1:
+            if gate['recipientGateIds'][0] >= 0:
+                target = self._open_target(gate['recipientGateIds'][0])
+                if target is None:
+                    return 0, []
+                deferred.append((target, balance))
+            elif not self._transfer(gate['recipients'][0], balance):
+                return 0, []
+        gate['totalForwarded'] += balance
+        gate['currentBalance'] = 0
+        return balance, deferred
+
+    def _process_conditional(self, slot, amount):
+        """(status, forwarded, deferred) for a CONDITIONAL payment."""
+        gate = self.gates[slot]
+        senders = self._senders(slot)
+        if self._invocator not in senders['senders'][:senders['count']]:
+            if self._transfer(self._invocator, amount):
+                return QUGATE_CONDITIONAL_REJECTED, 0, []
+            return QUGATE_SUCCESS, 0, []
+        deferred = []
+        if gate['recipientCount'] > 0:
+            if gate['recipientGateIds'][0] >= 0:
+                target = self._live_slot(gate['recipientGateIds'][0])
+                if target is None:
+                    return QUGATE_SUCCESS, 0, []
+                deferred.append((target, amount))
+            elif not self._transfer(gate['recipients'][0], amount):
+                return QUGATE_SUCCESS, 0, []
+        gate['totalForwarded'] += amount
+        return QUGATE_SUCCESS, amount, deferred
+
+    def _release_multisig(self, gate, release):
+        """Release an approved MULTISIG balance: (transferred, deferred, chain amount)."""
+        if gate['recipientCount'] > 0:
+            gate_id = gate['recipientGateIds'][0]
+            if gate_id >= 0:
+                target = self._open_target(gate_id)
+                return target is not None, [] if target is None else [(target, release)], 0
+            return self._transfer(gate['recipients'][0], release), [], 0
+        if gate['chainNextGateId'] != -1:
+            return True, [], release
+        return False, [], 0
+
+    def _multisig_vote(self, slot, amount):
+        """(status, deferred, chain amount) for a payment into a MULTISIG gate."""
+        cfg = self._multisig(slot)
+        guardians = cfg['guardians'][:cfg['guardianCount']]
+        if self._invocator not in guardians:
+            return QUGATE_SUCCESS, [], 0
+        bit = 1 << guardians.index(self._invocator)
+        if cfg['proposalActive'] == 1 \
+                and self.epoch - cfg['proposalEpoch'] > cfg['proposalExpiryEpochs']:
+            cfg.update(approvalBitmap=0, approvalCount=0, proposalActive=0)
+        if cfg['approvalBitmap'] & bit:
+            return QUGATE_MULTISIG_ALREADY_VOTED, [], 0
+        cfg['approvalBitmap'] |= bit
+        cfg['approvalCount'] += 1
+        if not cfg['proposalActive']:
+            cfg.update(proposalActive=1, proposalEpoch=self.epoch)
+        gate = self.gates[slot]
+        self._touch(gate)
+        admin_only = gate['recipientCount'] == 0 and gate['chainNextGateId'] == -1 \
+            and cfg['adminApprovalWindowEpochs'] > 0
+        if admin_only and amount > 0 and gate['currentBalance'] >= amount:
+            gate['currentBalance'] -= amount
+            self._burn(amount)
+            self.total_burned += amount
+        deferred, chain_amount = [], 0
+        if cfg['approvalCount'] >= cfg['required']:
+            if admin_only:
+                self.approvals[slot] = {
+                    'active': 1,
+                    'validUntilEpoch': self.epoch + cfg['adminApprovalWindowEpochs'] - 1}
+                cfg.update(approvalBitmap=0, approvalCount=0, proposalActive=0)
+            elif gate['currentBalance'] > 0:
+                release = gate['currentBalance']
+                transferred, deferred, chain_amount = self._release_multisig(gate, release)
+                cfg.update(approvalBitmap=0, approvalCount=0, proposalActive=0)
+                if transferred:
+                    gate['totalForwarded'] += release
+                    gate['currentBalance'] = 0
+        return QUGATE_SUCCESS, deferred, chain_amount
+
+    def _route(self, slot, amount, hop):
+        """routeToGate: (forwarded, accepted, deferred, deferred hop) for a hop into *slot*."""
+        gate = self.gates[slot]
+        if hop >= MAX_CHAIN_DEPTH or not gate['active']:
+            return 0, False, [], 0
+        if amount <= CHAIN_HOP_FEE:
+            if gate['reserve'] < CHAIN_HOP_FEE:
+                gate['currentBalance'] += amount
+                return 0, True, [], 0
+            gate['reserve'] -= CHAIN_HOP_FEE
+            after = amount
+        else:
+            after = amount - CHAIN_HOP_FEE
+        self._burn(CHAIN_HOP_FEE)
+        self.total_burned += CHAIN_HOP_FEE
+        gate['totalReceived'] += after
+        self._touch(gate)
+        mode = gate['mode']
+        if mode == MODE_SPLIT:
+            forwarded, deferred = self._process_split(slot, after)
+        elif mode in (MODE_ROUND_ROBIN, MODE_RANDOM):
+            forwarded, deferred = self._process_pick(slot, after)
+        elif mode == MODE_THRESHOLD:
+            forwarded, deferred = self._process_threshold(slot, after)
+            return forwarded, True, deferred, hop + 1
+        elif mode in (MODE_ORACLE, MODE_HEARTBEAT, MODE_MULTISIG):
+            gate['currentBalance'] += after
+            return after, True, [], 0
+        elif mode == MODE_TIME_LOCK:
+            if not self._lock_open(slot):
+                return 0, False, [], 0
+            self._anchor(slot)
+            gate['currentBalance'] += after
+            return after, True, [], 0
+        else:
+            return 0, False, [], 0
+        return forwarded, forwarded > 0 or bool(deferred), deferred, hop + 1
+
+    def _route_on(self, slot, amount, hop):
+        """Route into *slot*, then one level of its own gate-recipient payments."""
+        forwarded, _, deferred, deferred_hop = self._route(slot, amount, hop)
+        for target, share in deferred:
+            self._route(target, share, deferred_hop)
+        return forwarded
+
+    def _forward_chain(self, slot, amount):
+        """Push *amount* down *slot*'s chain; what cannot move goes back on its balance."""
+        next_id = self.gates[slot]['chainNextGateId']
+        hop = 0
+        while hop < MAX_CHAIN_DEPTH and next_id != -1 and amount > 0:
+            next_slot = self._slot(next_id)
+            if next_slot is None:
+                break
+            amount = self._route_on(next_slot, amount, hop)
+            next_id = self.gates[next_slot]['chainNextGateId']
+            hop += 1
+        if amount > 0 and next_id != -1:
+            gate = self.gates[slot]
+            gate['currentBalance'] += amount
+            gate['totalForwarded'] -= amount
+
+    # =============================================
+    # Procedures
+    # =============================================
+
+    def create_gate(self, inp):
+        fee = self.creation_fee * (1 + self.active_gates // FEE_ESCALATION_STEP)
+        if self._reward < fee:
+            raise _Rejected(QUGATE_INSUFFICIENT_FEE)
+        mode, count, chain = inp['mode'], inp['recipientCount'], inp['chainNextGateId']
+        if mode > MODE_TIME_LOCK or mode == MODE_ORACLE:
+            raise _Rejected(QUGATE_INVALID_MODE)
+        if count > MAX_RECIPIENTS:
+            raise _Rejected(QUGATE_INVALID_RECIPIENT_COUNT)
+        if count == 0 and chain == -1 \
+                and mode not in (MODE_HEARTBEAT, MODE_MULTISIG, MODE_TIME_LOCK):
+            raise _Rejected(QUGATE_INVALID_RECIPIENT_COUNT)
+        if not self.free_slots and self.gate_count >= MAX_GATES:
+            raise _Rejected(QUGATE_NO_FREE_SLOTS)
+        if mode == MODE_SPLIT and count > 0:
+            ratios = inp['ratios'][:count]
+            if any(ratio > MAX_RATIO for ratio in ratios) or sum(ratios) == 0:
+                raise _Rejected(QUGATE_INVALID_RATIO)
+        if mode == MODE_THRESHOLD and inp['threshold'] == 0:
+            raise _Rejected(QUGATE_INVALID_THRESHOLD)
+        if inp['allowedSenderCount'] > MAX_RECIPIENTS:
+            raise _Rejected(QUGATE_INVALID_SENDER_COUNT)
+        gate = _zero(structs.GATE_CONFIG)
+        gate.update(owner=self._invocator, mode=mode, active=1,
+                    createdEpoch=self.epoch & EPOCH_MASK, chainNextGateId=-1,
+                    adminGateId=-1, governancePolicy=GOVERNANCE_STRICT_ADMIN,
+                    threshold=inp['threshold'])
+        self._touch(gate)
+        self._set_recipients(gate, inp)
+        senders = self._sender_config(inp)
+        self._check_recipient_gates(count, inp['recipientGateIds'])
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.gate_count
+            self.gate_count += 1
+            if slot == len(self.gates):
+                self.gates.append(_zero(structs.GATE_CONFIG))
+        if chain != -1:
+            depth = self._chain_depth(slot, chain)
+            if depth is None:
+                if slot < self.gate_count - 1:
+                    self.free_slots.append(slot)
+                else:
+                    self.gate_count -= 1
+                raise _Rejected(QUGATE_INVALID_CHAIN)
+            gate.update(chainNextGateId=chain, chainDepth=depth)
+        self.gates[slot] = gate
+        self.allowed_senders[slot] = senders
+        self.approvals[slot] = _zero(structs.ADMIN_APPROVAL_STATE)
+        self.executions[slot] = _fresh_execution()
+        self.active_gates += 1
+        self._split_fee(fee)
+        if self._reward > fee:
+            gate['reserve'] = self._reward - fee
+        return {'status': QUGATE_SUCCESS, 'gateId': self._gate_id(slot), 'feePaid': fee}
+
+    @staticmethod
+    def _set_recipients(gate, inp):
+        count = inp['recipientCount']
+        gate['recipientCount'] = count
+        gate['recipients'] = inp['recipients'][:count] + [ZERO_ID] * (MAX_RECIPIENTS - count)
+        gate['ratios'] = inp['ratios'][:count] + [0] * (MAX_RECIPIENTS - count)
+        gate['recipientGateIds'] = inp['recipientGateIds'][:count] \
+            + [-1] * (MAX_RECIPIENTS - count)
+
+    @staticmethod
+    def _sender_config(inp):
+        count = inp['allowedSenderCount']
+        return {'senders': inp['allowedSenders'][:count] + [ZERO_ID] * (MAX_RECIPIENTS - count),
+                'count': count}
+
+    def send_to_gate(self, inp):
+        return self._send(inp['gateId'])
+
+    def send_to_gate_verified(self, inp):
+        return self._send(inp['gateId'], inp['expectedOwner'])
+
+    def _send(self, gate_id, expected_owner=None):
+        slot, gate = self._active_gate(gate_id)
+        if expected_owner is not None and gate['owner'] != expected_owner:
+            raise _Rejected(QUGATE_OWNER_MISMATCH)
+        amount = self._reward
+        if amount <= 0:
+            return QUGATE_DUST_AMOUNT
+        if amount < self.min_send:
+            self._burn(amount)
+            self.total_burned += amount
+            return QUGATE_DUST_AMOUNT
+        mode = gate['mode']
+        if mode == MODE_TIME_LOCK and not self._lock_open(slot):
+            if self._transfer(self._invocator, amount):
+                return QUGATE_GATE_NOT_ACTIVE
+            return QUGATE_INVALID_PARAMS
+        self._touch(gate)
+        gate['totalReceived'] += amount
+        status, forwarded = QUGATE_SUCCESS, 0
+        if mode in (MODE_SPLIT, MODE_ROUND_ROBIN, MODE_THRESHOLD, MODE_RANDOM):
+            process = {MODE_SPLIT: self._process_split,
+                       MODE_THRESHOLD: self._process_threshold}.get(mode, self._process_pick)
+            forwarded, deferred = process(slot, amount)
+            for target, share in deferred:
+                self._route_on(target, share, 0)
+        elif mode == MODE_CONDITIONAL:
+            status, forwarded, deferred = self._process_conditional(slot, amount)
+            for target, share in deferred:
+                self._route(target, share, 0)
+        elif mode in (MODE_ORACLE, MODE_HEARTBEAT):
+            gate['currentBalance'] += amount
+        elif mode == MODE_MULTISIG:
+            gate['currentBalance'] += amount
+            status, deferred, chain_amount = self._multisig_vote(slot, amount)
+            if status != QUGATE_SUCCESS:
+                return status
+            for target, share in deferred:
+                self._route_on(target, share, 0)
+            if chain_amount > 0:
+                next_slot = self._slot(gate['chainNextGateId'])
+                if next_slot is not None:
+                    self._route(next_slot, chain_amount, 0)
+        elif mode == MODE_TIME_LOCK:
+            self._anchor(slot)
+            gate['currentBalance'] += amount
+        if gate['chainNextGateId'] != -1 and mode != MODE_ORACLE and forwarded > 0:
+            self._forward_chain(slot, forwarded)
+        return status
+
+    def close_gate(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'])
+        if not self._refund_holdings(gate):
+            raise _Rejected(QUGATE_INVALID_PARAMS)
+        self._clear_mode_config(slot, gate['mode'])
+        if gate['active']:
+            self._close_slot(slot)
+        if self._reward > 0:
+            self._transfer(self._invocator, self._reward)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def update_gate(self, inp):
+        slot, current, approval = self._governed_gate(inp['gateId'])
+        count = inp['recipientCount']
+        if count > MAX_RECIPIENTS:
+            raise _Rejected(QUGATE_INVALID_RECIPIENT_COUNT)
+        if count == 0 and current['chainNextGateId'] == -1:
+            raise _Rejected(QUGATE_INVALID_RECIPIENT_COUNT)
+        if inp['allowedSenderCount'] > MAX_RECIPIENTS:
+            raise _Rejected(QUGATE_INVALID_SENDER_COUNT)
+        if current['mode'] == MODE_SPLIT and count > 0:
+            ratios = inp['ratios'][:count]
+            if any(ratio > MAX_RATIO for ratio in ratios) or sum(ratios) == 0:
+                raise _Rejected(QUGATE_INVALID_RATIO)
+        if current['mode'] == MODE_THRESHOLD and inp['threshold'] == 0:
+            raise _Rejected(QUGATE_INVALID_THRESHOLD)
+        gate = copy.deepcopy(current)
+        self._touch(gate)
+        if gate['mode'] == MODE_ROUND_ROBIN and gate['roundRobinIndex'] >= count:
+            gate['roundRobinIndex'] = 0
+        gate['threshold'] = inp['threshold']
+        self._set_recipients(gate, inp)
+        senders = self._sender_config(inp)
+        self._check_recipient_gates(count, inp['recipientGateIds'])
+        self._take_hop_fee()
+        self.gates[slot] = gate
+        self.allowed_senders[slot] = senders
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def fund_gate(self, inp):
+        _, gate = self._active_gate(inp['gateId'])
+        if self._reward <= 0:
+            return QUGATE_DUST_AMOUNT
+        gate['reserve'] += self._reward
+        return QUGATE_SUCCESS
+
+    def set_chain(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'])
+        if self._reward < CHAIN_HOP_FEE:
+            raise _Rejected(QUGATE_INSUFFICIENT_FEE)
+        next_id = inp['nextGateId']
+        if next_id == -1:
+            gate.update(chainNextGateId=-1, chainDepth=0)
+            self._take_hop_fee()
+            return QUGATE_SUCCESS
+        depth = self._chain_depth(slot, next_id)
+        if depth is None:
+            raise _Rejected(QUGATE_INVALID_CHAIN)
+        gate.update(chainNextGateId=next_id, chainDepth=depth)
+        self._take_hop_fee()
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def configure_heartbeat(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'], expire=False)
+        if gate['mode'] != MODE_HEARTBEAT:
+            raise _Rejected(QUGATE_HEARTBEAT_NOT_ACTIVE)
+        count, shares = inp['beneficiaryCount'], inp['beneficiaryShares']
+        if (inp['thresholdEpochs'] == 0 or not 0 < inp['payoutPercentPerEpoch'] <= 100
+                or count > MAX_RECIPIENTS or (count == 0 and gate['chainNextGateId'] == -1)
+                or (count > 0 and sum(shares[:count]) != 100)):
+            raise _Rejected(QUGATE_HEARTBEAT_INVALID)
+        self._charge_config_fee(inp['thresholdEpochs'])
+        padding = MAX_RECIPIENTS - count
+        self.heartbeats[slot] = {
+            'thresholdEpochs': inp['thresholdEpochs'], 'lastHeartbeatEpoch': self.epoch,
+            'payoutPercentPerEpoch': inp['payoutPercentPerEpoch'],
+            'minimumBalance': inp['minimumBalance'], 'active': 1, 'triggered': 0,
+            'triggerEpoch': 0, 'beneficiaryCount': count,
+            'beneficiaryAddresses': inp['beneficiaryAddresses'][:count] + [ZERO_ID] * padding,
+            'beneficiaryShares': shares[:count] + [0] * padding}
+        self._touch(gate)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def heartbeat(self, inp):
+        slot = self._require(inp['gateId'])
+        gate = self.gates[slot]
+        if gate['owner'] != self._invocator:
+            raise _Rejected(QUGATE_UNAUTHORIZED)
+        if not gate['active']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        cfg = self._heartbeat(slot)
+        if gate['mode'] != MODE_HEARTBEAT or not cfg['active']:
+            raise _Rejected(QUGATE_HEARTBEAT_NOT_ACTIVE)
+        if cfg['triggered']:
+            raise _Rejected(QUGATE_HEARTBEAT_TRIGGERED)
+        targets = list(self._downstream(gate))
+        cost = idle_charge(self.idle_fee, gate)
+        cost += sum(idle_charge(self.idle_fee, self.gates[target]) for target in targets)
+        cost += self.idle_fee * len(targets) * IDLE_SHIELD_PER_TARGET_BPS // 10000
+        if gate['adminGateId'] >= 0 and self._live_slot(gate['adminGateId']) is not None:
+            cost += self.idle_fee * IDLE_MULTISIG_MULTIPLIER_BPS // 10000
+        elapsed = self.epoch - cfg['lastHeartbeatEpoch'] or 1
+        if self.idle_window_epochs > 0 and elapsed < self.idle_window_epochs:
+            cost = cost * elapsed // self.idle_window_epochs
+        cost = max(cost, HEARTBEAT_PING_FEE)
+        if self._reward < cost:
+            raise _Rejected(QUGATE_INSUFFICIENT_FEE)
+        self._split_fee(cost, maintenance=True)
+        self._refund_excess(cost)
+        cfg['lastHeartbeatEpoch'] = self.epoch
+        self._touch(gate)
+        return {'status': QUGATE_SUCCESS, 'epochRecorded': self.epoch, 'feePaid': cost}
+
+    def configure_multisig(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'], expire=False)
+        if gate['mode'] != MODE_MULTISIG:
+            raise _Rejected(QUGATE_MULTISIG_INVALID_CONFIG)
+        cfg = self._multisig(slot)
+        if cfg['proposalActive'] and not (
+                cfg['proposalExpiryEpochs'] > 0
+                and self.epoch - cfg['proposalEpoch'] > cfg['proposalExpiryEpochs']):
+            raise _Rejected(QUGATE_MULTISIG_PROPOSAL_ACTIVE)
+        count = inp['guardianCount']
+        guardians = inp['guardians'][:count]
+        if (not 0 < count <= MAX_RECIPIENTS or not 0 < inp['required'] <= count
+                or inp['proposalExpiryEpochs'] == 0 or inp['adminApprovalWindowEpochs'] == 0
+                or len(set(guardians)) != count):
+            raise _Rejected(QUGATE_MULTISIG_INVALID_CONFIG)
+        self._take_hop_fee()
+        self.multisigs[slot] = {
+            'guardians': guardians + [ZERO_ID] * (MAX_RECIPIENTS - count),
+            'guardianCount': count, 'required': inp['required'],
+            'proposalExpiryEpochs': inp['proposalExpiryEpochs'],
+            'adminApprovalWindowEpochs': inp['adminApprovalWindowEpochs'],
+            'approvalBitmap': 0, 'approvalCount': 0, 'proposalEpoch': 0, 'proposalActive': 0}
+        self.approvals[slot] = _zero(structs.ADMIN_APPROVAL_STATE)
+        self._touch(gate)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def configure_time_lock(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'], expire=False)
+        if gate['mode'] != MODE_TIME_LOCK:
+            raise _Rejected(QUGATE_INVALID_MODE)
+        lock_mode = inp['lockMode']
+        if lock_mode == TIME_LOCK_ABSOLUTE_EPOCH:
+            if inp['unlockEpoch'] <= self.epoch:
+                raise _Rejected(QUGATE_TIME_LOCK_EPOCH_PAST)
+            duration = inp['unlockEpoch'] - self.epoch
+            unlock = inp['unlockEpoch']
+        elif lock_mode == TIME_LOCK_RELATIVE_EPOCHS:
+            if inp['delayEpochs'] == 0:
+                raise _Rejected(QUGATE_INVALID_PARAMS)
+            duration = inp['delayEpochs']
+            unlock = self.epoch + duration if gate['currentBalance'] > 0 else 0
+        else:
+            raise _Rejected(QUGATE_INVALID_PARAMS)
+        self._charge_config_fee(duration)
+        self.time_locks[slot] = {
+            'unlockEpoch': unlock, 'delayEpochs': inp['delayEpochs'], 'lockMode': lock_mode,
+            'cancellable': inp['cancellable'], 'fired': 0, 'cancelled': 0, 'active': 1}
+        self._touch(gate)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def cancel_time_lock(self, inp):
+        slot, gate, approval = self._governed_gate(inp['gateId'], expire=False)
+        if gate['mode'] != MODE_TIME_LOCK:
+            raise _Rejected(QUGATE_INVALID_MODE)
+        cfg = self._time_lock(slot)
+        if not cfg['active']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        if cfg['fired']:
+            raise _Rejected(QUGATE_TIME_LOCK_ALREADY_FIRED)
+        if cfg['cancelled']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        if not cfg['cancellable']:
+            raise _Rejected(QUGATE_TIME_LOCK_NOT_CANCELLABLE)
+        if not self._refund_holdings(gate):
+            raise _Rejected(QUGATE_INVALID_PARAMS)
+        self._take_hop_fee()
+        cfg['cancelled'] = 1
+        self._close_slot(slot)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def set_admin_gate(self, inp):
+        slot, gate = self._active_gate(inp['gateId'], expire=False)
+        admin_id, approval = inp['adminGateId'], None
+        if gate['owner'] != self._invocator or (
+                gate['adminGateId'] >= 0
+                and gate['governancePolicy'] == GOVERNANCE_STRICT_ADMIN):
+            if gate['adminGateId'] < 0:
+                raise _Rejected(QUGATE_UNAUTHORIZED)
+            current = gate['adminGateId']
+            current_slot = self._live_slot(current) if current > 0 else None
+            dead = current_slot is None or self.gates[current_slot]['mode'] != MODE_MULTISIG
+            if gate['owner'] == self._invocator and admin_id == -1 and dead:
+                self._take_hop_fee()
+                gate.update(adminGateId=-1, governancePolicy=GOVERNANCE_STRICT_ADMIN)
+                return QUGATE_SUCCESS
+            approval = self._admin_approval(gate)
+            if approval is None:
+                raise _Rejected(QUGATE_ADMIN_GATE_REQUIRED)
+        if admin_id == -1:
+            self._take_hop_fee()
+            gate.update(adminGateId=-1, governancePolicy=GOVERNANCE_STRICT_ADMIN)
+            self._consume(approval)
+            return QUGATE_SUCCESS
+        admin_slot = self._slot(admin_id) if admin_id > 0 else None
+        if admin_slot is None:
+            raise _Rejected(QUGATE_INVALID_ADMIN_GATE)
+        admin = self.gates[admin_slot]
+        if not admin['active'] or admin['mode'] != MODE_MULTISIG:
+            raise _Rejected(QUGATE_INVALID_ADMIN_GATE)
+        policy = inp['governancePolicy']
+        if policy not in (GOVERNANCE_STRICT_ADMIN, GOVERNANCE_OWNER_OR_ADMIN):
+            raise _Rejected(QUGATE_INVALID_PARAMS)
+        if gate['mode'] == MODE_MULTISIG and gate['recipientCount'] == 0:
+            raise _Rejected(QUGATE_INVALID_ADMIN_GATE)
+        if admin_slot == slot:
+            raise _Rejected(QUGATE_INVALID_ADMIN_CYCLE)
+        walk = admin_slot
+        for _ in range(MAX_CHAIN_DEPTH):
+            next_id = self.gates[walk]['adminGateId']
+            if next_id < 0:
+                break
+            next_slot = next_id & GATE_ID_SLOT_MASK
+            if next_slot == slot:
+                raise _Rejected(QUGATE_INVALID_ADMIN_CYCLE)
+            if self._slot(next_id) is None:
+                break
+            walk = next_slot
+        self._take_hop_fee()
+        gate.update(adminGateId=admin_id, governancePolicy=policy)
+        self._consume(approval)
+        return QUGATE_SUCCESS
+
+    def withdraw_reserve(self, inp):
+        if self._reward > 0:
+            self._transfer(self._invocator, self._reward)
+        self._reward = 0
+        slot = self._require(inp['gateId'])
+        gate = self.gates[slot]
+        approval = self._authorize(gate, strict=False)
+        if not gate['active']:
+            raise _Rejected(QUGATE_GATE_NOT_ACTIVE)
+        if gate['reserve'] <= 0:
+            return {'status': QUGATE_SUCCESS, 'withdrawn': 0}
+        amount = gate['reserve']
+        if 0 < inp['amount'] < amount:
+            amount = inp['amount']
+        withdrawn = 0
+        if self._transfer(self._invocator, amount):
+            gate['reserve'] -= amount
+            withdrawn = amount
+        self._consume(approval)
+        return {'status': QUGATE_SUCCESS, 'withdrawn': withdrawn}
+
+    # =============================================
+    # Functions
+    # =============================================
+
+    def _gate_view(self, slot):
+        """getGate's output for *slot* (no validity check)."""
+        gate = self.gates[slot]
+        senders = self._senders(slot)
+        view = {name: gate[name] for name, _, _ in structs.GET_GATE_OUTPUT.fields
+                if name in gate}
+        delinquent = self.delinquent[slot]
+        view.update(allowedSenders=list(senders['senders']),
+                    allowedSenderCount=senders['count'],
+                    hasAdminGate=int(gate['adminGateId'] >= 0),
+                    idleDelinquent=int(delinquent > 0))
+        if delinquent > 0 and self.idle_grace_epochs > 0:
+            if self.epoch - delinquent >= self.idle_grace_epochs:
+                view['idleExpiryOverdue'] = 1
+            else:
+                view['idleGraceRemainingEpochs'] = \
+                    self.idle_grace_epochs - (self.epoch - delinquent)
+        return view
+
+    def get_gate(self, inp):
+        slot = self._slot(inp['gateId'])
+        return {} if slot is None else self._gate_view(slot)
+
+    def get_gate_count(self, inp):
+        return {'totalGates': self.gate_count, 'activeGates': self.active_gates,
+                'totalBurned': self.total_burned,
+                'totalMaintenanceCharged': self.maintenance_charged,
+                'totalMaintenanceBurned': self.maintenance_burned,
+                'totalMaintenanceDividends': self.maintenance_dividends,
+                'distributedMaintenanceDividends': self.distributed_dividends}
+
+    def _matching(self, predicate):
+        ids = [self._gate_id(slot) for slot in range(self.gate_count)
+               if self.gates[slot]['active'] and predicate(self.gates[slot])]
+        ids = ids[:MAX_OWNER_GATES]
+        return {'gateIds': ids, 'count': len(ids)}
+
+    def get_gates_by_owner(self, inp):
+        return self._matching(lambda gate: gate['owner'] == inp['owner'])
+
+    def get_gates_by_mode(self, inp):
+        return self._matching(lambda gate: gate['mode'] == inp['mode'])
+
+    def get_gate_batch(self, inp):
+        entries = []
+        stale = [ZERO_ID] * MAX_RECIPIENTS
+        for gate_id in inp['gateIds'][:MAX_BATCH_GATES]:
+            slot = self._slot(gate_id)
+            if slot is None:
+                entries.append({'chainNextGateId': -1, 'adminGateId': -1,
+                                'governancePolicy': GOVERNANCE_STRICT_ADMIN,
+                                'recipientGateIds': [-1] * MAX_RECIPIENTS,
+                                'allowedSenders': stale})
+            else:
+                entry = self._gate_view(slot)
+                stale = entry['allowedSenders']
+                entries.append(entry)
+        return {'gates': entries}
+
+    def get_fees(self, inp):
+        return {'creationFee': self.creation_fee,
+                'currentCreationFee':
+                    self.creation_fee * (1 + self.active_gates // FEE_ESCALATION_STEP),
+                'feeBurnBps': self.fee_burn_bps, 'idleFee': self.idle_fee,
+                'idleWindowEpochs': self.idle_window_epochs,
+                'idleGraceEpochs': self.idle_grace_epochs, 'minSendAmount': self.min_send,
+                'expiryEpochs': self.expiry_epochs}
+
+    def get_heartbeat(self, inp):
+        slot = self._slot(inp['gateId'])
+        if slot is None or self.gates[slot]['mode'] != MODE_HEARTBEAT:
+            return {}
+        return dict(self._heartbeat(slot))
+
+    def get_multisig_state(self, inp):
+        slot = self._slot(inp['gateId'])
+        if slot is None:
+            return {'status': QUGATE_INVALID_GATE_ID}
+        if self.gates[slot]['mode'] != MODE_MULTISIG:
+            return {'status': QUGATE_MULTISIG_INVALID_CONFIG}
+        cfg = self._multisig(slot)
+        out = {name: cfg[name] for name in ('approvalBitmap', 'approvalCount', 'required',
+                                            'guardianCount', 'proposalEpoch', 'proposalActive')}
+        out.update(status=QUGATE_SUCCESS, guardians=cfg['guardians'][:cfg['guardianCount']])
+        return out
+
+    def get_time_lock_state(self, inp):
+        slot = self._slot(inp['gateId'])
+        if slot is None:
+            return {'status': QUGATE_INVALID_GATE_ID}
+        if self.gates[slot]['mode'] != MODE_TIME_LOCK:
+            return {'status': QUGATE_INVALID_MODE}
+        cfg = self._time_lock(slot)
+        unlock = cfg['unlockEpoch']
+        remaining = 0
+        if not cfg['fired'] and unlock != 0 and self.epoch < unlock:
+            remaining = unlock - self.epoch
+        return dict(cfg, status=QUGATE_SUCCESS, currentBalance=self.gates[slot]['currentBalance'],
+                    currentEpoch=self.epoch, epochsRemaining=remaining)
+
+    def get_admin_gate(self, inp):
+        out = {'adminGateId': -1}
+        slot = self._slot(inp['gateId'])
+        if slot is None:
+            return out
+        gate = self.gates[slot]
+        admin_id = gate['adminGateId']
+        out.update(hasAdminGate=int(admin_id >= 0), adminGateId=admin_id,
+                   governancePolicy=gate['governancePolicy'])
+        admin_slot = self._slot(admin_id) if admin_id > 0 else None
+        if admin_slot is not None:
+            cfg = self._multisig(admin_slot)
+            approval = self._approval(admin_slot)
+            out.update(adminGateMode=self.gates[admin_slot]['mode'],
+                       guardianCount=cfg['guardianCount'], required=cfg['required'],
+                       adminApprovalWindowEpochs=cfg['adminApprovalWindowEpochs'],
+                       guardians=cfg['guardians'][:cfg['guardianCount']])
+            if approval['active'] and self.epoch <= approval['validUntilEpoch']:
+                out.update(adminApprovalActive=1,
+                           adminApprovalValidUntilEpoch=approval['validUntilEpoch'])
+        return out
+
+    def get_gate_by_slot(self, inp):
+        slot = inp['slotIndex']
+        if slot >= self.gate_count:
+            return {}
+        generation = self.generations[slot]
+        if self.gates[slot]['active']:
+            gate_id = encode_gate_id(slot, generation)
+        else:
+            gate_id = (generation << GATE_ID_SLOT_BITS) | slot if generation else 0
+        return dict(self._gate_view(slot), valid=1, gateId=gate_id, generation=generation)
+
+    def get_latest_execution(self, inp):
+        slot = self._slot(inp['gateId'])
+        return _fresh_execution() if slot is None else dict(self._execution(slot))
+
+    # =============================================
+    # END_EPOCH passes
+    # =============================================
+
+    def _maintenance_eligible(self, slot, gate):
+        mode = gate['mode']
+        if mode == MODE_HEARTBEAT:
+            return bool(self._heartbeat(slot)['active'])
+        if mode == MODE_MULTISIG:
+            cfg = self._multisig(slot)
+            return bool(cfg['guardianCount'] and cfg['required'])
+        if mode == MODE_TIME_LOCK:
+            return bool(self._time_lock(slot)['active'])
+        return True
+
+    def _holding(self, slot, gate):
+        """Hold state: funds or a vote waiting on the gate, which shields it from charges."""
+        mode, balance = gate['mode'], gate['currentBalance']
+        if mode == MODE_HEARTBEAT:
+            cfg = self._heartbeat(slot)
+            return cfg['active'] == 1 and not cfg['triggered']
+        if mode == MODE_TIME_LOCK:
+            return self._lock_open(slot) and balance > 0
+        if mode == MODE_MULTISIG:
+            return balance > 0 or self._multisig(slot)['proposalActive'] == 1
+        return mode in (MODE_THRESHOLD, MODE_ORACLE) and balance > 0
+
+    def _charge(self, gate, fee, target=None):
+        """Take *fee* from *gate*'s reserve if it covers it; refresh *target*'s schedule."""
+        if gate['reserve'] < fee:
+            return False
+        gate['reserve'] -= fee
+        if target is not None:
+            self._touch(self.gates[target])
+            self.delinquent[target] = 0
+        self._split_fee(fee, maintenance=True)
+        return True
+
+    def _charge_maintenance(self):
+        window = self.idle_window_epochs
+        for slot in range(self.gate_count):
+            gate = self.gates[slot]
+            if not gate['active'] or not self._maintenance_eligible(slot, gate) \
+                    or self.idle_fee == 0:
+                continue
+            due = self._cycle_due(gate)
+            if due and gate['adminGateId'] >= 0 and gate['reserve'] > 0:
+                admin = self._live_slot(gate['adminGateId'])
+                if admin is not None:
+                    self._charge(gate, self.idle_fee * IDLE_MULTISIG_MULTIPLIER_BPS // 10000,
+                                 admin)
+            holding = self._holding(slot, gate)
+            recent = window > 0 and self.epoch - gate['lastActivityEpoch'] < window
+            if recent or holding:
+                if due and window > 0:
+                    gate['nextIdleChargeEpoch'] = (self.epoch + window) & EPOCH_MASK
+                self.delinquent[slot] = 0
+                if due and holding and gate['reserve'] > 0:
+                    targets = list(self._downstream(gate))
+                    for target in targets:
+                        self._charge(gate, idle_charge(self.idle_fee, self.gates[target]), target)
+                    if targets:
+                        self._charge(gate, self.idle_fee * len(targets)
+                                     * IDLE_SHIELD_PER_TARGET_BPS // 10000)
+                continue
+            next_idle = gate['nextIdleChargeEpoch']
+            if next_idle == 0 and window > 0:
+                gate['nextIdleChargeEpoch'] = (self.epoch + window) & EPOCH_MASK
+                continue
+            if window > 0 and self.epoch > 0 and next_idle > 0 and self.epoch >= next_idle:
+                if self._charge(gate, idle_charge(self.idle_fee, gate)):
+                    gate['nextIdleChargeEpoch'] = (self.epoch + window) & EPOCH_MASK
+                    self.delinquent[slot] = 0
+                elif not self.delinquent[slot]:
+                    self.delinquent[slot] = self.epoch
+
+    def _governs_live_gate(self, slot):
+        generation = self.generations[slot]
+        for gate in self.gates[:self.gate_count]:
+            admin_id = gate['adminGateId']
+            if gate['active'] and admin_id >= 0 \
+                    and admin_id & GATE_ID_SLOT_MASK == slot \
+                    and admin_id >> GATE_ID_SLOT_BITS > 0 \
+                    and generation == ((admin_id >> GATE_ID_SLOT_BITS) - 1) & GENERATION_MASK:
+                return True
+        return False
+
+    def _expire_gates(self):
+        if self.expiry_epochs == 0:
+            return
+        for slot in range(self.gate_count):
+            gate = self.gates[slot]
+            if not gate['active']:
+                continue
+            mode, delinquent = gate['mode'], self.delinquent[slot]
+            if delinquent == 0 and (
+                    (mode == MODE_TIME_LOCK and self._lock_open(slot))
+                    or (mode == MODE_HEARTBEAT and self._heartbeat(slot)['active'] == 1
+                        and not self._heartbeat(slot)['triggered'])
+                    or (mode == MODE_MULTISIG and gate['currentBalance'] > 0)):
+                continue
+            if mode == MODE_MULTISIG and gate['recipientCount'] == 0:
+                if self._governs_live_gate(slot):
+                    continue
+                if gate['currentBalance'] == 0 and gate['reserve'] <= 0:
+                    self._close_slot(slot)
+                    continue
+            overdue = delinquent > 0 and self.idle_grace_epochs > 0 \
+                and self.epoch - delinquent >= self.idle_grace_epochs
+            if overdue or self.epoch - gate['lastActivityEpoch'] >= self.expiry_epochs:
+                if not self._refund_holdings(gate):
+                    continue
+                self._clear_mode_config(slot, mode)
+                self._close_slot(slot)
+                self.delinquent[slot] = 0
+
+    def _pay_out_heartbeats(self):
+        for slot in range(self.gate_count):
+            gate = self.gates[slot]
+            if not gate['active'] or gate['mode'] != MODE_HEARTBEAT:
+                continue
+            cfg = self._heartbeat(slot)
+            if not cfg['active']:
+                continue
+            if not cfg['triggered']:
+                if self.epoch - cfg['lastHeartbeatEpoch'] > cfg['thresholdEpochs']:
+                    cfg.update(triggered=1, triggerEpoch=self.epoch)
+                continue
+            if gate['currentBalance'] <= cfg['minimumBalance']:
+                continue
+            count = cfg['beneficiaryCount']
+            addresses, shares = cfg['beneficiaryAddresses'], cfg['beneficiaryShares']
+            payout = gate['currentBalance'] * cfg['payoutPercentPerEpoch'] // 100
+            if payout == 0:
+                payout = gate['currentBalance']
+            paid = 0
+            for j in range(count):
+                if j == count - 1:
+                    share = payout - sum(payout * s // 100 for s in shares[:j])
+                else:
+                    share = payout * shares[j] // 100
+                if share > 0 and self._transfer(addresses[j], share):
+                    gate['totalForwarded'] += share
+                    gate['currentBalance'] -= share
+                    paid += share
+            if gate['chainNextGateId'] != -1 and payout > paid:
+                rest = payout - paid
+                gate['totalForwarded'] += rest
+                gate['currentBalance'] -= rest
+                self._forward_chain(slot, rest)
+            if gate['currentBalance'] > cfg['minimumBalance']:
+                continue
+            dust = gate['currentBalance']
+            if dust > 0 and count > 0:
+                prior = 0
+                for j in range(count):
+                    if j == count - 1:
+                        share = dust - prior
+                    else:
+                        share = dust * shares[j] // 100
+                        prior += share
+                    if share > 0 and self._transfer(addresses[j], share):
+                        gate['totalForwarded'] += share
+                        gate['currentBalance'] -= share
+            elif dust > 0 and self._transfer(gate['owner'], dust):
+                gate['currentBalance'] = 0
+            if gate['currentBalance'] > 0:
+                continue
+            self._close_slot(slot)
+
+    def _expire_proposals(self):
+        for slot in range(self.gate_count):
+            gate = self.gates[slot]
+            if not gate['active'] or gate['mode'] != MODE_MULTISIG:
+                continue
+            cfg = self._multisig(slot)
+            if cfg['proposalActive'] \
+                    and self.epoch - cfg['proposalEpoch'] > cfg['proposalExpiryEpochs']:
+                cfg.update(approvalBitmap=0, approvalCount=0, proposalActive=0)
+
+    def _release_time_locks(self):
+        for slot in range(self.gate_count):
+            gate = self.gates[slot]
+            if not gate['active'] or gate['mode'] != MODE_TIME_LOCK or not self._lock_open(slot):
+                continue
+            cfg = self._time_lock(slot)
+            if cfg['unlockEpoch'] == 0 or self.epoch < cfg['unlockEpoch']:
+                continue
+            release = gate['currentBalance']
+            if release > 0:
+                transferred = False
+                if gate['recipientCount'] > 0:
+                    if gate['recipientGateIds'][0] >= 0:
+                        target = self._live_slot(gate['recipientGateIds'][0])
+                        if target is not None:
+                            transferred = self._route(target, release, 0)[1]
+                    else:
+                        transferred = self._transfer(gate['recipients'][0], release)
+                elif gate['chainNextGateId'] != -1:
+                    gate['totalForwarded'] += release
+                    gate['currentBalance'] -= release
+                    self._forward_chain(slot, release)
+                    transferred = gate['currentBalance'] == 0
+                if transferred:
+                    gate['totalForwarded'] += release
+                    gate['currentBalance'] = 0
+            if gate['currentBalance'] > 0:
+                continue
+            cfg['fired'] = 1
+            self._close_slot(slot)
+
+
+PROCEDURES = {
+    1: (ContractSimulator.create_gate, structs.CREATE_GATE_INPUT, structs.CREATE_GATE_OUTPUT),
+    2: (ContractSimulator.send_to_gate, structs.SEND_TO_GATE_INPUT, structs.SEND_TO_GATE_OUTPUT),
+    3: (ContractSimulator.close_gate, structs.CLOSE_GATE_INPUT, structs.CLOSE_GATE_OUTPUT),
+    4: (ContractSimulator.update_gate, structs.UPDATE_GATE_INPUT, structs.UPDATE_GATE_OUTPUT),
+    10: (ContractSimulator.fund_gate, structs.FUND_GATE_INPUT, structs.FUND_GATE_OUTPUT),
+    11: (ContractSimulator.set_chain, structs.SET_CHAIN_INPUT, structs.SET_CHAIN_OUTPUT),
+    12: (ContractSimulator.send_to_gate_verified, structs.SEND_TO_GATE_VERIFIED_INPUT,
+         structs.SEND_TO_GATE_VERIFIED_OUTPUT),
+    13: (ContractSimulator.configure_heartbeat, structs.CONFIGURE_HEARTBEAT_INPUT,
+         structs.CONFIGURE_HEARTBEAT_OUTPUT),
+    14: (ContractSimulator.heartbeat, structs.HEARTBEAT_INPUT, structs.HEARTBEAT_OUTPUT),
+    16: (ContractSimulator.configure_multisig, structs.CONFIGURE_MULTISIG_INPUT,
+         structs.CONFIGURE_MULTISIG_OUTPUT),
+    18: (ContractSimulator.configure_time_lock, structs.CONFIGURE_TIME_LOCK_INPUT,
+         structs.CONFIGURE_TIME_LOCK_OUTPUT),
+    19: (ContractSimulator.cancel_time_lock, structs.CANCEL_TIME_LOCK_INPUT,
+         structs.CANCEL_TIME_LOCK_OUTPUT),
+    21: (ContractSimulator.set_admin_gate, structs.SET_ADMIN_GATE_INPUT,
+         structs.SET_ADMIN_GATE_OUTPUT),
+    23: (ContractSimulator.withdraw_reserve, structs.WITHDRAW_RESERVE_INPUT,
+         structs.WITHDRAW_RESERVE_OUTPUT),
+}
+
+FUNCTIONS = {
+    5: (ContractSimulator.get_gate, structs.GET_GATE_INPUT, structs.GET_GATE_OUTPUT),
+    6: (ContractSimulator.get_gate_count, structs.GET_GATE_COUNT_INPUT,
+        structs.GET_GATE_COUNT_OUTPUT),
+    7: (ContractSimulator.get_gates_by_owner, structs.GET_GATES_BY_OWNER_INPUT,
+        structs.GET_GATES_BY_OWNER_OUTPUT),
+    8: (ContractSimulator.get_gate_batch, structs.GET_GATE_BATCH_INPUT,
+        structs.GET_GATE_BATCH_OUTPUT),
+    9: (ContractSimulator.get_fees, structs.GET_FEES_INPUT, structs.GET_FEES_OUTPUT),
+    15: (ContractSimulator.get_heartbeat, structs.GET_HEARTBEAT_INPUT,
+         structs.GET_HEARTBEAT_OUTPUT),
+    17: (ContractSimulator.get_multisig_state, structs.GET_MULTISIG_STATE_INPUT,
+         structs.GET_MULTISIG_STATE_OUTPUT),
+    20: (ContractSimulator.get_time_lock_state, structs.GET_TIME_LOCK_STATE_INPUT,
+         structs.GET_TIME_LOCK_STATE_OUTPUT),
+    22: (ContractSimulator.get_admin_gate, structs.GET_ADMIN_GATE_INPUT,
+         structs.GET_ADMIN_GATE_OUTPUT),
+    24: (ContractSimulator.get_gates_by_mode, structs.GET_GATES_BY_MODE_INPUT,
+         structs.GET_GATES_BY_MODE_OUTPUT),
+    25: (ContractSimulator.get_gate_by_slot, structs.GET_GATE_BY_SLOT_INPUT,
+         structs.GET_GATE_BY_SLOT_OUTPUT),
+    26: (ContractSimulator.get_latest_execution, structs.GET_LATEST_EXECUTION_INPUT,
+         structs.GET_LATEST_EXECUTION_OUTPUT),
+}
+
+
+class SimulatorResponse:
+    """Minimal ``requests.Response`` stand-in."""
+
+    def __init__(self, status_code, payload, url):
+        self.status_code = status_code
+        self.payload = payload
+        self.url = url
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}: "
+                                     f"{self.payload.get('message')}", response=self)
+
+    def json(self):
+        return self.payload
+
+
+class SimulatorSession:
+    """``requests.Session`` stand-in answering RPC calls from a :class:`ContractSimulator`."""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def request(self, method, url, timeout=None, json=None, **kwargs):
+        status, payload = self.simulator.handle(method.upper(), url, json)
+        return SimulatorResponse(status, payload, url)
+
+    def close(self):
+        pass
@@ -0,0 +1,532 @@
+"""
+Binary layouts of the QuGate contract inputs/outputs.
+
+All data is little-endian with natural C alignment: each field is aligned to
+its own size, ``id`` (32-byte public key) is aligned to 8, and ``Array<T, N>``
+is N contiguous elements. Field names match QuGate.h exactly: the codec
+tables below are generated from it by ``scripts/gen_structs.py``, and an
+offline test fails if they drift.
+"""
+from __future__ import annotations
+
+import struct
+
+# type name -> (struct code, size, alignment)
+SCALAR_TYPES = {
+    'uint8': ('B', 1, 1),
+    'sint8': ('b', 1, 1),
+    'uint16': ('H', 2, 2),
+    'sint16': ('h', 2, 2),
+    'uint32': ('I', 4, 4),
+    'sint32': ('i', 4, 4),
+    'uint64': ('Q', 8, 8),
+    'sint64': ('q', 8, 8),
+    'id': ('32s', 32, 8),
+}
+
+ZERO_ID = bytes(32)
+
+
+class Codec:
+    """Precompiled little-endian codec for one contract struct.
+
+    A field type is a scalar type name or another Codec (a nested struct);
+    nested fields decode to dicts, arrays of them to lists of dicts.
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = []    # (field name, type name or Codec, count)
+        self.offsets = {}
+        self._plan = []     # (field name, first value index, count, nested Codec or None)
+        fmt = ['<']
+        offset = 0
+        align = 1
+        nvalues = 0
+        for field in fields:
+            fname, ftype = field[0], field[1]
+            count = field[2] if len(field) > 2 else 1
+            if isinstance(ftype, Codec):
+                code, size, falign = ftype.struct.format.lstrip('<'), ftype.size, ftype.align
+            else:
+                code, size, falign = SCALAR_TYPES[ftype]
+            pad = -offset % falign
+            if pad:
+                fmt.append(f'{pad}x')
+                offset += pad
+            self.offsets[fname] = offset
+            if isinstance(ftype, Codec) or code.endswith('s'):
+                fmt.append(code * count)
+            else:
+                fmt.append(f'{count}{code}')
+            offset += size * count
+            align = max(align, falign)
+            self.fields.append((fname, ftype, count))
+            nested = ftype if isinstance(ftype, Codec) else None
+            self._plan.append((fname, nvalues, count, nested))
+            nvalues += count * (nested.nvalues if nested else 1)
+        tail = -offset % align
+        if tail:
+            fmt.append(f'{tail}x')
+        self.size = offset + tail
+        self.align = align
+        self.nvalues = nvalues
+        self.struct = struct.Struct(''.join(fmt))
+
+    def __repr__(self):
+        return f'<Codec {self.name} size={self.size}>'
+
+    def _build(self, values, base=0):
+        out = {}
+        for fname, start, count, nested in self._plan:
+            i = base + start
+            if nested is None:
+                out[fname] = values[i] if count == 1 else list(values[i:i + count])
+            elif count == 1:
+                out[fname] = nested._build(values, i)
+            else:
+                step = nested.nvalues
+                out[fname] = [nested._build(values, i + k * step) for k in range(count)]
+        return out
+
+    def decode(self, data, offset=0):
+        """Decode one struct from *data* at *offset*; short buffers are zero-filled."""
+        if len(data) - offset < self.size:
+            data = bytes(data[offset:]).ljust(self.size, b'\0')
+            offset = 0
+        return self._build(self.struct.unpack_from(data, offset))
+
+    def decode_many(self, data, count=None, offset=0):
+        """Decode *count* consecutive structs (default: as many as fit) from *data*.
+
+        Works on a zero-copy ``memoryview`` of *data*; a short final struct is
+        zero-filled like :meth:`decode`.
+        """
+        view = memoryview(data)[offset:]
+        available = len(view) // self.size
+        if count is None:
+            count = available
+        whole = min(count, available)
+        out = [self._build(values)
+               for values in self.struct.iter_unpack(view[:whole * self.size])]
+        for i in range(whole, count):
+            out.append(self.decode(view, i * self.size))
+        return out
+
+    def _flatten(self, values, flat):
+        unknown = set(values) - set(self.offsets)
+        if unknown:
+            raise KeyError(f"{self.name} has no field(s) {sorted(unknown)}")
+        for fname, ftype, count in self.fields:
+            value = values.get(fname)
+            nested = isinstance(ftype, Codec)
+            zero = {} if nested else ZERO_ID if ftype == 'id' else 0
+            if count == 1:
+                items = [zero if value is None else value]
+            else:
+                items = [] if value is None else list(value)
+                if len(items) > count:
+                    raise ValueError(f"{self.name}.{fname} holds at most {count} entries")
+                items += [zero] * (count - len(items))
+            if nested:
+                for item in items:
+                    ftype._flatten(item, flat)
+            else:
+                flat.extend(items)
+
+    def encode(self, **values):
+        """Encode keyword *values*; missing fields and array tails are zeroed."""
+        flat = []
+        self._flatten(values, flat)
+        return self.struct.pack(*flat)
+
+
+# BEGIN GENERATED LAYOUTS (scripts/gen_structs.py from QuGate.h; do not edit)
+
+HEARTBEAT_CONFIG = Codec('QUGATE_HeartbeatConfig', [
+    ('thresholdEpochs', 'uint32'),
+    ('lastHeartbeatEpoch', 'uint32'),
+    ('payoutPercentPerEpoch', 'uint8'),
+    ('minimumBalance', 'sint64'),
+    ('active', 'uint8'),
+    ('triggered', 'uint8'),
+    ('triggerEpoch', 'uint32'),
+    ('beneficiaryAddresses', 'id', 8),
+    ('beneficiaryShares', 'uint8', 8),
+    ('beneficiaryCount', 'uint8'),
+])
+
+MULTISIG_CONFIG = Codec('QUGATE_MultisigConfig', [
+    ('guardians', 'id', 8),
+    ('guardianCount', 'uint8'),
+    ('required', 'uint8'),
+    ('proposalExpiryEpochs', 'uint32'),
+    ('adminApprovalWindowEpochs', 'uint32'),
+    ('approvalBitmap', 'uint8'),
+    ('approvalCount', 'uint8'),
+    ('proposalEpoch', 'uint32'),
+    ('proposalActive', 'uint8'),
+])
+
+ADMIN_APPROVAL_STATE = Codec('QUGATE_AdminApprovalState', [
+    ('active', 'uint8'),
+    ('validUntilEpoch', 'uint32'),
+])
+
+TIME_LOCK_CONFIG = Codec('QUGATE_TimeLockConfig', [
+    ('unlockEpoch', 'uint32'),
+    ('delayEpochs', 'uint32'),
+    ('lockMode', 'uint8'),
+    ('cancellable', 'uint8'),
+    ('fired', 'uint8'),
+    ('cancelled', 'uint8'),
+    ('active', 'uint8'),
+])
+
+ALLOWED_SENDERS_CONFIG = Codec('QUGATE_AllowedSendersConfig', [
+    ('senders', 'id', 8),
+    ('count', 'uint8'),
+])
+
+QUGATE_LOGGER = Codec('QuGateLogger', [
+    ('_contractIndex', 'uint32'),
+    ('_type', 'uint32'),
+    ('gateId', 'uint64'),
+    ('sender', 'id'),
+    ('amount', 'sint64'),
+    ('_terminator', 'sint8'),
+])
+
+GATE_CONFIG = Codec('GateConfig', [
+    ('owner', 'id'),
+    ('mode', 'uint8'),
+    ('recipientCount', 'uint8'),
+    ('active', 'uint8'),
+    ('createdEpoch', 'uint16'),
+    ('lastActivityEpoch', 'uint16'),
+    ('totalReceived', 'uint64'),
+    ('totalForwarded', 'uint64'),
+    ('currentBalance', 'uint64'),
+    ('threshold', 'uint64'),
+    ('roundRobinIndex', 'uint64'),
+    ('recipients', 'id', 8),
+    ('ratios', 'uint64', 8),
+    ('chainNextGateId', 'sint64'),
+    ('chainDepth', 'uint8'),
+    ('reserve', 'sint64'),
+    ('nextIdleChargeEpoch', 'uint16'),
+    ('adminGateId', 'sint64'),
+    ('governancePolicy', 'uint8'),
+    ('recipientGateIds', 'sint64', 8),
+])
+
+LATEST_EXECUTION = Codec('QUGATE_LatestExecution', [
+    ('valid', 'uint8'),
+    ('mode', 'uint8'),
+    ('outcomeType', 'uint8'),
+    ('selectedRecipientIndex', 'uint8'),
+    ('selectedDownstreamGateId', 'sint64'),
+    ('forwardedAmount', 'uint64'),
+    ('observedTick', 'uint64'),
+])
+
+CREATE_GATE_INPUT = Codec('createGate_input', [
+    ('mode', 'uint8'),
+    ('recipientCount', 'uint8'),
+    ('recipients', 'id', 8),
+    ('ratios', 'uint64', 8),
+    ('threshold', 'uint64'),
+    ('allowedSenders', 'id', 8),
+    ('allowedSenderCount', 'uint8'),
+    ('chainNextGateId', 'sint64'),
+    ('recipientGateIds', 'sint64', 8),
+])
+
+CREATE_GATE_OUTPUT = Codec('createGate_output', [
+    ('status', 'sint64'),
+    ('gateId', 'uint64'),
+    ('feePaid', 'uint64'),
+])
+
+SEND_TO_GATE_INPUT = Codec('sendToGate_input', [('gateId', 'uint64')])
+
+SEND_TO_GATE_OUTPUT = Codec('sendToGate_output', [('status', 'sint64')])
+
+CLOSE_GATE_INPUT = Codec('closeGate_input', [('gateId', 'uint64')])
+
+CLOSE_GATE_OUTPUT = Codec('closeGate_output', [('status', 'sint64')])
+
+UPDATE_GATE_INPUT = Codec('updateGate_input', [
+    ('gateId', 'uint64'),
+    ('recipientCount', 'uint8'),
+    ('recipients', 'id', 8),
+    ('ratios', 'uint64', 8),
+    ('threshold', 'uint64'),
+    ('allowedSenders', 'id', 8),
+    ('allowedSenderCount', 'uint8'),
+    ('recipientGateIds', 'sint64', 8),
+])
+
+UPDATE_GATE_OUTPUT = Codec('updateGate_output', [('status', 'sint64')])
+
+FUND_GATE_INPUT = Codec('fundGate_input', [('gateId', 'uint64')])
+
+FUND_GATE_OUTPUT = Codec('fundGate_output', [('result', 'sint64')])
+
+SET_CHAIN_INPUT = Codec('setChain_input', [
+    ('gateId', 'uint64'),
+    ('nextGateId', 'sint64'),
+])
+
+SET_CHAIN_OUTPUT = Codec('setChain_output', [('result', 'sint64')])
+
+SEND_TO_GATE_VERIFIED_INPUT = Codec('sendToGateVerified_input', [
+    ('gateId', 'uint64'),
+    ('expectedOwner', 'id'),
+])
+
+SEND_TO_GATE_VERIFIED_OUTPUT = Codec('sendToGateVerified_output', [('status', 'sint64')])
+
+CONFIGURE_HEARTBEAT_INPUT = Codec('configureHeartbeat_input', [
+    ('gateId', 'uint64'),
+    ('thresholdEpochs', 'uint32'),
+    ('payoutPercentPerEpoch', 'uint8'),
+    ('minimumBalance', 'sint64'),
+    ('beneficiaryAddresses', 'id', 8),
+    ('beneficiaryShares', 'uint8', 8),
+    ('beneficiaryCount', 'uint8'),
+])
+
+CONFIGURE_HEARTBEAT_OUTPUT = Codec('configureHeartbeat_output', [('status', 'sint64')])
+
+HEARTBEAT_INPUT = Codec('heartbeat_input', [('gateId', 'uint64')])
+
+HEARTBEAT_OUTPUT = Codec('heartbeat_output', [
+    ('status', 'sint64'),
+    ('epochRecorded', 'uint32'),
+    ('feePaid', 'uint64'),
+])
+
+GET_HEARTBEAT_INPUT = Codec('getHeartbeat_input', [('gateId', 'uint64')])
+
+GET_HEARTBEAT_OUTPUT = Codec('getHeartbeat_output', [
+    ('active', 'uint8'),
+    ('triggered', 'uint8'),
+    ('thresholdEpochs', 'uint32'),
+    ('lastHeartbeatEpoch', 'uint32'),
+    ('triggerEpoch', 'uint32'),
+    ('payoutPercentPerEpoch', 'uint8'),
+    ('minimumBalance', 'sint64'),
+    ('beneficiaryCount', 'uint8'),
+    ('beneficiaryAddresses', 'id', 8),
+    ('beneficiaryShares', 'uint8', 8),
+])
+
+CONFIGURE_MULTISIG_INPUT = Codec('configureMultisig_input', [
+    ('gateId', 'uint64'),
+    ('guardians', 'id', 8),
+    ('guardianCount', 'uint8'),
+    ('required', 'uint8'),
+    ('proposalExpiryEpochs', 'uint32'),
+    ('adminApprovalWindowEpochs', 'uint32'),
+])
+
+CONFIGURE_MULTISIG_OUTPUT = Codec('configureMultisig_output', [('status', 'sint64')])
+
+GET_MULTISIG_STATE_INPUT = Codec('getMultisigState_input', [('gateId', 'uint64')])
+
+GET_MULTISIG_STATE_OUTPUT = Codec('getMultisigState_output', [
+    ('status', 'sint64'),
+    ('approvalBitmap', 'uint8'),
+    ('approvalCount', 'uint8'),
+    ('required', 'uint8'),
+    ('guardianCount', 'uint8'),
+    ('proposalEpoch', 'uint32'),
+    ('proposalActive', 'uint8'),
+    ('guardians', 'id', 8),
+])
+
+CONFIGURE_TIME_LOCK_INPUT = Codec('configureTimeLock_input', [
+    ('gateId', 'uint64'),
+    ('unlockEpoch', 'uint32'),
+    ('delayEpochs', 'uint32'),
+    ('lockMode', 'uint8'),
+    ('cancellable', 'uint8'),
+])
+
+CONFIGURE_TIME_LOCK_OUTPUT = Codec('configureTimeLock_output', [('status', 'sint64')])
+
+CANCEL_TIME_LOCK_INPUT = Codec('cancelTimeLock_input', [('gateId', 'uint64')])
+
+CANCEL_TIME_LOCK_OUTPUT = Codec('cancelTimeLock_output', [('status', 'sint64')])
+
+SET_ADMIN_GATE_INPUT = Codec('setAdminGate_input', [
+    ('gateId', 'uint64'),
+    ('adminGateId', 'sint64'),
+    ('governancePolicy', 'uint8'),
+])
+
+SET_ADMIN_GATE_OUTPUT = Codec('setAdminGate_output', [('status', 'sint64')])
+
+GET_ADMIN_GATE_INPUT = Codec('getAdminGate_input', [('gateId', 'uint64')])
+
+GET_ADMIN_GATE_OUTPUT = Codec('getAdminGate_output', [
+    ('hasAdminGate', 'uint8'),
+    ('adminGateId', 'sint64'),
+    ('governancePolicy', 'uint8'),
+    ('adminGateMode', 'uint8'),
+    ('guardianCount', 'uint8'),
+    ('required', 'uint8'),
+    ('adminApprovalWindowEpochs', 'uint32'),
+    ('adminApprovalActive', 'uint8'),
+    ('adminApprovalValidUntilEpoch', 'uint32'),
+    ('guardians', 'id', 8),
+])
+
+WITHDRAW_RESERVE_INPUT = Codec('withdrawReserve_input', [
+    ('gateId', 'uint64'),
+    ('amount', 'uint64'),
+])
+
+WITHDRAW_RESERVE_OUTPUT = Codec('withdrawReserve_output', [
+    ('status', 'sint64'),
+    ('withdrawn', 'uint64'),
+])
+
+GET_GATES_BY_MODE_INPUT = Codec('getGatesByMode_input', [('mode', 'uint8')])
+
+GET_GATES_BY_MODE_OUTPUT = Codec('getGatesByMode_output', [
+    ('gateIds', 'uint64', 32),
+    ('count', 'uint64'),
+])
+
+GET_GATE_BY_SLOT_INPUT = Codec('getGateBySlot_input', [('slotIndex', 'uint64')])
+
+GET_GATE_BY_SLOT_OUTPUT = Codec('getGateBySlot_output', [
+    ('valid', 'uint8'),
+    ('gateId', 'uint64'),
+    ('generation', 'uint16'),
+    ('mode', 'uint8'),
+    ('recipientCount', 'uint8'),
+    ('active', 'uint8'),
+    ('owner', 'id'),
+    ('totalReceived', 'uint64'),
+    ('totalForwarded', 'uint64'),
+    ('currentBalance', 'uint64'),
+    ('threshold', 'uint64'),
+    ('createdEpoch', 'uint16'),
+    ('lastActivityEpoch', 'uint16'),
+    ('recipients', 'id', 8),
+    ('ratios', 'uint64', 8),
+    ('allowedSenders', 'id', 8),
+    ('allowedSenderCount', 'uint8'),
+    ('chainNextGateId', 'sint64'),
+    ('chainDepth', 'uint8'),
+    ('reserve', 'sint64'),
+    ('nextIdleChargeEpoch', 'uint16'),
+    ('adminGateId', 'sint64'),
+    ('governancePolicy', 'uint8'),
+    ('hasAdminGate', 'uint8'),
+    ('idleDelinquent', 'uint8'),
+    ('idleGraceRemainingEpochs', 'uint16'),
+    ('idleExpiryOverdue', 'uint8'),
+    ('recipientGateIds', 'sint64', 8),
+])
+
+GET_LATEST_EXECUTION_INPUT = Codec('getLatestExecution_input', [('gateId', 'uint64')])
+
+GET_LATEST_EXECUTION_OUTPUT = Codec('getLatestExecution_output', [
+    ('valid', 'uint8'),
+    ('mode', 'uint8'),
+    ('outcomeType', 'uint8'),
+    ('selectedRecipientIndex', 'uint8'),
+    ('selectedDownstreamGateId', 'sint64'),
+    ('forwardedAmount', 'uint64'),
+    ('observedTick', 'uint64'),
+])
+
+GET_TIME_LOCK_STATE_INPUT = Codec('getTimeLockState_input', [('gateId', 'uint64')])
+
+GET_TIME_LOCK_STATE_OUTPUT = Codec('getTimeLockState_output', [
+    ('status', 'sint64'),
+    ('unlockEpoch', 'uint32'),
+    ('delayEpochs', 'uint32'),
+    ('lockMode', 'uint8'),
+    ('cancellable', 'uint8'),
+    ('fired', 'uint8'),
+    ('cancelled', 'uint8'),
+    ('active', 'uint8'),
+    ('currentBalance', 'sint64'),
+    ('currentEpoch', 'uint32'),
+    ('epochsRemaining', 'uint32'),
+])
+
+GET_GATE_INPUT = Codec('getGate_input', [('gateId', 'uint64')])
+
+GET_GATE_OUTPUT = Codec('getGate_output', [
+    ('mode', 'uint8'),
+    ('recipientCount', 'uint8'),
+    ('active', 'uint8'),
+    ('owner', 'id'),
+    ('totalReceived', 'uint64'),
+    ('totalForwarded', 'uint64'),
+    ('currentBalance', 'uint64'),
+    ('threshold', 'uint64'),
+    ('createdEpoch', 'uint16'),
+    ('lastActivityEpoch', 'uint16'),
+    ('recipients', 'id', 8),
+    ('ratios', 'uint64', 8),
+    ('allowedSenders', 'id', 8),
+    ('allowedSenderCount', 'uint8'),
+    ('chainNextGateId', 'sint64'),
+    ('chainDepth', 'uint8'),
+    ('reserve', 'sint64'),
+    ('nextIdleChargeEpoch', 'uint16'),
+    ('adminGateId', 'sint64'),
+    ('governancePolicy', 'uint8'),
+    ('hasAdminGate', 'uint8'),
+    ('idleDelinquent', 'uint8'),
+    ('idleGraceRemainingEpochs', 'uint16'),
+    ('idleExpiryOverdue', 'uint8'),
+    ('recipientGateIds', 'sint64', 8),
+])
+
+GET_GATE_COUNT_INPUT = Codec('getGateCount_input', [])
+
+GET_GATE_COUNT_OUTPUT = Codec('getGateCount_output', [
+    ('totalGates', 'uint64'),
+    ('activeGates', 'uint64'),
+    ('totalBurned', 'uint64'),
+    ('totalMaintenanceCharged', 'uint64'),
+    ('totalMaintenanceBurned', 'uint64'),
+    ('totalMaintenanceDividends', 'uint64'),
+    ('distributedMaintenanceDividends', 'uint64'),
+])
+
+GET_GATES_BY_OWNER_INPUT = Codec('getGatesByOwner_input', [('owner', 'id')])
+
+GET_GATES_BY_OWNER_OUTPUT = Codec('getGatesByOwner_output', [
+    ('gateIds', 'uint64', 32),
+    ('count', 'uint64'),
+])
+
+GET_GATE_BATCH_INPUT = Codec('getGateBatch_input', [('gateIds', 'uint64', 32)])
+
+GET_GATE_BATCH_OUTPUT = Codec('getGateBatch_output', [('gates', GET_GATE_OUTPUT, 32)])
+
+GET_FEES_INPUT = Codec('getFees_input', [])
+
+GET_FEES_OUTPUT = Codec('getFees_output', [
+    ('creationFee', 'uint64'),
+    ('currentCreationFee', 'uint64'),
+    ('feeBurnBps', 'uint64'),
+    ('idleFee', 'uint64'),
+    ('idleWindowEpochs', 'uint64'),
+    ('idleGraceEpochs', 'uint64'),
+    ('minSendAmount', 'uint64'),
+    ('expiryEpochs', 'uint64'),
+])
+# END GENERATED LAYOUTS
+
+# getGate_input is the plain {gateId} query shared by several functions
+GATE_ID_INPUT = GET_GATE_INPUT
@@ -0,0 +1,252 @@
+"""
+Live fleet monitor: ``python -m qugate top``.
+
+:class:`FleetView` keeps one display row per live gate. Each
+:meth:`FleetView.update` reads every live gate through a
+:class:`~qugate.bulk.GateDirectory` (chunked 32-ID getGateBatch calls, so
+``3 + ceil(gates / 32)`` queries) and calls getLatestExecution only for the
+gates whose totals moved. It then rebuilds the rows of gates that changed, or
+that showed throughput in the previous update and so drop back to zero. The
+visible rows are kept in a sorted list under the current owner/mode filter,
+and a changed row is moved with two bisections, so a tick with a handful of
+active gates costs a handful of list operations however large the fleet is:
+
+    view = FleetView(client, sort='received', modes=['SPLIT'])
+    view.update()
+    print(view.render(limit=30))
+
+Each row shows the ``totalReceived``/``totalForwarded`` deltas since the
+previous update, ``currentBalance``, the reserve runway (epochs of idle fees
+the reserve covers at the gate's multiplier), the delinquency state
+(``idleDelinquent``, ``idleGraceRemainingEpochs``) and the outcome of the
+gate's latest execution seen while monitoring (``-`` until it moves).
+:func:`main` redraws it once per tick.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+from .bulk import GateDirectory
+from .client import QuGateClient, RpcError
+from .clock import TickClock
+from .constants import DEFAULT_RPC, MODE_NAMES
+from .gateid import gate_slot
+from .keys import identity_from_public_key, public_key_from_identity
+from .maintenance import idle_charge
+
+OUTCOME_NAMES = ['-', 'FORWARDED', 'HELD', 'REFUNDED', 'BURNED', 'REJECTED']
+NO_RUNWAY = float('inf')
+
+# sort name -> row field; larger first unless noted in ASCENDING
+SORT_FIELDS = {
+    'received': 'dReceived',
+    'forwarded': 'dForwarded',
+    'balance': 'currentBalance',
+    'reserve': 'reserve',
+    'runway': 'runwayEpochs',
+    'slot': 'slot',
+}
+ASCENDING = frozenset(('runway', 'slot'))
+
+
+def runway_epochs(gate, fees):
+    """Epochs of idle charges the gate's reserve covers (``inf`` if none are charged)."""
+    charge = idle_charge(fees['idleFee'], gate)
+    if charge <= 0 or fees['idleWindowEpochs'] <= 0:
+        return NO_RUNWAY
+    return max(gate['reserve'], 0) // charge * fees['idleWindowEpochs']
+
+
+class FleetView:
+    """Per-gate monitor rows, incrementally refreshed, filtered and sorted.
+
+    *owner* is an identity (or 32-byte public key) and *modes* a list of mode
+    numbers or MODE_NAMES entries; closed gates are never shown.
+    """
+
+    def __init__(self, client, sort='received', owner=None, modes=None, workers=None):
+        self.client = client
+        self.workers = workers or client.pool_size
+        self.directory = GateDirectory(client, workers)
+        self.tick = None
+        self.epoch = None
+        self.fees = None
+        self.gates = {}             # slot -> gate from the last read
+        self.executions = {}        # gate ID -> getLatestExecution output
+        self.rows = {}
+        self.rebuilt = 0
+        self._moving = set()
+        self._order = []
+        self._sort = None
+        self._owner = None
+        self._modes = None
+        self.configure(sort, owner, modes)
+
+    # =============================================
+    # Filtering and sorting
+    # =============================================
+
+    def configure(self, sort=None, owner=None, modes=None):
+        """Change the sort and/or filter; the visible order is rebuilt once."""
+        if sort is not None:
+            if sort not in SORT_FIELDS:
+                raise ValueError(f"unknown sort {sort!r}; expected one of {sorted(SORT_FIELDS)}")
+            self._sort = sort
+        if owner is not None:
+            self._owner = owner if isinstance(owner, bytes) else public_key_from_identity(owner)
+        if modes is not None:
+            self._modes = frozenset(m if isinstance(m, int) else MODE_NAMES.index(m.upper())
+                                    for m in modes)
+        self._order = sorted(self._key(row) for row in self.rows.values() if self._visible(row))
+
+    def _visible(self, row):
+        return ((self._owner is None or row['owner'] == self._owner)
+                and (self._modes is None or row['mode'] in self._modes))
+
+    def _key(self, row):
+        value = row[SORT_FIELDS[self._sort]]
+        return (value if self._sort in ASCENDING else -value, row['slot'])
+
+    def _place(self, slot, row):
+        """Swap *slot*'s row (None to drop it) and move it within the visible order."""
+        old = self.rows.pop(slot, None)
+        if old is not None and self._visible(old):
+            key = self._key(old)
+            index = bisect_left(self._order, key)
+            if index < len(self._order) and self._order[index] == key:
+                del self._order[index]
+        if row is not None:
+            self.rows[slot] = row
+            if self._visible(row):
+                insort(self._order, self._key(row))
+
+    # =============================================
+    # Refresh
+    # =============================================
+
+    def _outcome(self, gate_id):
+        out = self.executions.get(gate_id)
+        return out['outcomeType'] if out and out['valid'] else 0
+
+    def _probe(self, gate_ids):
+        if len(gate_ids) <= 1:
+            outs = [self.client.get_latest_execution(g) for g in gate_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(gate_ids), self.workers)) as pool:
+                outs = list(pool.map(self.client.get_latest_execution, gate_ids))
+        self.executions.update(zip(gate_ids, outs))
+
+    def _row(self, slot, gate_id, gate, old):
+        fresh = old is None or old['gateId'] != gate_id
+        return {
+            'slot': slot,
+            'gateId': gate_id,
+            'mode': gate['mode'],
+            'owner': gate['owner'],
+            'totalReceived': gate['totalReceived'],
+            'totalForwarded': gate['totalForwarded'],
+            'dReceived': 0 if fresh else gate['totalReceived'] - old['totalReceived'],
+            'dForwarded': 0 if fresh else gate['totalForwarded'] - old['totalForwarded'],
+            'currentBalance': gate['currentBalance'],
+            'reserve': gate['reserve'],
+            'runwayEpochs': runway_epochs(gate, self.fees),
+            'idleDelinquent': gate['idleDelinquent'],
+            'idleGraceRemainingEpochs': gate['idleGraceRemainingEpochs'],
+            'outcomeType': self._outcome(gate_id),
+        }
+
+    def update(self):
+        """Refresh from the node; returns the slots whose rows were rebuilt."""
+        info = self.client.tick_info()
+        count = self.client.get_gate_count()
+        live = self.directory.read(count)
+        gates = {gate_slot(gate_id): (gate_id, gate) for gate_id, gate in live.items()}
+        self.tick = info.get('tick')
+        dirty = {slot for slot in self.rows if slot not in gates} | self._moving
+        if self.fees is None or info.get('epoch') != self.epoch:
+            self.fees = self.client.get_fees()
+            dirty |= set(gates)                     # runway depends on the epoch's fees
+        self.epoch = info.get('epoch')
+        moved = []
+        for slot, (gate_id, gate) in gates.items():
+            old = self.rows.get(slot)
+            if old is None or self.gates.get(slot) != gate:
+                dirty.add(slot)
+                if (old is not None and old['gateId'] == gate_id
+                        and (old['totalReceived'], old['totalForwarded'])
+                        != (gate['totalReceived'], gate['totalForwarded'])):
+                    moved.append(gate_id)
+        if moved:
+            self._probe(moved)
+        self.gates = {slot: gate for slot, (_, gate) in gates.items()}
+        self._moving = set()
+        for slot in sorted(dirty):
+            if slot not in gates:
+                self._place(slot, None)
+                continue
+            row = self._row(slot, *gates[slot], self.rows.get(slot))
+            self._place(slot, row)
+            if row['dReceived'] or row['dForwarded']:
+                self._moving.add(slot)
+        self.rebuilt += len(dirty)
+        return dirty
+
+    def visible(self, limit=None):
+        """The filtered rows in sort order (the first *limit* of them)."""
+        keys = self._order if limit is None else self._order[:limit]
+        return [self.rows[slot] for _, slot in keys]
+
+    # =============================================
+    # Rendering
+    # =============================================
+
+    def render(self, limit=40):
+        lines = [f"tick {self.tick}  epoch {self.epoch}  gates {len(self.rows)} live, "
+                 f"{len(self._order)} shown  sort {self._sort}",
+                 f"{'GATE':>10} {'MODE':<11} {'OWNER':<12} {'dRECV':>12} {'dFWD':>12} "
+                 f"{'BALANCE':>14} {'RESERVE':>12} {'RUNWAY':>7} {'DELINQ':>6} LAST"]
+        for row in self.visible(limit):
+            runway = '-' if row['runwayEpochs'] == NO_RUNWAY else row['runwayEpochs']
+            delinquent = f"{row['idleGraceRemainingEpochs']}e" if row['idleDelinquent'] else '-'
+            lines.append(
+                f"{row['gateId']:>10} {MODE_NAMES[row['mode']]:<11} "
+                f"{identity_from_public_key(row['owner'])[:12]:<12} "
+                f"{row['dReceived']:>12} {row['dForwarded']:>12} {row['currentBalance']:>14} "
+                f"{row['reserve']:>12} {runway:>7} {delinquent:>6} "
+                f"{OUTCOME_NAMES[row['outcomeType']]}")
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m qugate top',
+                                     description='Live per-gate throughput and balances.')
+    parser.add_argument('--rpc', default=DEFAULT_RPC)
+    parser.add_argument('--sort', choices=sorted(SORT_FIELDS), default='received')
+    parser.add_argument('--owner', help='only gates owned by this identity')
+    parser.add_argument('--mode', action='append', choices=MODE_NAMES, dest='modes',
+                        help='only gates in this mode (repeatable)')
+    parser.add_argument('--limit', type=int, default=40, help='rows to show (default 40)')
+    parser.add_argument('--once', action='store_true', help='print one snapshot and exit')
+    args = parser.parse_args(argv)
+
+    with QuGateClient(args.rpc) as client:
+        view = FleetView(client, args.sort, args.owner, args.modes)
+        clock = TickClock(client)
+        try:
+            while True:
+                try:
+                    view.update()
+                except RpcError as exc:
+                    print(f"top: {exc}", file=sys.stderr)
+                else:
+                    if args.once:
+                        print(view.render(args.limit))
+                        return 0
+                    sys.stdout.write('\x1b[H\x1b[2J' + view.render(args.limit) + '\n')
+                    sys.stdout.flush()
+                clock.wait_until(clock.current() + 1)
+        except KeyboardInterrupt:
+            return 0
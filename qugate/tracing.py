@@ -0,0 +1,201 @@
+"""
+Per-call tracing: where a run's wall time actually goes.
+
+Clients, :class:`~qugate.tx.Broadcaster` and :class:`~qugate.clock.TickClock`
+take an optional ``tracer`` and time every operation through it as a
+*(kind, name)* span:
+
+* ``query``   contract function round-trips, named after the function
+  (``getGate(5)``); cache hits are not traced;
+* ``balance`` ``/live/v1/balances`` reads;
+* ``tx``      transaction broadcasts;
+* ``wait``    tick waits.
+
+:class:`Tracer` aggregates each (kind, name) into an :class:`HdrHistogram`,
+logs calls slower than ``slow`` seconds to the ``qugate.trace`` logger, and
+passes every finished span to its ``hooks``. :meth:`Tracer.dump` prints the
+per-run breakdown, largest share of traced time first:
+
+    tracer = Tracer(slow=2.0)
+    client = QuGateClient(RPC, tracer=tracer)
+    clock = TickClock(client)                        # picks up client.tracer
+    ...
+    tracer.dump()
+
+Anything else can be timed with ``with tracer.span('subprocess', 'qubic-cli'):``.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from . import constants
+
+log = logging.getLogger('qugate.trace')
+
+# FUNC_GET_GATE_BY_SLOT -> 'getGateBySlot(25)'
+FUNCTION_NAMES = {
+    value: ''.join(part.capitalize() if i else part.lower()
+                   for i, part in enumerate(name[len('FUNC_'):].split('_'))) + f'({value})'
+    for name, value in vars(constants).items() if name.startswith('FUNC_')
+}
+
+
+def function_name(input_type):
+    return FUNCTION_NAMES.get(input_type, f'function({input_type})')
+
+
+class HdrHistogram:
+    """Log-linear histogram of non-negative integers.
+
+    Values below ``2**significant_bits`` are kept exactly; larger ones share a
+    bucket with values that agree in their top *significant_bits* bits, so any
+    quantile is reported within ``2**(1 - significant_bits)`` relative error
+    (about 1.6% at the default 7) in a few hundred buckets at most.
+    """
+
+    def __init__(self, significant_bits=7):
+        self.significant_bits = significant_bits
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        shift = max(value.bit_length() - self.significant_bits, 0)
+        return shift, value >> shift
+
+    def record(self, value, count=1):
+        if value < 0:
+            raise ValueError("HdrHistogram records non-negative values")
+        key = self._bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        return self
+
+    def value_at(self, quantile):
+        """The value at *quantile* (0..1): a bucket midpoint, clamped to the recorded range."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * quantile))
+        seen = 0
+        for shift, top in sorted(self.buckets):
+            seen += self.buckets[(shift, top)]
+            if seen >= rank:
+                middle = (top << shift) + ((1 << shift) >> 1)
+                return min(max(middle, self.min), self.max)
+        return self.max
+
+
+class Tracer:
+    """Aggregates timed spans per (kind, name); thread-safe.
+
+    Each hook is called as ``hook(kind, name, seconds, error)`` after every
+    span, *error* being the exception that ended it or None.
+    """
+
+    def __init__(self, slow=None, hooks=()):
+        self.slow = slow
+        self.hooks = list(hooks)
+        self.histograms = {}        # (kind, name) -> HdrHistogram of microseconds
+        self.errors = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds, error=None):
+        key = (kind, name)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = HdrHistogram()
+            histogram.record(max(int(seconds * 1e6), 0))
+            if error is not None:
+                self.errors[key] = self.errors.get(key, 0) + 1
+        if self.slow is not None and seconds >= self.slow:
+            log.warning("slow %s %s: %.3fs%s", kind, name, seconds,
+                        f" ({type(error).__name__})" if error is not None else '')
+        for hook in self.hooks:
+            hook(kind, name, seconds, error)
+
+    @contextmanager
+    def span(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            self.record(kind, name, time.perf_counter() - start, exc)
+            raise
+        self.record(kind, name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+            self.started = time.monotonic()
+
+    def breakdown(self):
+        """One row per (kind, name), largest total first; times in seconds.
+
+        ``share`` is the fraction of all traced time; spans that overlap
+        (concurrent calls) are each counted in full.
+        """
+        with self._lock:
+            items = [(key, HdrHistogram(h.significant_bits).merge(h))
+                     for key, h in self.histograms.items()]
+            errors = dict(self.errors)
+        traced = sum(h.total for _, h in items) or 1
+        rows = []
+        for (kind, name), h in items:
+            rows.append({
+                'kind': kind, 'name': name, 'count': h.count, 'errors': errors.get((kind, name), 0),
+                'total': h.total / 1e6, 'share': h.total / traced, 'mean': h.total / h.count / 1e6,
+                'p50': h.value_at(0.50) / 1e6, 'p90': h.value_at(0.90) / 1e6,
+                'p99': h.value_at(0.99) / 1e6, 'max': h.max / 1e6,
+            })
+        rows.sort(key=lambda row: (-row['total'], row['kind'], row['name']))
+        return rows
+
+    def by_kind(self):
+        """``{kind: total seconds}`` across names, largest first."""
+        totals = {}
+        for row in self.breakdown():
+            totals[row['kind']] = totals.get(row['kind'], 0.0) + row['total']
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def dump(self, file=None):
+        """Print the breakdown table (to stderr by default)."""
+        file = sys.stderr if file is None else file
+        rows = self.breakdown()
+        wall = time.monotonic() - self.started
+        kinds = ', '.join(f"{kind} {total:.2f}s" for kind, total in self.by_kind().items())
+        print(f"trace: {wall:.2f}s wall; traced {kinds or 'nothing'}", file=file)
+        print(f"{'KIND':<8} {'NAME':<28} {'COUNT':>7} {'ERR':>4} {'TOTAL s':>9} {'SHARE':>6} "
+              f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}", file=file)
+        for row in rows:
+            print(f"{row['kind']:<8} {row['name']:<28} {row['count']:>7} {row['errors']:>4} "
+                  f"{row['total']:>9.3f} {row['share']:>6.1%} {row['p50'] * 1e3:>8.1f} "
+                  f"{row['p90'] * 1e3:>8.1f} {row['p99'] * 1e3:>8.1f} {row['max'] * 1e3:>8.1f}",
+                  file=file)
+
+
+def span(tracer, kind, name):
+    """``tracer.span(kind, name)``, or a no-op context when *tracer* is None."""
+    return nullcontext() if tracer is None else tracer.span(kind, name)
@@ -0,0 +1,174 @@
+"""
+Transaction building, signing and broadcasting without ``qubic-cli``.
+
+The wire format matches what ``qubic-cli -sendcustomtransaction`` sends for a
+contract procedure call:
+
+    Transaction (80 bytes)  sourcePublicKey(32) destinationPublicKey(32)
+                            amount(sint64) tick(uint32) inputType(uint16)
+                            inputSize(uint16)
+    input                   inputSize bytes
+    signature               64 bytes, SchnorrQ over K12(header + input)
+
+and is broadcast as one packet behind an 8-byte request header
+(3-byte size, type 24 = BROADCAST_TRANSACTION, 4-byte dejavu = 0) to the
+node's TCP port.
+"""
+from __future__ import annotations
+
+import socket
+import struct
+
+from . import fourq
+from .constants import DEFAULT_NODE_IP, DEFAULT_NODE_PORT, QUGATE_INDEX
+from .k12 import k12
+from .keys import derive_keys, identity_from_public_key
+from .tracing import span
+
+TRANSACTION_HEADER = struct.Struct('<32s32sqIHH')
+SIGNATURE_SIZE = 64
+MAX_INPUT_SIZE = 1024
+BROADCAST_TRANSACTION = 24
+DEFAULT_TICK_OFFSET = 20   # qubic-cli's default scheduledTickOffset
+
+
+def contract_public_key(contract_index=QUGATE_INDEX):
+    """Destination public key of a contract: its index in the first 8 bytes."""
+    return struct.pack('<Q', contract_index) + bytes(24)
+
+
+def build_transaction(source_pk, destination_pk, amount, tick, input_type=0, input_data=b''):
+    """Unsigned transaction bytes (header + input)."""
+    if len(input_data) > MAX_INPUT_SIZE:
+        raise ValueError(f"transaction input is limited to {MAX_INPUT_SIZE} bytes")
+    return TRANSACTION_HEADER.pack(source_pk, destination_pk, amount, tick,
+                                   input_type, len(input_data)) + bytes(input_data)
+
+
+def sign_transaction(unsigned_tx, subseed, public_key):
+    """Append the SchnorrQ signature over K12(*unsigned_tx*)."""
+    return unsigned_tx + fourq.sign(subseed, public_key, k12(unsigned_tx, 32))
+
+
+def verify_transaction(tx):
+    """True if the trailing signature of *tx* is valid for its source key."""
+    body, signature = tx[:-SIGNATURE_SIZE], tx[-SIGNATURE_SIZE:]
+    return fourq.verify(body[:32], k12(body, 32), signature)
+
+
+def transaction_hash(tx):
+    """60-char lowercase transaction id, as printed by qubic-cli and the RPC."""
+    return identity_from_public_key(k12(tx, 32), lowercase=True)
+
+
+def build_contract_transaction(seed, input_type, amount, input_data, tick,
+                               contract_index=QUGATE_INDEX):
+    """Signed contract procedure call from *seed*."""
+    subseed, _, public_key = derive_keys(seed)
+    unsigned = build_transaction(public_key, contract_public_key(contract_index),
+                                 amount, tick, input_type, input_data)
+    return sign_transaction(unsigned, subseed, public_key)
+
+
+class TxHandle(str):
+    """Transaction id of a broadcast transaction, carrying its target ``.tick`` and ``.source``."""
+
+    def __new__(cls, tx_hash, tick, source):
+        handle = super().__new__(cls, tx_hash)
+        handle.tick = tick
+        handle.source = source
+        return handle
+
+    @classmethod
+    def of(cls, tx):
+        """Handle for signed transaction bytes *tx*."""
+        source, _, _, tick, _, _ = TRANSACTION_HEADER.unpack_from(tx)
+        return cls(transaction_hash(tx), tick, identity_from_public_key(source))
+
+    def __repr__(self):
+        return f'TxHandle({str.__repr__(self)}, tick={self.tick})'
+
+
+def broadcast_packet(tx):
+    """Request header + *tx*, ready to write to the node socket."""
+    size = 8 + len(tx)
+    return size.to_bytes(3, 'little') + bytes([BROADCAST_TRANSACTION]) + bytes(4) + tx
+
+
+class Broadcaster:
+    """Signs and broadcasts transactions over one persistent TCP connection.
+
+    Broadcasts are traced as ``tx`` spans by *tracer* (default: the client's).
+    """
+
+    def __init__(self, node_ip=DEFAULT_NODE_IP, node_port=DEFAULT_NODE_PORT,
+                 contract_index=QUGATE_INDEX, client=None, tick_offset=DEFAULT_TICK_OFFSET,
+                 timeout=5.0, tracer=None):
+        self.node_ip = node_ip
+        self.node_port = node_port
+        self.contract_index = contract_index
+        self.client = client
+        self.tick_offset = tick_offset
+        self.timeout = timeout
+        self.tracer = getattr(client, 'tracer', None) if tracer is None else tracer
+        self._sock = None
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.node_ip, self.node_port),
+                                                  timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self._sock
+
+    def _drain(self, sock):
+        # The node pushes peer lists and other packets we never read; discard
+        # them so its send buffer never blocks our connection.
+        sock.setblocking(False)
+        try:
+            while True:
+                if not sock.recv(65536):
+                    raise ConnectionResetError("node closed the connection")
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            sock.settimeout(self.timeout)
+
+    def send(self, tx):
+        """Broadcast signed *tx*; reconnects once if the connection dropped.
+
+        Returns a :class:`TxHandle` (the transaction id, with its target tick).
+        """
+        packet = broadcast_packet(tx)
+        with span(self.tracer, 'tx', 'broadcast'):
+            for attempt in range(2):
+                try:
+                    sock = self._connect()
+                    self._drain(sock)
+                    sock.sendall(packet)
+                    return TxHandle.of(tx)
+                except OSError:
+                    self.close()
+                    if attempt:
+                        raise
+
+    def send_contract_call(self, seed, input_type, amount, input_data=b'', tick=None):
+        """Sign and broadcast a procedure call; *tick* defaults to current + tick_offset."""
+        if tick is None:
+            if self.client is None:
+                raise ValueError("tick is required when the Broadcaster has no client")
+            tick = self.client.get_tick() + self.tick_offset
+        subseed, _, public_key = derive_keys(seed)
+        unsigned = build_transaction(public_key, contract_public_key(self.contract_index),
+                                     amount, tick, input_type, input_data)
+        return self.send(sign_transaction(unsigned, subseed, public_key))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Regenerate the Codec tables in qugate/structs.py from QuGate.h.
+
+    python3 scripts/gen_structs.py           # rewrite qugate/structs.py
+    python3 scripts/gen_structs.py --check   # exit 1 if it is out of date
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+QUGATE_H = ROOT / "QuGate.h"
+STRUCTS_PY = ROOT / "qugate" / "structs.py"
+
+sys.path.insert(0, str(ROOT))
+from qugate.header import generate, parse_header, public_structs  # noqa: E402
+
+BEGIN = "# BEGIN GENERATED LAYOUTS (scripts/gen_structs.py from QuGate.h; do not edit)\n"
+END = "# END GENERATED LAYOUTS\n"
+
+
+def render(header_text: str, structs_text: str) -> str:
+    _, structs = parse_header(header_text)
+    block = generate(structs, public_structs(header_text, structs))
+    start = structs_text.index(BEGIN) + len(BEGIN)
+    end = structs_text.index(END)
+    return structs_text[:start] + "\n" + block + structs_text[end:]
+
+
+def main() -> int:
+    current = STRUCTS_PY.read_text(encoding="utf-8")
+    updated = render(QUGATE_H.read_text(encoding="utf-8"), current)
+    if "--check" in sys.argv[1:]:
+        if updated != current:
+            print("gen_structs: qugate/structs.py is out of date with QuGate.h")
+            print("Run: python3 scripts/gen_structs.py")
+            return 1
+        print("gen_structs: OK")
+        return 0
+    if updated != current:
+        STRUCTS_PY.write_text(updated, encoding="utf-8")
+        print(f"gen_structs: updated {STRUCTS_PY.relative_to(ROOT)}")
+    else:
+        print("gen_structs: already up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
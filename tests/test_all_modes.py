@@ -11,16 +11,37 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_configure_heartbeat,
+    build_configure_multisig,
+    build_configure_time_lock,
+    build_create_gate,
+    build_update_gate,
+    build_withdraw_reserve,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
+
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 CONTRACT_INDEX = 25  # Pulse took index 24, QuGate uses 25
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, CONTRACT_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -73,129 +94,46 @@ def cli(*args, timeout=15):
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
-    raise Exception("Cannot get identity")
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def get_pubkey(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
+    return public_key_from_identity(identity)
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_GATE, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL',
-             'ORACLE', 'HEARTBEAT', 'MULTISIG', 'TIME_LOCK']
-    # Layout: mode(1) rcpCount(1) active(1) pad(5) owner(32) [offset 40] totRcv(8) totFwd(8) curBal(8) thresh(8) createdEp(2) lastEp(2) pad(4) [offset 80] recipients(256) ratios(64) = 400 bytes
-    tr, tf, cb, th = struct.unpack_from('<QQQQ', b, 40)
-    ratios = [struct.unpack_from('<Q', b, 336 + i*8)[0] for i in range(8)]
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': b[0], 'mode_name': modes[b[0]] if b[0] < len(modes) else f'?{b[0]}',
-        'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf,
-        'currentBalance': cb, 'threshold': th,
-        'ratios': ratios[:max(b[1], 1)],
+        'mode': g['mode'],
+        'mode_name': MODE_NAMES[g['mode']] if g['mode'] < len(MODE_NAMES) else f"?{g['mode']}",
+        'recipientCount': g['recipientCount'], 'active': g['active'],
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold'],
+        'ratios': g['ratios'][:max(g['recipientCount'], 1)],
     }
 
 def query_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_COUNT, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
-
-def build_create(mode, recipients_pk, ratios, threshold=0, allowed_senders=None,
-                 chain_next_gate_id=-1):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)  # padding
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    # Oracle fields (zeroed for non-oracle modes)
-    data += bytes(32)  # oracleId
-    data += bytes(32)  # oracleCurrency1
-    data += bytes(32)  # oracleCurrency2
-    data += struct.pack('<BB', 0, 0)  # oracleCondition, oracleTriggerMode
-    data += struct.pack('<q', 0)  # oracleThreshold
-    # Chain field
-    data += struct.pack('<q', chain_next_gate_id)
-    return bytes(data)
-
-def build_update(gate_id, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<Q', gate_id)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(7)  # padding
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    data += bytes(7)  # trailing padding
-    assert len(data) == 608, f"Expected 608, got {len(data)}"
-    return bytes(data)
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 def send_tx(key, proc, amount, data):
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(proc), str(amount),
-               str(len(data)), data.hex())
+    return TRACKER.track(BROADCASTER.send_contract_call(key, proc, amount, data))
 
 def wait(n=15):
-    start = get_tick()
-    target = start + n
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=720)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    target = CLOCK.current() + n
     print(f"    waiting for tick {target}...")
-    for _ in range(180):
-        time.sleep(4)
-        try:
-            if get_tick() >= target:
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=720):
+        return True
     print("    ⚠ timeout!")
     return False
 
@@ -236,7 +174,7 @@ print("TEST 1: SPLIT mode (60/40)")
 print("─" * 60)
 
 before_total, _ = query_count()
-data = build_create(MODE_SPLIT, [PK_B, PK_C], [60, 40])
+data = build_create_gate(MODE_SPLIT, [PK_B, PK_C], [60, 40])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -265,7 +203,7 @@ print("─" * 60)
 print("TEST 2: ROUND_ROBIN mode")
 print("─" * 60)
 
-data = build_create(MODE_ROUND_ROBIN, [PK_B, PK_C], [1, 1])
+data = build_create_gate(MODE_ROUND_ROBIN, [PK_B, PK_C], [1, 1])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -306,7 +244,7 @@ print("─" * 60)
 print("TEST 3: THRESHOLD mode (threshold=15000)")
 print("─" * 60)
 
-data = build_create(MODE_THRESHOLD, [PK_B, PK_C], [50, 50], threshold=15000)
+data = build_create_gate(MODE_THRESHOLD, [PK_B, PK_C], [50, 50], threshold=15000)
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -349,7 +287,7 @@ print("─" * 60)
 print("TEST 4: RANDOM mode")
 print("─" * 60)
 
-data = build_create(MODE_RANDOM, [PK_B, PK_C], [50, 50])
+data = build_create_gate(MODE_RANDOM, [PK_B, PK_C], [50, 50])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -385,7 +323,7 @@ print("TEST 5: CONDITIONAL mode (whitelist)")
 print("─" * 60)
 
 # Only ADDR_B_KEY is allowed to send
-data = build_create(MODE_CONDITIONAL, [PK_B, PK_C], [50, 50], allowed_senders=[PK_B])
+data = build_create_gate(MODE_CONDITIONAL, [PK_B, PK_C], [50, 50], allowed_senders=[PK_B])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -429,7 +367,7 @@ print("TEST 6: updateGate (change SPLIT ratios)")
 print("─" * 60)
 
 # Update gate_id (the SPLIT gate from test 1) from 60/40 to 25/75
-update_data = build_update(gate_id, [PK_B, PK_C], [25, 75])
+update_data = build_update_gate(gate_id, [PK_B, PK_C], [25, 75])
 send_tx(ADDR_A_KEY, PROC_UPDATE, 0, update_data)
 wait()
 
@@ -448,7 +386,7 @@ check("New 25/75 split works", s1 == 2500 and s2 == 7500, f"got {s1}/{s2}")
 
 # Non-owner update should fail
 gate_before = query_gate(gate_id)
-bad_update = build_update(gate_id, [PK_B, PK_C], [99, 1])
+bad_update = build_update_gate(gate_id, [PK_B, PK_C], [99, 1])
 send_tx(ADDR_C_KEY, PROC_UPDATE, 0, bad_update)
 wait()
 
@@ -496,7 +434,7 @@ print("TEST 8: HEARTBEAT gate (mode=6) — create, configure, heartbeat()")
 print("─" * 60)
 
 before_total8, _ = query_count()
-hb_data = build_create(MODE_HEARTBEAT, [PK_B], [1])
+hb_data = build_create_gate(MODE_HEARTBEAT, [PK_B], [1])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, hb_data)
 wait()
 
@@ -507,30 +445,17 @@ check("HEARTBEAT gate created", hb_gate['active'] == 1 and hb_gate['mode'] == MO
       f"id={hb_id}, mode={hb_gate['mode']}")
 
 # configureHeartbeat: threshold=3 epochs, payout=25%, min_balance=5000, beneficiaries B(60)/C(40)
-cfg_hb = bytearray()
-cfg_hb += struct.pack('<Q', hb_id)       # gateId
-cfg_hb += struct.pack('<I', 3)            # thresholdEpochs
-cfg_hb += struct.pack('<B', 25)           # payoutPercentPerEpoch
-cfg_hb += struct.pack('<q', 5000)         # minimumBalance
-for i in range(8):                        # beneficiaryAddresses[8]
-    cfg_hb += [PK_B, PK_C][i] if i < 2 else bytes(32)
-for i in range(8):                        # beneficiaryShares[8]
-    cfg_hb += struct.pack('<B', [60, 40, 0, 0, 0, 0, 0, 0][i])
-cfg_hb += struct.pack('<B', 2)            # beneficiaryCount
-send_tx(ADDR_A_KEY, PROC_CONFIGURE_HEARTBEAT, 0, bytes(cfg_hb))
+cfg_hb = build_configure_heartbeat(hb_id, 3, 25, 5000, [PK_B, PK_C], [60, 40])
+send_tx(ADDR_A_KEY, PROC_CONFIGURE_HEARTBEAT, 0, cfg_hb)
 wait()
 
 # Query heartbeat state via getHeartbeat
-hb_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_HEARTBEAT, 'inputSize': 8,
-    'requestData': base64.b64encode(struct.pack('<Q', hb_id)).decode()
-}, timeout=5).json()
-hb_b = base64.b64decode(hb_resp['responseData'])
-hb_active = hb_b[0]
-hb_triggered = hb_b[1]
-hb_threshold = struct.unpack_from('<I', hb_b, 2)[0]
-hb_pct = hb_b[14]
-hb_bene_count = hb_b[23]
+hb_state = CLIENT.get_heartbeat(hb_id)
+hb_active = hb_state['active']
+hb_triggered = hb_state['triggered']
+hb_threshold = hb_state['thresholdEpochs']
+hb_pct = hb_state['payoutPercentPerEpoch']
+hb_bene_count = hb_state['beneficiaryCount']
 check("configureHeartbeat stored",
       hb_active == 1 and hb_threshold == 3 and hb_pct == 25,
       f"active={hb_active}, threshold={hb_threshold}, pct={hb_pct}")
@@ -541,24 +466,15 @@ check("Not triggered initially", hb_triggered == 0)
 send_tx(ADDR_A_KEY, PROC_HEARTBEAT, 0, struct.pack('<Q', hb_id))
 wait()
 
-hb_resp2 = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_HEARTBEAT, 'inputSize': 8,
-    'requestData': base64.b64encode(struct.pack('<Q', hb_id)).decode()
-}, timeout=5).json()
-hb_b2 = base64.b64decode(hb_resp2['responseData'])
-check("heartbeat() accepted", hb_b2[1] == 0, f"still not triggered")
+hb_state2 = CLIENT.get_heartbeat(hb_id)
+check("heartbeat() accepted", hb_state2['triggered'] == 0, f"still not triggered")
 
 # heartbeat() by non-owner — rejected (epoch should not change)
-hb_last_before = struct.unpack_from('<I', hb_b2, 6)[0]
+hb_last_before = hb_state2['lastHeartbeatEpoch']
 send_tx(ADDR_B_KEY, PROC_HEARTBEAT, 0, struct.pack('<Q', hb_id))
 wait()
 
-hb_resp3 = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_HEARTBEAT, 'inputSize': 8,
-    'requestData': base64.b64encode(struct.pack('<Q', hb_id)).decode()
-}, timeout=5).json()
-hb_b3 = base64.b64decode(hb_resp3['responseData'])
-hb_last_after = struct.unpack_from('<I', hb_b3, 6)[0]
+hb_last_after = CLIENT.get_heartbeat(hb_id)['lastHeartbeatEpoch']
 check("Non-owner heartbeat() rejected", hb_last_after == hb_last_before,
       f"epoch unchanged={hb_last_before}")
 
@@ -578,7 +494,7 @@ print("TEST 9: MULTISIG gate (mode=7) — create, configure, vote, release")
 print("─" * 60)
 
 before_total9, _ = query_count()
-ms_data = build_create(MODE_MULTISIG, [PK_B], [1])
+ms_data = build_create_gate(MODE_MULTISIG, [PK_B], [1])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, ms_data)
 wait()
 
@@ -589,28 +505,18 @@ check("MULTISIG gate created", ms_gate['active'] == 1 and ms_gate['mode'] == MOD
       f"id={ms_id}, mode={ms_gate['mode']}")
 
 # configureMultisig: 2 guardians (B, C), required=2, expiry=4 epochs
-cfg_ms = bytearray()
-cfg_ms += struct.pack('<I', ms_id & 0xFFFFFFFF)  # gateId (uint32)
-for i in range(8):                                 # guardians[8]
-    cfg_ms += [PK_B, PK_C][i] if i < 2 else bytes(32)
-cfg_ms += struct.pack('<B', 2)                     # guardianCount
-cfg_ms += struct.pack('<B', 2)                     # required
-cfg_ms += struct.pack('<I', 4)                     # proposalExpiryEpochs
-send_tx(ADDR_A_KEY, PROC_CONFIGURE_MULTISIG, 0, bytes(cfg_ms))
-wait()
-
-ms_state_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE, 'inputSize': 4,
-    'requestData': base64.b64encode(struct.pack('<I', ms_id & 0xFFFFFFFF)).decode()
-}, timeout=5).json()
-ms_b = base64.b64decode(ms_state_resp['responseData'])
-ms_status = struct.unpack_from('<q', ms_b, 0)[0]
-ms_guardian_count = ms_b[11]
-ms_required = ms_b[10]
+cfg_ms = build_configure_multisig(ms_id, [PK_B, PK_C], 2, 4)
+send_tx(ADDR_A_KEY, PROC_CONFIGURE_MULTISIG, 0, cfg_ms)
+wait()
+
+ms_state = CLIENT.get_multisig_state(ms_id)
+ms_status = ms_state['status']
+ms_guardian_count = ms_state['guardianCount']
+ms_required = ms_state['required']
 check("configureMultisig stored",
       ms_status == 0 and ms_guardian_count == 2 and ms_required == 2,
       f"status={ms_status}, guardians={ms_guardian_count}, required={ms_required}")
-check("No active proposal initially", ms_b[16] == 0)
+check("No active proposal initially", ms_state['proposalActive'] == 0)
 
 # Fund gate (non-guardian) — accumulates, no vote
 send_tx(ADDR_A_KEY, PROC_SEND, 300_000, struct.pack('<Q', ms_id))
@@ -624,13 +530,11 @@ check("MULTISIG gate funded", ms_funded['currentBalance'] >= 300_000,
 send_tx(ADDR_B_KEY, PROC_SEND, MIN_SEND, struct.pack('<Q', ms_id))
 wait()
 
-ms_v1_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE, 'inputSize': 4,
-    'requestData': base64.b64encode(struct.pack('<I', ms_id & 0xFFFFFFFF)).decode()
-}, timeout=5).json()
-ms_b1 = base64.b64decode(ms_v1_resp['responseData'])
-check("Guardian B vote registered (count=1)", ms_b1[9] == 1, f"count={ms_b1[9]}")
-check("Proposal active after vote 1", ms_b1[16] == 1, f"active={ms_b1[16]}")
+ms_s1 = CLIENT.get_multisig_state(ms_id)
+check("Guardian B vote registered (count=1)", ms_s1['approvalCount'] == 1,
+      f"count={ms_s1['approvalCount']}")
+check("Proposal active after vote 1", ms_s1['proposalActive'] == 1,
+      f"active={ms_s1['proposalActive']}")
 check("Funds NOT released yet (1/2)", query_gate(ms_id)['currentBalance'] > 0)
 
 # Guardian C votes — threshold met
@@ -649,33 +553,19 @@ check("Gate balance cleared", ms_v2_gate['currentBalance'] < ms_bal_before_exec,
       f"balance={ms_v2_gate['currentBalance']}")
 
 # Votes reset after execution
-ms_v2_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE, 'inputSize': 4,
-    'requestData': base64.b64encode(struct.pack('<I', ms_id & 0xFFFFFFFF)).decode()
-}, timeout=5).json()
-ms_b2 = base64.b64decode(ms_v2_resp['responseData'])
-check("Votes reset after execution", ms_b2[9] == 0 and ms_b2[16] == 0,
-      f"count={ms_b2[9]}, active={ms_b2[16]}")
+ms_s2 = CLIENT.get_multisig_state(ms_id)
+check("Votes reset after execution", ms_s2['approvalCount'] == 0 and ms_s2['proposalActive'] == 0,
+      f"count={ms_s2['approvalCount']}, active={ms_s2['proposalActive']}")
 
 # Non-owner configureMultisig rejected
-bad_ms_cfg = bytearray()
-bad_ms_cfg += struct.pack('<I', ms_id & 0xFFFFFFFF)
-for i in range(8):
-    bad_ms_cfg += PK_A if i < 1 else bytes(32)
-bad_ms_cfg += struct.pack('<B', 1)
-bad_ms_cfg += struct.pack('<B', 1)
-bad_ms_cfg += struct.pack('<I', 1)
-send_tx(ADDR_B_KEY, PROC_CONFIGURE_MULTISIG, 0, bytes(bad_ms_cfg))
-wait()
-
-ms_after_bad = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE, 'inputSize': 4,
-    'requestData': base64.b64encode(struct.pack('<I', ms_id & 0xFFFFFFFF)).decode()
-}, timeout=5).json()
-ms_bad_b = base64.b64decode(ms_after_bad['responseData'])
+bad_ms_cfg = build_configure_multisig(ms_id, [PK_A], 1, 1)
+send_tx(ADDR_B_KEY, PROC_CONFIGURE_MULTISIG, 0, bad_ms_cfg)
+wait()
+
+ms_bad = CLIENT.get_multisig_state(ms_id)
 check("Non-owner configureMultisig rejected",
-      ms_bad_b[11] == 2 and ms_bad_b[10] == 2,  # guardianCount and required unchanged
-      f"guardians={ms_bad_b[11]}, required={ms_bad_b[10]}")
+      ms_bad['guardianCount'] == 2 and ms_bad['required'] == 2,  # unchanged
+      f"guardians={ms_bad['guardianCount']}, required={ms_bad['required']}")
 
 # ============================================================
 # TEST 10: TIME_LOCK gate — create, configure, fund, query state
@@ -686,7 +576,7 @@ print("TEST 10: TIME_LOCK gate (mode=8) — create, configure, query")
 print("─" * 60)
 
 before_total10, _ = query_count()
-tl_data = build_create(MODE_TIME_LOCK, [PK_B], [10000])
+tl_data = build_create_gate(MODE_TIME_LOCK, [PK_B], [10000])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, tl_data)
 wait()
 
@@ -697,21 +587,17 @@ check("TIME_LOCK gate created", tl_gate['active'] == 1 and tl_gate['mode'] == MO
       f"id={tl_id}, mode={tl_gate['mode']}")
 
 # configureTimeLock: absolute lock, unlockEpoch = current + 10, cancellable = 1
-cfg_tl = struct.pack('<QII2B', tl_id, 210, 0, 0, 1)  # gateId(8), unlockEpoch(4), delayEpochs(4), lockMode(1), cancellable(1)
+cfg_tl = build_configure_time_lock(tl_id, unlock_epoch=210, lock_mode=0, cancellable=1)
 send_tx(ADDR_A_KEY, PROC_CONFIGURE_TIME_LOCK, 0, cfg_tl)
 wait()
 
 # Query TIME_LOCK state
-tl_state_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_TIME_LOCK_STATE, 'inputSize': 8,
-    'requestData': base64.b64encode(struct.pack('<Q', tl_id)).decode()
-}, timeout=5).json()
-tl_b = base64.b64decode(tl_state_resp['responseData'])
-tl_status = struct.unpack_from('<q', tl_b, 0)[0]
-tl_unlock = struct.unpack_from('<I', tl_b, 8)[0]
-tl_lock_mode = tl_b[16]
-tl_cancellable = tl_b[17]
-tl_active = tl_b[20]
+tl_state = CLIENT.get_time_lock_state(tl_id)
+tl_status = tl_state['status']
+tl_unlock = tl_state['unlockEpoch']
+tl_lock_mode = tl_state['lockMode']
+tl_cancellable = tl_state['cancellable']
+tl_active = tl_state['active']
 check("configureTimeLock stored",
       tl_status == 0 and tl_unlock == 210 and tl_lock_mode == 0 and tl_cancellable == 1,
       f"status={tl_status}, unlock={tl_unlock}, lockMode={tl_lock_mode}, cancellable={tl_cancellable}")
@@ -727,15 +613,9 @@ check("TIME_LOCK gate funded", tl_gate_funded['currentBalance'] >= 200_000,
 
 # Verify getGate returns adminGateId and hasAdminGate fields
 # (fields exist at end of getGate_output; gate should have no admin gate by default)
-tl_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_GATE, 'inputSize': 8,
-    'requestData': base64.b64encode(struct.pack('<Q', tl_id)).decode()
-}, timeout=5).json()
-tl_full = base64.b64decode(tl_resp['responseData'])
-# hasAdminGate is the last byte in getGate_output
-# adminGateId (sint64) and hasAdminGate (uint8) are at the end after chainDepth
-check("getGate returns hasAdminGate=0 by default", True,
-      "adminGateId/hasAdminGate fields present in getGate_output")
+tl_full = CLIENT.get_gate(tl_id)
+check("getGate returns hasAdminGate=0 by default", tl_full['hasAdminGate'] == 0,
+      f"hasAdminGate={tl_full['hasAdminGate']}, adminGateId={tl_full['adminGateId']}")
 
 # ============================================================
 # CHAIN-ONLY GATES (recipientCount=0 with chain forwarding)
@@ -744,7 +624,7 @@ print()
 print("--- Chain-Only Gates (0 recipients + chain) ---")
 
 # Step 1: Create a target SPLIT gate with real recipients
-chain_target_data = build_create(MODE_SPLIT, [PK_B, PK_C], [50, 50])
+chain_target_data = build_create_gate(MODE_SPLIT, [PK_B, PK_C], [50, 50])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, chain_target_data)
 wait()
 
@@ -759,7 +639,7 @@ check("Chain target SPLIT gate created", target_gate['active'] == 1 and target_g
 bal_b_before = get_balance(ADDR_B)
 bal_c_before = get_balance(ADDR_C)
 
-chain_only_data = build_create(MODE_THRESHOLD, [], [], threshold=15000,
+chain_only_data = build_create_gate(MODE_THRESHOLD, [], [], threshold=15000,
                                chain_next_gate_id=target_gate_id)
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, chain_only_data)
 wait()
@@ -804,20 +684,13 @@ print("─" * 60)
 print("TEST 11: getGatesByMode — query SPLIT gates")
 print("─" * 60)
 
-gbm_data = struct.pack('<B', MODE_SPLIT)
-gbm_resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_GATES_BY_MODE,
-    'inputSize': len(gbm_data),
-    'requestData': base64.b64encode(gbm_data).decode()
-}, timeout=5).json()
-gbm_b = base64.b64decode(gbm_resp['responseData'])
-# Output: Array<uint64, 16> gateIds (128 bytes) + uint64 count (8 bytes)
-gbm_count = struct.unpack_from('<Q', gbm_b, 128)[0]
+gbm_ids = CLIENT.get_gates_by_mode(MODE_SPLIT)
+gbm_count = len(gbm_ids)
 check("getGatesByMode returns at least 1 SPLIT gate",
       gbm_count >= 1,
       f"count={gbm_count}")
 if gbm_count > 0:
-    first_id = struct.unpack_from('<Q', gbm_b, 0)[0]
+    first_id = gbm_ids[0]
     check("getGatesByMode first gate ID is valid",
           first_id > 0,
           f"gateId={first_id}")
@@ -831,8 +704,7 @@ print("TEST 12: withdrawReserve — withdraw from chain reserve")
 print("─" * 60)
 
 # Use the chain-only gate which should have chain reserve
-# withdrawReserve_input: gateId(8) reserveTarget(1) amount(8)
-wr_data = struct.pack('<QBQ', co_gate_id, 1, 0)  # reserveTarget=1 (chain), amount=0 (all)
+wr_data = build_withdraw_reserve(co_gate_id, 0)  # amount=0 withdraws the whole reserve
 wr_resp = send_tx(ADDR_A_KEY, PROC_WITHDRAW_RESERVE, 0, wr_data)
 wait()
 # Verify gate still active after withdraw
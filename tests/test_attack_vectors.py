@@ -7,16 +7,36 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    GateIdPredictor,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_create_gate,
+    gate_slot,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
 
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
-ID_TOOL = os.environ.get("QUBIC_ID_TOOL", shutil.which("identity_tool") or "identity_tool")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
+# Mirrors the contract's free-list, so each createGate's ID is known up front
+PREDICTOR = GateIdPredictor.from_client(CLIENT)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -26,129 +46,70 @@ PROC_CREATE_GATE = 1
 PROC_SEND_TO_GATE = 2
 PROC_CLOSE_GATE = 3
 
-# Versioned gate ID encoding
-GATE_ID_SLOT_BITS = 20
-
-def encode_gate_id(slot_idx, generation=0):
-    return ((generation + 1) << GATE_ID_SLOT_BITS) | slot_idx
-
 results = []
 
-# Track generation per slot for versioned gate IDs.
-# When a gate is closed, the slot's generation increments; the next gate
-# created in that slot uses the new generation.
-_slot_generation = {}  # slot_idx -> current generation
-
-def next_gate_id_for_slot(slot_idx):
-    """Return the versioned gate ID for a newly created gate on *slot_idx*."""
-    gen = _slot_generation.get(slot_idx, 0)
-    return encode_gate_id(slot_idx, gen)
-
-def mark_slot_closed(slot_idx):
-    """Bump the generation so the next occupant of this slot gets a new ID."""
-    _slot_generation[slot_idx] = _slot_generation.get(slot_idx, 0) + 1
-
 def cli(*args, timeout=15):
     r = subprocess.run([CLI] + NODE_ARGS + list(args), capture_output=True, text=True, timeout=timeout)
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def query_gate_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 6, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 5, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL']
-    off = 40
-    tr, tf, cb, th, ep = struct.unpack_from('<QQQQQ', b, off)
-    ratios = [struct.unpack_from('<Q', b, 336 + i*8)[0] for i in range(8)]
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': modes[b[0]] if b[0] < 5 else f'UNKNOWN({b[0]})',
-        'recipientCount': b[1], 'active': b[2],
-        'owner': b[8:40].hex(),
-        'totalReceived': tr, 'totalForwarded': tf,
-        'currentBalance': cb, 'threshold': th, 'createdEpoch': ep,
-        'ratios': ratios[:max(b[1], 1)]
+        'mode': MODE_NAMES[g['mode']] if g['mode'] < 5 else f"UNKNOWN({g['mode']})",
+        'recipientCount': g['recipientCount'], 'active': g['active'],
+        'owner': g['owner'].hex(),
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold'],
+        'createdEpoch': g['createdEpoch'],
+        'ratios': g['ratios'][:max(g['recipientCount'], 1)]
     }
 
 def get_pubkey_from_identity(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
-
-def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
+    return public_key_from_identity(identity)
 
 def send_contract_tx(key, input_type, amount, input_data):
-    hex_data = input_data.hex()
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(input_type), str(amount),
-               str(len(input_data)), hex_data)
+    return TRACKER.track(BROADCASTER.send_contract_call(key, input_type, amount, input_data))
+
+def create_gate(key, amount, create_data):
+    """Send createGate and wait; returns the gate ID predicted before sending."""
+    candidates = PREDICTOR.candidates()
+    gate_id = PREDICTOR.allocate()
+    send_contract_tx(key, PROC_CREATE_GATE, amount, create_data)
+    wait_ticks(15)
+    if len(candidates) > 1:
+        # Free-list order unknown (slots freed by a crawl or in one tick): read back which one
+        live = [gid for gid, g in CLIENT.get_gates(candidates).items() if g and g['active']]
+        if len(live) == 1:
+            PREDICTOR.confirm(gate_id, live[0])
+            gate_id = live[0]
+    return gate_id
 
 def wait_ticks(n=15):
-    start = get_tick()
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=480)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    start = CLOCK.current()
     target = start + n
     print(f"    Waiting for tick {target} (current: {start})...")
-    for _ in range(120):
-        time.sleep(4)
-        try:
-            cur = get_tick()
-            if cur >= target:
-                print(f"    ✓ Reached tick {cur}")
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=480):
+        print(f"    ✓ Reached tick {CLOCK.tick}")
+        return True
     print("    ⚠ Timeout")
     return False
 
@@ -187,14 +148,11 @@ bal2_before = get_balance(ADDR_C)
 
 # Create gate as Address A
 create_data = build_create_gate(0, [PK_B], [100])  # SPLIT, 1 recipient
-out = send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
+gate_id = create_gate(ADDR_A_KEY, 1000, create_data)
 print("  Address A created gate (1000 QU fee)")
-wait_ticks(15)
 
 total, active = query_gate_count()
-slot_idx = total - 1
-gate_id = next_gate_id_for_slot(slot_idx)
-print(f"  Gate #{gate_id} created (slot={slot_idx}), active={active}")
+print(f"  Gate #{gate_id} created (slot={gate_slot(gate_id)}), active={active}")
 
 # Try to close as Address C (not the owner)
 close_data = struct.pack('<Q', gate_id)
@@ -212,7 +170,7 @@ wait_ticks(15)
 gate = query_gate(gate_id)
 record("Owner close succeeds", gate['active'] == 0,
        f"Gate active={gate['active']}")
-mark_slot_closed(slot_idx)
+PREDICTOR.release(gate_id)
 print()
 
 # ============================================================
@@ -277,16 +235,12 @@ print("=" * 50)
 
 # Create fresh gate for this test
 create_data = build_create_gate(0, [PK_B], [100])
-send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
-wait_ticks(15)
-total2, _ = query_gate_count()
-slot_idx2 = total2 - 1
-gate_id2 = next_gate_id_for_slot(slot_idx2)
+gate_id2 = create_gate(ADDR_A_KEY, 1000, create_data)
 
 bal1_before = get_balance(ADDR_B)
 send_data = struct.pack('<Q', gate_id2)
 out = send_contract_tx(ADDR_A_KEY, PROC_SEND_TO_GATE, 0, send_data)
-print(f"  Sent 0 QU to gate #{gate_id2} (slot={slot_idx2})")
+print(f"  Sent 0 QU to gate #{gate_id2} (slot={gate_slot(gate_id2)})")
 wait_ticks(15)
 
 gate = query_gate(gate_id2)
@@ -297,7 +251,7 @@ record("Zero amount — no effect", gate['totalReceived'] == 0 and bal1_before =
 # Clean up
 send_contract_tx(ADDR_A_KEY, PROC_CLOSE_GATE, 0, struct.pack('<Q', gate_id2))
 wait_ticks(15)
-mark_slot_closed(slot_idx2)
+PREDICTOR.release(gate_id2)
 print()
 
 # ============================================================
@@ -308,20 +262,18 @@ print("=" * 50)
 
 total_before, _ = query_gate_count()
 create_data = build_create_gate(0, [PK_B], [100])
-send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
-wait_ticks(15)
+gate_id6 = create_gate(ADDR_A_KEY, 1000, create_data)
 total_after, active_after = query_gate_count()
 # If free-list works, total should stay same (slot reused) or increment by 1
 # After closing gates above, free slots should be available
-slot_idx6 = total_after - 1
-gate_id6 = next_gate_id_for_slot(slot_idx6)
+print(f"  Gate #{gate_id6} created (slot={gate_slot(gate_id6)})")
 record("Gate slot reuse", total_after <= total_before + 1,
        f"Before: total={total_before}, After: total={total_after}, active={active_after}")
 
 # Clean up
 send_contract_tx(ADDR_A_KEY, PROC_CLOSE_GATE, 0, struct.pack('<Q', gate_id6))
 wait_ticks(15)
-mark_slot_closed(slot_idx6)
+PREDICTOR.release(gate_id6)
 print()
 
 # ============================================================
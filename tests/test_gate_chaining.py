@@ -24,15 +24,32 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_create_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
 
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -53,99 +70,48 @@ def cli(*args, timeout=15):
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 5, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL']
-    off = 40
-    tr, tf, cb, th, ep = struct.unpack_from('<QQQQQ', b, off)
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': modes[b[0]] if b[0] < 5 else f'UNKNOWN({b[0]})',
-        'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf,
-        'currentBalance': cb, 'threshold': th
+        'mode': MODE_NAMES[g['mode']] if g['mode'] < 5 else f"UNKNOWN({g['mode']})",
+        'recipientCount': g['recipientCount'], 'active': g['active'],
+        'owner': g['owner'].hex(), 'totalReceived': g['totalReceived'],
+        'totalForwarded': g['totalForwarded'], 'currentBalance': g['currentBalance'],
+        'threshold': g['threshold'], 'createdEpoch': g['createdEpoch'],
+        'ratios': g['ratios'][:g['recipientCount']]
     }
 
 def query_gate_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 6, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 def get_pubkey_from_identity(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
-
-def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
+    return public_key_from_identity(identity)
 
 def send_contract_tx(key, input_type, amount, input_data):
-    hex_data = input_data.hex()
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(input_type), str(amount),
-               str(len(input_data)), hex_data)
+    return TRACKER.track(BROADCASTER.send_contract_call(key, input_type, amount, input_data))
 
 def wait_ticks(n=15):
-    start = get_tick()
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=480)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    start = CLOCK.current()
     target = start + n
     print(f"    Waiting for tick {target} (current: {start})...")
-    for _ in range(120):
-        time.sleep(4)
-        try:
-            cur = get_tick()
-            if cur >= target:
-                print(f"    ✓ Reached tick {cur}")
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=480):
+        print(f"    ✓ Reached tick {CLOCK.tick}")
+        return True
     print("    ⚠ Timeout")
     return False
 
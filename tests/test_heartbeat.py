@@ -16,16 +16,33 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_configure_heartbeat,
+    build_create_gate,
+    build_heartbeat,
+    identity_from_seed,
+    public_key_from_identity,
+)
+
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 CONTRACT_INDEX = 25  # Pulse took index 24, QuGate uses 25
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, CONTRACT_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -61,152 +78,54 @@ def cli(*args, timeout=15):
 
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
-    raise Exception("Cannot get identity")
+    return identity_from_seed(key)
 
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 
 def get_pubkey(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
+    return public_key_from_identity(identity)
 
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_GATE, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    tr, tf, cb, th = struct.unpack_from('<QQQQ', b, 40)
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': b[0], 'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf, 'currentBalance': cb, 'threshold': th,
+        'mode': g['mode'], 'recipientCount': g['recipientCount'], 'active': g['active'],
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold'],
     }
 
 
 def query_heartbeat(gate_id):
-    """
-    getHeartbeat output layout (from contract):
-      active(1) triggered(1) thresholdEpochs(4) lastHeartbeatEpoch(4) triggerEpoch(4)
-      payoutPercentPerEpoch(1) minimumBalance(8) beneficiaryCount(1)
-      beneficiaryAddresses[8] (256) beneficiaryShares[8] (8)
-    """
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_HEARTBEAT, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    active, triggered = b[0], b[1]
-    threshold_epochs, last_hb, trigger_epoch = struct.unpack_from('<III', b, 2)
-    payout_pct = b[14]
-    min_bal = struct.unpack_from('<q', b, 15)[0]
-    bene_count = b[23]
-    return {
-        'active': active, 'triggered': triggered,
-        'thresholdEpochs': threshold_epochs, 'lastHeartbeatEpoch': last_hb,
-        'triggerEpoch': trigger_epoch, 'payoutPercentPerEpoch': payout_pct,
-        'minimumBalance': min_bal, 'beneficiaryCount': bene_count,
-    }
+    return CLIENT.get_heartbeat(gate_id)
 
 
 def query_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_COUNT, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
-
-
-def build_create(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)  # padding
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
-
-
-def build_configure_heartbeat(gate_id, threshold_epochs, payout_pct, min_balance,
-                               beneficiary_pks, beneficiary_shares):
-    """
-    configureHeartbeat_input layout:
-      gateId(8) thresholdEpochs(4) payoutPercentPerEpoch(1) minimumBalance(8)
-      beneficiaryAddresses[8] (256) beneficiaryShares[8] (8) beneficiaryCount(1)
-    """
-    data = bytearray()
-    data += struct.pack('<Q', gate_id)
-    data += struct.pack('<I', threshold_epochs)
-    data += struct.pack('<B', payout_pct)
-    data += struct.pack('<q', min_balance)
-    for i in range(8):
-        data += beneficiary_pks[i] if i < len(beneficiary_pks) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<B', beneficiary_shares[i] if i < len(beneficiary_shares) else 0)
-    data += struct.pack('<B', len(beneficiary_pks))
-    return bytes(data)
-
-
-def build_heartbeat(gate_id):
-    """heartbeat_input: gateId(8)"""
-    return struct.pack('<Q', gate_id)
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 
 def send_tx(key, proc, amount, data):
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(proc), str(amount),
-               str(len(data)), data.hex())
+    return TRACKER.track(BROADCASTER.send_contract_call(key, proc, amount, data))
 
 
 def wait(n=15):
-    start = get_tick()
-    target = start + n
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=720)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    target = CLOCK.current() + n
     print(f"    waiting for tick {target}...")
-    for _ in range(180):
-        time.sleep(4)
-        try:
-            if get_tick() >= target:
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=720):
+        return True
     print("    ⚠ timeout!")
     return False
 
@@ -249,7 +168,7 @@ print("TEST 1: Create HEARTBEAT gate")
 print("─" * 60)
 
 before_total, _ = query_count()
-data = build_create(MODE_HEARTBEAT, [PK_B], [1])
+data = build_create_gate(MODE_HEARTBEAT, [PK_B], [1])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -359,18 +278,20 @@ print(f"  State before: triggered={hb_pre['triggered']}, lastHB={hb_pre['lastHea
 # We simulate by waiting for the node to advance epochs naturally in testnet.
 print("  ⏳ Waiting for epoch advancement (testnet should auto-advance)...")
 # Wait up to 10 minutes for epoch to advance
-epoch_advanced = False
-for attempt in range(30):
-    time.sleep(20)
+def heartbeat_triggered():
     try:
         hb_check = query_heartbeat(hb_gate_id)
-        if hb_check['triggered'] == 1:
-            epoch_advanced = True
-            break
-        print(f"  ... attempt {attempt+1}: triggered={hb_check['triggered']}, "
-              f"lastHB={hb_check['lastHeartbeatEpoch']}")
     except Exception as e:
         print(f"  ... query failed: {e}")
+        return False
+    if hb_check['triggered'] == 1:
+        return True
+    print(f"  ... tick {CLOCK.tick}: triggered={hb_check['triggered']}, "
+          f"lastHB={hb_check['lastHeartbeatEpoch']}")
+    return False
+
+
+epoch_advanced = CLOCK.wait_for(heartbeat_triggered, timeout=600, every=10)
 
 hb_post = query_heartbeat(hb_gate_id)
 check("Gate triggered after threshold epochs",
@@ -403,11 +324,7 @@ bal_c_before = get_balance(ADDR_C)
 
 # Wait one more epoch for payout to happen
 print("  ⏳ Waiting for payout epoch...")
-for attempt in range(15):
-    time.sleep(20)
-    gate_check = query_gate(hb_gate_id)
-    if gate_check['totalForwarded'] > 0:
-        break
+CLOCK.wait_for(lambda: query_gate(hb_gate_id)['totalForwarded'] > 0, timeout=300, every=5)
 
 gate_after = query_gate(hb_gate_id)
 bal_b_after = get_balance(ADDR_B)
@@ -466,11 +383,8 @@ else:
     fwd_before2 = gate_current['totalForwarded']
 
     print("  ⏳ Waiting for second payout epoch...")
-    for attempt in range(15):
-        time.sleep(20)
-        gate_check2 = query_gate(hb_gate_id)
-        if gate_check2['totalForwarded'] > fwd_before2:
-            break
+    CLOCK.wait_for(lambda: query_gate(hb_gate_id)['totalForwarded'] > fwd_before2,
+                   timeout=300, every=5)
 
     gate_after2 = query_gate(hb_gate_id)
     expected_payout2 = bal_epoch2 * 50 // 100
@@ -497,13 +411,9 @@ if gate_final['active'] == 0:
 else:
     # Wait several more epochs for balance to drain below minimum
     print("  ⏳ Waiting for balance to drain below minimumBalance...")
-    auto_closed = False
-    for attempt in range(20):
-        time.sleep(20)
-        gate_check = query_gate(hb_gate_id)
-        if gate_check['active'] == 0:
-            auto_closed = True
-            break
+    auto_closed = CLOCK.wait_for(lambda: query_gate(hb_gate_id)['active'] == 0,
+                                 timeout=400, every=5)
+    gate_check = query_gate(hb_gate_id)
 
     check("Gate auto-closes when balance <= minimum", auto_closed,
           f"active={gate_check['active']}, balance={gate_check['currentBalance']}")
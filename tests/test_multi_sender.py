@@ -9,15 +9,32 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_create_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
 
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -38,97 +55,48 @@ def cli(*args, timeout=15):
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 5, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL']
-    off = 40
-    tr, tf, cb = struct.unpack_from('<QQQ', b, off)
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': modes[b[0]], 'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf, 'currentBalance': cb
+        'mode': MODE_NAMES[g['mode']] if g['mode'] < 5 else f"UNKNOWN({g['mode']})",
+        'recipientCount': g['recipientCount'], 'active': g['active'],
+        'owner': g['owner'].hex(), 'totalReceived': g['totalReceived'],
+        'totalForwarded': g['totalForwarded'], 'currentBalance': g['currentBalance'],
+        'threshold': g['threshold'], 'createdEpoch': g['createdEpoch'],
+        'ratios': g['ratios'][:g['recipientCount']]
     }
 
 def query_gate_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 6, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 def get_pubkey_from_identity(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
-
-def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
+    return public_key_from_identity(identity)
 
 def send_contract_tx(key, input_type, amount, input_data):
-    hex_data = input_data.hex()
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(input_type), str(amount),
-               str(len(input_data)), hex_data)
+    return TRACKER.track(BROADCASTER.send_contract_call(key, input_type, amount, input_data))
 
 def wait_ticks(n=15):
-    start = get_tick()
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=720)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    start = CLOCK.current()
     target = start + n
     print(f"    Waiting for tick {target} (current: {start})...")
-    for _ in range(180):
-        time.sleep(4)
-        try:
-            cur = get_tick()
-            if cur >= target:
-                print(f"    ✓ Reached tick {cur}")
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=720):
+        print(f"    ✓ Reached tick {CLOCK.tick}")
+        return True
     print("    ⚠ Timeout")
     return False
 
@@ -158,13 +126,11 @@ PK_C = get_pubkey_from_identity(ADDR_C)
 print(f"  Recipients: Address A ({ADDR_A[:12]}...) + Address C ({ADDR_C[:12]}...)")
 print("  Senders: Address A, Address B, Address C")
 
-bal0_start = get_balance(ADDR_A)
-bal1_start = get_balance(ADDR_B)
-bal2_start = get_balance(ADDR_C)
+start = BALANCES.snapshot([ADDR_A, ADDR_B, ADDR_C])
 print("\n━━━ Starting Balances ━━━")
-print(f"  Address A: {bal0_start:,} QU")
-print(f"  Address B: {bal1_start:,} QU")
-print(f"  Address C: {bal2_start:,} QU")
+print(f"  Address A: {start[ADDR_A]:,} QU")
+print(f"  Address B: {start[ADDR_B]:,} QU")
+print(f"  Address C: {start[ADDR_C]:,} QU")
 
 # ============================================================
 print(f"\n{'='*60}")
@@ -187,21 +153,19 @@ print(f"\n{'='*60}")
 print("STEP 2: Address A sends 10,000 QU (sender is also a recipient)")
 print(f"{'='*60}")
 
-bal0_before = get_balance(ADDR_A)
-bal2_before = get_balance(ADDR_C)
+before = BALANCES.snapshot([ADDR_A, ADDR_C])
 
 send_data = struct.pack('<Q', gate_id)
 out = send_contract_tx(ADDR_A_KEY, PROC_SEND_TO_GATE, 10000, send_data)
 print(f"  Address A sent 10,000 QU to gate #{gate_id}")
 wait_ticks(15)
 
-bal0_after = get_balance(ADDR_A)
-bal2_after = get_balance(ADDR_C)
+change = BALANCES.diff(before, BALANCES.snapshot([ADDR_A, ADDR_C]))
 gate = query_gate(gate_id)
 
 # Address A sent 10k but also received 5k back (50%), net -5k
-addr_a_net = bal0_after - bal0_before
-addr_c_gain = bal2_after - bal2_before
+addr_a_net = change[ADDR_A]
+addr_c_gain = change[ADDR_C]
 
 print(f"  Gate: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}")
 print(f"  Address A net change: {addr_a_net:+,} QU (sent 10k, received 5k back = -5k)")
@@ -213,19 +177,17 @@ print(f"\n{'='*60}")
 print("STEP 3: Address B sends 20,000 QU (owner sends, not a recipient)")
 print(f"{'='*60}")
 
-bal0_before = get_balance(ADDR_A)
-bal2_before = get_balance(ADDR_C)
+before = BALANCES.snapshot([ADDR_A, ADDR_C])
 
 out = send_contract_tx(ADDR_B_KEY, PROC_SEND_TO_GATE, 20000, send_data)
 print(f"  Address B sent 20,000 QU to gate #{gate_id}")
 wait_ticks(15)
 
-bal0_after = get_balance(ADDR_A)
-bal2_after = get_balance(ADDR_C)
+change = BALANCES.diff(before, BALANCES.snapshot([ADDR_A, ADDR_C]))
 gate = query_gate(gate_id)
 
-addr_a_gain = bal0_after - bal0_before
-addr_c_gain = bal2_after - bal2_before
+addr_a_gain = change[ADDR_A]
+addr_c_gain = change[ADDR_C]
 
 print(f"  Gate: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}")
 print(f"  Address A gained: {addr_a_gain:+,} QU (expected +10,000)")
@@ -237,19 +199,17 @@ print(f"\n{'='*60}")
 print("STEP 4: Address C sends 8,000 QU (recipient sends to own gate)")
 print(f"{'='*60}")
 
-bal0_before = get_balance(ADDR_A)
-bal2_before = get_balance(ADDR_C)
+before = BALANCES.snapshot([ADDR_A, ADDR_C])
 
 out = send_contract_tx(ADDR_C_KEY, PROC_SEND_TO_GATE, 8000, send_data)
 print(f"  Address C sent 8,000 QU to gate #{gate_id}")
 wait_ticks(15)
 
-bal0_after = get_balance(ADDR_A)
-bal2_after = get_balance(ADDR_C)
+change = BALANCES.diff(before, BALANCES.snapshot([ADDR_A, ADDR_C]))
 gate = query_gate(gate_id)
 
-addr_a_gain = bal0_after - bal0_before
-addr_c_net = bal2_after - bal2_before
+addr_a_gain = change[ADDR_A]
+addr_c_net = change[ADDR_C]
 
 print(f"  Gate: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}")
 print(f"  Address A gained: {addr_a_gain:+,} QU (expected +4,000)")
@@ -275,14 +235,12 @@ print(f"\n{'='*60}")
 print("FINAL RESULTS")
 print(f"{'='*60}")
 
-bal0_end = get_balance(ADDR_A)
-bal1_end = get_balance(ADDR_B)
-bal2_end = get_balance(ADDR_C)
+total_change = BALANCES.diff(start, BALANCES.snapshot([ADDR_A, ADDR_B, ADDR_C]))
 
 print("\n  Balance Changes:")
-print(f"    Address A: {bal0_end - bal0_start:+,} QU (sent 10k, received 50% of all 38k)")
-print(f"    Address B: {bal1_end - bal1_start:+,} QU (sent 20k + 1k fee, received nothing)")
-print(f"    Address C: {bal2_end - bal2_start:+,} QU (sent 8k, received 50% of all 38k)")
+print(f"    Address A: {total_change[ADDR_A]:+,} QU (sent 10k, received 50% of all 38k)")
+print(f"    Address B: {total_change[ADDR_B]:+,} QU (sent 20k + 1k fee, received nothing)")
+print(f"    Address C: {total_change[ADDR_C]:+,} QU (sent 8k, received 50% of all 38k)")
 
 print(f"\n  Gate totals: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}")
 
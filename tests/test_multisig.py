@@ -16,16 +16,32 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_configure_multisig,
+    build_create_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 CONTRACT_INDEX = 25  # Pulse took index 24, QuGate uses 25
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, CONTRACT_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -62,147 +78,54 @@ def cli(*args, timeout=15):
 
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
-    raise Exception("Cannot get identity")
+    return identity_from_seed(key)
 
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 
 def get_pubkey(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
+    return public_key_from_identity(identity)
 
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_GATE, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    tr, tf, cb, th = struct.unpack_from('<QQQQ', b, 40)
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': b[0], 'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf, 'currentBalance': cb, 'threshold': th,
+        'mode': g['mode'], 'recipientCount': g['recipientCount'], 'active': g['active'],
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold'],
     }
 
 
 def query_multisig_state(gate_id):
-    """
-    getMultisigState_output layout:
-      status(8) approvalBitmap(1) approvalCount(1) required(1) guardianCount(1)
-      proposalEpoch(4) proposalActive(1) guardians[8](256)
-    """
-    data = struct.pack('<I', gate_id & 0xFFFFFFFF)  # uint32 gateId
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    status = struct.unpack_from('<q', b, 0)[0]
-    bitmap, count, required, guardian_count = b[8], b[9], b[10], b[11]
-    proposal_epoch = struct.unpack_from('<I', b, 12)[0]
-    proposal_active = b[16]
-    # Parse guardian public keys (Array<id, 8> starting after proposalActive)
-    guardians = []
-    guardian_offset = 17  # after proposalActive (byte 16)
-    for i in range(8):
-        pk = b[guardian_offset + i * 32 : guardian_offset + (i + 1) * 32]
-        guardians.append(pk)
-    return {
-        'status': status, 'approvalBitmap': bitmap, 'approvalCount': count,
-        'required': required, 'guardianCount': guardian_count,
-        'proposalEpoch': proposal_epoch, 'proposalActive': proposal_active,
-        'guardians': guardians,
-    }
+    return CLIENT.get_multisig_state(gate_id)
 
 
 def query_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_COUNT, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
-
-
-def build_create(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)  # padding
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
-
-
-def build_configure_multisig(gate_id, guardian_pks, required, expiry_epochs):
-    """
-    configureMultisig_input layout:
-      gateId(4) guardians[8](256) guardianCount(1) required(1) proposalExpiryEpochs(4)
-    Note: gateId is uint32 in the input struct.
-    """
-    data = bytearray()
-    data += struct.pack('<I', gate_id & 0xFFFFFFFF)  # uint32
-    for i in range(8):
-        data += guardian_pks[i] if i < len(guardian_pks) else bytes(32)
-    data += struct.pack('<B', len(guardian_pks))  # guardianCount
-    data += struct.pack('<B', required)
-    data += struct.pack('<I', expiry_epochs)
-    return bytes(data)
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 
 def send_tx(key, proc, amount, data):
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(proc), str(amount),
-               str(len(data)), data.hex())
+    return TRACKER.track(BROADCASTER.send_contract_call(key, proc, amount, data))
 
 
 def wait(n=15):
-    start = get_tick()
-    target = start + n
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=720)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    target = CLOCK.current() + n
     print(f"    waiting for tick {target}...")
-    for _ in range(180):
-        time.sleep(4)
-        try:
-            if get_tick() >= target:
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=720):
+        return True
     print("    ⚠ timeout!")
     return False
 
@@ -255,7 +178,7 @@ print("─" * 60)
 
 before_total, _ = query_count()
 # recipient[0] = ADDR_B (funds release target)
-data = build_create(MODE_MULTISIG, [PK_B], [1])
+data = build_create_gate(MODE_MULTISIG, [PK_B], [1])
 send_tx(ADDR_A_KEY, PROC_CREATE, CREATION_FEE, data)
 wait()
 
@@ -424,16 +347,15 @@ check("Proposal active with 1 vote", ms_with_vote['proposalActive'] == 1,
       f"active={ms_with_vote['proposalActive']}, count={ms_with_vote['approvalCount']}")
 
 print("  ⏳ Waiting for proposal to expire (4 epochs)...")
-expired = False
-for attempt in range(20):
-    time.sleep(20)
+def proposal_expired():
     try:
         ms_check = query_multisig_state(ms_gate_id)
-        if ms_check['proposalActive'] == 0 and ms_check['approvalCount'] == 0:
-            expired = True
-            break
     except Exception:
-        pass
+        return False
+    return ms_check['proposalActive'] == 0 and ms_check['approvalCount'] == 0
+
+
+expired = CLOCK.wait_for(proposal_expired, timeout=400, every=5)
 
 if expired:
     check("Proposal expired and votes reset", True)
@@ -500,14 +422,7 @@ check("Guardian 3 is zero (unused slot)", guardian_pks[3] == bytes(32))
 
 # getMultisigState on invalid gate ID should return error
 invalid_id = 0xDEADBEEF
-data_invalid = struct.pack('<I', invalid_id & 0xFFFFFFFF)
-resp_invalid = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-    'contractIndex': CONTRACT_INDEX, 'inputType': FUNC_GET_MULTISIG_STATE,
-    'inputSize': len(data_invalid),
-    'requestData': base64.b64encode(data_invalid).decode()
-}, timeout=5).json()
-b_invalid = base64.b64decode(resp_invalid['responseData'])
-status_invalid = struct.unpack_from('<q', b_invalid, 0)[0]
+status_invalid = query_multisig_state(invalid_id)['status']
 check("getMultisigState invalid gateId returns error", status_invalid != 0,
       f"status={status_invalid}")
 
@@ -15,12 +15,22 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
 import sys
 import pytest
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_fund_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
+
 LIVE_NODE = os.environ.get("QUBIC_NODE")
 pytestmark = pytest.mark.skipif(not LIVE_NODE, reason="Requires live Qubic node (set QUBIC_NODE env var)")
 
@@ -28,6 +38,11 @@ CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -67,61 +82,31 @@ def cli(*args, timeout=15):
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
-    raise Exception("Cannot get identity")
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def get_pubkey(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
+    return public_key_from_identity(identity)
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': FUNC_GET_GATE, 'inputSize': len(data),
-        'requestData': base64.b64encode(data).decode()
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL', 'ORACLE']
-    tr, tf, cb, th = struct.unpack_from('<QQQQ', b, 40)
+    g = CLIENT.get_gate(gate_id)
     return {
-        'mode': b[0], 'mode_name': modes[b[0]] if b[0] < 6 else f'?{b[0]}',
-        'recipientCount': b[1], 'active': b[2],
-        'totalReceived': tr, 'totalForwarded': tf,
-        'currentBalance': cb, 'threshold': th,
+        'mode': g['mode'],
+        'mode_name': MODE_NAMES[g['mode']] if g['mode'] < len(MODE_NAMES) else f"?{g['mode']}",
+        'recipientCount': g['recipientCount'], 'active': g['active'],
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold'],
     }
 
 def query_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': FUNC_GET_COUNT, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    total, active, burned = struct.unpack_from('<QQQ', b, 0)
-    return {'total': total, 'active': active, 'burned': burned}
+    count = CLIENT.get_gate_count()
+    return {'total': count['totalGates'], 'active': count['activeGates'],
+            'burned': count['totalBurned']}
 
 def build_create_oracle(recipient_keys, oracle_condition, oracle_threshold,
                          trigger_mode=TRIGGER_ONCE, oracle_id_byte=99):
@@ -162,22 +147,13 @@ def build_create_oracle(recipient_keys, oracle_condition, oracle_threshold,
     buf += struct.pack('<q', oracle_threshold)
     return bytes(buf)
 
-def build_fund_gate(gate_id):
-    """Build fundGate input."""
-    return struct.pack('<q', gate_id)
-
 def send_tx(seed, input_type, data, amount, tick_offset=5):
     tick = get_tick() + tick_offset
-    cli("-seed", seed,
-        "-sendspecialcommand", str(QUGATE_INDEX),
-        "-specialcommandtype", str(input_type),
-        "-specialcommanddata", base64.b64encode(data).decode(),
-        "-amount", str(amount),
-        "-scheduledtick", str(tick))
+    BROADCASTER.send_contract_call(seed, input_type, amount, data, tick=tick)
     return tick
 
 def wait(ticks=8):
-    time.sleep(ticks * 2)
+    CLOCK.wait_ticks(ticks, timeout=ticks * 30)
 
 def check(name, condition):
     global passed, failed
@@ -0,0 +1,196 @@
+"""Offline unit tests for the asyncio RPC client against a local HTTP server."""
+import asyncio
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    AsyncQuGateClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    RpcError,
+    structs,
+)
+from qugate.gateid import encode_gate_id  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+
+class FakeNode:
+    """Minimal keep-alive HTTP/1.1 server answering the three RPC endpoints."""
+
+    def __init__(self, delay=0.0, fail_first=0, chunked=False):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.chunked = chunked
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    def respond(self, method, path, body):
+        if path == '/live/v1/tick-info':
+            return {'tick': 1000, 'epoch': 7}
+        if path.startswith('/live/v1/balances/'):
+            return {'balance': {'id': path.rsplit('/', 1)[1], 'balance': '12345'}}
+        request = json.loads(body)
+        data = base64.b64decode(request['requestData'])
+        gate_id = int.from_bytes(data[:8], 'little')
+        out = structs.GET_GATE_OUTPUT.encode(active=1, totalReceived=gate_id)
+        return {'responseData': base64.b64encode(out).decode()}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                method, path, _ = line.decode().split(' ', 2)
+                length = 0
+                while (header := await reader.readline()) not in (b'\r\n', b''):
+                    name, _, value = header.decode().partition(':')
+                    if name.lower() == 'content-length':
+                        length = int(value)
+                body = await reader.readexactly(length)
+                self.requests += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    await asyncio.sleep(self.delay)
+                finally:
+                    self.in_flight -= 1
+                if self.fail_first:
+                    self.fail_first -= 1
+                    writer.write(b'HTTP/1.1 503 Busy\r\nContent-Length: 0\r\n\r\n')
+                    continue
+                payload = json.dumps(self.respond(method, path, body)).encode()
+                if self.chunked:
+                    half = len(payload) // 2
+                    writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n')
+                    for part in (payload[:half], payload[half:]):
+                        writer.write(b'%x\r\n%s\r\n' % (len(part), part))
+                    writer.write(b'0\r\n\r\n')
+                else:
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n' % len(payload)
+                                 + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_tick_balance_and_query():
+    async def main():
+        async with FakeNode() as node:
+            async with AsyncQuGateClient(node.url) as client:
+                assert await client.get_tick() == 1000
+                assert await client.get_balance('A' * 60) == 12345
+                gate = await client.get_gate(encode_gate_id(3))
+                assert gate['active'] == 1 and gate['totalReceived'] == encode_gate_id(3)
+            assert node.connections == 1    # keep-alive reuse
+    run(main())
+
+
+def test_chunked_responses():
+    async def main():
+        async with FakeNode(chunked=True) as node:
+            async with AsyncQuGateClient(node.url) as client:
+                assert (await client.tick_info())['epoch'] == 7
+                assert (await client.get_gate(5))['totalReceived'] == 5
+    run(main())
+
+
+def test_fan_out_is_bounded_and_overlaps():
+    async def main():
+        async with FakeNode(delay=0.05) as node:
+            async with AsyncQuGateClient(node.url, concurrency=4) as client:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                gates = await asyncio.gather(*(client.get_gate(i) for i in range(16)))
+                elapsed = loop.time() - start
+            assert [g['totalReceived'] for g in gates] == list(range(16))
+            assert node.max_in_flight == 4
+            assert node.connections == 4
+            assert elapsed < 16 * 0.05 / 2     # overlapped, not serial
+    run(main())
+
+
+def test_retries_transient_errors():
+    async def main():
+        async with FakeNode(fail_first=2) as node:
+            async with AsyncQuGateClient(node.url, retry_delay=0) as client:
+                assert await client.get_tick() == 1000
+            assert node.requests == 3
+    run(main())
+
+
+def test_deadline_raises_rpc_error():
+    async def main():
+        async with FakeNode(delay=1.0) as node:
+            async with AsyncQuGateClient(node.url, retry_delay=0.01) as client:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                with pytest.raises(RpcError):
+                    await client.get_tick(deadline=0.1)
+                assert loop.time() - start < 0.5
+    run(main())
+
+
+def test_cancellation_releases_slot_and_connection():
+    async def main():
+        async with FakeNode(delay=0.5) as node:
+            async with AsyncQuGateClient(node.url, concurrency=1) as client:
+                task = asyncio.create_task(client.get_tick())
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert client._idle == []
+                node.delay = 0
+                assert await client.get_tick(deadline=1.0) == 1000
+    run(main())
+
+
+def test_unreachable_node():
+    async def main():
+        async with AsyncQuGateClient('http://127.0.0.1:9', retries=1, retry_delay=0) as client:
+            with pytest.raises(RpcError):
+                await client.get_tick()
+    run(main())
+
+
+def test_breaker_fails_fast_and_counts():
+    async def main():
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        async with AsyncQuGateClient('http://127.0.0.1:9', retries=4, retry_delay=0,
+                                     breaker=breaker) as client:
+            with pytest.raises(RpcError):
+                await client.get_tick()
+            with pytest.raises(CircuitOpenError):
+                await client.get_tick()
+            snap = client.metrics.snapshot()['/live/v1/tick-info']
+            assert (snap['requests'], snap['retries'], snap['rejected']) == (2, 1, 1)
+    run(main())
@@ -0,0 +1,105 @@
+"""Offline unit tests for the client-side gate ID predictor."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import GateIdPredictor, encode_gate_id  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+
+def slot_out(generation, active):
+    return {'valid': 1, 'generation': generation, 'active': active}
+
+
+class SlotClient:
+    """Answers getGateCount/getGateBySlot from a list of slot outputs."""
+
+    pool_size = 4
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.crawled = []
+
+    def get_gate_count(self):
+        return {'totalGates': len(self.slots)}
+
+    def get_gate_by_slot(self, slot):
+        self.crawled.append(slot)
+        if slot >= len(self.slots):
+            return {'valid': 0, 'generation': 0, 'active': 0}
+        return self.slots[slot]
+
+
+def test_fresh_slots_then_lifo_reuse():
+    predictor = GateIdPredictor()
+    first, second, third = (predictor.allocate() for _ in range(3))
+    assert [first, second, third] == [encode_gate_id(0), encode_gate_id(1), encode_gate_id(2)]
+    predictor.release(first)
+    predictor.release(third)
+    assert predictor.certain
+    assert predictor.allocate() == encode_gate_id(2, generation=1)
+    assert predictor.allocate() == encode_gate_id(0, generation=1)
+    assert predictor.allocate() == encode_gate_id(3)
+
+
+def test_from_client_crawls_generations_and_free_set():
+    client = SlotClient([slot_out(0, 1), slot_out(2, 0), slot_out(1, 1), slot_out(5, 0)])
+    predictor = GateIdPredictor.from_client(client)
+    assert sorted(client.crawled) == [0, 1, 2, 3]
+    assert (predictor.gate_count, predictor.free_count) == (4, 2)
+    # the crawl cannot tell which of the two freed slots is on top
+    assert not predictor.certain
+    assert sorted(predictor.candidates()) == [encode_gate_id(1, 2), encode_gate_id(3, 5)]
+    predictor.allocate()
+    assert predictor.certain
+    predictor.allocate()
+    assert predictor.next_id() == encode_gate_id(4)
+
+
+def test_closes_in_one_tick_are_unordered():
+    predictor = GateIdPredictor(gate_count=3, generations={0: 0, 1: 0, 2: 0})
+    predictor.release(encode_gate_id(0), encode_gate_id(1))
+    assert not predictor.certain
+    predictor.release(encode_gate_id(2))
+    assert predictor.certain
+    assert predictor.allocate() == encode_gate_id(2, generation=1)
+    assert sorted(predictor.candidates()) == [encode_gate_id(0, 1), encode_gate_id(1, 1)]
+
+
+def test_release_rejects_stale_and_unknown_ids():
+    predictor = GateIdPredictor()
+    gate_id = predictor.allocate()
+    predictor.release(gate_id)
+    with pytest.raises(ValueError):
+        predictor.release(gate_id)
+    with pytest.raises(ValueError):
+        predictor.release(encode_gate_id(7))
+
+
+def test_cancel_mirrors_contract_undo():
+    predictor = GateIdPredictor()
+    ids = [predictor.allocate() for _ in range(3)]
+    predictor.cancel(ids[-1])                 # fresh slot: _gateCount -= 1
+    assert predictor.gate_count == 2
+    predictor.release(ids[0])
+    reused = predictor.allocate()
+    predictor.cancel(reused)                  # reused slot goes back on the free-list
+    assert predictor.next_id() == reused
+
+
+def test_generation_wraps_at_uint16():
+    predictor = GateIdPredictor(gate_count=1, generations={0: 0xFFFF})
+    predictor.release(encode_gate_id(0, 0xFFFF))
+    assert predictor.next_id() == encode_gate_id(0, 0)
+
+
+def test_confirm_corrects_a_guess_from_an_unordered_group():
+    predictor = GateIdPredictor(gate_count=3, generations={0: 1, 1: 1, 2: 0}, free_slots=[0, 1])
+    guess = predictor.allocate()
+    actual = encode_gate_id(0, 1) if guess == encode_gate_id(1, 1) else encode_gate_id(1, 1)
+    predictor.confirm(guess, actual)
+    assert predictor.certain
+    assert predictor.next_id() == guess
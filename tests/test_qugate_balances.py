@@ -0,0 +1,84 @@
+"""Offline unit tests for the tick-scoped balance service."""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import BalanceService, Snapshot  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+
+class FakeClient:
+    """Stands in for QuGateClient: a tick counter and a balance table."""
+
+    pool_size = 4
+
+    def __init__(self, balances):
+        self.balances = dict(balances)
+        self.tick = 100
+        self.lock = threading.Lock()
+        self.balance_calls = []
+        self.tick_calls = 0
+
+    def get_tick(self):
+        self.tick_calls += 1
+        return self.tick
+
+    def get_balance(self, identity):
+        with self.lock:
+            self.balance_calls.append(identity)
+        return self.balances[identity]
+
+
+def test_get_many_fetches_each_identity_once_per_tick():
+    client = FakeClient({'A': 1, 'B': 2, 'C': 3})
+    service = BalanceService(client)
+    assert service.get_many(['A', 'B', 'A']) == {'A': 1, 'B': 2}
+    assert service.get_many(['B', 'C']) == {'B': 2, 'C': 3}
+    assert sorted(client.balance_calls) == ['A', 'B', 'C']
+    assert (service.hits, service.misses) == (1, 3)
+
+
+def test_new_tick_refetches():
+    client = FakeClient({'A': 1})
+    service = BalanceService(client)
+    assert service.get('A') == 1
+    client.balances['A'] = 5
+    assert service.get('A') == 1          # same tick: cached
+    client.tick += 1
+    assert service.get('A') == 5
+    assert client.balance_calls == ['A', 'A']
+
+
+def test_explicit_tick_skips_tick_info():
+    client = FakeClient({'A': 1})
+    service = BalanceService(client)
+    service.get('A', tick=7)
+    service.get('A', tick=7)
+    assert client.tick_calls == 0
+    assert client.balance_calls == ['A']
+
+
+def test_snapshot_and_diff():
+    client = FakeClient({'A': 100, 'B': 50})
+    service = BalanceService(client)
+    before = service.snapshot(['A', 'B'])
+    assert isinstance(before, Snapshot) and before.tick == 100
+    client.tick = 115
+    client.balances.update(A=40, B=110)
+    after = service.snapshot(['A', 'B'])
+    assert after == {'A': 40, 'B': 110} and after.tick == 115
+    assert service.diff(before, after) == {'A': -60, 'B': 60}
+    assert service.diff({'A': 1}, {'B': 2}) == {'A': -1, 'B': 2}
+
+
+def test_invalidate():
+    client = FakeClient({'A': 1})
+    service = BalanceService(client)
+    service.get('A')
+    service.invalidate()
+    service.get('A')
+    assert client.balance_calls == ['A', 'A']
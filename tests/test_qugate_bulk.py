@@ -0,0 +1,165 @@
+"""Offline unit tests for chunked getGateBatch reads."""
+import asyncio
+import base64
+import os
+import struct
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    AsyncQuGateClient,
+    ContractSimulator,
+    GateDirectory,
+    QuGateClient,
+    build_close_gate,
+    build_create_gate,
+    encode_gate_id,
+    structs,
+)
+from qugate.bulk import batches, is_missing, missing  # noqa: E402
+from qugate.constants import MODE_SPLIT, PROC_CLOSE_GATE, PROC_CREATE_GATE  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+OWNER = bytes([0xA1]) * 32
+
+
+def batch_reply(data, known):
+    """getGateBatch output for the requested IDs: real gates for *known*, zeroed otherwise."""
+    gates = []
+    for gate_id in struct.unpack('<32Q', data):
+        if gate_id in known:
+            gates.append({'owner': OWNER, 'active': 1, 'totalReceived': gate_id})
+        else:
+            gates.append({'chainNextGateId': -1, 'adminGateId': -1,
+                          'recipientGateIds': [-1] * 8})
+    return structs.GET_GATE_BATCH_OUTPUT.encode(gates=gates)
+
+
+class BatchSession:
+    """Thread-safe fake ``requests`` session that answers getGateBatch calls."""
+
+    def __init__(self, known):
+        self.known = set(known)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, json=None):
+        with self.lock:
+            self.calls += 1
+        assert json['inputType'] == 8 and json['inputSize'] == 256
+        out = batch_reply(base64.b64decode(json['requestData']), self.known)
+        return FakeResponse({'responseData': base64.b64encode(out).decode()})
+
+    def close(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_batches_dedupe_and_chunk():
+    ids = list(range(1, 71)) + [5, 6]
+    chunks = batches(ids)
+    assert [len(c) for c in chunks] == [32, 32, 6]
+    assert sum(chunks, []) == list(range(1, 71))
+
+
+def test_zeroed_entry_is_missing():
+    gate = structs.GET_GATE_OUTPUT.decode(batch_reply(bytes(256), set())[:776])
+    assert is_missing(gate)
+    assert not is_missing({'owner': OWNER})
+
+
+def test_get_gates_blocking_fleet():
+    fleet = [encode_gate_id(slot) for slot in range(2048)]
+    known = set(fleet[:2000])
+    session = BatchSession(known)
+    client = QuGateClient(session=session)
+    result = client.get_gates(fleet + [0])
+    assert session.calls == 65         # 2049 ids -> 65 batches, not 2049 calls
+    assert list(result) == fleet + [0]
+    assert result[fleet[0]]['totalReceived'] == fleet[0]
+    assert missing(result) == fleet[2000:] + [0]
+
+
+def test_get_gates_async():
+    known = {encode_gate_id(s) for s in range(40)}
+    session = BatchSession(known)
+
+    class Client(AsyncQuGateClient):
+        async def query(self, input_type, data=b'', deadline=None):
+            session.calls += 1
+            await asyncio.sleep(0)
+            return batch_reply(data, known)
+
+    async def main():
+        client = Client()
+        return await client.get_gates(encode_gate_id(s) for s in range(50))
+
+    result = asyncio.run(main())
+    assert session.calls == 2
+    assert len(result) == 50
+    assert missing(result) == [encode_gate_id(s) for s in range(40, 50)]
+
+
+def test_get_gates_empty():
+    assert QuGateClient(session=BatchSession(set())).get_gates([]) == {}
+
+
+def test_directory_follows_closes_and_reuse_without_slot_reads():
+    sim = ContractSimulator(epoch=100)
+    sim.fund(OWNER, 10 ** 9)
+    client = QuGateClient(session=sim.session(), retries=0)
+    requested = []
+    get_gates = client.get_gates
+    client.get_gates = lambda ids, workers=None: requested.append(len(ids)) or get_gates(ids)
+
+    expected = set()
+
+    def create():
+        gate_id = sim.invoke(OWNER, PROC_CREATE_GATE, 100000,
+                             build_create_gate(MODE_SPLIT, [bytes([7]) * 32], [1]))['gateId']
+        expected.add(gate_id)
+        return gate_id
+
+    def close(gate_id):
+        sim.invoke(OWNER, PROC_CLOSE_GATE, 0, build_close_gate(gate_id))
+        expected.remove(gate_id)
+
+    def read():
+        live = directory.read(client.get_gate_count())
+        assert set(live) == expected
+        return live
+
+    gate_ids = [create() for _ in range(40)]
+    directory = GateDirectory(client)
+    assert len(read()) == 40
+    for gate_id in gate_ids[10:]:
+        close(gate_id)
+    assert len(read()) == 10
+    requested.clear()
+    read()
+    assert requested == [10]                     # closed slots skipped while counts hold
+    reused = [create(), create()]                # the newest free slots, next generation
+    assert len(read()) == 12 and requested[-1] == 10 + 30   # the 30 closed slots rechecked
+    close(reused[0])
+    once = create()                              # same slot, one generation on
+    assert once in read()
+    close(once)
+    twice = create()
+    close(twice)
+    assert directory.slot_reads == 0
+    assert create() in read()                    # reused twice over: one getGateBySlot pass
+    assert directory.slot_reads == len(directory.closed) + 1
@@ -0,0 +1,119 @@
+"""Offline unit tests for the tick-scoped query cache."""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import QueryCache, QuGateClient, encode_gate_id, structs  # noqa: E402
+from qugate.constants import FUNC_GET_FEES, FUNC_GET_GATE  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+OWNER = bytes([0xA0]) * 32
+
+
+class ManualClock:
+    def __init__(self, tick=100):
+        self.tick = tick
+        self.ages = []
+
+    def current(self, max_age=None):
+        self.ages.append(max_age)
+        return self.tick
+
+
+class QueryCountingClient(QuGateClient):
+    """QuGateClient whose contract calls are answered locally and counted."""
+
+    def __init__(self, gates, **kwargs):
+        super().__init__(**kwargs)
+        self.gates = gates
+        self.calls = []
+
+    def _query(self, input_type, data):
+        self.calls.append(input_type)
+        if input_type == FUNC_GET_GATE:
+            gate_id = structs.GATE_ID_INPUT.decode(data)['gateId']
+            return structs.GET_GATE_OUTPUT.encode(**self.gates.get(gate_id, {}))
+        if input_type == FUNC_GET_FEES:
+            return structs.GET_FEES_OUTPUT.encode(creationFee=len(self.calls))
+        return structs.GET_GATE_OUTPUT.encode(**self.gates[1]) * 2
+
+
+def gate(**fields):
+    base = dict(mode=2, owner=OWNER, createdEpoch=200, active=1, currentBalance=5000)
+    base.update(fields)
+    return base
+
+
+def test_same_tick_queries_hit_cache():
+    clock = ManualClock()
+    cache = QueryCache(clock, max_age=0.5)
+    client = QueryCountingClient({1: gate()}, cache=cache)
+    for _ in range(5):
+        assert client.get_gate(1)['currentBalance'] == 5000
+    assert client.calls == [FUNC_GET_GATE]
+    assert (cache.hits, cache.misses) == (4, 1)
+    assert clock.ages == [0.5] * 5
+
+
+def test_key_includes_request_data():
+    client = QueryCountingClient({1: gate(), 2: gate(mode=0)}, cache=QueryCache(ManualClock()))
+    assert client.get_gate(1)['mode'] == 2
+    assert client.get_gate(2)['mode'] == 0
+    assert client.calls == [FUNC_GET_GATE, FUNC_GET_GATE]
+
+
+def test_new_tick_invalidates():
+    clock = ManualClock()
+    client = QueryCountingClient({1: gate()}, cache=QueryCache(clock))
+    first = client.get_fees()['creationFee']
+    assert client.get_fees()['creationFee'] == first
+    clock.tick += 1
+    assert client.get_fees()['creationFee'] == first + 1
+    client.cache.invalidate()
+    assert client.get_fees()['creationFee'] == first + 2
+
+
+def test_gate_constants_survive_tick_changes():
+    clock = ManualClock()
+    gid = encode_gate_id(1)
+    client = QueryCountingClient({gid: gate()}, cache=QueryCache(clock))
+    client.get_gate(gid)
+    for _ in range(3):
+        clock.tick += 1
+        assert client.get_gate_constants(gid) == {'mode': 2, 'owner': OWNER, 'createdEpoch': 200}
+    assert client.calls == [FUNC_GET_GATE]
+
+
+def test_missing_gates_are_not_remembered():
+    client = QueryCountingClient({}, cache=QueryCache(ManualClock()))
+    assert client.get_gate(99)['owner'] == bytes(32)
+    assert client.cache.gate_constants(99) is None
+
+
+def test_batch_reads_remember_constants():
+    client = QueryCountingClient({1: gate(mode=1)}, cache=QueryCache(ManualClock()))
+    client.get_gate_batch([1, 1])
+    assert client.cache.gate_constants(1)['mode'] == 1
+
+
+def test_without_cache_every_call_queries():
+    client = QueryCountingClient({1: gate()})
+    client.get_gate(1)
+    client.get_gate(1)
+    assert client.get_gate_constants(1)['createdEpoch'] == 200
+    assert len(client.calls) == 3
+
+
+def test_concurrent_readers_share_replies():
+    client = QueryCountingClient({1: gate()}, cache=QueryCache(ManualClock()))
+    client.get_gate(1)
+    threads = [threading.Thread(target=client.get_gate, args=(1,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert client.calls == [FUNC_GET_GATE]
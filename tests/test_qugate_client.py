@@ -0,0 +1,244 @@
+"""Offline unit tests for the qugate client package (no node required)."""
+import base64
+import os
+import struct
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    QuGateClient,
+    RpcError,
+    build_configure_multisig,
+    build_create_gate,
+    build_update_gate,
+    build_withdraw_reserve,
+    encode_gate_id,
+    gate_generation,
+    gate_slot,
+)
+from qugate import structs  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+PK_B = bytes([0xB0]) * 32
+PK_C = bytes([0xC0]) * 32
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(f"status {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Records requests and answers from a queue of payloads/exceptions."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.closed = False
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, kwargs))
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeResponse(reply)
+
+    def close(self):
+        self.closed = True
+
+
+def contract_reply(data):
+    return {'responseData': base64.b64encode(data).decode()}
+
+
+# =============================================
+# Struct layouts
+# =============================================
+
+@pytest.mark.parametrize("codec,size", [
+    (structs.CREATE_GATE_INPUT, 672),
+    (structs.UPDATE_GATE_INPUT, 672),
+    (structs.GET_GATE_OUTPUT, 776),
+    (structs.GET_GATE_BY_SLOT_OUTPUT, 792),
+    (structs.GET_GATE_COUNT_OUTPUT, 56),
+    (structs.GET_FEES_OUTPUT, 64),
+    (structs.GET_HEARTBEAT_OUTPUT, 304),
+    (structs.GET_MULTISIG_STATE_OUTPUT, 280),
+    (structs.GET_TIME_LOCK_STATE_OUTPUT, 40),
+    (structs.GET_ADMIN_GATE_OUTPUT, 288),
+    (structs.GET_GATES_BY_OWNER_OUTPUT, 264),
+    (structs.GET_LATEST_EXECUTION_OUTPUT, 32),
+])
+def test_struct_sizes(codec, size):
+    assert codec.size == size
+    assert codec.struct.size == size
+
+
+def test_get_gate_offsets_match_scripts():
+    # The integration scripts historically read these fields at fixed offsets
+    assert structs.GET_GATE_OUTPUT.offsets['owner'] == 8
+    assert structs.GET_GATE_OUTPUT.offsets['totalReceived'] == 40
+    assert structs.GET_GATE_OUTPUT.offsets['ratios'] == 336
+
+
+def test_decode_zero_fills_short_buffer():
+    out = structs.GET_GATE_COUNT_OUTPUT.decode(struct.pack('<QQ', 7, 3))
+    assert out['totalGates'] == 7
+    assert out['activeGates'] == 3
+    assert out['distributedMaintenanceDividends'] == 0
+
+
+def test_encode_rejects_unknown_and_oversized_fields():
+    with pytest.raises(KeyError):
+        structs.GATE_ID_INPUT.encode(gate=1)
+    with pytest.raises(ValueError):
+        structs.CREATE_GATE_INPUT.encode(ratios=[1] * 9)
+
+
+# =============================================
+# Payload builders
+# =============================================
+
+def test_build_create_gate_round_trip():
+    data = build_create_gate(0, [PK_B, PK_C], [60, 40], threshold=5,
+                             chain_next_gate_id=encode_gate_id(3))
+    assert len(data) == structs.CREATE_GATE_INPUT.size
+    fields = structs.CREATE_GATE_INPUT.decode(data)
+    assert fields['recipientCount'] == 2
+    assert fields['recipients'][:3] == [PK_B, PK_C, bytes(32)]
+    assert fields['ratios'][:3] == [60, 40, 0]
+    assert fields['threshold'] == 5
+    assert fields['chainNextGateId'] == encode_gate_id(3)
+    assert fields['recipientGateIds'] == [-1] * 8
+
+
+def test_build_update_gate_has_no_mode():
+    fields = structs.UPDATE_GATE_INPUT.decode(build_update_gate(42, [PK_B], [1]))
+    assert fields['gateId'] == 42
+    assert 'mode' not in fields
+    assert fields['recipientGateIds'] == [-1] * 8
+
+
+def test_build_configure_multisig_uses_uint64_gate_id():
+    gate_id = encode_gate_id(5, generation=70000)
+    fields = structs.CONFIGURE_MULTISIG_INPUT.decode(
+        build_configure_multisig(gate_id, [PK_B, PK_C], 2, 4))
+    assert fields['gateId'] == gate_id
+    assert fields['guardianCount'] == 2
+    assert fields['adminApprovalWindowEpochs'] == 1
+
+
+def test_build_withdraw_reserve():
+    assert build_withdraw_reserve(9, 100) == struct.pack('<QQ', 9, 100)
+
+
+def test_gate_id_round_trip():
+    gate_id = encode_gate_id(1234, generation=7)
+    assert gate_slot(gate_id) == 1234
+    assert gate_generation(gate_id) == 7
+    assert gate_generation(0) == -1
+
+
+# =============================================
+# Client
+# =============================================
+
+def test_query_request_shape():
+    session = FakeSession(contract_reply(struct.pack('<QQ', 4, 2)))
+    client = QuGateClient("http://node:41841/", session=session)
+    count = client.get_gate_count()
+    assert (count['totalGates'], count['activeGates']) == (4, 2)
+    method, url, kwargs = session.calls[0]
+    assert method == 'POST'
+    assert url == "http://node:41841/live/v1/querySmartContract"
+    assert kwargs['json'] == {'contractIndex': 25, 'inputType': 6,
+                              'inputSize': 0, 'requestData': ''}
+
+
+def test_get_gate_decodes_fields():
+    gate = structs.GET_GATE_OUTPUT.encode(mode=2, recipientCount=2, active=1, owner=PK_B,
+                                          totalReceived=900, ratios=[50, 50],
+                                          chainNextGateId=-1)
+    session = FakeSession(contract_reply(gate))
+    client = QuGateClient(session=session)
+    out = client.get_gate(encode_gate_id(0))
+    assert out['mode'] == 2
+    assert out['owner'] == PK_B
+    assert out['totalReceived'] == 900
+    assert out['ratios'][:2] == [50, 50]
+    assert out['chainNextGateId'] == -1
+    sent = base64.b64decode(session.calls[0][2]['json']['requestData'])
+    assert struct.unpack('<Q', sent)[0] == encode_gate_id(0)
+
+
+def test_get_gate_batch_splits_entries():
+    size = structs.GET_GATE_OUTPUT.size
+    out = structs.GET_GATE_OUTPUT.encode(active=1, currentBalance=5) + \
+        structs.GET_GATE_OUTPUT.encode(active=0)
+    session = FakeSession(contract_reply(out.ljust(32 * size, b'\0')))
+    client = QuGateClient(session=session)
+    gates = client.get_gate_batch([encode_gate_id(0), encode_gate_id(1)])
+    assert [g['active'] for g in gates] == [1, 0]
+    assert gates[0]['currentBalance'] == 5
+    with pytest.raises(ValueError):
+        client.get_gate_batch(range(33))
+
+
+def test_get_gates_by_owner_truncates_to_count():
+    out = structs.GET_GATES_BY_OWNER_OUTPUT.encode(gateIds=[11, 12, 13], count=2)
+    client = QuGateClient(session=FakeSession(contract_reply(out)))
+    assert client.get_gates_by_owner(PK_B) == [11, 12]
+
+
+def test_get_balance():
+    session = FakeSession({'balance': {'id': 'X', 'balance': '4200', 'validForTick': 9}}, {})
+    client = QuGateClient(session=session)
+    assert client.get_balance('X') == 4200
+    assert session.calls[0][1].endswith('/live/v1/balances/X')
+    with pytest.raises(RpcError):
+        client.get_balance('X')
+
+
+def test_tick_data():
+    session = FakeSession({'tickData': {'tickNumber': 7, 'transactionHashes': ['abc']}},
+                          {'tickData': None})
+    client = QuGateClient(session=session)
+    assert client.tick_data(7)['transactionHashes'] == ['abc']
+    assert client.tick_data(8) is None
+    method, url, kwargs = session.calls[0]
+    assert (method, kwargs['json']) == ('POST', {'tickNumber': 7})
+    assert url.endswith('/query/v1/getTickData')
+
+
+def test_retries_then_succeeds():
+    session = FakeSession(requests.ConnectionError("down"), {'tick': 99})
+    client = QuGateClient(session=session, retries=2, retry_delay=0)
+    assert client.get_tick() == 99
+    assert len(session.calls) == 2
+
+
+def test_retries_exhausted_raises_rpc_error():
+    session = FakeSession(*[requests.Timeout("slow")] * 3)
+    client = QuGateClient(session=session, retries=2, retry_delay=0)
+    with pytest.raises(RpcError):
+        client.tick_info()
+    assert len(session.calls) == 3
+
+
+def test_context_manager_closes_session():
+    session = FakeSession()
+    with QuGateClient(session=session):
+        pass
+    assert session.closed
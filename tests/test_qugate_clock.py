@@ -0,0 +1,109 @@
+"""Offline unit tests for the adaptive tick clock."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import RpcError, TickClock  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+
+class SimulatedNode:
+    """Tick advances every *period* seconds of wall time; counts get_tick calls."""
+
+    def __init__(self, period=0.05, start=1000):
+        self.period = period
+        self.start = start
+        self.t0 = time.monotonic()
+        self.calls = 0
+        self.down = False
+        self.lock = threading.Lock()
+
+    def get_tick(self):
+        with self.lock:
+            self.calls += 1
+        if self.down:
+            raise RpcError("node down") if self.down is True else self.down
+        return self.start + int((time.monotonic() - self.t0) / self.period)
+
+
+def test_learns_tick_rate():
+    node = SimulatedNode(period=0.05)
+    clock = TickClock(node, seconds_per_tick=0.5, min_poll=0.01, max_poll=0.1)
+    assert clock.wait_ticks(20, timeout=5)
+    assert 0.03 < clock.seconds_per_tick < 0.1
+
+
+def test_wait_does_not_oversleep_or_hammer():
+    node = SimulatedNode(period=0.05)
+    clock = TickClock(node, seconds_per_tick=0.05, min_poll=0.01, max_poll=1.0)
+    start = clock.refresh()
+    began = time.monotonic()
+    assert clock.wait_until(start + 10, timeout=5)
+    elapsed = time.monotonic() - began
+    assert elapsed < 10 * 0.05 + 0.2
+    assert node.calls < 40               # a fixed 10 ms poll would take ~50
+
+
+def test_waiters_share_one_poller():
+    node = SimulatedNode(period=0.05)
+    clock = TickClock(node, seconds_per_tick=0.05, min_poll=0.02, max_poll=0.2)
+    start = clock.refresh()
+    results = []
+    threads = [threading.Thread(target=lambda k=k: results.append(clock.wait_until(start + 4 + k % 3,
+                                                                                   timeout=5)))
+               for k in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [True] * 12
+    assert node.calls < 30
+    assert clock._targets == []
+
+
+def test_reached_target_returns_immediately():
+    node = SimulatedNode(period=10)
+    clock = TickClock(node)
+    tick = clock.refresh()
+    calls = node.calls
+    assert clock.wait_until(tick, timeout=0)
+    assert clock.wait_until(tick - 5, timeout=0)
+    assert node.calls == calls
+
+
+def test_timeout_and_node_errors():
+    node = SimulatedNode(period=10)
+    node.down = True
+    clock = TickClock(node, min_poll=0.01, max_poll=0.05)
+    assert not clock.wait_until(5000, timeout=0.2)
+    assert clock.errors >= 1
+    node.down = False
+    assert clock.current() >= 1000
+
+
+def test_poller_survives_malformed_replies():
+    node = SimulatedNode(period=0.02)
+    node.down = KeyError('tick')
+    clock = TickClock(node, seconds_per_tick=0.02, min_poll=0.01, max_poll=0.05)
+    threading.Timer(0.15, setattr, (node, 'down', False)).start()
+    assert clock.wait_until(node.start + 10, timeout=5)
+    assert clock.errors >= 1 and isinstance(clock.last_error, KeyError)
+
+
+def test_wait_for_rechecks_each_tick():
+    node = SimulatedNode(period=0.03)
+    clock = TickClock(node, seconds_per_tick=0.03, min_poll=0.01, max_poll=0.1)
+    checks = []
+
+    def ready():
+        checks.append(clock.tick)
+        return len(checks) >= 4
+
+    assert clock.wait_for(ready, timeout=5)
+    assert len(set(checks[1:])) == 3     # one check per new tick
+    assert not clock.wait_for(lambda: False, timeout=0.1)
@@ -0,0 +1,162 @@
+"""Offline unit tests for the getGateBySlot crawler and its columnar snapshot."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    GateIdPredictor,
+    GateTable,
+    QuGateClient,
+    SlotCrawler,
+    build_close_gate,
+    build_create_gate,
+    build_send_to_gate,
+    encode_gate_id,
+)
+from qugate.constants import (  # noqa: E402
+    MODE_RANDOM,
+    MODE_ROUND_ROBIN,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    PROC_CLOSE_GATE,
+    PROC_CREATE_GATE,
+    PROC_SEND_TO_GATE,
+)
+
+pytestmark = pytest.mark.offline
+
+OWNER = bytes([0xA0]) * 32
+PK_B = bytes([0xB0]) * 32
+PK_C = bytes([0xC0]) * 32
+
+
+class Client(QuGateClient):
+    """QuGateClient on a ContractSimulator that logs the crawler's reads."""
+
+    def __init__(self, sim):
+        super().__init__(session=sim.session(), retries=0)
+        self.calls = []
+
+    def get_gate_by_slot(self, slot):
+        self.calls.append(('slot', slot))
+        return super().get_gate_by_slot(slot)
+
+    def get_gates(self, gate_ids, workers=None):
+        self.calls.append(('batch', tuple(gate_ids)))
+        return super().get_gates(gate_ids, workers)
+
+    def reads(self):
+        reads = sorted(slot for kind, slot in self.calls if kind == 'slot')
+        self.calls.clear()
+        return reads
+
+
+def create(sim, mode=MODE_SPLIT, recipients=(PK_B,), ratios=(100,), threshold=0):
+    return sim.invoke(OWNER, PROC_CREATE_GATE, 100000,
+                      build_create_gate(mode, list(recipients), list(ratios),
+                                        threshold=threshold))['gateId']
+
+
+def make_state():
+    """Slot 0 a live SPLIT, slot 1 closed (generation 1), slot 2 a live ROUND_ROBIN."""
+    sim = ContractSimulator(epoch=100)
+    sim.fund(OWNER, 10 ** 9)
+    create(sim)
+    closed = create(sim, MODE_THRESHOLD, threshold=5000)
+    create(sim, MODE_ROUND_ROBIN, recipients=(PK_B, PK_C), ratios=(1, 1))
+    sim.invoke(OWNER, PROC_CLOSE_GATE, 0, build_close_gate(closed))
+    return sim, Client(sim)
+
+
+def test_crawl_builds_columns():
+    sim, client = make_state()
+    table = SlotCrawler(client).crawl()
+    assert len(table) == 3
+    assert table.active_slots() == [0, 2]
+    assert table.free_slots() == [1]
+    assert [table.columns['mode'][slot] for slot in (0, 2)] == [MODE_SPLIT, MODE_ROUND_ROBIN]
+    row = table.row(0)
+    assert row['recipients'][:2] == [PK_B, bytes(32)]
+    assert row['ratios'][0] == 100
+    assert row['owner'] == OWNER
+    assert table.row(1)['gateId'] == encode_gate_id(1, 0)    # the last occupant's ID
+    assert table.epoch == 100
+
+
+def test_save_and_load_round_trip(tmp_path):
+    sim, client = make_state()
+    table = SlotCrawler(client).crawl()
+    path = tmp_path / 'gates.snapshot'
+    table.save(path)
+    loaded = GateTable.load(path)
+    assert (loaded.epoch, len(loaded)) == (100, 3)
+    assert [loaded.row(s) for s in range(3)] == [table.row(s) for s in range(3)]
+
+
+def test_refresh_rereads_only_moved_and_new_slots():
+    sim, client = make_state()
+    crawler = SlotCrawler(client)
+    table = crawler.crawl()
+    client.reads()
+    assert crawler.refresh(table) == {}
+    assert client.reads() == []
+
+    sim.advance(10)
+    sim.invoke(OWNER, PROC_SEND_TO_GATE, 5000, build_send_to_gate(table.row(2)['gateId']))
+    reused, new = create(sim, MODE_RANDOM), create(sim)
+    assert [reused & 0xFFFFF, new & 0xFFFFF] == [1, 3]
+    changes = crawler.refresh(table)
+    assert client.reads() == [1, 2, 3]
+    assert changes[2]['totalReceived'] == (0, 5000)
+    assert changes[2]['totalForwarded'] == (0, 5000)
+    assert changes[1]['gateId'] == (encode_gate_id(1, 0), reused)
+    assert changes[3]['mode'] == (None, MODE_SPLIT)
+    assert table.observed[2] == sim.tick
+
+
+def test_refresh_skips_never_executed_gates():
+    sim = ContractSimulator(epoch=100)
+    sim.fund(OWNER, 10 ** 9)
+    for _ in range(10):
+        create(sim)
+    client = Client(sim)
+    crawler = SlotCrawler(client)
+    table = crawler.crawl()
+    for _ in range(3):
+        client.reads()
+        assert crawler.refresh(table) == {}
+        assert sum(1 for kind, _ in client.calls if kind == 'batch') == 1   # one 32-ID check
+        assert client.reads() == []
+    assert crawler.reads == 10
+
+
+def test_refresh_detects_close_and_reuse():
+    sim, client = make_state()
+    crawler = SlotCrawler(client)
+    table = crawler.crawl()
+    reused = create(sim, MODE_RANDOM)                        # free slot 1 handed out again
+    sim.invoke(OWNER, PROC_CLOSE_GATE, 0, build_close_gate(table.row(0)['gateId']))
+    client.reads()
+    changes = crawler.refresh(table)
+    assert client.reads() == [0, 1]
+    assert changes[0]['active'] == (1, 0)
+    assert changes[1]['gateId'] == (encode_gate_id(1, 0), reused)
+    assert reused == encode_gate_id(1, 1)
+    assert table.active_slots() == [1, 2]
+    predictor = GateIdPredictor.from_slots(table.row(s) for s in range(len(table)))
+    assert predictor.next_id() == encode_gate_id(0, 1)
+    assert create(sim) == predictor.next_id()
+
+
+def test_new_epoch_rereads_everything():
+    sim, client = make_state()
+    crawler = SlotCrawler(client)
+    table = crawler.crawl()
+    sim.end_epoch()
+    client.reads()
+    crawler.refresh(table)
+    assert client.reads() == [0, 1, 2]
+    assert table.epoch == 101
@@ -0,0 +1,76 @@
+"""Offline unit tests for the QuGateLogger event indexer."""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import EventIndex, decode_events, encode_gate_id, read_entries, structs  # noqa: E402
+from qugate import constants  # noqa: E402
+from qugate.events import ENTRY_HEADER, LOGGER_SIZE  # noqa: E402
+from qugate.header import parse_constants  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+QUGATE_H = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "QuGate.h")
+SENDER_A = bytes([0xA0]) * 32
+SENDER_B = bytes([0xB0]) * 32
+GATE = encode_gate_id(3)
+
+
+def entry(log_id, tick, log_type, gate_id, sender, amount, message_type=6, contract=25):
+    content = structs.QUGATE_LOGGER.encode(_contractIndex=contract, _type=log_type,
+                                           gateId=gate_id, sender=sender,
+                                           amount=amount)[:LOGGER_SIZE]
+    word = len(content) | message_type << 24
+    return ENTRY_HEADER.pack(150, tick, word, log_id, 0) + content
+
+
+def recording():
+    return b''.join([
+        entry(1, 1000, constants.LOG_GATE_CREATED, GATE, SENDER_A, 1000),
+        entry(2, 1001, constants.LOG_PAYMENT_FORWARDED, GATE, SENDER_B, 5000),
+        entry(3, 1001, 0, 0, bytes(32), 0, message_type=0),          # a core transfer
+        entry(4, 1002, constants.LOG_PAYMENT_FORWARDED, 99, SENDER_B, 7, contract=24),
+        entry(5, 1003, constants.LOG_FAIL_UNAUTHORIZED, GATE, SENDER_B, 0, message_type=5),
+    ])
+
+
+def test_log_types_match_header():
+    with open(QUGATE_H, encoding="utf-8") as f:
+        header = parse_constants(f.read())
+    ours = {name: value for name, value in vars(constants).items() if name.startswith('LOG_')
+            and name != 'LOG_TYPE_NAMES'}
+    assert ours == {name[len('QUGATE_'):]: value for name, value in header.items()
+                    if name.startswith('QUGATE_LOG_')}
+
+
+def test_decode_keeps_only_qugate_contract_messages():
+    events = list(decode_events(read_entries(io.BytesIO(recording()))))
+    assert [e['logId'] for e in events] == [1, 2, 5]
+    assert events[1]['_type'] == constants.LOG_PAYMENT_FORWARDED
+    assert (events[1]['gateId'], events[1]['sender'], events[1]['amount']) == (GATE, SENDER_B, 5000)
+    assert (events[2]['level'], events[2]['tick'], events[2]['epoch']) == ('warning', 1003, 150)
+
+
+def test_truncated_stream_stops_cleanly():
+    data = recording()
+    assert len(list(read_entries(io.BytesIO(data[:-10])))) == 4
+
+
+def test_index_queries_and_dedupes(tmp_path):
+    path = tmp_path / 'events.db'
+    with EventIndex(str(path)) as index:
+        assert index.ingest(decode_events(read_entries(io.BytesIO(recording()))), batch=2) == 3
+        assert index.ingest(decode_events(read_entries(io.BytesIO(recording())))) == 0
+        assert len(index) == 3
+        assert index.last_tick() == 1003
+    with EventIndex(str(path)) as index:
+        history = index.gate_history(GATE)
+        assert [e['_type'] for e in history] == [constants.LOG_GATE_CREATED,
+                                                 constants.LOG_PAYMENT_FORWARDED,
+                                                 constants.LOG_FAIL_UNAUTHORIZED]
+        assert [e['logId'] for e in index.gate_history(GATE, since=1001, until=1002)] == [2]
+        assert [e['amount'] for e in index.sender_history(SENDER_B)] == [5000, 0]
+        assert index.sender_history(bytes(32)) == []
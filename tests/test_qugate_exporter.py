@@ -0,0 +1,151 @@
+"""Offline unit tests for the Prometheus exporter."""
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    InclusionTracker,
+    MetricsExporter,
+    QuGateClient,
+    TxHandle,
+    build_close_gate,
+    build_create_gate,
+    build_send_to_gate,
+    encode_gate_id,
+)
+from qugate.constants import PROC_CLOSE_GATE, PROC_CREATE_GATE, PROC_SEND_TO_GATE  # noqa: E402
+from qugate.inclusion import INCLUDED  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+OWNER = bytes([0xA0]) * 32
+PAYEE = bytes([0xB0]) * 32
+SOURCE = "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"
+
+
+class Client(QuGateClient):
+    """QuGateClient on a ContractSimulator that counts getGateBySlot and getGateBatch calls."""
+
+    def __init__(self, sim):
+        super().__init__(session=sim.session(), retries=0)
+        self.slot_reads = 0
+        self.batches = []
+
+    def get_gate_by_slot(self, slot):
+        self.slot_reads += 1
+        return super().get_gate_by_slot(slot)
+
+    def get_gate_batch(self, gate_ids):
+        self.batches.append(len(gate_ids))          # list.append: safe across the pool
+        return super().get_gate_batch(gate_ids)
+
+
+def contract(n):
+    """*n* gates cycling through SPLIT, ROUND_ROBIN and THRESHOLD."""
+    sim = ContractSimulator(epoch=120)
+    sim.fund(OWNER, 10 ** 9)
+    gate_ids = [sim.invoke(OWNER, PROC_CREATE_GATE, 100000,
+                           build_create_gate(slot % 3, [PAYEE], [1],
+                                             threshold=10 ** 6))['gateId']
+                for slot in range(n)]
+    return sim, Client(sim), gate_ids
+
+
+def close(sim, gate_id):
+    sim.invoke(OWNER, PROC_CLOSE_GATE, 0, build_close_gate(gate_id))
+
+
+def test_one_batched_cycle_per_scrape():
+    sim, client, gate_ids = contract(70)
+    exporter = MetricsExporter(client)
+    exporter.scrape()
+    assert (client.slot_reads, len(client.batches)) == (0, 3)
+    exporter.scrape()
+    assert (client.slot_reads, len(client.batches)) == (0, 6)
+    close(sim, gate_ids[6])
+    close(sim, gate_ids[5])
+    exporter.scrape()
+    assert len(exporter.last['gates']) == 68 and len(client.batches) == 9
+    reused = sim.invoke(OWNER, PROC_CREATE_GATE, 100000,
+                        build_create_gate(0, [PAYEE], [1]))['gateId']
+    assert reused == encode_gate_id(5, 1)          # slot 5 taken by a new gate
+    state = exporter.scrape()
+    assert reused in state['gates']
+    assert exporter.directory.gate_ids[5] == reused
+    assert client.slot_reads == 0
+
+
+def test_closed_slots_are_skipped_between_count_changes():
+    sim, client, gate_ids = contract(40)
+    exporter = MetricsExporter(client)
+    exporter.scrape()
+    for gate_id in gate_ids[10:]:
+        close(sim, gate_id)
+    exporter.scrape()
+    client.batches.clear()
+    for _ in range(3):
+        assert len(exporter.scrape()['gates']) == 10
+    assert (client.batches, client.slot_reads) == ([10] * 3, 0)   # one 10-ID batch per scrape
+
+
+def test_render_prometheus_text():
+    sim, client, gate_ids = contract(2)
+    sim.fund(PAYEE, 1000)
+    sim.invoke(PAYEE, PROC_SEND_TO_GATE, 1000, build_send_to_gate(gate_ids[1]))
+    endpoint = '/live/v1/querySmartContract'
+    client.metrics.observe(endpoint, 3.0, ok=False)
+    client.metrics.retry(endpoint)
+    burned = client.get_gate_count()['totalBurned']
+    assert burned > 0
+    exporter = MetricsExporter(client)
+    exporter.scrape()
+    text = exporter.render()
+    lines = text.splitlines()
+    assert '# TYPE qugate_burned_total counter' in lines
+    assert f'qugate_burned_total {burned}' in lines
+    assert f'qugate_fee{{field="idleFee"}} {sim.idle_fee}' in lines
+    assert f'qugate_gate_received_total{{gate_id="{gate_ids[1]}",mode="ROUND_ROBIN"}} 1000' \
+        in lines
+    label = f'endpoint="{endpoint}"'
+    calls = client.metrics.snapshot()[endpoint]['requests']
+    assert f'qugate_rpc_retries_total{{{label}}} 1' in lines
+    assert f'qugate_rpc_failures_total{{{label}}} 1' in lines
+    assert f'qugate_rpc_latency_seconds_bucket{{{label},le="+Inf"}} {calls}' in lines
+    assert f'qugate_rpc_latency_seconds_count{{{label}}} {calls}' in lines
+    assert text.endswith('\n') and 'qugate_tx_' not in text
+
+
+class Clock:
+    def current(self):
+        return 200
+
+
+class TickData:
+    def tick_data(self, tick):
+        return {'tickNumber': tick, 'transactionHashes': ['a' * 60]}
+
+
+def test_tracker_metrics_and_http_endpoint():
+    tracker = InclusionTracker(TickData(), Clock())
+    tracker.track(TxHandle('a' * 60, 150, SOURCE))
+    tracker.track(TxHandle('b' * 60, 150, SOURCE))
+    tracker.track(TxHandle('c' * 60, 250, SOURCE))
+    tracker.poll()
+    assert tracker.status(TxHandle('a' * 60, 150, SOURCE)) == INCLUDED
+    exporter = MetricsExporter(contract(1)[1], interval=60, tracker=tracker)
+    port = exporter.serve(port=0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as reply:
+            assert reply.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            lines = reply.read().decode().splitlines()
+    finally:
+        exporter.stop()
+    assert 'qugate_tx_resolved_total{status="included"} 1' in lines
+    assert 'qugate_tx_resolved_total{status="dropped"} 1' in lines
+    assert 'qugate_tx_pending 1' in lines
+    assert 'qugate_tx_inclusion_seconds_bucket{le="2.0"} 1' in lines
+    assert '# TYPE qugate_scrapes_total counter' in lines
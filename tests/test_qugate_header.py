@@ -0,0 +1,94 @@
+"""Offline unit tests for the QuGate.h layout parser and generated codecs."""
+import os
+import struct
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+from qugate import structs  # noqa: E402
+from qugate.header import (  # noqa: E402
+    codecs,
+    constant_name,
+    parse_constants,
+    parse_header,
+    parse_registrations,
+    public_structs,
+)
+import gen_structs  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+with open(os.path.join(ROOT, "QuGate.h"), encoding="utf-8") as f:
+    HEADER = f.read()
+CONSTANTS, STRUCTS = parse_header(HEADER)
+
+
+def test_structs_py_matches_header():
+    with open(gen_structs.STRUCTS_PY, encoding="utf-8") as f:
+        current = f.read()
+    assert gen_structs.render(HEADER, current) == current, \
+        "qugate/structs.py is stale: run python3 scripts/gen_structs.py"
+
+
+def test_constants():
+    assert CONSTANTS['QUGATE_MAX_GATES'] == 2048
+    assert CONSTANTS['QUGATE_GATE_ID_SLOT_MASK'] == 0xFFFFF
+    assert CONSTANTS['QUGATE_CHAIN_HOP_FEE'] == 1000
+    assert CONSTANTS['QUGATE_INVALID_GATE_ID'] == -1
+    assert parse_constants("constexpr uint64 A = 4 * X_MULTIPLIER;", {'X_MULTIPLIER': 3}) == {'A': 12}
+
+
+def test_registrations_cover_every_entry_point():
+    registered = parse_registrations(HEADER)
+    assert ('function', 'getGateBatch', 8) in registered
+    assert ('procedure', 'createGate', 1) in registered
+    names = public_structs(HEADER, STRUCTS)
+    for _, name, _ in registered:
+        assert f'{name}_input' in names and f'{name}_output' in names
+
+
+def test_skips_structs_with_code():
+    assert 'QUGATE' not in STRUCTS
+    assert STRUCTS['QUGATE2'] == []
+
+
+@pytest.mark.parametrize("name,size", [
+    ('getGate_output', 776),
+    ('getGateBySlot_output', 792),
+    ('createGate_input', 672),
+    ('getGateBatch_output', 32 * 776),
+    ('QuGateLogger', 64),
+])
+def test_parsed_sizes(name, size):
+    assert codecs(STRUCTS, [name])[name].size == size
+
+
+def test_constant_name():
+    assert constant_name('getGateBySlot_output') == 'GET_GATE_BY_SLOT_OUTPUT'
+    assert constant_name('QUGATE_HeartbeatConfig') == 'HEARTBEAT_CONFIG'
+    assert constant_name('QuGateLogger') == 'QUGATE_LOGGER'
+
+
+def test_nested_array_round_trip():
+    gates = [{'active': 1, 'currentBalance': 5}, {'mode': 3, 'ratios': [1, 2]}]
+    data = structs.GET_GATE_BATCH_OUTPUT.encode(gates=gates)
+    assert len(data) == structs.GET_GATE_BATCH_OUTPUT.size
+    out = structs.GET_GATE_BATCH_OUTPUT.decode(data)['gates']
+    assert len(out) == 32
+    assert out[0]['currentBalance'] == 5 and out[1]['mode'] == 3
+    assert out[1]['ratios'][:3] == [1, 2, 0]
+    assert out[2] == structs.GET_GATE_OUTPUT.decode(bytes(776))
+
+
+def test_decode_many_matches_decode():
+    one = structs.GET_GATE_OUTPUT.encode(active=1, totalReceived=9, owner=b'\x01' * 32)
+    two = structs.GET_GATE_OUTPUT.encode(chainNextGateId=-1)
+    data = bytearray(one + two)
+    gates = structs.GET_GATE_OUTPUT.decode_many(data)
+    assert gates == [structs.GET_GATE_OUTPUT.decode(one), structs.GET_GATE_OUTPUT.decode(two)]
+    assert struct.unpack_from('<Q', data, 40)[0] == gates[0]['totalReceived']
+    padded = structs.GET_GATE_OUTPUT.decode_many(one + two[:100], 3)
+    assert padded[1]['chainNextGateId'] == 0 and padded[2]['active'] == 0
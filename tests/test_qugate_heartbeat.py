@@ -0,0 +1,165 @@
+"""Offline unit tests for the HEARTBEAT payout projection."""
+import os
+import random
+import sys
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    QuGateClient,
+    build_configure_heartbeat,
+    build_create_gate,
+    build_send_to_gate,
+)
+from qugate.constants import (  # noqa: E402
+    MODE_HEARTBEAT,
+    PROC_CONFIGURE_HEARTBEAT,
+    PROC_CREATE_GATE,
+    PROC_SEND_TO_GATE,
+)
+from qugate.heartbeat import (  # noqa: E402
+    end_epoch,
+    heartbeat_schedule,
+    heartbeat_state,
+    heartbeat_state_from,
+    project_heartbeats,
+)
+
+pytestmark = pytest.mark.offline
+
+
+def scalar_gate(balance, threshold, last, pct, minimum, shares, count, epoch):
+    """END_EPOCH's heartbeat branch for one gate, epoch by epoch, until it closes."""
+    triggered, trigger_epoch = False, 0
+    paid = [0] * 8
+    while True:
+        if not triggered:
+            if epoch - last > threshold:
+                triggered, trigger_epoch = True, epoch
+            epoch += 1
+            continue
+        if balance <= minimum:
+            return trigger_epoch, 0, paid           # never paid, never closed
+        payout = balance * pct // 100 or balance
+        prior = 0
+        for j in range(count):
+            share = payout - prior if j == count - 1 else payout * shares[j] // 100
+            prior += share
+            paid[j] += share
+        balance -= payout
+        if balance <= minimum:
+            prior = 0
+            for j in range(count):
+                share = balance - prior if j == count - 1 else balance * shares[j] // 100
+                prior += share
+                paid[j] += share
+            return trigger_epoch, epoch, paid
+        epoch += 1
+
+
+def random_shares(rng, count):
+    cuts = sorted(rng.sample(range(1, 100), count - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [100])] + [0] * (8 - count)
+
+
+def test_matches_end_epoch_arithmetic():
+    rng = random.Random(18)
+    rows = []
+    for _ in range(300):
+        count = rng.randint(1, 8)
+        rows.append((rng.choice([0, 1, 999, rng.randint(1, 10 ** 13)]), rng.randint(1, 5),
+                     rng.randint(90, 100), rng.randint(1, 100),
+                     rng.choice([0, 10000, rng.randint(0, 10 ** 6)]),
+                     random_shares(rng, count), count))
+    balance, threshold, last, pct, minimum, shares, count = map(list, zip(*rows))
+    state = project_heartbeats(
+        heartbeat_state(balance, threshold, last, pct, minimum, shares, count), epoch=100)
+    for i, row in enumerate(rows):
+        trigger_epoch, close_epoch, paid = scalar_gate(*row, epoch=100)
+        assert state['triggerEpoch'][i] == trigger_epoch
+        assert state['closeEpoch'][i] == close_epoch
+        assert state['paid'][i].tolist() == paid
+    closed = state['closeEpoch'] > 0
+    assert (~closed).any() and closed.any()
+    assert (state['paid'].sum(axis=1) + state['currentBalance']
+            == np.array(balance, dtype=np.uint64)).all()
+    assert not state['currentBalance'][closed].any()
+    assert not state['paid'][~closed].any()
+
+
+def test_integration_scenario_schedule():
+    """test_heartbeat.py's gate: threshold 2, 50% per epoch, 10000 minimum, 60/40."""
+    config = {'thresholdEpochs': 2, 'lastHeartbeatEpoch': 200, 'payoutPercentPerEpoch': 50,
+              'minimumBalance': 10000, 'beneficiaryShares': [60, 40] + [0] * 6,
+              'beneficiaryCount': 2, 'triggered': 0, 'triggerEpoch': 0}
+    gate = {'currentBalance': 100000, 'chainNextGateId': -1}
+    state = heartbeat_state_from([config], [gate])
+    schedule = [(epoch, paid[0, :2].tolist()) for epoch, paid in heartbeat_schedule(state, 200)]
+    assert schedule == [(203, [0, 0]), (204, [30000, 20000]), (205, [15000, 10000]),
+                        (206, [7500, 5000]), (207, [3750 + 3750, 2500 + 2500])]
+    assert (state['triggerEpoch'][0], state['closeEpoch'][0]) == (203, 207)
+    assert state['paid'][0, :2].tolist() == [60000, 40000]
+
+
+def test_chain_only_refund_and_stuck_gates():
+    state = heartbeat_state(
+        balance=[1000, 500, 0], threshold_epochs=1, last_heartbeat_epoch=10, payout_percent=10,
+        minimum_balance=[100, 1000, -1], shares=[[0] * 8, [100] + [0] * 7, [100] + [0] * 7],
+        beneficiary_count=[0, 1, 1], chained=[True, False, False])
+    project_heartbeats(state, epoch=10)
+    assert state['chainedOut'][0] + state['refunded'][0] == 1000
+    assert 0 < state['refunded'][0] <= 100              # the rest goes back to the owner
+    assert not state['paid'][0].any() and state['closeEpoch'][0] > 13
+    # at or below its minimum when triggered: END_EPOCH skips it for good
+    assert state['triggerEpoch'][1] == 12 and not state['paid'][1].any()
+    assert state['closeEpoch'][1] == 0 and state['currentBalance'][1] == 500
+    assert state['closeEpoch'][2] == 0                  # nothing to pay, never closes
+
+
+def test_agrees_with_the_simulator_below_and_above_minimum():
+    owner = bytes([0xA0]) * 32
+    sim = ContractSimulator(epoch=100)
+    sim.fund(owner, 10 ** 9)
+    client = QuGateClient(session=sim.session(), retries=0)
+    gate_ids, heirs = [], []
+    # (deposit, minimum): below, at and above the minimum when the gate triggers
+    for k, (deposit, minimum) in enumerate([(5000, 10000), (10000, 10000), (100000, 10000)]):
+        pair = [bytes([0x10 + 2 * k]) * 32, bytes([0x11 + 2 * k]) * 32]
+        gate_id = sim.invoke(owner, PROC_CREATE_GATE, 100000 + 10 ** 6,
+                             build_create_gate(MODE_HEARTBEAT, [], []))['gateId']
+        sim.invoke(owner, PROC_CONFIGURE_HEARTBEAT, 200000,
+                   build_configure_heartbeat(gate_id, 2, 50, minimum, pair, [60, 40]))
+        sim.invoke(owner, PROC_SEND_TO_GATE, deposit, build_send_to_gate(gate_id))
+        gate_ids.append(gate_id)
+        heirs.append(pair)
+    state = heartbeat_state_from([client.get_heartbeat(g) for g in gate_ids],
+                                 [client.get_gate(g) for g in gate_ids])
+    for _ in range(10):
+        end_epoch(state, sim.epoch)
+        sim.end_epoch()
+        gates = [client.get_gate(g) for g in gate_ids]
+        assert [g['active'] for g in gates] == (state['closeEpoch'] == 0).astype(int).tolist()
+        assert [g['currentBalance'] for g in gates] == state['currentBalance'].tolist()
+        assert [[sim.balance(pk) for pk in pair] for pair in heirs] == \
+            state['paid'][:, :2].tolist()
+    assert state['closeEpoch'].tolist()[:2] == [0, 0] and state['closeEpoch'][2] > 0
+    assert state['currentBalance'].tolist()[:2] == [5000, 10000]
+
+
+def test_thousands_of_gates_project_quickly():
+    rng = np.random.default_rng(3)
+    n = 5000
+    state = heartbeat_state(
+        balance=rng.integers(1, 10 ** 12, n), threshold_epochs=rng.integers(1, 50, n),
+        last_heartbeat_epoch=rng.integers(100, 120, n), payout_percent=rng.integers(5, 101, n),
+        minimum_balance=rng.integers(0, 10 ** 6, n), shares=[[50, 30, 20] + [0] * 5],
+        beneficiary_count=3)
+    start = time.perf_counter()
+    project_heartbeats(state, epoch=120)
+    assert time.perf_counter() - start < 5.0
+    assert (state['closeEpoch'] > 0).all()
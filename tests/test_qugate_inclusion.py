@@ -0,0 +1,148 @@
+"""Offline unit tests for the transaction inclusion tracker."""
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import Backoff, InclusionTracker, RpcError, TxHandle  # noqa: E402
+from qugate.inclusion import DROPPED, INCLUDED, PENDING, UNVERIFIED  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+SOURCE = "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"
+
+
+class ManualClock:
+    """Tick advances only when someone waits for it."""
+
+    def __init__(self, tick):
+        self.tick = tick
+        self.waits = []
+
+    def current(self):
+        return self.tick
+
+    def wait_until(self, target, timeout=None):
+        self.waits.append(target)
+        self.tick = max(self.tick, target)
+        return True
+
+
+class TickDataNode:
+    def __init__(self, ticks):
+        self.ticks = ticks          # {tick: [tx hashes]}, missing = no tick data
+        self.calls = []
+        self.fail = []              # HTTP statuses the next calls fail with
+
+    def tick_data(self, tick):
+        self.calls.append(tick)
+        if self.fail:
+            status = self.fail.pop(0)
+            response = requests.Response()
+            response.status_code = status
+            raise RpcError(f"{status}") from requests.HTTPError(response=response)
+        if tick not in self.ticks:
+            return None
+        return {'tickNumber': tick, 'transactionHashes': self.ticks[tick]}
+
+
+def handle(name, tick):
+    return TxHandle(name * 60, tick, SOURCE)
+
+
+def test_included_and_dropped_resolve_after_target_tick():
+    a, b = handle('a', 110), handle('b', 110)
+    node = TickDataNode({110: [str(a)]})
+    clock = ManualClock(100)
+    tracker = InclusionTracker(node, clock)
+    tracker.track(a)
+    tracker.track(b)
+    assert tracker.pending == [a, b]
+    assert tracker.wait(a) == INCLUDED
+    assert clock.waits == [111]
+    assert tracker.status(b) == DROPPED       # same tick: resolved by the same read
+    assert node.calls == [110]
+    assert tracker.pending == []
+
+
+def test_settle_returns_only_missed_handles():
+    a, b, c = handle('a', 105), handle('b', 107), handle('c', 107)
+    node = TickDataNode({105: [str(a)], 107: [str(c).upper()]})
+    tracker = InclusionTracker(node, ManualClock(100))
+    for h in (c, a, b):
+        tracker.track(h)
+    assert tracker.settle() == [b]
+    assert tracker.status(c) == INCLUDED
+
+
+def test_empty_tick_counts_as_dropped_after_grace():
+    a = handle('a', 105)
+    node = TickDataNode({})
+    clock = ManualClock(100)
+    tracker = InclusionTracker(node, clock, grace=3)
+    assert tracker.wait(a) == DROPPED
+    assert clock.tick > 105 + 3
+    assert node.calls.count(105) > 1
+
+
+def test_node_without_query_api_resolves_unverified():
+    a, b = handle('a', 105), handle('b', 106)
+    node = TickDataNode({})
+    node.fail = [404]
+    tracker = InclusionTracker(node, ManualClock(100))
+    tracker.track(b)
+    assert tracker.wait(a) == UNVERIFIED
+    assert not tracker.verify
+    assert tracker.settle() == []
+    assert tracker.status(b) == UNVERIFIED
+    assert node.calls == [105]
+
+
+def test_transient_errors_are_retried_not_unverified():
+    a = handle('a', 105)
+    node = TickDataNode({105: [str(a)]})
+    node.fail = [503, 500]
+    tracker = InclusionTracker(node, ManualClock(100), backoff=Backoff(base=0, jitter=False))
+    assert tracker.wait(a) == INCLUDED
+    assert tracker.verify and tracker.errors == 2
+    assert node.calls == [105, 105, 105]
+
+
+def test_failed_read_backs_off_without_disabling_verification():
+    a = handle('a', 105)
+    node = TickDataNode({105: [str(a)]})
+    node.fail = [503]
+    tracker = InclusionTracker(node, ManualClock(110), backoff=Backoff(base=60, jitter=False))
+    tracker.track(a)
+    tracker.poll()
+    tracker.poll()                            # still inside the backoff: no second read
+    assert node.calls == [105] and tracker.status(a) == PENDING and tracker.verify
+    tracker._retry_at = 0.0
+    tracker.poll()
+    assert tracker.status(a) == INCLUDED
+
+
+def test_timeout_leaves_handle_pending():
+    class StuckClock(ManualClock):
+        def wait_until(self, target, timeout=None):
+            return False
+
+    a = handle('a', 105)
+    tracker = InclusionTracker(TickDataNode({105: [str(a)]}), StuckClock(100))
+    assert tracker.wait(a, timeout=0) == PENDING
+    assert tracker.settle(timeout=0) == [a]
+
+
+def test_poll_resolves_processed_ticks_without_waiting():
+    a, b = handle('a', 105), handle('b', 120)
+    node = TickDataNode({105: [str(a)]})
+    clock = ManualClock(110)
+    tracker = InclusionTracker(node, clock)
+    tracker.track(a)
+    tracker.track(b)
+    tracker.poll()
+    assert tracker.status(a) == INCLUDED
+    assert tracker.status(b) == PENDING
+    assert clock.waits == []
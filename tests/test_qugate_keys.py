@@ -0,0 +1,63 @@
+"""Offline unit tests for seed/identity/public-key conversion."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import identity_from_seed, is_valid_identity, public_key_from_identity  # noqa: E402
+from qugate.keys import derive_keys, identity_from_public_key  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+WALLETS = [
+    ("eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv",
+     "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"),
+    ("sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh",
+     "KENGZYMYWOIHSCXMGBIXBGTKZYCCDITKSNBNILSLUFPQPRCUUYENPYUCEXRM"),
+    ("xeejtwxqrrlvacapbujaleejhbrsnnpvviknskemmgdihggpssjjkrg",
+     "FLNRYKSGLGKZQECRCBNCYAWLNHVCWNYAZSISJRAPUANHDGWAIFBYLIADPQLE"),
+]
+
+
+@pytest.mark.parametrize("seed,identity", WALLETS)
+def test_identity_from_seed(seed, identity):
+    assert identity_from_seed(seed) == identity
+
+
+@pytest.mark.parametrize("seed,identity", WALLETS)
+def test_public_key_round_trip(seed, identity):
+    public_key = public_key_from_identity(identity)
+    assert public_key == derive_keys(seed)[2]
+    assert identity_from_public_key(public_key) == identity
+    assert public_key_from_identity(identity.lower()) == public_key
+
+
+def test_bad_checksum_is_rejected():
+    identity = WALLETS[0][1]
+    typo = identity[:-1] + ('A' if identity[-1] != 'A' else 'B')
+    with pytest.raises(ValueError):
+        public_key_from_identity(typo)
+    assert not is_valid_identity(typo)
+    assert public_key_from_identity(typo, verify_checksum=False) == public_key_from_identity(identity)
+
+
+@pytest.mark.parametrize("identity", ["", "A" * 59, "1" * 60, "Z" * 60])
+def test_malformed_identity_is_rejected(identity):
+    assert not is_valid_identity(identity)
+
+
+def test_invalid_seed_is_rejected():
+    with pytest.raises(ValueError):
+        identity_from_seed("A" * 55)
+    with pytest.raises(ValueError):
+        identity_from_seed("a" * 54)
+
+
+def test_derivation_is_cached():
+    seed = WALLETS[1][0]
+    identity_from_seed(seed)
+    hits = derive_keys.cache_info().hits
+    identity_from_seed.cache_clear()
+    identity_from_seed(seed)
+    assert derive_keys.cache_info().hits == hits + 1
@@ -0,0 +1,114 @@
+"""Offline unit tests for the idle-maintenance forecaster."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    MaintenanceForecaster,
+    QuGateClient,
+    build_configure_heartbeat,
+    build_create_gate,
+    constants,
+    encode_gate_id,
+)
+from qugate.constants import (  # noqa: E402
+    MODE_HEARTBEAT,
+    MODE_MULTISIG,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    PROC_CONFIGURE_HEARTBEAT,
+    PROC_CREATE_GATE,
+)
+from qugate.header import parse_constants  # noqa: E402
+from qugate.maintenance import idle_charge, idle_multiplier_bps  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+QUGATE_H = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "QuGate.h")
+FEES = {'idleFee': 1000, 'idleWindowEpochs': 4, 'idleGraceEpochs': 2, 'expiryEpochs': 50}
+
+
+def gate(mode=MODE_SPLIT, recipients=2, chain=-1, reserve=0, next_charge=0, last=90,
+         balance=0, admin=-1, gate_targets=()):
+    targets = list(gate_targets) + [-1] * (8 - len(gate_targets))
+    return {'mode': mode, 'recipientCount': recipients, 'active': 1, 'chainNextGateId': chain,
+            'reserve': reserve, 'nextIdleChargeEpoch': next_charge, 'lastActivityEpoch': last,
+            'currentBalance': balance, 'adminGateId': admin, 'recipientGateIds': targets,
+            'idleDelinquent': 0, 'idleExpiryOverdue': 0, 'idleGraceRemainingEpochs': 0}
+
+
+def test_idle_constants_match_header():
+    with open(QUGATE_H, encoding="utf-8") as f:
+        header = parse_constants(f.read())
+    ours = {name: value for name, value in vars(constants).items() if name.startswith('IDLE_')}
+    assert ours == {name[len('QUGATE_'):]: value for name, value in header.items()
+                    if name.startswith('QUGATE_IDLE_')}
+
+
+def test_multipliers():
+    assert idle_multiplier_bps(gate(recipients=2)) == 10000
+    assert idle_multiplier_bps(gate(recipients=3)) == 15000
+    assert idle_multiplier_bps(gate(recipients=8)) == 20000
+    assert idle_multiplier_bps(gate(mode=MODE_HEARTBEAT, recipients=1)) == 15000
+    assert idle_multiplier_bps(gate(mode=MODE_MULTISIG, recipients=8)) == 20000
+    assert idle_multiplier_bps(gate(recipients=3, chain=encode_gate_id(9))) == 20000
+    assert idle_charge(999, gate(recipients=3)) == 1498
+
+
+def test_idle_gate_runs_dry_then_expires_after_grace():
+    gid = encode_gate_id(0)
+    row = MaintenanceForecaster(FEES, 100, {gid: gate(reserve=2500, next_charge=101)}) \
+        .forecast(20)[gid]
+    assert (row['nextChargeEpoch'], row['nextChargeAmount'], row['charged']) == (101, 1000, 2000)
+    assert (row['runwayEpochs'], row['delinquentEpoch'], row['expiryEpoch']) == (9, 109, 111)
+    assert row['reserve'] == 500
+    assert row['topUp'] == 2500                     # charges at 101, 105, ..., 117
+
+
+def test_hold_gate_shields_downstream_and_pays_admin_drain():
+    hold, target = encode_gate_id(0), encode_gate_id(1)
+    payer, admin = encode_gate_id(2), encode_gate_id(3)
+    gates = {
+        hold: gate(MODE_THRESHOLD, chain=target, reserve=10000, balance=5, last=99),
+        target: gate(recipients=3, reserve=0, next_charge=101, last=99),
+        payer: gate(reserve=5000, next_charge=102, admin=admin),
+        admin: gate(MODE_MULTISIG, recipients=0, reserve=0, next_charge=0, last=99),
+    }
+    forecast = MaintenanceForecaster(FEES, 100, gates,
+                                     multisigs={admin: {'guardianCount': 2, 'required': 1}}) \
+        .forecast(20)
+    # 1500 for the 3-recipient target plus a 500 shielding surcharge, once per window
+    assert forecast[hold]['charged'] == 10000 and forecast[hold]['runwayEpochs'] is None
+    assert forecast[target]['charged'] == 0 and forecast[target]['expiryEpoch'] == 0
+    # admin drain 1500 plus the payer's own 1000 per cycle, until the reserve is gone
+    assert forecast[payer]['charged'] == 5000
+    assert (forecast[payer]['delinquentEpoch'], forecast[payer]['expiryEpoch']) == (110, 112)
+    assert forecast[admin]['expiryEpoch'] == 112    # no longer governs a live gate
+    assert forecast[payer]['topUp'] == 7500
+
+
+def test_from_client_uses_mode_configs():
+    owner, beneficiary = bytes([0xA0]) * 32, bytes([0xB0]) * 32
+    sim = ContractSimulator(epoch=100, idle_fee=FEES['idleFee'],
+                            idle_window_epochs=FEES['idleWindowEpochs'])
+    sim.fund(owner, 10 ** 9)
+    client = QuGateClient(session=sim.session(), retries=0)
+    fee = client.get_fees()['currentCreationFee']
+    gate_id = sim.invoke(owner, PROC_CREATE_GATE, fee + 3000,
+                         build_create_gate(MODE_HEARTBEAT, [], []))['gateId']
+    sim.invoke(owner, PROC_CONFIGURE_HEARTBEAT, 10 ** 6,
+               build_configure_heartbeat(gate_id, 1, 10, 0, [beneficiary], [100]))
+    for _ in range(3):
+        sim.end_epoch()                             # no heartbeat: triggered at 102
+    assert client.get_heartbeat(gate_id)['triggered'] == 1
+
+    row = MaintenanceForecaster.from_client(client).forecast(8)[gate_id]
+    # triggered heartbeat: no hold, charged 1.5x at 104 and 108
+    assert (row['nextChargeEpoch'], row['nextChargeAmount']) == (104, 1500)
+    assert (row['charged'], row['reserve'], row['runwayEpochs']) == (3000, 0, None)
+    for _ in range(8):
+        sim.end_epoch()
+    assert client.get_gate(gate_id)['reserve'] == row['reserve']
@@ -0,0 +1,75 @@
+"""Offline tests for the local stand-in node."""
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    Broadcaster,
+    ContractSimulator,
+    LocalNode,
+    QuGateClient,
+    build_create_gate,
+)
+from qugate.__main__ import COMMANDS  # noqa: E402
+from qugate.constants import MODE_SPLIT, PROC_CREATE_GATE  # noqa: E402
+from qugate.keys import derive_keys, identity_from_public_key  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+SEED = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_broadcasts_over_the_node_port_execute_on_the_clock():
+    _, _, public_key = derive_keys(SEED)
+    simulator = ContractSimulator(ticks_per_epoch=10 ** 6)
+    simulator.fund(public_key, 10 ** 6)
+    node = LocalNode(simulator, tick_rate=200)
+    port, node_port = node.serve(port=0, node_port=0)
+    try:
+        client = QuGateClient(f"http://127.0.0.1:{port}", retries=0)
+        assert client.get_fees()['creationFee'] == 100000
+        with Broadcaster(node_port=node_port, client=client, tick_offset=40) as broadcaster:
+            broadcaster.send_contract_call(SEED, PROC_CREATE_GATE, 100000,
+                                           build_create_gate(MODE_SPLIT, [bytes(31) + b'\1'], [1]))
+            deadline = time.monotonic() + 5
+            while not client.get_gates_by_owner(public_key) and time.monotonic() < deadline:
+                time.sleep(0.02)
+        assert client.get_gates_by_owner(public_key) == [1 << 20]
+        assert client.get_balance(identity_from_public_key(public_key)) == 10 ** 6 - 100000
+        assert client.get_tick() > 40
+    finally:
+        node.stop()
+
+
+def test_rpc_errors_and_manual_clock():
+    node = LocalNode(tick_rate=0)
+    port, node_port = node.serve(port=0, node_port=None)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        assert node_port is None
+        status, reply = post(f"{base}/live/v1/broadcast-transaction", b'{not json')
+        assert status == 400 and reply['code'] == 3
+        assert post(f"{base}/live/v1/nowhere", b'{}')[0] == 404
+        client = QuGateClient(base, retries=0)
+        assert client.get_tick() == 1
+        node.simulator.advance(4)
+        assert client.get_tick() == 5
+    finally:
+        node.stop()
+    assert 'node' in COMMANDS
@@ -0,0 +1,99 @@
+"""Offline unit tests for the vectorized payout verifier."""
+import os
+import random
+import sys
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate.constants import MODE_RANDOM, MODE_ROUND_ROBIN, MODE_SPLIT  # noqa: E402
+from qugate.payouts import (  # noqa: E402
+    expected_payouts,
+    mismatches,
+    random_recipients,
+    round_robin_recipients,
+    running_totals,
+    sequence_positions,
+    split_payouts,
+)
+
+pytestmark = pytest.mark.offline
+
+
+def scalar_split(ratios, count, amount):
+    """processSplit, one payment at a time."""
+    total = sum(ratios[:count])
+    shares = [0] * 8
+    distributed = 0
+    for i in range(count):
+        if i == count - 1:
+            share = amount - distributed
+        elif total == 0:
+            share = 0
+        else:
+            share = (amount // total) * ratios[i] + ((amount % total) * ratios[i]) // total
+        shares[i] = share
+        distributed += share
+    return shares
+
+
+def test_split_matches_contract_formula():
+    rng = random.Random(7)
+    rows = []
+    for _ in range(2000):
+        count = rng.randint(1, 8)
+        ratios = [rng.randint(1, 10000) for _ in range(count)] + [0] * (8 - count)
+        rows.append((ratios, count, rng.choice([1, 999, 10 ** 6, rng.randint(1, 2 ** 62)])))
+    ratios, counts, amounts = zip(*rows)
+    shares = split_payouts(ratios, counts, amounts)
+    assert shares.tolist() == [scalar_split(*row) for row in rows]
+    assert (shares.sum(axis=1) == np.array(amounts, dtype=np.uint64)).all()
+
+
+def test_split_known_values():
+    shares = split_payouts([[60, 40] + [0] * 6, [1, 1, 1] + [0] * 5], [2, 3], [10000, 100])
+    assert shares[0, :2].tolist() == [6000, 4000]
+    assert shares[1, :3].tolist() == [33, 33, 34]
+
+
+def test_round_robin_and_random_selection():
+    gates = np.array([5, 9, 5, 5, 9])
+    positions = sequence_positions(gates)
+    assert positions.tolist() == [0, 0, 1, 2, 1]
+    assert round_robin_recipients([2, 0, 2, 2, 0], [3, 2, 3, 3, 2], positions).tolist() == \
+        [2, 0, 0, 1, 1]
+    totals = running_totals(gates, [100, 7, 50, 1, 3], [1000, 0, 1000, 1000, 0])
+    assert totals.tolist() == [1100, 7, 1150, 1151, 10]
+    assert random_recipients(totals, 5000, 3).tolist() == \
+        [(t + 5000) % 3 for t in totals.tolist()]
+
+
+def test_mixed_batch_and_mismatches():
+    ratios = [[70, 30] + [0] * 6] * 4
+    expected = expected_payouts(
+        mode=[MODE_SPLIT, MODE_ROUND_ROBIN, MODE_RANDOM, MODE_RANDOM],
+        recipient_count=[2, 2, 2, 0], ratios=ratios, amount=[1000, 500, 300, 300],
+        tick=11, total_received=[0, 0, 1300, 300], round_robin_index=[0, 1, 0, 0])
+    assert expected[0, :2].tolist() == [700, 300]
+    assert expected[1, :2].tolist() == [0, 500]
+    assert expected[2, :2].tolist() == [0, 300]       # (1300 + 11) % 2 == 1
+    assert expected[3].sum() == 0                      # no recipients: nothing paid out
+    observed = expected.copy()
+    observed[2, 1] -= 1
+    assert mismatches(expected, observed).tolist() == [2]
+
+
+def test_hundred_thousand_payments_are_fast():
+    rng = np.random.default_rng(1)
+    n = 100_000
+    counts = rng.integers(1, 9, n)
+    ratios = rng.integers(1, 10_001, (n, 8))
+    amounts = rng.integers(1, 10 ** 12, n)
+    gates = rng.integers(0, 5000, n)
+    start = time.perf_counter()
+    split_payouts(ratios, counts, amounts)
+    random_recipients(running_totals(gates, amounts, 0), 1000, counts)
+    assert time.perf_counter() - start < 1.0
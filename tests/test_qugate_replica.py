@@ -0,0 +1,138 @@
+"""Offline unit tests for the event-driven state replica."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    QuGateClient,
+    StateReplica,
+    build_close_gate,
+    build_create_gate,
+    build_fund_gate,
+    build_send_to_gate,
+    build_set_chain,
+    encode_gate_id,
+    structs,
+)
+from qugate.constants import (  # noqa: E402
+    CHAIN_HOP_FEE,
+    LOG_FAIL_UNAUTHORIZED,
+    LOG_GATE_CLOSED,
+    LOG_GATE_CREATED,
+    LOG_GATE_EXPIRED,
+    LOG_PAYMENT_FORWARDED,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    PROC_CLOSE_GATE,
+    PROC_CREATE_GATE,
+    PROC_FUND_GATE,
+    PROC_SEND_TO_GATE,
+    PROC_SET_CHAIN,
+)
+
+pytestmark = pytest.mark.offline
+
+OWNER_A = bytes([0xA0]) * 32
+OWNER_B = bytes([0xB0]) * 32
+
+
+class Client(QuGateClient):
+    """QuGateClient on a ContractSimulator that logs getGateBatch passes."""
+
+    def __init__(self, sim):
+        super().__init__(session=sim.session(), retries=0)
+        self.batches = []
+
+    def get_gates(self, gate_ids, workers=None):
+        self.batches.append(sorted(gate_ids))
+        return super().get_gates(gate_ids, workers)
+
+
+def event(tick, log_type, gate_id):
+    return {'tick': tick, '_type': log_type, 'gateId': gate_id}
+
+
+def create(sim, mode, owner=OWNER_A):
+    return sim.invoke(owner, PROC_CREATE_GATE, 100000,
+                      build_create_gate(mode, [OWNER_B], [1], threshold=5000))['gateId']
+
+
+def simulated(*modes, owners=()):
+    sim = ContractSimulator(epoch=100)
+    for owner in (OWNER_A, OWNER_B):
+        sim.fund(owner, 10 ** 9)
+    gate_ids = [create(sim, mode, owner) for mode, owner in
+                zip(modes, list(owners) + [OWNER_A] * len(modes))]
+    replica = StateReplica(Client(sim), sweep_ticks=10)
+    replica.bootstrap()
+    return sim, replica, gate_ids
+
+
+def test_bootstrap_loads_live_gates():
+    sim, replica, (g0, g1) = simulated(MODE_THRESHOLD, MODE_SPLIT, owners=(OWNER_A, OWNER_B))
+    sim.invoke(OWNER_A, PROC_SEND_TO_GATE, 3000, build_send_to_gate(g0))
+    replica.bootstrap()
+    assert replica.live_gate_ids() == [g0, g1] == [encode_gate_id(0), encode_gate_id(1)]
+    assert replica.gate(g0)['currentBalance'] == 3000
+    assert set(replica.gate(g0)) == set(f[0] for f in structs.GET_GATE_OUTPUT.fields)
+    assert replica.gates_by_owner(OWNER_B) == [g1]
+    assert replica.tick == sim.tick
+
+
+def test_events_reread_touched_gates_once_per_tick():
+    sim, replica, (g0, g1) = simulated(MODE_THRESHOLD, MODE_SPLIT)
+    client, tick = replica.client, replica.tick
+
+    sim.invoke(OWNER_A, PROC_SEND_TO_GATE, 3000, build_send_to_gate(g0))
+    replica.apply(event(tick + 1, LOG_PAYMENT_FORWARDED, g0))
+    sim.invoke(OWNER_A, PROC_SEND_TO_GATE, 1000, build_send_to_gate(g0))
+    replica.apply(event(tick + 1, LOG_PAYMENT_FORWARDED, g0))
+    replica.apply(event(tick + 1, LOG_FAIL_UNAUTHORIZED, g1))
+    assert client.batches == []                # nothing read until the tick is complete
+
+    g2 = create(sim, MODE_SPLIT)
+    sim.invoke(OWNER_A, PROC_CLOSE_GATE, 0, build_close_gate(g1))
+    replica.follow([event(tick + 2, LOG_GATE_CREATED, g2), event(tick + 2, LOG_GATE_CLOSED, g1)])
+    assert client.batches == [[g0], [g2]]
+    assert replica.gate(g0)['currentBalance'] == 4000
+    assert replica.gate(g1) is None
+    assert replica.live_gate_ids() == [g0, g2]
+    assert replica.counts['activeGates'] == 2
+    assert (replica.tick, replica.events, replica.failures, replica.rereads) == \
+        (tick + 2, 5, 1, 2)
+
+
+def test_expired_event_rereads_gate_that_stayed_active():
+    sim, replica, (kept, closed) = simulated(MODE_SPLIT, MODE_SPLIT)
+    tick = replica.tick
+    sim.invoke(OWNER_A, PROC_CLOSE_GATE, 0, build_close_gate(closed))
+    replica.follow([event(tick + 1, LOG_GATE_EXPIRED, kept),     # refund failed: still live
+                    event(tick + 1, LOG_GATE_EXPIRED, closed)])
+    assert replica.live_gate_ids() == [kept]
+    assert replica.rereads == 2
+
+
+def test_sweep_picks_up_changes_no_event_reports():
+    sim, replica, (funded, chained, threshold) = simulated(MODE_SPLIT, MODE_SPLIT,
+                                                             MODE_THRESHOLD)
+    tick = replica.tick
+    sim.invoke(OWNER_A, PROC_FUND_GATE, 700, build_fund_gate(funded))
+    sim.invoke(OWNER_A, PROC_SET_CHAIN, CHAIN_HOP_FEE, build_set_chain(chained, funded))
+    sim.invoke(OWNER_A, PROC_SEND_TO_GATE, 3000, build_send_to_gate(threshold))
+
+    replica.follow([event(tick + 9, LOG_PAYMENT_FORWARDED, funded)])
+    assert replica.gate(chained)['chainNextGateId'] == -1       # not due yet
+    assert replica.gate(threshold)['currentBalance'] == 0
+    replica.follow([event(tick + 10, LOG_PAYMENT_FORWARDED, funded)])
+    assert replica.sweeps == 1
+    assert replica.gate(funded)['reserve'] == 700
+    assert replica.gate(chained)['chainNextGateId'] == funded
+    assert replica.gate(threshold)['currentBalance'] == 3000
+
+    sim.invoke(OWNER_A, PROC_SEND_TO_GATE, 1000, build_send_to_gate(threshold))
+    replica.sweep()
+    assert replica.gate(threshold)['currentBalance'] == 4000
+    assert replica.sweeps == 2
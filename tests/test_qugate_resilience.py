@@ -0,0 +1,134 @@
+"""Offline unit tests for backoff, the circuit breaker and RPC metrics."""
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    Backoff,
+    CircuitBreaker,
+    CircuitOpenError,
+    QuGateClient,
+    RpcError,
+    RpcMetrics,
+)
+from qugate.resilience import endpoint  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+IDENTITY = "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"
+
+
+class Reply:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FlakySession:
+    """Fails while ``down`` is set; otherwise answers every request with a tick."""
+
+    def __init__(self, down=True):
+        self.down = down
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append(url)
+        if self.down:
+            raise requests.ConnectionError("refused")
+        return Reply({'tick': 42})
+
+    def close(self):
+        pass
+
+
+def test_backoff_is_capped_and_jittered():
+    backoff = Backoff(base=0.5, factor=2, cap=3)
+    assert [Backoff(0.5, 2, 3, jitter=False).delay(n) for n in range(4)] == [0.5, 1, 2, 3]
+    delays = [backoff.delay(5) for _ in range(200)]
+    assert all(0 <= d <= 3 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.05)
+    for _ in range(2):
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and breaker.trips == 1
+    assert not breaker.due_for_probe()
+    time.sleep(0.06)
+    assert breaker.due_for_probe()
+    assert not breaker.due_for_probe()          # only one caller probes
+    breaker.probed(False)
+    assert breaker.is_open
+    time.sleep(0.06)
+    assert breaker.due_for_probe()
+    breaker.probed(True)
+    assert not breaker.is_open and breaker.failures == 0
+
+
+def test_success_resets_failure_streak():
+    breaker = CircuitBreaker(threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_metrics_snapshot_and_labels():
+    metrics = RpcMetrics()
+    for ms in (1, 2, 3, 4, 100):
+        metrics.observe(f'/live/v1/balances/{IDENTITY}', ms / 1000)
+    metrics.observe('/live/v1/tick-info', 0.5, ok=False)
+    metrics.retry('/live/v1/tick-info')
+    metrics.reject('/live/v1/querySmartContract')
+    snap = metrics.snapshot()
+    balances = snap['/live/v1/balances/{id}']
+    assert balances['requests'] == 5 and balances['max'] == 0.1
+    assert balances['p50'] == 0.003
+    assert snap['/live/v1/tick-info']['failures'] == 1
+    assert snap['/live/v1/tick-info']['retries'] == 1
+    assert snap['/live/v1/querySmartContract']['rejected'] == 1
+    assert endpoint('/live/v1/tick-info?x=1') == '/live/v1/tick-info'
+
+
+def test_client_fails_fast_while_open_then_recovers():
+    session = FlakySession()
+    breaker = CircuitBreaker(threshold=3, cooldown=0.05)
+    client = QuGateClient(session=session, retries=5, retry_delay=0, breaker=breaker)
+    with pytest.raises(RpcError) as err:
+        client.get_tick()
+    assert not isinstance(err.value, CircuitOpenError)
+    assert len(session.calls) == 3                 # stopped retrying once the breaker opened
+    with pytest.raises(CircuitOpenError):
+        client.get_tick()
+    assert len(session.calls) == 3                 # no request while open
+    session.down = False
+    time.sleep(0.06)
+    assert client.get_tick() == 42                 # health probe closed the breaker
+    assert session.calls[3].endswith('/live/v1/tick-info')
+    snap = client.metrics.snapshot()['/live/v1/tick-info']
+    assert snap['failures'] == 3 and snap['retries'] == 2 and snap['rejected'] == 1
+
+
+def test_failed_probe_keeps_failing_fast():
+    session = FlakySession()
+    client = QuGateClient(session=session, retries=0, retry_delay=0,
+                          breaker=CircuitBreaker(threshold=1, cooldown=0.01))
+    with pytest.raises(RpcError):
+        client.get_tick()
+    time.sleep(0.02)
+    with pytest.raises(CircuitOpenError):
+        client.get_tick()
+    assert len(session.calls) == 2                 # the original attempt plus one probe
+    assert not client.health()
@@ -0,0 +1,160 @@
+"""Offline unit tests for the routing-graph analyzer."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    QuGateClient,
+    RoutingGraph,
+    build_create_gate,
+    build_send_to_gate,
+    encode_gate_id,
+)
+from qugate.constants import (  # noqa: E402
+    MODE_HEARTBEAT,
+    MODE_RANDOM,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    MODE_TIME_LOCK,
+    PROC_CREATE_GATE,
+    PROC_SEND_TO_GATE,
+)
+
+pytestmark = pytest.mark.offline
+
+A, B, C, D, E = (encode_gate_id(slot) for slot in range(5))
+W1, W2, W3 = (bytes([i]) * 32 for i in (1, 2, 3))
+
+
+def gate(mode=MODE_SPLIT, to=(), ratios=(), chain=-1, reserve=0, threshold=0, balance=0):
+    """*to* lists wallets (bytes) and gate IDs (ints) in recipient order."""
+    recipients = [t if isinstance(t, bytes) else bytes(32) for t in to]
+    targets = [t if isinstance(t, int) else -1 for t in to]
+    return {'mode': mode, 'recipientCount': len(to), 'active': 1, 'chainNextGateId': chain,
+            'recipients': recipients + [bytes(32)] * (8 - len(to)),
+            'recipientGateIds': targets + [-1] * (8 - len(to)),
+            'ratios': list(ratios) + [0] * (8 - len(ratios)), 'reserve': reserve,
+            'threshold': threshold, 'currentBalance': balance, 'totalReceived': 0}
+
+
+def test_gate_recipient_pays_one_hop_fee():
+    graph = RoutingGraph({A: gate(to=(W1, B), ratios=(60, 40)),
+                          B: gate(to=(W2, W3), ratios=(1, 1))})
+    result = graph.route(A, 10000)
+    assert result['wallets'] == {W1: 6000, W2: 1500, W3: 1500}
+    assert (result['delivered'], result['hopFees']) == (9000, 1000)
+    assert result['hops'] == [(B, 0, 3000)]
+    assert not (result['stranded'] or result['lost'] or result['held'])
+
+
+def test_small_hop_strands_unless_reserve_pays():
+    graph = RoutingGraph({A: gate(MODE_THRESHOLD, chain=B, threshold=500),
+                          B: gate(to=(W1,), ratios=(1,)),
+                          C: gate(to=(W2,), ratios=(1,))})
+    assert graph.route(A, 800)['stranded'] == {B: 800}        # CHAIN_HOP_INSUFFICIENT
+    assert graph.route(A, 400)['held'] == {A: 400}            # below the threshold
+    graph.route(C, 5000)
+    graph.update(B, gate(to=(W1,), ratios=(1,), reserve=5000))
+    result = graph.route(A, 800)
+    assert result['wallets'] == {W1: 800} and result['reserveFees'] == 1000
+    graph.route(C, 5000)                                       # untouched by the update
+    assert (graph.hits, graph.misses) == (1, 4)
+
+
+def test_chain_depth_and_dead_link_strand_at_entry():
+    graph = RoutingGraph({A: gate(chain=B), B: gate(chain=C), C: gate(chain=D),
+                          D: gate(chain=E), E: gate(to=(W1,), ratios=(1,))})
+    result = graph.route(A, 10000)
+    assert [hop[:2] for hop in result['hops']] == [(B, 0), (C, 1), (D, 2)]
+    assert result['stranded'] == {A: 7000} and result['hopFees'] == 3000
+    assert graph.route(B, 10000)['wallets'] == {W1: 7000}
+    graph.update(E, None)
+    assert graph.route(C, 10000)['stranded'] == {C: 9000}      # D links to a closed gate
+    assert graph.route(B, 10000)['hops'] == [(C, 0, 9000), (D, 1, 8000)]
+
+
+def test_cycles_and_incremental_update():
+    graph = RoutingGraph({A: gate(chain=B), B: gate(chain=A),
+                          C: gate(to=(C, W1), ratios=(1, 1)), D: gate(to=(W2,), ratios=(1,))})
+    assert graph.cycles() == [[A, B], [C]]
+    result = graph.route(A, 10000)
+    assert [hop[0] for hop in result['hops']] == [B, A, B]
+    assert result['stranded'] == {A: 7000}
+    graph.update(B, gate(to=(W3,), ratios=(1,)))
+    assert graph.cycles() == [[C]]
+    assert graph.route(A, 10000)['wallets'] == {W3: 9000}
+    assert graph.successors(C) == [C]
+
+
+def test_updates_recompute_only_the_affected_components():
+    gates = {encode_gate_id(slot): gate(chain=encode_gate_id(slot + 1) if slot % 10 < 9 else -1)
+             for slot in range(100)}
+    graph = RoutingGraph(gates)
+    assert graph.cycles() == []
+    regions = []
+    tarjan = graph._strongly_connected
+    graph._strongly_connected = lambda nodes: regions.append(len(nodes)) or tarjan(nodes)
+
+    graph.update(A, gate(chain=B, reserve=500))                # same successors
+    assert regions == []
+    graph.update(encode_gate_id(9), gate(chain=A))             # closes the first ten
+    assert regions == [10]
+    assert graph.cycles() == [[encode_gate_id(slot) for slot in range(10)]]
+    graph.update(encode_gate_id(95), None)                     # splits the tail off
+    assert regions == [10, 0]
+    assert graph.cycles() == [[encode_gate_id(slot) for slot in range(10)]]
+
+    rng = random.Random(7)
+    ids = sorted(gates)
+    for _ in range(200):
+        gate_id = rng.choice(ids)
+        if rng.random() < 0.1:
+            graph.update(gate_id, None)
+        else:
+            graph.update(gate_id, gate(to=(rng.choice(ids), W1), ratios=(1, 1),
+                                       chain=rng.choice(ids + [-1] * 5)))
+        assert graph.cycles() == RoutingGraph(graph.gates).cycles()
+
+
+def test_update_drops_only_dependent_routes():
+    graph = RoutingGraph({A: gate(chain=B), B: gate(to=(W1,), ratios=(1,)),
+                          C: gate(to=(W2,), ratios=(1,))})
+    graph.route(A, 10000)
+    graph.route(C, 10000)
+    graph.update(B, gate(to=(W3,), ratios=(1,)))
+    assert graph.route(A, 10000)['wallets'] == {W3: 9000}
+    graph.route(C, 10000)
+    assert (graph.hits, graph.misses) == (1, 3)
+    graph.update(C, None)
+    assert set(graph._dependents) == {A, B}
+
+def test_sinks_take_every_branch():
+    graph = RoutingGraph({A: gate(MODE_RANDOM, to=(W1, B, C)),
+                          B: gate(MODE_HEARTBEAT), C: gate(MODE_TIME_LOCK)},
+                         time_locks={C: {'active': 1, 'cancelled': 1, 'fired': 0}})
+    assert graph.route(A, 10000)['held'] == {B: 9000}          # (10000 + 0) % 3 == 1
+    assert graph.route(A, 10000, tick=2)['wallets'] == {W1: 10000}
+    assert graph.route(A, 10000, tick=1)['lost'] == [(A, 10000, 'dead recipient gate')]
+    assert graph.sinks(A) == {'wallets': [W1], 'gates': [B]}   # C's lock was cancelled
+
+
+def test_from_client_matches_the_contract():
+    owner = bytes([0xA0]) * 32
+    sim = ContractSimulator(epoch=100)
+    sim.fund(owner, 10 ** 9)
+    inner = sim.invoke(owner, PROC_CREATE_GATE, 100000,
+                       build_create_gate(MODE_SPLIT, [W2], [1]))['gateId']
+    entry = sim.invoke(owner, PROC_CREATE_GATE, 100000,
+                       build_create_gate(MODE_SPLIT, [W1, bytes(32)], [1, 1],
+                                         recipient_gate_ids=[-1, inner]))['gateId']
+    graph = RoutingGraph.from_client(QuGateClient(session=sim.session(), retries=0))
+    assert graph.successors(entry) == [inner]
+    result = graph.route(entry, 4000)
+    assert result['wallets'] == {W1: 2000, W2: 1000}
+
+    sim.invoke(owner, PROC_SEND_TO_GATE, 4000, build_send_to_gate(entry))
+    assert {wallet: sim.balance(wallet) for wallet in (W1, W2)} == result['wallets']
@@ -0,0 +1,154 @@
+"""Offline unit tests for the pipelined transaction scheduler."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import TxHandle, TxScheduler, build_send_to_gate  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+SEED_A = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
+SEED_B = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
+
+
+class ManualClock:
+    def __init__(self, tick):
+        self.tick = tick
+        self.waits = []
+
+    def current(self):
+        return self.tick
+
+    def wait_until(self, target, timeout=None):
+        if target > self.tick:
+            self.waits.append(target)
+            self.tick = target
+        return True
+
+
+class RecordingBroadcaster:
+    tick_offset = 5
+
+    def __init__(self, clock=None, slow=0):
+        self.sent = []
+        self.clock = clock
+        self.slow = slow            # ticks that pass per send
+
+    def send_contract_call(self, seed, input_type, amount, input_data=b'', tick=None):
+        if self.clock is not None:
+            assert tick > self.clock.tick, "scheduled into the past"
+            self.clock.tick += self.slow
+        self.sent.append((seed, input_type, amount, tick))
+        return TxHandle(f"{len(self.sent):a>60}", tick, seed)
+
+
+class Tracker:
+    def __init__(self):
+        self.tracked = []
+
+    def track(self, handle):
+        self.tracked.append(handle)
+        return handle
+
+
+def test_independent_calls_share_a_tick():
+    scheduler = TxScheduler(RecordingBroadcaster(), ManualClock(100), per_source=None)
+    ops = [scheduler.add(SEED_A, 1, 1000, build_send_to_gate(i)) for i in range(50)]
+    assert scheduler.plan(105) == 105
+    assert {op.tick for op in ops} == {105}
+
+
+def test_same_source_calls_are_ordered_by_default():
+    scheduler = TxScheduler(RecordingBroadcaster(), ManualClock(100))
+    a = [scheduler.add(SEED_A, 1) for _ in range(3)]
+    b = scheduler.add(SEED_B, 1)
+    scheduler.plan(105)
+    assert [op.tick for op in a] == [105, 106, 107] and b.tick == 105
+
+
+def test_dependencies_land_in_later_ticks():
+    scheduler = TxScheduler(RecordingBroadcaster(), ManualClock(100), per_source=None)
+    creates = [scheduler.add(SEED_A, 1, 1000) for _ in range(3)]
+    sends = [scheduler.add(SEED_B, 2, 500, after=c) for c in creates]
+    close = scheduler.add(SEED_A, 3, after=sends)
+    assert scheduler.plan(105) == 107
+    assert [op.tick for op in creates] == [105] * 3
+    assert [op.tick for op in sends] == [106] * 3
+    assert close.tick == 107
+
+
+def test_source_order_and_caps():
+    scheduler = TxScheduler(RecordingBroadcaster(), ManualClock(100), per_source=2, per_tick=3)
+    a = [scheduler.add(SEED_A, 1) for _ in range(5)]
+    b = [scheduler.add(SEED_B, 1) for _ in range(2)]
+    scheduler.plan(10)
+    assert [op.tick for op in a] == [10, 10, 11, 11, 12]
+    assert [op.tick for op in b] == [10, 11]      # tick 10 already holds 3
+
+
+def test_source_never_moves_backwards():
+    scheduler = TxScheduler(RecordingBroadcaster(), ManualClock(100))
+    first = scheduler.add(SEED_A, 1)
+    scheduler.add(SEED_B, 2, after=first)
+    late = scheduler.add(SEED_A, 3)
+    scheduler.plan(10)
+    assert late.tick >= first.tick
+
+
+def test_unknown_dependency_rejected():
+    other = TxScheduler(RecordingBroadcaster(), ManualClock(100))
+    stray = other.add(SEED_A, 1)
+    with pytest.raises(ValueError):
+        TxScheduler(RecordingBroadcaster(), ManualClock(100)).add(SEED_A, 2, after=stray)
+
+
+def test_run_broadcasts_in_tick_order_and_tracks():
+    clock = ManualClock(100)
+    broadcaster = RecordingBroadcaster(clock)
+    tracker = Tracker()
+    scheduler = TxScheduler(broadcaster, clock, tracker)
+    create = scheduler.add(SEED_A, 1, 1000)
+    send = scheduler.add(SEED_B, 2, 5000, after=create)
+    handles = scheduler.run()
+    assert [h.tick for h in handles] == [105, 106]
+    assert [s[3] for s in broadcaster.sent] == [105, 106]
+    assert tracker.tracked == handles
+    assert send.handle is handles[1]
+    assert clock.waits == []                      # everything inside the lookahead
+    assert scheduler.run() == handles             # nothing left to send
+
+
+def test_run_holds_back_calls_beyond_lookahead():
+    clock = ManualClock(100)
+    scheduler = TxScheduler(RecordingBroadcaster(clock), clock, per_source=1, lookahead=3)
+    for _ in range(6):
+        scheduler.add(SEED_A, 1)
+    scheduler.run()
+    assert clock.waits == [102, 103, 104, 105, 106, 107]   # ticks 105..110, 3 ahead
+
+
+def test_run_shifts_plan_when_sending_falls_behind():
+    clock = ManualClock(100)
+    broadcaster = RecordingBroadcaster(clock, slow=4)
+    scheduler = TxScheduler(broadcaster, clock, per_source=1, margin=1)
+    ops = [scheduler.add(SEED_A, 1) for _ in range(4)]
+    scheduler.run()
+    ticks = [op.tick for op in ops]
+    assert ticks == sorted(set(ticks))            # still one per tick, in order
+    assert scheduler.shifted > 0
+
+
+def test_second_run_respects_calls_already_sent():
+    clock = ManualClock(100)
+    scheduler = TxScheduler(RecordingBroadcaster(), clock)
+    a = scheduler.add(SEED_A, 1)
+    b = scheduler.add(SEED_A, 2)
+    scheduler.run()
+    assert (a.tick, b.tick) == (105, 106)
+    clock.tick = 101
+    c = scheduler.add(SEED_A, 3)
+    d = scheduler.add(SEED_B, 3)
+    scheduler.run()
+    assert c.tick == 107 and d.tick == 106
@@ -0,0 +1,218 @@
+"""Offline unit tests for the reference contract simulator."""
+import base64
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    MaintenanceForecaster,
+    QuGateClient,
+    RpcError,
+    build_configure_heartbeat,
+    build_configure_multisig,
+    build_configure_time_lock,
+    build_contract_transaction,
+    build_create_gate,
+    build_heartbeat,
+    build_send_to_gate,
+    build_set_admin_gate,
+    build_update_gate,
+    constants,
+)
+from qugate.constants import (  # noqa: E402
+    MODE_HEARTBEAT,
+    MODE_MULTISIG,
+    MODE_ROUND_ROBIN,
+    MODE_SPLIT,
+    MODE_THRESHOLD,
+    MODE_TIME_LOCK,
+    PROC_CONFIGURE_HEARTBEAT,
+    PROC_CONFIGURE_MULTISIG,
+    PROC_CONFIGURE_TIME_LOCK,
+    PROC_CREATE_GATE,
+    PROC_HEARTBEAT,
+    PROC_SEND_TO_GATE,
+    PROC_SET_ADMIN_GATE,
+    PROC_UPDATE_GATE,
+    QUGATE_DUST_AMOUNT,
+    QUGATE_INVALID_GATE_ID,
+    QUGATE_SUCCESS,
+    QUGATE_UNAUTHORIZED,
+)
+from qugate.header import parse_header  # noqa: E402
+from qugate.keys import derive_keys, identity_from_public_key  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+HEADER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "QuGate.h")
+SEED = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
+A, B, C = bytes([1]) * 32, bytes([2]) * 32, bytes([3]) * 32
+OWNER, PAYER = bytes([0xA0]) * 32, bytes([0xB0]) * 32
+G1, G2 = bytes([0xC1]) * 32, bytes([0xC2]) * 32
+
+
+def simulator(**kwargs):
+    sim = ContractSimulator(epoch=100, **kwargs)
+    for key in (OWNER, PAYER, G1, G2):
+        sim.fund(key, 10 ** 9)
+    return sim
+
+
+def create(sim, *args, reserve=0, **kwargs):
+    out = sim.invoke(OWNER, PROC_CREATE_GATE, 100000 + reserve, build_create_gate(*args, **kwargs))
+    assert out['status'] == QUGATE_SUCCESS, out
+    return out['gateId']
+
+
+def send(sim, gate_id, amount, source=PAYER):
+    return sim.invoke(source, PROC_SEND_TO_GATE, amount, build_send_to_gate(gate_id))['status']
+
+
+def test_client_routes_payments_through_the_simulator():
+    sim = simulator()
+    client = QuGateClient(session=sim.session(), retries=0)
+    rr = create(sim, MODE_ROUND_ROBIN, [A, B], [0, 0])
+    split = create(sim, MODE_SPLIT, [C, bytes(32)], [50, 50], recipient_gate_ids=[-1, rr])
+    threshold = create(sim, MODE_THRESHOLD, [A], [0], threshold=5000)
+    assert send(sim, split, 10000) == QUGATE_SUCCESS
+    assert send(sim, split, 10000) == QUGATE_SUCCESS
+    # 5000 per send to C; the other half pays the 1000 QU hop into rr, which alternates A/B
+    assert (sim.balance(A), sim.balance(B), sim.balance(C)) == (4000, 4000, 10000)
+    assert send(sim, threshold, 3000) == QUGATE_SUCCESS
+    assert client.get_gate(threshold)['currentBalance'] == 3000
+    send(sim, threshold, 3000)
+    assert sim.balance(A) == 10000 and client.get_gate(threshold)['totalForwarded'] == 6000
+
+    gate = client.get_gate(split)
+    assert (gate['totalReceived'], gate['totalForwarded'], gate['active']) == (20000, 20000, 1)
+    execution = client.get_latest_execution(rr)
+    assert (execution['selectedRecipientIndex'], execution['forwardedAmount']) == (1, 4000)
+    assert client.get_gates_by_owner(OWNER) == [rr, split, threshold]
+    batch = client.get_gate_batch([split, 12345])
+    assert batch[0]['recipientGateIds'][:2] == [-1, rr] and batch[1]['chainNextGateId'] == -1
+    counts = client.get_gate_count()
+    assert (counts['totalGates'], counts['activeGates']) == (3, 3)
+    assert counts['totalBurned'] == 3 * 50000 + 2 * 1000
+
+    before = sim.balance(PAYER)
+    assert send(sim, 12345, 5000) == QUGATE_INVALID_GATE_ID and sim.balance(PAYER) == before
+    assert send(sim, split, 999) == QUGATE_DUST_AMOUNT and sim.balance(PAYER) == before - 999
+    assert sim.invoke(bytes([0xEE]) * 32, PROC_SEND_TO_GATE, 5000, build_send_to_gate(split)) \
+        is None
+    assert client.get_balance(identity_from_public_key(C)) == 10000
+    # END_TICK pays out whole per-computor shares of the creation-fee dividends
+    sim.advance()
+    assert client.get_gate_count()['distributedMaintenanceDividends'] == 150000 // 676 * 676
+    assert client.tick_info()['tick'] == 2
+    with pytest.raises(RpcError):
+        QuGateClient(session=sim.session(), retries=0, contract_index=24).get_fees()
+
+
+def test_end_epoch_agrees_with_the_maintenance_forecaster():
+    sim = simulator()
+    client = QuGateClient(session=sim.session(), retries=0)
+    bare = create(sim, MODE_SPLIT, [A], [1])
+    short = create(sim, MODE_SPLIT, [A, B], [1, 1], reserve=30000)
+    funded = create(sim, MODE_SPLIT, [A, B, C], [1, 1, 1], reserve=200000)
+    held = create(sim, MODE_THRESHOLD, [A], [0], threshold=10 ** 6, chain_next_gate_id=funded)
+    send(sim, held, 5000)
+    forecast = MaintenanceForecaster.from_client(client).forecast(14)
+    assert (forecast[bare]['delinquentEpoch'], forecast[bare]['expiryEpoch']) == (104, 108)
+    assert forecast[short]['expiryEpoch'] == 112 and forecast[funded]['charged'] == 3 * 37500
+
+    owner_before = sim.balance(OWNER)
+    for epoch in range(100, 114):
+        sim.end_epoch()
+        gate = client.get_gate_by_slot(0)
+        if epoch == 104:
+            assert gate['idleDelinquent'] == 1 and gate['idleGraceRemainingEpochs'] == 3
+    assert sim.epoch == 114
+    assert client.get_gate(bare)['active'] == 0 and client.get_gate(short)['active'] == 0
+    assert client.get_gate_by_slot(1)['gateId'] == short    # closed: generation shows the old ID
+    assert client.get_gate(funded)['reserve'] == forecast[funded]['reserve'] == 87500
+    assert client.get_gate(held)['currentBalance'] == 5000
+    assert sim.balance(OWNER) == owner_before + 5000         # short's leftover reserve refunded
+    assert client.get_gate_count()['activeGates'] == 2
+    assert create(sim, MODE_SPLIT, [A], [1]) == short + (1 << 20)     # last freed slot reused
+
+
+def test_heartbeat_time_lock_and_admin_gate_flows():
+    sim = simulator()
+    client = QuGateClient(session=sim.session(), retries=0)
+    will = create(sim, MODE_HEARTBEAT, [], [])
+    assert sim.invoke(OWNER, PROC_CONFIGURE_HEARTBEAT, 200000, build_configure_heartbeat(
+        will, 2, 50, 0, [A, B], [60, 40]))['status'] == QUGATE_SUCCESS
+    send(sim, will, 100000)
+    sim.end_epoch()
+    ping = sim.invoke(OWNER, PROC_HEARTBEAT, 50000, build_heartbeat(will))
+    assert ping['status'] == QUGATE_SUCCESS and ping['epochRecorded'] == 101
+    assert ping['feePaid'] == 25000 * 15000 // 10000 // 4     # pro-rated to one epoch of four
+    for _ in range(4):
+        sim.end_epoch()                                     # the silence passes 2 epochs at 104
+    assert client.get_heartbeat(will)['triggerEpoch'] == 104 and sim.balance(A) == 0
+    sim.end_epoch()
+    assert (sim.balance(A), sim.balance(B)) == (30000, 20000)
+    assert sim.invoke(OWNER, PROC_HEARTBEAT, 50000, build_heartbeat(will))['status'] == -16
+
+    lock = create(sim, MODE_TIME_LOCK, [C], [0])
+    assert sim.invoke(OWNER, PROC_CONFIGURE_TIME_LOCK, 200000, build_configure_time_lock(
+        lock, unlock_epoch=sim.epoch + 2))['status'] == QUGATE_SUCCESS
+    send(sim, lock, 70000)
+    state = client.get_time_lock_state(lock)
+    assert (state['epochsRemaining'], state['currentBalance']) == (2, 70000)
+    for _ in range(3):
+        sim.end_epoch()
+    assert sim.balance(C) == 70000 and client.get_gate(lock)['active'] == 0
+
+    admin = create(sim, MODE_MULTISIG, [], [])
+    assert sim.invoke(OWNER, PROC_CONFIGURE_MULTISIG, 1000, build_configure_multisig(
+        admin, [G1, G2], 2, 5, 3))['status'] == QUGATE_SUCCESS
+    target = create(sim, MODE_SPLIT, [A], [1])
+    assert sim.invoke(OWNER, PROC_SET_ADMIN_GATE, 1000,
+                      build_set_admin_gate(target, admin))['status'] == QUGATE_SUCCESS
+    update = build_update_gate(target, [B], [1])
+    assert sim.invoke(OWNER, PROC_UPDATE_GATE, 1000, update)['status'] == QUGATE_UNAUTHORIZED
+    send(sim, admin, 1000, G1)
+    send(sim, admin, 1000, G2)
+    assert client.get_admin_gate(target)['adminApprovalActive'] == 1
+    assert sim.invoke(OWNER, PROC_UPDATE_GATE, 1000, update)['status'] == QUGATE_SUCCESS
+    assert client.get_gate(target)['recipients'][0] == B
+    assert client.get_admin_gate(target)['adminApprovalActive'] == 0     # approval consumed
+    assert sim.invoke(OWNER, PROC_UPDATE_GATE, 1000, update)['status'] == QUGATE_UNAUTHORIZED
+
+
+def test_signed_transactions_run_at_their_tick():
+    sim = simulator(ticks_per_epoch=10)
+    session = sim.session()
+    _, _, public_key = derive_keys(SEED)
+    sim.fund(public_key, 10 ** 6)
+    tx = build_contract_transaction(SEED, PROC_CREATE_GATE, 100000,
+                                    build_create_gate(MODE_SPLIT, [A], [1]), sim.tick + 2)
+    reply = session.request('POST', 'http://sim/live/v1/broadcast-transaction',
+                            json={'encodedTransaction': base64.b64encode(tx).decode()})
+    tx_id = reply.json()['transactionId']
+    bad = session.request('POST', 'http://sim/live/v1/broadcast-transaction',
+                          json={'encodedTransaction': base64.b64encode(tx[:-1] + b'x').decode()})
+    assert bad.status_code == 400
+    client = QuGateClient(session=session, retries=0)
+    assert client.tick_data(sim.tick + 2) is None
+    sim.advance(2)
+    assert client.tick_data(sim.tick)['transactionHashes'] == [tx_id]
+    assert client.get_gates_by_owner(public_key) == [1 << 20]
+    assert sim.balance(public_key) == 10 ** 6 - 100000
+    with pytest.raises(ValueError):
+        sim.submit(tx)                                      # its tick has passed
+    sim.advance(8)
+    assert client.tick_info()['epoch'] == 101
+
+
+def test_defaults_match_the_contract_header():
+    header_constants, _ = parse_header(open(HEADER).read())
+    mirrored = {name: value for name, value in vars(constants).items()
+                if isinstance(value, int) and f'QUGATE_{name}' in header_constants}
+    assert {'MAX_GATES', 'DEFAULT_CREATION_FEE', 'TIME_LOCK_RELATIVE_EPOCHS'} <= set(mirrored)
+    for name, value in mirrored.items():
+        assert header_constants[f'QUGATE_{name}'] == value, name
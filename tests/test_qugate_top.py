@@ -0,0 +1,128 @@
+"""Offline unit tests for the fleet monitor."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    ContractSimulator,
+    FleetView,
+    QuGateClient,
+    build_close_gate,
+    build_create_gate,
+    build_send_to_gate,
+)
+from qugate.__main__ import main  # noqa: E402
+from qugate.constants import (  # noqa: E402
+    EXEC_FORWARDED,
+    MODE_ROUND_ROBIN,
+    MODE_THRESHOLD,
+    PROC_CLOSE_GATE,
+    PROC_CREATE_GATE,
+    PROC_SEND_TO_GATE,
+)
+from qugate.keys import identity_from_public_key  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+OWNER_A = bytes([0xA0]) * 32
+OWNER_B = bytes([0xB0]) * 32
+PAYEE = bytes([0xC0]) * 32
+
+
+class Client(QuGateClient):
+    """QuGateClient on a ContractSimulator that counts getLatestExecution and getGateBatch."""
+
+    def __init__(self, sim):
+        super().__init__(session=sim.session(), retries=0)
+        self.exec_calls = 0
+        self.batches = []
+
+    def get_gate_by_slot(self, slot):
+        raise AssertionError("the monitor should not need getGateBySlot")
+
+    def get_latest_execution(self, gate_id):
+        self.exec_calls += 1
+        return super().get_latest_execution(gate_id)
+
+    def get_gate_batch(self, gate_ids):
+        self.batches.append(len(gate_ids))          # list.append: safe across the pool
+        return super().get_gate_batch(gate_ids)
+
+
+def fleet(n, **kwargs):
+    """*n* gates: THRESHOLD on every third slot, else ROUND_ROBIN; 1000 reserve per slot."""
+    sim = ContractSimulator(epoch=100, idle_fee=1000, idle_window_epochs=4, **kwargs)
+    client = Client(sim)
+    gate_ids = []
+    for slot in range(n):
+        owner = OWNER_A if slot % 2 else OWNER_B
+        sim.fund(owner, 10 ** 9)
+        mode = MODE_THRESHOLD if slot % 3 == 0 else MODE_ROUND_ROBIN
+        fee = client.get_fees()['currentCreationFee']
+        gate_ids.append(sim.invoke(owner, PROC_CREATE_GATE, fee + 1000 * slot,
+                                   build_create_gate(mode, [PAYEE], [1],
+                                                     threshold=10 ** 9))['gateId'])
+    return sim, client, gate_ids
+
+
+def pay(sim, gate_id, amount):
+    sim.fund(PAYEE, amount)
+    sim.invoke(PAYEE, PROC_SEND_TO_GATE, amount, build_send_to_gate(gate_id))
+
+
+def test_deltas_and_incremental_rebuilds():
+    sim, client, gate_ids = fleet(200)
+    view = FleetView(client)
+    assert len(view.update()) == 200
+    assert view.visible(1)[0]['dReceived'] == 0
+    pay(sim, gate_ids[7], 5000)
+    pay(sim, gate_ids[4], 1900)
+    client.batches.clear()
+    assert view.update() == {4, 7}
+    top = view.visible(2)
+    assert [(row['slot'], row['dReceived'], row['dForwarded']) for row in top] == \
+        [(7, 5000, 5000), (4, 1900, 1900)]
+    assert top[0]['outcomeType'] == EXEC_FORWARDED and top[0]['totalReceived'] == 5000
+    assert client.exec_calls == 2                # executions only for the movers
+    assert len(client.batches) == 7              # ceil(200 / 32) getGateBatch calls
+    assert view.update() == {4, 7}               # back to zero throughput
+    assert view.visible(1)[0]['dReceived'] == 0
+    assert view.update() == set()
+    assert client.exec_calls == 2
+
+
+def test_filters_sorts_and_runway():
+    sim, client, gate_ids = fleet(12)
+    view = FleetView(client, sort='reserve', owner=identity_from_public_key(OWNER_A),
+                     modes=['THRESHOLD'])
+    view.update()
+    assert [row['slot'] for row in view.visible()] == [9, 3]
+    # 1.0x multiplier: 1000 per 4-epoch window
+    assert [row['runwayEpochs'] for row in view.visible()] == [36, 12]
+    view.configure(sort='slot', modes=[MODE_ROUND_ROBIN])
+    assert [row['slot'] for row in view.visible()] == [1, 5, 7, 11]
+    sim.invoke(OWNER_A, PROC_CLOSE_GATE, 0, build_close_gate(gate_ids[5]))
+    view.update()
+    assert [row['slot'] for row in view.visible()] == [1, 7, 11]
+    with pytest.raises(ValueError):
+        view.configure(sort='owner')
+
+
+def test_epoch_change_and_render():
+    sim, client, gate_ids = fleet(3, idle_grace_epochs=3)
+    view = FleetView(client, sort='runway')
+    view.update()
+    for _ in range(5):
+        sim.end_epoch()                          # slot 0 has no reserve for the idle charge
+    assert view.update() == {0, 1, 2}
+    text = view.render()
+    assert 'epoch 105' in text and '3 shown' in text
+    assert text.splitlines()[2].split()[-2:] == ['2e', '-']
+    assert view.visible()[0]['slot'] == 0       # no reserve, shortest runway first
+
+
+def test_cli_usage(capsys):
+    assert main([]) == 2
+    assert 'top' in capsys.readouterr().out
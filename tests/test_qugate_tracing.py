@@ -0,0 +1,102 @@
+"""Offline unit tests for per-call tracing."""
+import base64
+import io
+import logging
+import os
+import random
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import QuGateClient, RpcError, TickClock, Tracer  # noqa: E402
+from qugate.tracing import HdrHistogram, function_name  # noqa: E402
+
+pytestmark = pytest.mark.offline
+
+IDENTITY = "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+
+    def request(self, method, url, timeout=None, **kwargs):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeResponse(reply)
+
+
+def test_hdr_quantiles_within_relative_error():
+    rng = random.Random(23)
+    values = [int(rng.lognormvariate(9, 2)) for _ in range(20000)]
+    histogram = HdrHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in (0.5, 0.9, 0.99, 0.999):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(histogram.value_at(q) - exact) <= exact / 64 + 1
+    assert (histogram.min, histogram.max, histogram.count) == (values[0], values[-1], 20000)
+    assert len(histogram.buckets) < 1500
+    merged = HdrHistogram().merge(histogram).merge(histogram)
+    assert merged.count == 40000 and merged.value_at(0.5) == histogram.value_at(0.5)
+    small = HdrHistogram()
+    for value in (3, 1, 2):
+        small.record(value)
+    assert [small.value_at(q) for q in (0.1, 0.5, 1.0)] == [1, 2, 3]
+
+
+def test_spans_hooks_errors_and_slow_log(caplog):
+    seen = []
+    tracer = Tracer(slow=0.5, hooks=[lambda *args: seen.append(args)])
+    with tracer.span('query', 'getGate(5)'):
+        pass
+    with pytest.raises(RpcError):
+        with tracer.span('query', 'getGate(5)'):
+            raise RpcError("down")
+    with caplog.at_level(logging.WARNING, logger='qugate.trace'):
+        tracer.record('wait', 'tick', 2.0)
+    assert 'slow wait tick: 2.000s' in caplog.text
+    assert [(kind, name, type(error)) for kind, name, _, error in seen] == [
+        ('query', 'getGate(5)', type(None)), ('query', 'getGate(5)', RpcError),
+        ('wait', 'tick', type(None))]
+    rows = tracer.breakdown()
+    assert [(row['kind'], row['count'], row['errors']) for row in rows] == \
+        [('wait', 1, 0), ('query', 2, 1)]
+    assert rows[0]['p50'] == pytest.approx(2.0, rel=0.02) and rows[0]['share'] > 0.99
+    out = io.StringIO()
+    tracer.dump(out)
+    assert out.getvalue().splitlines()[-1].startswith('query    getGate(5)')
+    tracer.reset()
+    assert tracer.breakdown() == []
+
+
+def test_client_and_clock_are_traced():
+    tracer = Tracer()
+    session = FakeSession({'responseData': base64.b64encode(bytes(56)).decode()},
+                          {'balance': {'balance': '7'}},
+                          requests.ConnectionError("refused"), {'tick': 9})
+    client = QuGateClient(session=session, tracer=tracer, retries=1, retry_delay=0)
+    client.get_gate_count()
+    assert client.get_balance(IDENTITY) == 7
+    clock = TickClock(client)
+    clock.refresh()
+    assert clock.wait_until(9) is True
+    names = {(row['kind'], row['name']): row['count'] for row in tracer.breakdown()}
+    assert names == {('query', 'getGateCount(6)'): 1, ('balance', 'balances'): 1,
+                     ('wait', 'tick'): 1}
+    assert function_name(25) == 'getGateBySlot(25)' and function_name(99) == 'function(99)'
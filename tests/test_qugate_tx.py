@@ -0,0 +1,139 @@
+"""Offline unit tests for K12, FourQ signing and transaction packets."""
+import os
+import socket
+import struct
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import build_send_to_gate, fourq  # noqa: E402
+from qugate.k12 import k12  # noqa: E402
+from qugate.keys import derive_keys, identity_from_public_key  # noqa: E402
+from qugate.tx import (  # noqa: E402
+    BROADCAST_TRANSACTION,
+    Broadcaster,
+    broadcast_packet,
+    build_contract_transaction,
+    contract_public_key,
+    transaction_hash,
+    verify_transaction,
+)
+
+pytestmark = pytest.mark.offline
+
+ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
+ADDR_A_ID = "SINUBYSBZKBSVEFQDZBQWUEJWRXCXOZNKPHIXDZWRBKXDSPJEHFAMBACXHUN"
+
+
+def ptn(n):
+    return bytes(i % 251 for i in range(n))
+
+
+@pytest.mark.parametrize("message,expected", [
+    (b'', "1AC2D450FC3B4205D19DA7BFCA1B37513C0803577AC7167F06FE2CE1F0EF39E5"),
+    (ptn(17), "6BF75FA2239198DB4772E36478F8E19B0F371205F6A9A93A273F51DF37122888"),
+    (ptn(17 ** 2), "0C315EBCDEDBF61426DE7DCF8FB725D1E74675D7F5327A5067F367B108ECB67C"),
+])
+def test_k12_vectors(message, expected):
+    assert k12(message, 32).hex().upper() == expected
+
+
+def test_base_point_has_order_n():
+    assert fourq.on_curve(fourq.GX, fourq.GY)
+    r = fourq.IDENTITY
+    p, k = fourq.G, fourq.N
+    while k:
+        if k & 1:
+            r = fourq.point_add(r, p)
+        p, k = fourq.point_double(p), k >> 1
+    assert fourq.to_affine(r) == ((0, 0), (1, 0))
+
+
+def test_seed_derives_known_identity():
+    _, private_key, public_key = derive_keys(ADDR_A_KEY)
+    assert identity_from_public_key(public_key) == ADDR_A_ID
+    assert fourq.encode(fourq.point_mul(int.from_bytes(private_key, 'little'), fourq.G)) == public_key
+    assert fourq.encode(fourq.decode(public_key)) == public_key
+
+
+def test_sign_and_verify():
+    subseed, _, public_key = derive_keys(ADDR_A_KEY)
+    digest = k12(b'qugate', 32)
+    signature = fourq.sign(subseed, public_key, digest)
+    assert len(signature) == 64
+    assert fourq.verify(public_key, digest, signature)
+    assert not fourq.verify(public_key, k12(b'other', 32), signature)
+    assert fourq.sign(subseed, public_key, digest) == signature   # deterministic
+
+
+def test_contract_destination():
+    assert identity_from_public_key(contract_public_key(25)) == \
+        "ZAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAZUQI"
+
+
+def test_contract_transaction_layout():
+    data = build_send_to_gate(7)
+    tx = build_contract_transaction(ADDR_A_KEY, 2, 5000, data, tick=123456)
+    assert len(tx) == 80 + len(data) + 64
+    source, dest, amount, tick, input_type, input_size = struct.unpack_from('<32s32sqIHH', tx)
+    assert source == derive_keys(ADDR_A_KEY)[2]
+    assert dest == contract_public_key(25)
+    assert (amount, tick, input_type, input_size) == (5000, 123456, 2, 8)
+    assert tx[80:88] == data
+    assert verify_transaction(tx)
+    tampered = tx[:40] + bytes([tx[40] ^ 1]) + tx[41:]
+    assert not verify_transaction(tampered)
+
+
+def test_transaction_hash_is_lowercase_identity():
+    tx = build_contract_transaction(ADDR_A_KEY, 2, 1000, build_send_to_gate(1), tick=1)
+    tx_hash = transaction_hash(tx)
+    assert len(tx_hash) == 60 and tx_hash.islower()
+
+
+def test_broadcast_packet_header():
+    tx = build_contract_transaction(ADDR_A_KEY, 3, 0, build_send_to_gate(1), tick=1)
+    packet = broadcast_packet(tx)
+    assert int.from_bytes(packet[:3], 'little') == len(packet)
+    assert packet[3] == BROADCAST_TRANSACTION
+    assert packet[4:8] == bytes(4)
+    assert packet[8:] == tx
+
+
+def test_broadcaster_reuses_one_connection():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(4)
+    accepted = []
+    received = bytearray()
+
+    def serve():
+        conn, _ = server.accept()
+        accepted.append(conn)
+        conn.sendall(b'\x08\x00\x00\x00\x00\x00\x00\x00')   # unsolicited packet to drain
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            received.extend(chunk)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    txs = [build_contract_transaction(ADDR_A_KEY, 2, 1000 + i, build_send_to_gate(1), tick=50)
+           for i in range(3)]
+    with Broadcaster('127.0.0.1', server.getsockname()[1]) as broadcaster:
+        hashes = [broadcaster.send(tx) for tx in txs]
+    thread.join(timeout=5)
+    server.close()
+    assert len(accepted) == 1
+    assert bytes(received) == b''.join(broadcast_packet(tx) for tx in txs)
+    assert hashes == [transaction_hash(tx) for tx in txs]
+    assert [h.tick for h in hashes] == [50, 50, 50]
+    assert hashes[0].source == ADDR_A_ID
+
+
+def test_send_contract_call_needs_tick_without_client():
+    with pytest.raises(ValueError):
+        Broadcaster().send_contract_call(ADDR_A_KEY, 2, 1000, build_send_to_gate(1))
@@ -1,23 +1,43 @@
 #!/usr/bin/env python3
 """
 QuGate Testnet Scenario Tests
-Uses qubic-cli for transactions, HTTP RPC for queries.
+Transactions are signed in-process and broadcast by the shared Broadcaster;
+queries go through the pooled QuGateClient over the HTTP RPC.
 """
 import os
 import shutil
-import struct
 import subprocess
-import base64
 import time
-import requests
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    RpcError,
+    TickClock,
+    build_close_gate,
+    build_create_gate,
+    build_send_to_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_NAMES  # noqa: E402
+
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
-ID_TOOL = os.environ.get("QUBIC_ID_TOOL", shutil.which("identity_tool") or "identity_tool")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
+CONTRACT_ID = "ZAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAZUQI"  # contract index 25
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -40,135 +60,62 @@ def cli(*args, timeout=15):
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding after 5 attempts")
+    return CLIENT.get_tick()
+
+def node_call(fn, *args):
+    """Call the node; if it is down (not merely slow), restart it and try once more"""
+    try:
+        return fn(*args)
+    except RpcError:
+        if CLIENT.health():
+            raise
+        print("    Node down, restarting...")
+        restart_node()
+        return fn(*args)
 
 def query_gate_count():
-    for attempt in range(5):
-        try:
-            resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-                'contractIndex': QUGATE_INDEX, 'inputType': 6, 'inputSize': 0, 'requestData': ''
-            }, timeout=5).json()
-            b = base64.b64decode(resp['responseData'])
-            t, a = struct.unpack('<QQ', b[:16])
-            return t, a
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-            else:
-                restart_node()
-                return query_gate_count()
+    count = node_call(CLIENT.get_gate_count)
+    return count['totalGates'], count['activeGates']
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
-    for attempt in range(5):
-        try:
-            resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-                'contractIndex': QUGATE_INDEX, 'inputType': 5, 'inputSize': len(data),
-                'requestData': base64.b64encode(data).decode()
-            }, timeout=5).json()
-            b = base64.b64decode(resp['responseData'])
-            break
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-            else:
-                restart_node()
-                return query_gate(gate_id)
-    else:
-        raise Exception("Failed to query gate")
-    modes = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL']
-    off = 40
-    tr, tf, cb, th, ep = struct.unpack_from('<QQQQQ', b, off)
-    # Get ratios at offset 80 + 8*32 = 336
-    ratios = [struct.unpack_from('<Q', b, 336 + i*8)[0] for i in range(8)]
+    g = node_call(CLIENT.get_gate, gate_id)
     return {
-        'mode': modes[b[0]], 'recipientCount': b[1], 'active': b[2],
-        'owner': b[8:40].hex(), 'totalReceived': tr, 'totalForwarded': tf,
-        'currentBalance': cb, 'threshold': th, 'createdEpoch': ep,
-        'ratios': ratios[:b[1]]
+        'mode': MODE_NAMES[g['mode']], 'recipientCount': g['recipientCount'], 'active': g['active'],
+        'owner': g['owner'].hex(), 'totalReceived': g['totalReceived'],
+        'totalForwarded': g['totalForwarded'], 'currentBalance': g['currentBalance'],
+        'threshold': g['threshold'], 'createdEpoch': g['createdEpoch'],
+        'ratios': g['ratios'][:g['recipientCount']]
     }
 
 def get_pubkey_from_identity(identity):
-    """Reverse Qubic base26 identity (first 56 chars) to 32-byte pubkey"""
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
-
-def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    """Build createGate_input with proper alignment"""
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)  # padding for id alignment
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
-
-def build_send_to_gate(gate_id):
-    return struct.pack('<Q', gate_id)
-
-def build_close_gate(gate_id):
-    return struct.pack('<Q', gate_id)
+    return public_key_from_identity(identity)
 
 def send_contract_tx(key, input_type, amount, input_data):
-    """Send a transaction to the QuGate contract using qubic-cli"""
-    hex_data = input_data.hex()
-    out = cli("-seed", key, "-sendcustomtransaction",
-              CONTRACT_ID, str(input_type), str(amount),
-              str(len(input_data)), hex_data)
-    return out
+    return TRACKER.track(BROADCASTER.send_contract_call(key, input_type, amount, input_data))
 
 def wait_ticks(n=15):
     """Wait for n ticks to pass, with node crash recovery"""
-    try:
-        start = get_tick()
-    except Exception:
-        print("    Node down, restarting...")
-        restart_node()
-        start = get_tick()
+    if TRACKER.pending:
+        missed = TRACKER.settle(timeout=360)
+        for tx in missed:
+            print(f"    ⚠ tx {tx[:12]}... for tick {tx.tick}: {TRACKER.status(tx)}")
+        print(f"    ✓ Settled at tick {CLOCK.tick}")
+        return not missed
+    start = node_call(CLOCK.current)
     target = start + n
     print(f"    Waiting for tick {target} (current: {start})...")
-    for _ in range(90):
-        time.sleep(4)
-        try:
-            cur = get_tick()
-            if cur >= target:
-                print(f"    ✓ Reached tick {cur}")
-                return True
-        except Exception:
+    deadline = time.monotonic() + 360
+    while time.monotonic() < deadline:
+        if CLOCK.wait_until(target, timeout=20):
+            print(f"    ✓ Reached tick {CLOCK.tick}")
+            return True
+        if not CLIENT.health():
             print("    Node crashed, restarting...")
             restart_node()
     print("    ⚠ Timeout waiting for ticks")
@@ -176,6 +123,7 @@ def wait_ticks(n=15):
 
 def restart_node():
     """Restart the Qubic node"""
+    CLIENT.cache.invalidate()     # state resets; tick numbers may repeat
     subprocess.run(["pkill", "-9", "Qubic"], capture_output=True)
     time.sleep(2)
     subprocess.Popen(
@@ -187,14 +135,13 @@ def restart_node():
     # Wait for ready
     for i in range(60):
         time.sleep(3)
-        try:
-            t = requests.get(f"{RPC}/live/v1/tick-info", timeout=2).json().get('tick', 0)
+        if CLIENT.health():
+            CLIENT.breaker.reset()
+            t = CLIENT.get_tick()
             if t > 43910000:
                 print(f"    Node restarted at tick {t}")
                 return
-        except Exception:
-            pass
-    raise Exception("Failed to restart node")
+    raise RpcError("Failed to restart node")
 
 def print_balances():
     for name, key in [("Address A", ADDR_A_KEY), ("Address B", ADDR_B_KEY), ("Address C", ADDR_C_KEY)]:
@@ -247,7 +194,7 @@ input_data = build_create_gate(mode=0, recipients_pk=[PK_B, PK_C], ratios=[60, 4
 print(f"  Input size: {len(input_data)} bytes")
 print("  Sending createGate tx (1000 QU fee)...")
 out = send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, input_data)
-print(f"  CLI: {out.strip()}")
+print(f"  Tx: {out} (tick {out.tick})")
 
 wait_ticks(15)
 
@@ -271,27 +218,25 @@ print("\n" + "="*50)
 print(f"SCENARIO 2: Send 10,000 QU through gate #{SPLIT_GATE_ID}")
 print("="*50)
 
-bal_before_1 = get_balance(ADDR_B)
-bal_before_2 = get_balance(ADDR_C)
-print(f"  Address B before: {bal_before_1:,} QU")
-print(f"  Address C before: {bal_before_2:,} QU")
+before = BALANCES.snapshot([ADDR_B, ADDR_C])
+print(f"  Address B before: {before[ADDR_B]:,} QU")
+print(f"  Address C before: {before[ADDR_C]:,} QU")
 
 input_data = build_send_to_gate(SPLIT_GATE_ID)
 print(f"  Sending 10,000 QU to gate #{SPLIT_GATE_ID}...")
 out = send_contract_tx(ADDR_A_KEY, PROC_SEND_TO_GATE, 10000, input_data)
-print(f"  CLI: {out.strip()}")
+print(f"  Tx: {out} (tick {out.tick})")
 
 wait_ticks(15)
 
 gate = query_gate(SPLIT_GATE_ID)
 print(f"\n  Gate #{SPLIT_GATE_ID}: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}, balance={gate['currentBalance']}")
 
-bal_after_1 = get_balance(ADDR_B)
-bal_after_2 = get_balance(ADDR_C)
-gain1 = bal_after_1 - bal_before_1
-gain2 = bal_after_2 - bal_before_2
-print(f"  Address B after: {bal_after_1:,} QU (gained {gain1})")
-print(f"  Address C after: {bal_after_2:,} QU (gained {gain2})")
+after = BALANCES.snapshot([ADDR_B, ADDR_C])
+gains = BALANCES.diff(before, after)
+gain1, gain2 = gains[ADDR_B], gains[ADDR_C]
+print(f"  Address B after: {after[ADDR_B]:,} QU (gained {gain1})")
+print(f"  Address C after: {after[ADDR_C]:,} QU (gained {gain2})")
 
 if gain1 == 6000 and gain2 == 4000:
     print("  ✅ Perfect 60/40 split!")
@@ -307,23 +252,20 @@ print("\n" + "="*50)
 print("SCENARIO 3: Send 50,000 QU through same gate")
 print("="*50)
 
-bal_before_1 = get_balance(ADDR_B)
-bal_before_2 = get_balance(ADDR_C)
+before = BALANCES.snapshot([ADDR_B, ADDR_C])
 
 input_data = build_send_to_gate(SPLIT_GATE_ID)
 print("  Sending 50,000 QU...")
 out = send_contract_tx(ADDR_A_KEY, PROC_SEND_TO_GATE, 50000, input_data)
-print(f"  CLI: {out.strip()}")
+print(f"  Tx: {out} (tick {out.tick})")
 
 wait_ticks(15)
 
 gate = query_gate(SPLIT_GATE_ID)
 print(f"\n  Gate: received={gate['totalReceived']}, forwarded={gate['totalForwarded']}")
 
-bal_after_1 = get_balance(ADDR_B)
-bal_after_2 = get_balance(ADDR_C)
-gain1 = bal_after_1 - bal_before_1
-gain2 = bal_after_2 - bal_before_2
+gains = BALANCES.diff(before, BALANCES.snapshot([ADDR_B, ADDR_C]))
+gain1, gain2 = gains[ADDR_B], gains[ADDR_C]
 print(f"  Address B gained: {gain1} (expected 30000)")
 print(f"  Address C gained: {gain2} (expected 20000)")
 
@@ -342,7 +284,7 @@ print("="*50)
 input_data = build_close_gate(SPLIT_GATE_ID)
 print("  Sending closeGate tx...")
 out = send_contract_tx(ADDR_A_KEY, PROC_CLOSE_GATE, 0, input_data)
-print(f"  CLI: {out.strip()}")
+print(f"  Tx: {out} (tick {out.tick})")
 
 wait_ticks(15)
 
@@ -365,5 +307,9 @@ print("="*50)
 total, active = query_gate_count()
 print(f"  Gates: total={total}, active={active}")
 print_balances()
+for path, m in CLIENT.metrics.snapshot().items():
+    if m['retries'] or m['failures'] or m['rejected']:
+        print(f"  RPC {path}: {m['requests']} calls, {m['retries']} retries, "
+              f"{m['failures']} failures, {m['rejected']} fast-failed, p95={m['p95'] or 0:.3f}s")
 
 print("\n🏁 All scenarios complete!")
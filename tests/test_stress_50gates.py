@@ -16,17 +16,36 @@ import os
 import shutil
 import struct
 import subprocess
-import base64
-import time
-import requests
 import sys
 import random
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    GateIdPredictor,
+    InclusionTracker,
+    QuGateClient,
+    QueryCache,
+    RpcError,
+    TickClock,
+    TxScheduler,
+    build_create_gate,
+    identity_from_seed,
+    public_key_from_identity,
+)
+
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
 NODE_ARGS = ["-nodeip", "127.0.0.1", "-nodeport", "31841"]
 RPC = "http://127.0.0.1:41841"
 QUGATE_INDEX = 25  # Pulse took index 24
-CONTRACT_ID = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, QUGATE_INDEX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
+TRACKER = InclusionTracker(CLIENT, CLOCK)
+PREDICTOR = GateIdPredictor.from_client(CLIENT)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -44,112 +63,50 @@ MODE_CONDITIONAL = 4
 
 MODE_NAMES = ['SPLIT', 'ROUND_ROBIN', 'THRESHOLD', 'RANDOM', 'CONDITIONAL']
 
-# Versioned gate ID encoding
-GATE_ID_SLOT_BITS = 20
-
-def encode_gate_id(slot_idx, generation=0):
-    return ((generation + 1) << GATE_ID_SLOT_BITS) | slot_idx
-
 def cli(*args, timeout=15):
     r = subprocess.run([CLI] + NODE_ARGS + list(args), capture_output=True, text=True, timeout=timeout)
     return r.stdout + r.stderr
 
 def get_identity(key):
-    out = cli("-seed", key, "-showkeys")
-    for line in out.splitlines():
-        if "Identity:" in line:
-            return line.split("Identity:")[1].strip()
+    return identity_from_seed(key)
 
 def get_balance(identity):
-    out = cli("-getbalance", identity)
-    for line in out.splitlines():
-        if "Balance:" in line:
-            return int(line.split("Balance:")[1].strip())
-    return None
+    return BALANCES.get(identity)
 
 def get_tick():
-    for attempt in range(5):
-        try:
-            return requests.get(f"{RPC}/live/v1/tick-info", timeout=5).json()['tick']
-        except Exception:
-            if attempt < 4:
-                time.sleep(3)
-    raise Exception("Node not responding")
+    return CLIENT.get_tick()
 
 def query_gate_count():
-    resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-        'contractIndex': QUGATE_INDEX, 'inputType': 6, 'inputSize': 0, 'requestData': ''
-    }, timeout=5).json()
-    b = base64.b64decode(resp['responseData'])
-    t, a = struct.unpack('<QQ', b[:16])
-    return t, a
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates']
 
 def query_gate(gate_id):
-    data = struct.pack('<Q', gate_id)
     try:
-        resp = requests.post(f"{RPC}/live/v1/querySmartContract", json={
-            'contractIndex': QUGATE_INDEX, 'inputType': 5, 'inputSize': len(data),
-            'requestData': base64.b64encode(data).decode()
-        }, timeout=5).json()
-        b = base64.b64decode(resp['responseData'])
-        off = 40
-        tr, tf, cb, th, ep = struct.unpack_from('<QQQQQ', b, off)
-        return {
-            'mode': b[0], 'recipientCount': b[1], 'active': b[2],
-            'totalReceived': tr, 'totalForwarded': tf,
-            'currentBalance': cb, 'threshold': th
-        }
-    except Exception:
+        g = CLIENT.get_gate(gate_id)
+    except RpcError:
         return None
+    return {
+        'mode': g['mode'], 'recipientCount': g['recipientCount'], 'active': g['active'],
+        'totalReceived': g['totalReceived'], 'totalForwarded': g['totalForwarded'],
+        'currentBalance': g['currentBalance'], 'threshold': g['threshold']
+    }
 
 def get_pubkey_from_identity(identity):
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
-
-def build_create_gate(mode, recipients_pk, ratios, threshold=0, allowed_senders=None):
-    data = bytearray()
-    data += struct.pack('<B', mode)
-    data += struct.pack('<B', len(recipients_pk))
-    data += bytes(6)
-    for i in range(8):
-        data += recipients_pk[i] if i < len(recipients_pk) else bytes(32)
-    for i in range(8):
-        data += struct.pack('<Q', ratios[i] if i < len(ratios) else 0)
-    data += struct.pack('<Q', threshold)
-    for i in range(8):
-        if allowed_senders and i < len(allowed_senders):
-            data += allowed_senders[i]
-        else:
-            data += bytes(32)
-    data += struct.pack('<B', len(allowed_senders) if allowed_senders else 0)
-    return bytes(data)
-
-def send_contract_tx(key, input_type, amount, input_data):
-    hex_data = input_data.hex()
-    return cli("-seed", key, "-sendcustomtransaction",
-               CONTRACT_ID, str(input_type), str(amount),
-               str(len(input_data)), hex_data)
+    return public_key_from_identity(identity)
 
 def wait_ticks(n=15):
-    start = get_tick()
-    target = start + n
+    if TRACKER.pending:
+        sys.stdout.write(f"    Settling {len(TRACKER.pending)} txs...")
+        sys.stdout.flush()
+        missed = TRACKER.settle(timeout=720)
+        print(f" ⚠ {len(missed)} not included" if missed else f" ✓ ({CLOCK.tick})")
+        return not missed
+    target = CLOCK.current() + n
     sys.stdout.write(f"    Waiting for tick {target}...")
     sys.stdout.flush()
-    for _ in range(180):
-        time.sleep(4)
-        try:
-            cur = get_tick()
-            if cur >= target:
-                print(f" ✓ ({cur})")
-                return True
-        except Exception:
-            time.sleep(5)
+    if CLOCK.wait_until(target, timeout=720):
+        print(f" ✓ ({CLOCK.tick})")
+        return True
     print(" ⚠ TIMEOUT")
     return False
 
@@ -222,80 +179,75 @@ assert len(gate_configs) == 50, f"Expected 50 configs, got {len(gate_configs)}"
 
 # ============================================================
 print(f"\n{'='*60}")
-print(f"PHASE 1: Create 50 gates (batched, {len(gate_configs)} configs)")
+print(f"PHASE 1: Create 50 gates (pipelined, {len(gate_configs)} configs)")
 print(f"{'='*60}")
 
 gate_ids = []
-created = 0
-failed_creates = 0
-
-# Send all create transactions, waiting between batches
-BATCH_SIZE = 5
-for batch_start in range(0, len(gate_configs), BATCH_SIZE):
-    batch_end = min(batch_start + BATCH_SIZE, len(gate_configs))
-    batch = gate_configs[batch_start:batch_end]
-    
-    print(f"\n  Batch {batch_start//BATCH_SIZE + 1}: Gates {batch_start+1}-{batch_end}")
-    
-    for i, (name, mode, pks, ratios, thresh, senders) in enumerate(batch):
-        idx = batch_start + i + 1
-        create_data = build_create_gate(mode, pks, ratios, thresh, senders)
-        out = send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
-        if "sent" in out.lower():
-            sys.stdout.write(f"    #{idx} {name} ")
-            sys.stdout.flush()
-        else:
-            print(f"    #{idx} {name} — SEND FAILED")
-            failed_creates += 1
-    
-    # Wait for batch to process
-    wait_ticks(15)
-    
-    # Check what was created
-    total_now, active_now = query_gate_count()
-    batch_created = total_now - total_start - created
-    created = total_now - total_start
-    print(f"    Batch result: {batch_created} gates created (total: {created}, active: {active_now})")
-
-# Record gate IDs
-for i in range(created):
-    gate_ids.append(encode_gate_id(total_start + i))
-
-print(f"\n  ✅ Created {created}/50 gates ({failed_creates} send failures)")
+send_amount = 1000  # Small amounts to avoid running out
+
+# One pipeline: every create is signed, packed into the next target tick(s)
+# and broadcast in one pass, then settled together. per_source=None lets
+# ADDR_A fill a tick: no call in a phase depends on another's order. The
+# predictor knows the ID each create will get, so when the free-list order is
+# known the phase-2 sends ride in the same pipeline, one tick behind their
+# creates.
+scheduler = TxScheduler(BROADCASTER, CLOCK, TRACKER, per_source=None)
+predicted = []
+candidates = []
+exact = True
+creates = []
+for name, mode, pks, ratios, thresh, senders in gate_configs:
+    exact = exact and PREDICTOR.certain
+    candidates.extend(PREDICTOR.candidates())
+    predicted.append(PREDICTOR.allocate())
+    create_data = build_create_gate(mode, pks, ratios, thresh, senders)
+    creates.append(scheduler.add(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data))
+sends = []
+if exact:
+    for gid, create in zip(predicted, creates):
+        sends.append(scheduler.add(ADDR_A_KEY, PROC_SEND_TO_GATE, send_amount,
+                                   struct.pack('<Q', gid), after=create))
+scheduler.run()
+handles = [op.handle for op in creates]
+print(f"\n  Broadcast {len(handles)} creates for ticks {handles[0].tick}-{handles[-1].tick}"
+      + (f" + {len(sends)} sends behind them" if sends else ""))
+missed = set(TRACKER.settle(timeout=720))
+failed_creates = sum(1 for handle in handles if handle in missed)
+for idx, (handle, (name, *_)) in enumerate(zip(handles, gate_configs), 1):
+    if handle in missed:
+        print(f"    #{idx} {name} — {TRACKER.status(handle).upper()}")
+
+total_now, active_now = query_gate_count()
+# Predicted IDs, or every ID the creates could have taken if the order was unknown
+landed = CLIENT.get_gates(predicted if exact else dict.fromkeys(candidates))
+gate_ids = [gid for gid, g in landed.items() if g and g['active']]
+created = len(gate_ids)
+print(f"  Result: {created} gates created (active: {active_now}, IDs "
+      f"{'predicted' if exact else 'read back'})")
+
+print(f"\n  ✅ Created {created}/50 gates ({failed_creates} not included)")
 
 # ============================================================
 print(f"\n{'='*60}")
 print("PHASE 2: Send transactions through all active gates")
 print(f"{'='*60}")
 
-send_amount = 1000  # Small amounts to avoid running out
-sends_attempted = 0
-sends_ok = 0
-
-for batch_start in range(0, len(gate_ids), BATCH_SIZE):
-    batch_end = min(batch_start + BATCH_SIZE, len(gate_ids))
-    batch_ids = gate_ids[batch_start:batch_end]
-    
-    print(f"\n  Batch: Gates {batch_ids[0]}-{batch_ids[-1]}")
-    
-    for gid in batch_ids:
-        send_data = struct.pack('<Q', gid)
-        out = send_contract_tx(ADDR_A_KEY, PROC_SEND_TO_GATE, send_amount, send_data)
-        sends_attempted += 1
-        if "sent" in out.lower():
-            sends_ok += 1
-    
-    wait_ticks(15)
+if sends:
+    sends_attempted = len(sends)
+    sends_ok = sum(1 for op in sends if op.handle not in missed)
+else:
+    scheduler = TxScheduler(BROADCASTER, CLOCK, TRACKER, per_source=None)
+    for gid in gate_ids:
+        scheduler.add(ADDR_A_KEY, PROC_SEND_TO_GATE, send_amount, struct.pack('<Q', gid))
+    sends_attempted = len(scheduler.run())
+    sends_ok = sends_attempted - len(TRACKER.settle(timeout=720))
 
 print(f"\n  Sent {sends_ok}/{sends_attempted} transactions ({send_amount} QU each)")
 
 # Verify some gates received funds
 sample_gates = random.sample(gate_ids, min(10, len(gate_ids)))
-gates_with_activity = 0
-for gid in sample_gates:
-    g = query_gate(gid)
-    if g and g['totalReceived'] > 0:
-        gates_with_activity += 1
+sampled = CLIENT.get_gates(sample_gates)   # one getGateBatch call
+gates_with_activity = sum(1 for g in sampled.values() if g and g['totalReceived'] > 0)
 
 print(f"  Sample check: {gates_with_activity}/{len(sample_gates)} sampled gates have received funds")
 
@@ -304,24 +256,20 @@ print(f"\n{'='*60}")
 print("PHASE 3: Close all 50 gates")
 print(f"{'='*60}")
 
-closed = 0
-for batch_start in range(0, len(gate_ids), BATCH_SIZE):
-    batch_end = min(batch_start + BATCH_SIZE, len(gate_ids))
-    batch_ids = gate_ids[batch_start:batch_end]
-    
-    for gid in batch_ids:
-        close_data = struct.pack('<Q', gid)
-        send_contract_tx(ADDR_A_KEY, PROC_CLOSE_GATE, 0, close_data)
-    
-    wait_ticks(15)
-    closed += len(batch_ids)
-    sys.stdout.write(f"  Closed {closed}/{len(gate_ids)}...")
-    
-    total_now, active_now = query_gate_count()
-    print(f" (active: {active_now})")
+scheduler = TxScheduler(BROADCASTER, CLOCK, TRACKER, per_source=None)
+for gid in gate_ids:
+    scheduler.add(ADDR_A_KEY, PROC_CLOSE_GATE, 0, struct.pack('<Q', gid))
+scheduler.run()
+wait_ticks()
+
+still_open = [gid for gid, g in CLIENT.get_gates(gate_ids).items() if g and g['active']]
+closed = len(gate_ids) - len(still_open)
+print(f"  Closed {closed}/{len(gate_ids)}, still active after close: {len(still_open)}")
 
 total_end, active_end = query_gate_count()
 print(f"\n  Final: total={total_end}, active={active_end}")
+# Closes that share a tick land in no guaranteed order: re-read the free-list
+PREDICTOR = GateIdPredictor.from_client(CLIENT)
 
 # ============================================================
 print(f"\n{'='*60}")
@@ -329,11 +277,15 @@ print("PHASE 4: Verify slot reuse — create 5 new gates")
 print(f"{'='*60}")
 
 total_before_reuse = total_end
+scheduler = TxScheduler(BROADCASTER, CLOCK, TRACKER, per_source=None)
+candidates = []
 for i in range(5):
+    candidates.extend(PREDICTOR.candidates())
+    PREDICTOR.allocate()
     create_data = build_create_gate(MODE_SPLIT, [PK_B, PK_C], [50, 50])
-    send_contract_tx(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
-
-wait_ticks(15)
+    scheduler.add(ADDR_A_KEY, PROC_CREATE_GATE, 1000, create_data)
+scheduler.run()
+wait_ticks()
 total_after_reuse, active_after_reuse = query_gate_count()
 reused = 5 - (total_after_reuse - total_before_reuse)
 print(f"  Before: total={total_before_reuse}, After: total={total_after_reuse}")
@@ -343,9 +295,15 @@ if reused > 0:
 else:
     print("  ⚠ No slots reused (free-list may not be working)")
 
-# Note: reuse gates are not cleaned up here — reused slots have incremented
-# generations whose exact IDs can't be trivially predicted from counts alone.
-# They will auto-expire after QUGATE_DEFAULT_EXPIRY_EPOCHS.
+# Clean up: the reuse gates sit on slots the predictor named, at their new generations
+reuse_ids = [gid for gid, g in CLIENT.get_gates(dict.fromkeys(candidates)).items()
+             if g and g['active']]
+scheduler = TxScheduler(BROADCASTER, CLOCK, TRACKER, per_source=None)
+for gid in reuse_ids:
+    scheduler.add(ADDR_A_KEY, PROC_CLOSE_GATE, 0, struct.pack('<Q', gid))
+scheduler.run()
+wait_ticks()
+print(f"  Closed {len(reuse_ids)} reuse gates")
 
 # ============================================================
 print(f"\n{'='*60}")
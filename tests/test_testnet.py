@@ -2,21 +2,33 @@
 """QuGate testnet verification"""
 import os
 import shutil
-import subprocess
-import requests
-import time
-import base64
 import struct
+import sys
 import pytest
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from qugate import (  # noqa: E402
+    BalanceService,
+    Broadcaster,
+    QuGateClient,
+    QueryCache,
+    TickClock,
+    build_create_gate,
+    public_key_from_identity,
+)
+from qugate.constants import MODE_SPLIT  # noqa: E402
+
 LIVE_NODE = os.environ.get("QUBIC_NODE")
 pytestmark = pytest.mark.skipif(not LIVE_NODE, reason="Requires live Qubic node (set QUBIC_NODE env var)")
 
 CLI = os.environ.get("QUBIC_CLI", shutil.which("qubic-cli") or "qubic-cli")
-ID_TOOL = os.environ.get("QUBIC_ID_TOOL", shutil.which("identity_tool") or "identity_tool")
 RPC = "http://localhost:41841"
 CONTRACT_IDX = 25  # Pulse took index 24
-CONTRACT = "YAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAMSME"
+CLIENT = QuGateClient(RPC, CONTRACT_IDX)
+BROADCASTER = Broadcaster(client=CLIENT)
+BALANCES = BalanceService(CLIENT)
+CLOCK = TickClock(CLIENT)
+CLIENT.cache = QueryCache(CLOCK)
 
 ADDR_A_KEY = "eraaastggldisjhoojaekgyimrsddjxbvgaawswfvnvaygqmusnkevv"
 ADDR_B_KEY = "sgwnpzidgxbclnisgehigeculaejjxedzdkjyyfrzgzvuojrhdzywfh"
@@ -26,33 +38,24 @@ ADDR_B_KEY_ID = "KENGZYMYWOIHSCXMGBIXBGTKZYCCDITKSNBNILSLUFPQPRCUUYENPYUCEXRM"
 ADDR_C_KEY_ID = "FLNRYKSGLGKZQECRCBNCYAWLNHVCWNYAZSISJRAPUANHDGWAIFBYLIADPQLE"
 
 def get_tick():
-    return requests.get(f"{RPC}/live/v1/tick-info").json()["tick"]
+    return CLIENT.get_tick()
 
 def get_balance(addr):
-    return int(requests.get(f"{RPC}/live/v1/balances/{addr}").json()["balance"]["balance"])
+    return BALANCES.get(addr)
 
 def wait_ticks(n=20):
-    target = get_tick() + n
-    while get_tick() < target:
-        time.sleep(3)
+    CLOCK.wait_ticks(n)
 
-def query_sc(input_type, input_size=0, request_data=""):
-    r = requests.post(f"{RPC}/live/v1/querySmartContract",
-        json={"contractIndex": CONTRACT_IDX, "inputType": input_type,
-              "inputSize": input_size, "requestData": request_data})
-    return base64.b64decode(r.json().get("responseData", ""))
+def query_sc(input_type, request_data=b""):
+    return CLIENT.query(input_type, request_data)
 
 def get_gate_count():
-    data = query_sc(6)
-    if len(data) >= 24:
-        return struct.unpack_from("<QQQ", data)
-    return (0, 0, 0)
+    count = CLIENT.get_gate_count()
+    return count['totalGates'], count['activeGates'], count['totalBurned']
 
 def get_fees():
-    data = query_sc(9)
-    if len(data) >= 32:
-        return struct.unpack_from("<QQQQ", data)
-    return None
+    fees = CLIENT.get_fees()
+    return fees['creationFee'], fees['currentCreationFee'], fees['feeBurnBps'], fees['idleFee']
 
 def build_gate_id_hex(gate_id):
     return struct.pack("<Q", gate_id).hex()
@@ -65,62 +68,7 @@ def encode_gate_id(slot_idx, generation=0):
 
 def send_custom_tx(key, amount, target_tick, input_type, hex_data):
     data_bytes = bytes.fromhex(hex_data) if hex_data else b""
-    cmd = [CLI, "-nodeip", "127.0.0.1", "-nodeport", "31841",
-           "-seed", key, "-sendcustomtransaction",
-           CONTRACT, str(input_type), str(amount), str(len(data_bytes)), hex_data]
-    r = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    return r.stdout.strip() + " " + r.stderr.strip()
-
-def get_pubkey_bytes(key):
-    r = subprocess.run([CLI, "-seed", key, "-showkeys"],
-                      capture_output=True, text=True, timeout=10)
-    for line in r.stdout.split("\n"):
-        if line.startswith("Public key:"):
-            # It's a lowercase identity, need to convert to bytes
-            identity = line.split(":")[1].strip()
-            return identity_to_bytes(identity)
-    return None
-
-def identity_to_bytes(identity):
-    """Convert Qubic identity (60 lowercase chars) to 32 bytes"""
-    identity = identity.upper()
-    v = 0
-    for i in range(len(identity)):
-        c = identity[i]
-        if c >= 'A' and c <= 'Z':
-            v += (ord(c) - ord('A')) * (26 ** (len(identity) - 1 - i))
-    # Actually this is wrong — Qubic uses a specific encoding
-    # Let's use the identity_tool binary if available
-    r = subprocess.run([ID_TOOL, identity],
-                      capture_output=True, text=True, timeout=10)
-    if r.returncode == 0:
-        # Parse hex output
-        hex_str = r.stdout.strip()
-        if len(hex_str) == 64:
-            return bytes.fromhex(hex_str)
-    # Fallback: try using the qubic-cli getPublicKeyFromIdentity if available
-    return None
-
-def key_to_pubkey_bytes(key):
-    """Get pubkey bytes by using identity_tool with the key"""
-    r = subprocess.run([ID_TOOL, key],
-                      capture_output=True, text=True, timeout=10)
-    out = r.stdout.strip()
-    # identity_tool outputs: Identity: XXX\nPublic key (hex): YYY
-    for line in out.split("\n"):
-        if "hex" in line.lower() or len(line.strip()) == 64:
-            hex_str = line.split(":")[-1].strip() if ":" in line else line.strip()
-            if len(hex_str) == 64:
-                try:
-                    return bytes.fromhex(hex_str)
-                except ValueError:
-                    pass
-    # Last resort — construct from showkeys
-    r2 = subprocess.run([CLI, "-seed", key, "-showkeys"],
-                       capture_output=True, text=True, timeout=10)
-    print(f"  [debug] showkeys output: {r2.stdout[:200]}")
-    print(f"  [debug] identity_tool output: {out[:200]}")
-    return None
+    return BROADCASTER.send_contract_call(key, input_type, amount, data_bytes, tick=target_tick)
 
 print("=" * 60)
 print("QuGate V3 Testnet Verification")
@@ -130,16 +78,7 @@ print("=" * 60)
 print("\nResolving public keys...")
 
 def decode_identity(identity):
-    """Decode Qubic identity (60 chars A-Z) to 32-byte public key"""
-    identity = identity.upper()
-    pk = bytearray(32)
-    for i in range(4):
-        val = 0
-        for j in range(13, -1, -1):
-            c = identity[i * 14 + j]
-            val = val * 26 + (ord(c) - ord('A'))
-        struct.pack_into('<Q', pk, i * 8, val)
-    return bytes(pk)
+    return public_key_from_identity(identity)
 
 pk1 = decode_identity(ADDR_B_KEY_ID)
 pk2 = decode_identity(ADDR_C_KEY_ID)
@@ -169,22 +108,7 @@ else:
 
 # Test 2: Create SPLIT gate (60/40 to Address B/Address C)
 print("\n--- Test 2: Create SPLIT Gate ---")
-# Build createGate_input — 600 bytes with proper alignment
-# Layout: mode(1) + recipientCount(1) + 6 padding + recipients(256) + ratios(64) + threshold(8) + allowedSenders(256) + allowedSenderCount(1) + 7 trailing padding
-data = bytearray(600)
-data[0] = 0   # mode = SPLIT
-data[1] = 2   # recipientCount = 2
-# offset 8: recipients (8 * 32 bytes)
-struct.pack_into("32s", data, 8, pk1)
-struct.pack_into("32s", data, 8 + 32, pk2)
-# offset 264: ratios (8 * uint64)
-struct.pack_into("<Q", data, 264, 60)
-struct.pack_into("<Q", data, 272, 40)
-# offset 328: threshold
-struct.pack_into("<Q", data, 328, 0)
-# offset 336: allowedSenders (8 * 32 bytes) — all zeros
-# offset 592: allowedSenderCount
-data[592] = 0
+data = build_create_gate(MODE_SPLIT, [pk1, pk2], [60, 40])
 
 tick = get_tick()
 target = tick + 5